@@ -0,0 +1,701 @@
+# Licensed under the Apache License: http://www.apache.org/licenses/LICENSE-2.0
+# For details: https://github.com/coveragepy/coveragepy/blob/main/NOTICE.txt
+
+"""Raw data collector for coverage.py."""
+
+from __future__ import annotations
+
+import contextlib
+import functools
+import os
+import sys
+from collections.abc import Mapping
+from types import FrameType
+from typing import Any, Callable, TypeVar, cast
+
+from coverage import env
+from coverage.core import Core
+from coverage.data import CoverageData
+from coverage.debug import short_stack
+from coverage.exceptions import ConfigError
+from coverage.misc import human_sorted_items, isolate_module
+from coverage.numbits import numbits_union, nums_to_numbits
+from coverage.plugin import CoveragePlugin
+from coverage.types import (
+    TCheckIncludeFn,
+    TFileDisposition,
+    Tracer,
+    TShouldStartContextFn,
+    TShouldTraceFn,
+    TTraceData,
+    TTraceFn,
+    TWarnFn,
+)
+
+os = isolate_module(os)
+
+
+T = TypeVar("T")
+
+
+class Collector:
+    """Collects trace data.
+
+    Creates a Tracer object for each thread, since they track stack
+    information.  Each Tracer points to the same shared data, contributing
+    traced data points.  If the core uses sharded data, each Tracer has its
+    own data instead, and they are merged when the data is flushed.
+
+    When the Collector is started, it creates a Tracer for the current thread,
+    and installs a function to create Tracers for each new thread started.
+    When the Collector is stopped, all active Tracers are stopped.
+
+    Threads started while the Collector is stopped will never have Tracers
+    associated with them.
+
+    """
+
+    # The stack of active Collectors.  Collectors are added here when started,
+    # and popped when stopped.  Collectors on the stack are paused when not
+    # the top, and resumed when they become the top again.
+    _collectors: list[Collector] = []
+
+    def __init__(
+        self,
+        core: Core,
+        should_trace: TShouldTraceFn,
+        check_include: TCheckIncludeFn,
+        should_start_context: TShouldStartContextFn | None,
+        file_mapper: Callable[[str], str],
+        branch: bool,
+        warn: TWarnFn,
+        concurrency: list[str],
+        dynamic_context_buffer: int = 0,
+        flush_interval: float = 0.0,
+    ) -> None:
+        """Create a collector.
+
+        `should_trace` is a function, taking a file name and a frame, and
+        returning a `coverage.FileDisposition object`.
+
+        `check_include` is a function taking a file name and a frame. It returns
+        a boolean: True if the file should be traced, False if not.
+
+        `should_start_context` is a function taking a frame, and returning a
+        string. If the frame should be the start of a new context, the string
+        is the new context. If the frame should not be the start of a new
+        context, return None.
+
+        `file_mapper` is a function taking a filename, and returning a Unicode
+        filename.  The result is the name that will be recorded in the data
+        file.
+
+        If `branch` is true, then branches will be measured.  This involves
+        collecting data on which statements followed each other (arcs).  Use
+        `get_arc_data` to get the arc data.
+
+        `warn` is a warning function, taking a single string message argument
+        and an optional slug argument which will be a string or None, to be
+        used if a warning needs to be issued.
+
+        `concurrency` is a list of strings indicating the concurrency libraries
+        in use.  Valid values are "greenlet", "eventlet", "gevent", or "thread"
+        (the default).  "thread" can be combined with one of the other three.
+        Other values are ignored.
+
+        `dynamic_context_buffer` is how many measured lines or arcs to keep in
+        memory when switching dynamic contexts.  Data for a number of contexts
+        is written to the CoverageData at once when there's more than that,
+        when `flush_data` is called, or when stopping.  If zero, data is
+        written at every switch.
+
+        `flush_interval` is how many seconds to wait between writes of the data
+        to the CoverageData by a background thread.  If zero, data is only
+        written when `flush_data` is called.
+
+        """
+        self.core = core
+        self.should_trace = should_trace
+        self.check_include = check_include
+        self.should_start_context = should_start_context
+        self.file_mapper = file_mapper
+        self.branch = branch
+        self.warn = warn
+        self.dynamic_context_buffer = dynamic_context_buffer
+        self.flush_interval = flush_interval
+        assert isinstance(concurrency, list), f"Expected a list: {concurrency!r}"
+
+        self.pid = os.getpid()
+
+        self.covdata: CoverageData
+        self.threading = None
+        self.static_context: str | None = None
+        self.current_context: str | None = None
+
+        self.origin = short_stack()
+
+        self.concur_id_func = None
+
+        do_threading = False
+
+        tried = "nothing"  # to satisfy pylint
+        try:
+            if "greenlet" in concurrency:
+                tried = "greenlet"
+                import greenlet
+
+                self.concur_id_func = greenlet.getcurrent
+            elif "eventlet" in concurrency:
+                tried = "eventlet"
+                import eventlet.greenthread
+
+                self.concur_id_func = eventlet.greenthread.getcurrent
+            elif "gevent" in concurrency:
+                tried = "gevent"
+                import gevent
+
+                self.concur_id_func = gevent.getcurrent
+
+            if "thread" in concurrency:
+                do_threading = True
+        except ImportError as ex:
+            msg = f"Couldn't trace with concurrency={tried}, the module isn't installed."
+            raise ConfigError(msg) from ex
+
+        if self.concur_id_func and not hasattr(core.tracer_class, "concur_id_func"):
+            raise ConfigError(
+                "Can't support concurrency={} with {}, only threads are supported.".format(
+                    tried,
+                    self.tracer_name(),
+                ),
+            )
+
+        if do_threading or not concurrency:
+            # It's important to import threading only if we need it.  If
+            # it's imported early, and the program being measured uses
+            # gevent, then gevent's monkey-patching won't work properly.
+            import threading
+
+            self.threading = threading
+
+        if self.flush_interval and not self.threading:
+            raise ConfigError(
+                "Can't use flush_interval with concurrency={}, threads are needed.".format(
+                    ",".join(concurrency),
+                ),
+            )
+
+        # The background thread writing data every flush_interval seconds.
+        self.flush_thread: Any = None
+        self.flush_stop: Any = None
+
+        # Data since the last reset snapshot, also written as we flush.
+        self.snapshot_data: CoverageData | None = None
+
+        self.reset()
+
+    def __repr__(self) -> str:
+        return f"<Collector at {id(self):#x}: {self.tracer_name()}>"
+
+    def use_data(self, covdata: CoverageData, context: str | None) -> None:
+        """Use `covdata` for recording data."""
+        self.covdata = covdata
+        self.static_context = context
+        self.current_context = context
+        self.covdata.set_context(self.static_context)
+        self.snapshot_data = None
+
+    def _covdatas(self) -> list[CoverageData]:
+        """The CoverageData objects to write flushed data to."""
+        if self.snapshot_data is None:
+            return [self.covdata]
+        return [self.covdata, self.snapshot_data]
+
+    def tracer_name(self) -> str:
+        """Return the class name of the tracer we're using."""
+        return self.core.tracer_class.__name__
+
+    def _clear_data(self) -> None:
+        """Clear out existing data, but stay ready for more collection."""
+        # We used to use self.data.clear(), but that would remove filename
+        # keys and data values that were still in use higher up the stack
+        # when we are called as part of switch_context.
+        with self.data_lock or contextlib.nullcontext():
+            for data in self.data_shards.values():
+                for d in data.values():
+                    d.clear()
+
+        self._reset_activity()
+
+    def _reset_activity(self) -> None:
+        """Start noticing activity in the tracers afresh."""
+        for tracer in self.tracers:
+            tracer.reset_activity()
+
+    def reset(self) -> None:
+        """Clear collected data, and prepare to collect more."""
+        self.data_lock = self.threading.Lock() if self.threading else None
+        # Held while data is written to the CoverageData, which can happen
+        # in the flush thread as well as in the measured threads.
+        self.flush_lock = self.threading.RLock() if self.threading else None
+
+        # The trace data we are collecting.
+        self.data: TTraceData = {}
+
+        # All the trace data dicts the tracers write to, keyed by thread: just
+        # self.data under None, or with sharded data, one for each thread, so
+        # that tracers in different threads don't contend for the same dict
+        # and sets.  Shards of threads that have ended are dropped by
+        # _take_data once their data is taken.
+        self.data_shards: dict[Any, TTraceData] = {None: self.data}
+
+        # A dictionary mapping file names to file tracer plugin names that will
+        # handle them.
+        self.file_tracers: dict[str, str] = {}
+
+        self.disabled_plugins: set[str] = set()
+
+        # Data from dynamic contexts not yet written to the CoverageData:
+        # {context: {mapped file name: numbits or set of arcs}}, and how many
+        # lines or arcs it holds.
+        self.buffered_data: dict[str | None, dict[str, Any]] = {}
+        self.buffered_count = 0
+
+        # The .should_trace_cache attribute is a cache from file names to
+        # coverage.FileDisposition objects, or None.  When a file is first
+        # considered for tracing, a FileDisposition is obtained from
+        # Coverage.should_trace.  Its .trace attribute indicates whether the
+        # file should be traced or not.  If it should be, a plugin with dynamic
+        # file names can decide not to trace it based on the dynamic file name
+        # being excluded by the inclusion rules, in which case the
+        # FileDisposition will be replaced by None in the cache.
+        if env.PYPY:
+            import __pypy__  # pylint: disable=import-error
+
+            # Alex Gaynor said:
+            # should_trace_cache is a strictly growing key: once a key is in
+            # it, it never changes.  Further, the keys used to access it are
+            # generally constant, given sufficient context. That is to say, at
+            # any given point _trace() is called, pypy is able to know the key.
+            # This is because the key is determined by the physical source code
+            # line, and that's invariant with the call site.
+            #
+            # This property of a dict with immutable keys, combined with
+            # call-site-constant keys is a match for PyPy's module dict,
+            # which is optimized for such workloads.
+            #
+            # This gives a 20% benefit on the workload described at
+            # https://bitbucket.org/pypy/pypy/issue/1871/10x-slower-than-cpython-under-coverage
+            self.should_trace_cache = __pypy__.newdict("module")
+        else:
+            self.should_trace_cache = {}
+
+        # Our active Tracers.
+        self.tracers: list[Tracer] = []
+
+        self._clear_data()
+
+    def lock_data(self) -> None:
+        """Lock self.data_lock, for use by the C tracer."""
+        if self.data_lock is not None:
+            self.data_lock.acquire()
+
+    def unlock_data(self) -> None:
+        """Unlock self.data_lock, for use by the C tracer."""
+        if self.data_lock is not None:
+            self.data_lock.release()
+
+    def _start_tracer(self) -> TTraceFn | None:
+        """Start a new Tracer object, and store it in self.tracers."""
+        tracer = self.core.tracer_class(**self.core.tracer_kwargs)
+        if self.core.sharded_data and self.threading:
+            # A tracer started again on the same thread uses the same shard.
+            thread = self.threading.current_thread()
+            with self.data_lock or contextlib.nullcontext():
+                tracer.data = self.data_shards.setdefault(thread, {})
+        else:
+            tracer.data = self.data
+        tracer.lock_data = self.lock_data
+        tracer.unlock_data = self.unlock_data
+        tracer.trace_arcs = self.branch
+        tracer.should_trace = self.should_trace
+        tracer.should_trace_cache = self.should_trace_cache
+        tracer.warn = self.warn
+
+        if hasattr(tracer, "concur_id_func"):
+            tracer.concur_id_func = self.concur_id_func
+        if hasattr(tracer, "file_tracers"):
+            tracer.file_tracers = self.file_tracers
+        if hasattr(tracer, "threading"):
+            tracer.threading = self.threading
+        if hasattr(tracer, "check_include"):
+            tracer.check_include = self.check_include
+        if hasattr(tracer, "should_start_context"):
+            tracer.should_start_context = self.should_start_context
+        if hasattr(tracer, "switch_context"):
+            tracer.switch_context = self.switch_context
+        if hasattr(tracer, "disable_plugin"):
+            tracer.disable_plugin = self.disable_plugin
+
+        fn = tracer.start()
+        self.tracers.append(tracer)
+
+        return fn
+
+    # The trace function has to be set individually on each thread before
+    # execution begins.  Ironically, the only support the threading module has
+    # for running code before the thread main is the tracing function.  So we
+    # install this as a trace function, and the first time it's called, it does
+    # the real trace installation.
+    #
+    # New in 3.12: threading.settrace_all_threads: https://github.com/python/cpython/pull/96681
+
+    def _installation_trace(self, frame: FrameType, event: str, arg: Any) -> TTraceFn | None:
+        """Called on new threads, installs the real tracer."""
+        # Remove ourselves as the trace function.
+        sys.settrace(None)
+        # Install the real tracer.
+        fn: TTraceFn | None = self._start_tracer()
+        # Invoke the real trace function with the current event, to be sure
+        # not to lose an event.
+        if fn:
+            fn = fn(frame, event, arg)
+        # Return the new trace function to continue tracing in this scope.
+        return fn
+
+    def start(self) -> None:
+        """Start collecting trace information."""
+        # We may be a new collector in a forked process.  The old process'
+        # collectors will be in self._collectors, but they won't be usable.
+        # Find them and discard them.
+        keep_collectors = []
+        for c in self._collectors:
+            if c.pid == self.pid:
+                keep_collectors.append(c)
+            else:
+                c.post_fork()
+        self._collectors[:] = keep_collectors
+
+        if self._collectors:
+            self._collectors[-1].pause()
+
+        self.tracers = []
+
+        if self.flush_interval:
+            self._start_flush_thread()
+
+        try:
+            # Install the tracer on this thread.
+            self._start_tracer()
+        except:
+            if self._collectors:
+                self._collectors[-1].resume()
+            raise
+
+        # If _start_tracer succeeded, then we add ourselves to the global
+        # stack of collectors.
+        self._collectors.append(self)
+
+        # Install our installation tracer in threading, to jump-start other
+        # threads.
+        if self.core.systrace and self.threading:
+            self.threading.settrace(self._installation_trace)
+
+    def stop(self) -> None:
+        """Stop collecting trace information."""
+        assert self._collectors
+        if self._collectors[-1] is not self:
+            print("self._collectors:")
+            for c in self._collectors:
+                print(f"  {c!r}\n{c.origin}")
+        assert self._collectors[-1] is self, (
+            f"Expected current collector to be {self!r}, but it's {self._collectors[-1]!r}"
+        )
+
+        self.pause()
+        self._stop_flush_thread()
+        if self.dynamic_context_buffer:
+            # Buffered data shouldn't wait in memory for a save that might
+            # never come.
+            self.flush_data()
+
+        # Remove this Collector from the stack, and resume the one underneath (if any).
+        self._collectors.pop()
+        if self._collectors:
+            self._collectors[-1].resume()
+
+    def pause(self) -> None:
+        """Pause tracing, but be prepared to `resume`."""
+        for tracer in self.tracers:
+            tracer.stop()
+            stats = tracer.get_stats()
+            if stats:
+                print(f"\nCoverage.py {tracer.__class__.__name__} stats:")
+                for k, v in human_sorted_items(stats.items()):
+                    print(f"{k:>20}: {v}")
+        if self.threading:
+            self.threading.settrace(None)
+
+    def resume(self) -> None:
+        """Resume tracing after a `pause`."""
+        for tracer in self.tracers:
+            tracer.start()
+        if self.core.systrace:
+            if self.threading:
+                self.threading.settrace(self._installation_trace)
+            else:
+                self._start_tracer()
+
+    def _start_flush_thread(self) -> None:
+        """Start a thread to write the data every flush_interval seconds."""
+        assert self.threading is not None
+        running = self.threading.Event()
+        self.flush_stop = self.threading.Event()
+
+        def flush_periodically() -> None:
+            running.set()
+            while not self.flush_stop.wait(self.flush_interval):
+                self.flush_data()
+
+        self.flush_thread = self.threading.Thread(
+            target=flush_periodically,
+            name="coverage-flush",
+            daemon=True,
+        )
+        self.flush_thread.start()
+        # Wait until the thread is running, so that it won't be traced by the
+        # tracer we're about to install for new threads.
+        running.wait()
+
+    def _stop_flush_thread(self) -> None:
+        """Stop the thread started by _start_flush_thread, if there is one."""
+        if self.flush_thread is not None:
+            self.flush_stop.set()
+            self.flush_thread.join()
+            self.flush_thread = None
+
+    def post_fork(self) -> None:
+        """After a fork, tracers might need to adjust."""
+        for tracer in self.tracers:
+            if hasattr(tracer, "post_fork"):
+                tracer.post_fork()
+
+    def _activity(self) -> bool:
+        """Has any activity been traced?
+
+        Returns a boolean, True if any trace function was invoked.
+
+        """
+        return any(tracer.activity() for tracer in self.tracers)
+
+    def switch_context(self, new_context: str | None) -> None:
+        """Switch to a new dynamic context."""
+        with self.flush_lock or contextlib.nullcontext():
+            self._switch_context(new_context)
+
+    def _switch_context(self, new_context: str | None) -> None:
+        """Switch to a new dynamic context, holding the flush lock."""
+        context: str | None
+        if self.dynamic_context_buffer:
+            self._buffer_data()
+            if self.buffered_count > self.dynamic_context_buffer:
+                self._write_buffered_data()
+        else:
+            self.flush_data()
+        if self.static_context:
+            context = self.static_context
+            if new_context:
+                context += "|" + new_context
+        else:
+            context = new_context
+        self.current_context = context
+        for covdata in self._covdatas():
+            covdata.set_context(context)
+        self._restart_events()
+
+    def _restart_events(self) -> None:
+        """Have tracers that report each line only once start again."""
+        for tracer in self.tracers:
+            if hasattr(tracer, "restart_events"):
+                tracer.restart_events()
+
+    def snapshot(self, reset: bool) -> CoverageData:
+        """Get the data collected since the last reset snapshot.
+
+        Returns a new in-memory CoverageData.  If there hasn't been a reset
+        snapshot, it has everything collected so far.  If `reset` is true,
+        the next snapshot will start from now.
+
+        """
+        with self.flush_lock or contextlib.nullcontext():
+            return self._snapshot(reset)
+
+    def _snapshot(self, reset: bool) -> CoverageData:
+        """Take a snapshot, holding the flush lock."""
+        self.flush_data()
+        snapshot = CoverageData(no_disk=True, warn=self.warn)
+        if self.snapshot_data is not None:
+            snapshot.update(self.snapshot_data)
+        else:
+            snapshot.update(self.covdata)
+        if reset:
+            self.snapshot_data = CoverageData(no_disk=True, warn=self.warn)
+            self.snapshot_data.set_context(self.current_context)
+            self._restart_events()
+        return snapshot
+
+    def disable_plugin(self, disposition: TFileDisposition) -> None:
+        """Disable the plugin mentioned in `disposition`."""
+        file_tracer = disposition.file_tracer
+        assert file_tracer is not None
+        plugin = file_tracer._coverage_plugin
+        plugin_name = plugin._coverage_plugin_name
+        self.warn(f"Disabling plug-in {plugin_name!r} due to previous exception")
+        plugin._coverage_enabled = False
+        disposition.trace = False
+
+    @functools.cache  # pylint: disable=method-cache-max-size-none
+    def cached_mapped_file(self, filename: str) -> str:
+        """A locally cached version of file names mapped through file_mapper."""
+        return self.file_mapper(filename)
+
+    def mapped_file_dict(self, d: Mapping[str, T]) -> dict[str, T]:
+        """Return a dict like d, but with keys modified by file_mapper."""
+        # The call to list(items()) ensures that the GIL protects the dictionary
+        # iterator against concurrent modifications by tracers running
+        # in other threads. We try three times in case of concurrent
+        # access, hoping to get a clean copy.
+        runtime_err = None
+        for _ in range(3):  # pragma: part covered
+            try:
+                items = list(d.items())
+            except RuntimeError as ex:  # pragma: cant happen
+                runtime_err = ex
+            else:
+                break
+        else:  # pragma: cant happen
+            assert isinstance(runtime_err, Exception)
+            raise runtime_err
+
+        return {self.cached_mapped_file(k): v for k, v in items if v}
+
+    def plugin_was_disabled(self, plugin: CoveragePlugin) -> None:
+        """Record that `plugin` was disabled during the run."""
+        self.disabled_plugins.add(plugin._coverage_plugin_name)
+
+    def _take_data(self) -> dict[str, Any]:
+        """Remove the collected lines or arcs, keyed by mapped file names.
+
+        Tracers in other threads can go on recording while this runs.  Data
+        they record after it's been taken is kept for the next time.
+
+        """
+        # Reset the activity first: anything recorded from now on needs to be
+        # taken by the next flush.
+        self._reset_activity()
+
+        taken: dict[str, Any] = {}
+        with self.data_lock or contextlib.nullcontext():
+            data_shards = list(self.data_shards.values())
+            # Threads that have already ended won't record any more, so once
+            # their data is taken, their shards can go.
+            ended = [
+                thread
+                for thread in self.data_shards
+                if thread is not None and not thread.is_alive()
+            ]
+        for data in data_shards:
+            file_datas = cast(dict[str, Any], data)
+            # The list() here is to get a clean copy even as tracers are
+            # continuing to add files.
+            for fname, file_data in list(file_datas.items()):
+                if self.branch and self.core.packed_arcs:
+                    # The C tracer keeps arcs packed into integers in CArcSet
+                    # objects, which unpack themselves in C.  See
+                    # ctracer/arcset.c for the details.
+                    items = set(file_data.pop_arcs())
+                else:
+                    # Copying and then removing the copied items are each
+                    # atomic, so items added in between aren't lost.
+                    items = set(file_data)
+                    file_data -= items
+                if fname in taken:
+                    taken[fname].update(items)
+                else:
+                    taken[fname] = items
+        if ended:
+            with self.data_lock or contextlib.nullcontext():
+                for thread in ended:
+                    # The ended thread's tracer still refers to the shard, so
+                    # empty it to free the memory.
+                    shard = self.data_shards.pop(thread, None)
+                    if shard is not None:
+                        shard.clear()
+        return self.mapped_file_dict(taken)
+
+    def _add_file_tracers(self) -> None:
+        """Record the file tracers that were used in our CoverageData."""
+        file_tracers = {
+            k: v for k, v in self.file_tracers.items() if v not in self.disabled_plugins
+        }
+        for covdata in self._covdatas():
+            covdata.add_file_tracers(self.mapped_file_dict(file_tracers))
+
+    def _buffer_data(self) -> None:
+        """Move the collected data into the buffer for the current context."""
+        if not self._activity():
+            return
+
+        buffered = self.buffered_data.setdefault(self.current_context, {})
+        for fname, items in self._take_data().items():
+            if self.branch:
+                arcs = buffered.setdefault(fname, set())
+                before = len(arcs)
+                arcs.update(items)
+                self.buffered_count += len(arcs) - before
+            else:
+                line_bits = nums_to_numbits(items)
+                if fname in buffered:
+                    line_bits = numbits_union(buffered[fname], line_bits)
+                buffered[fname] = line_bits
+                self.buffered_count += len(items)
+
+    def _write_buffered_data(self) -> bool:
+        """Write the buffered data for all contexts to our CoverageData.
+
+        Returns True if there was data to write, False if not.
+
+        """
+        if not self.buffered_data:
+            return False
+        for covdata in self._covdatas():
+            covdata._add_context_data(self.buffered_data, arcs=self.branch)
+        self._add_file_tracers()
+        self.buffered_data = {}
+        self.buffered_count = 0
+        return True
+
+    def flush_data(self) -> bool:
+        """Save the collected data to our associated `CoverageData`.
+
+        Data may have also been saved along the way. This forces the
+        last of the data to be saved.
+
+        Returns True if there was data to save, False if not.
+        """
+        with self.flush_lock or contextlib.nullcontext():
+            if self.dynamic_context_buffer:
+                self._buffer_data()
+                return self._write_buffered_data()
+
+            if not self._activity():
+                return False
+
+            mapped_data = self._take_data()
+            for covdata in self._covdatas():
+                if self.branch:
+                    covdata.add_arcs(mapped_data)
+                else:
+                    covdata.add_lines(mapped_data)
+            self._add_file_tracers()
+            return True
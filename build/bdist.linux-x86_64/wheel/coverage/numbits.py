@@ -0,0 +1,173 @@
+# Licensed under the Apache License: http://www.apache.org/licenses/LICENSE-2.0
+# For details: https://github.com/coveragepy/coveragepy/blob/main/NOTICE.txt
+
+"""
+Functions to manipulate packed binary representations of number sets.
+
+To save space, coverage stores sets of line numbers in SQLite using a packed
+binary representation called a numbits.  A numbits is a set of positive
+integers.
+
+A numbits is stored as a blob in the database.  The exact meaning of the bytes
+in the blobs should be considered an implementation detail that might change in
+the future.  Use these functions to work with those binary blobs of data.
+
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import sqlite3
+from collections.abc import Iterable
+
+# These functions avoid Python-level loops over bits and bytes.  A numbits is
+# converted to a Python int with int.from_bytes, so set operations are single
+# int operations.  Converting to and from lists of numbers goes through a
+# string of binary digits, with one byte per number, so that most of the work
+# happens in C.
+
+# Translate "0" and "1" characters to 0 and 1 bytes, and back again.
+_DIGITS_TO_FLAGS = bytes.maketrans(b"01", b"\x00\x01")
+_FLAGS_TO_DIGITS = bytes.maketrans(b"\x00\x01", b"01")
+
+
+def _numbits_int(numbits: bytes) -> int:
+    """Convert a numbits to an int with the same bits set."""
+    return int.from_bytes(numbits, "little")
+
+
+def _int_numbits(bits: int, nbytes: int | None = None) -> bytes:
+    """Convert an int to a numbits.
+
+    The result is `nbytes` long if provided, otherwise as short as possible.
+
+    """
+    if nbytes is None:
+        nbytes = (bits.bit_length() + 7) // 8
+    return bits.to_bytes(nbytes, "little")
+
+
+def nums_to_numbits(nums: Iterable[int]) -> bytes:
+    """Convert `nums` into a numbits.
+
+    Arguments:
+        nums: a reusable iterable of integers, the line numbers to store.
+
+    Returns:
+        A binary blob.
+    """
+    try:
+        nbytes = max(nums) // 8 + 1
+    except ValueError:
+        # nums was empty.
+        return b""
+    # Set a flag byte for each number, then read the flags as binary digits,
+    # most-significant first.
+    flags = bytearray(nbytes * 8)
+    for num in nums:
+        flags[num] = 1
+    digits = flags.translate(_FLAGS_TO_DIGITS)
+    digits.reverse()
+    return _int_numbits(int(digits, 2), nbytes)
+
+
+def numbits_to_nums(numbits: bytes) -> list[int]:
+    """Convert a numbits into a list of numbers.
+
+    Arguments:
+        numbits: a binary blob, the packed number set.
+
+    Returns:
+        A list of ints.
+
+    When registered as a SQLite function by :func:`register_sqlite_functions`,
+    this returns a string, a JSON-encoded list of ints.
+
+    """
+    bits = _numbits_int(numbits)
+    if not bits:
+        return []
+    # The binary digits, least-significant first, as a flag byte per number.
+    flags = format(bits, "b").encode("ascii")[::-1].translate(_DIGITS_TO_FLAGS)
+    return list(itertools.compress(range(len(flags)), flags))
+
+
+def numbits_union(numbits1: bytes, numbits2: bytes) -> bytes:
+    """Compute the union of two numbits.
+
+    Returns:
+        A new numbits, the union of `numbits1` and `numbits2`.
+    """
+    bits = _numbits_int(numbits1) | _numbits_int(numbits2)
+    return _int_numbits(bits, max(len(numbits1), len(numbits2)))
+
+
+def numbits_intersection(numbits1: bytes, numbits2: bytes) -> bytes:
+    """Compute the intersection of two numbits.
+
+    Returns:
+        A new numbits, the intersection `numbits1` and `numbits2`.
+    """
+    return _int_numbits(_numbits_int(numbits1) & _numbits_int(numbits2))
+
+
+def numbits_any_intersection(numbits1: bytes, numbits2: bytes) -> bool:
+    """Is there any number that appears in both numbits?
+
+    Determine whether two number sets have a non-empty intersection. This is
+    faster than computing the intersection.
+
+    Returns:
+        A bool, True if there is any number in both `numbits1` and `numbits2`.
+    """
+    return bool(_numbits_int(numbits1) & _numbits_int(numbits2))
+
+
+def num_in_numbits(num: int, numbits: bytes) -> bool:
+    """Does the integer `num` appear in `numbits`?
+
+    Returns:
+        A bool, True if `num` is a member of `numbits`.
+    """
+    nbyte, nbit = divmod(num, 8)
+    if nbyte >= len(numbits):
+        return False
+    return bool(numbits[nbyte] & (1 << nbit))
+
+
+def register_sqlite_functions(connection: sqlite3.Connection) -> None:
+    """
+    Define numbits functions in a SQLite connection.
+
+    This defines these functions for use in SQLite statements:
+
+    * :func:`numbits_union`
+    * :func:`numbits_intersection`
+    * :func:`numbits_any_intersection`
+    * :func:`num_in_numbits`
+    * :func:`numbits_to_nums`
+
+    `connection` is a :class:`sqlite3.Connection <python:sqlite3.Connection>`
+    object.  After creating the connection, pass it to this function to
+    register the numbits functions.  Then you can use numbits functions in your
+    queries::
+
+        import sqlite3
+        from coverage.numbits import register_sqlite_functions
+
+        conn = sqlite3.connect("example.db")
+        register_sqlite_functions(conn)
+        c = conn.cursor()
+        # Kind of a nonsense query:
+        # Find all the files and contexts that executed line 47 in any file:
+        c.execute(
+            "select file_id, context_id from line_bits where num_in_numbits(?, numbits)",
+            (47,)
+        )
+    """
+    connection.create_function("numbits_union", 2, numbits_union)
+    connection.create_function("numbits_intersection", 2, numbits_intersection)
+    connection.create_function("numbits_any_intersection", 2, numbits_any_intersection)
+    connection.create_function("num_in_numbits", 2, num_in_numbits)
+    connection.create_function("numbits_to_nums", 1, lambda b: json.dumps(numbits_to_nums(b)))
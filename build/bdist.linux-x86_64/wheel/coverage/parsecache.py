@@ -0,0 +1,157 @@
+# Licensed under the Apache License: http://www.apache.org/licenses/LICENSE-2.0
+# For details: https://github.com/coveragepy/coveragepy/blob/main/NOTICE.txt
+
+"""A persistent on-disk cache of Python parsing results."""
+
+from __future__ import annotations
+
+import json
+import os
+import platform
+import tempfile
+from typing import TYPE_CHECKING, Any
+
+from coverage import env
+from coverage.debug import NoDebugging
+from coverage.misc import Hasher, isolate_module
+from coverage.types import TArc, TDebugCtl
+from coverage.version import __version__
+
+if TYPE_CHECKING:
+    from coverage.parser import PythonParser
+
+os = isolate_module(os)
+
+
+def _arc(pair: list[int]) -> TArc:
+    """Convert a JSON list back into an arc."""
+    return (pair[0], pair[1])
+
+
+def _frag(pair: list[str | None]) -> tuple[str | None, str | None]:
+    """Convert a JSON list back into a missing arc fragment."""
+    return (pair[0], pair[1])
+
+
+def parse_results(parser: PythonParser) -> dict[str, Any]:
+    """Get the results of parsing from `parser` as JSON-compatible data.
+
+    The data can be applied to another parser of the same text with
+    :func:`restore_parse_results`.
+
+    """
+    results: dict[str, Any] = {
+        "statements": sorted(parser.statements),
+        "excluded": sorted(parser.excluded),
+        "raw_statements": sorted(parser.raw_statements),
+        "multiline_map": sorted(parser.multiline_map.items()),
+        "arcs": None,
+    }
+    if parser._all_arcs is not None:
+        assert parser._missing_arc_fragments is not None
+        results["arcs"] = sorted(parser._all_arcs)
+        results["with_jump_fixers"] = [
+            [arc, start_next, end_next]
+            for arc, (start_next, end_next) in parser._with_jump_fixers.items()
+        ]
+        results["missing_arc_fragments"] = [
+            [arc, frags] for arc, frags in parser._missing_arc_fragments.items()
+        ]
+        results["exit_counts"] = sorted(parser.exit_counts().items())
+    return results
+
+
+def restore_parse_results(parser: PythonParser, results: dict[str, Any]) -> None:
+    """Fill in `parser` with `results` from :func:`parse_results`."""
+    parser.statements = set(results["statements"])
+    parser.excluded = set(results["excluded"])
+    parser.raw_statements = set(results["raw_statements"])
+    parser.multiline_map = dict(results["multiline_map"])
+    if results["arcs"] is not None:
+        parser._all_arcs = {_arc(arc) for arc in results["arcs"]}
+        parser._with_jump_fixers = {
+            _arc(arc): (_arc(start_next), _arc(end_next))
+            for arc, start_next, end_next in results["with_jump_fixers"]
+        }
+        parser._missing_arc_fragments = {
+            _arc(arc): [_frag(frag) for frag in frags]
+            for arc, frags in results["missing_arc_fragments"]
+        }
+        parser._exit_counts = dict(results["exit_counts"])
+
+
+class ParseCache:
+    """Save and restore the results of :class:`PythonParser` analysis.
+
+    Parsing and arc analysis only depend on the source text, the exclusion
+    regex, the version of coverage.py, and the version of Python.  A hash of
+    those is used as the key for an entry, so an entry is never stale: edited
+    source simply gets a new key.
+
+    Each entry is a small JSON file in `directory`.  Entries are written
+    atomically, so a number of processes can share the same directory.
+
+    """
+
+    def __init__(self, directory: str, debug: TDebugCtl | None = None) -> None:
+        self.directory = directory
+        self.debug = debug or NoDebugging()
+
+    def _key(self, parser: PythonParser) -> str:
+        """Compute the cache key for the parse `parser` will do."""
+        hasher = Hasher()
+        hasher.update(__version__)
+        hasher.update(platform.python_implementation())
+        hasher.update(list(env.PYVERSION))
+        hasher.update(parser.exclude)
+        hasher.update(parser.text)
+        return hasher.hexdigest()
+
+    def _entry_path(self, parser: PythonParser) -> str:
+        """The file name of the cache entry for `parser`."""
+        return os.path.join(self.directory, self._key(parser) + ".json")
+
+    def load(self, parser: PythonParser) -> bool:
+        """Fill in the results of parsing on `parser` from the cache.
+
+        Returns True if the results were found in the cache, False if `parser`
+        still has to do its own work.
+
+        """
+        path = self._entry_path(parser)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        if self.debug.should("dataio"):
+            self.debug.write(f"Using cached parse of {parser.filename!r} from {path!r}")
+        restore_parse_results(parser, entry)
+        return True
+
+    def save(self, parser: PythonParser) -> None:
+        """Write the results of parsing from `parser` into the cache.
+
+        If the cache can't be written, it's simply not written.
+
+        """
+        entry = parse_results(parser)
+        path = self._entry_path(parser)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(entry, f)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+        except OSError as exc:
+            if self.debug.should("dataio"):
+                self.debug.write(f"Couldn't write parse cache {path!r}: {exc}")
+            return
+
+        if self.debug.should("dataio"):
+            self.debug.write(f"Cached parse of {parser.filename!r} in {path!r}")
@@ -0,0 +1,1732 @@
+# Licensed under the Apache License: http://www.apache.org/licenses/LICENSE-2.0
+# For details: https://github.com/coveragepy/coveragepy/blob/main/NOTICE.txt
+
+"""SQLite coverage data."""
+
+from __future__ import annotations
+
+import bisect
+import collections
+import datetime
+import functools
+import glob
+import itertools
+import os
+import random
+import re
+import socket
+import sqlite3
+import string
+import sys
+import textwrap
+import threading
+import uuid
+import zlib
+from collections.abc import Collection, Container, Iterable, Iterator, Mapping, Sequence
+from typing import Any, Callable, cast
+
+from coverage.debug import NoDebugging, auto_repr, file_summary
+from coverage.exceptions import CoverageException, DataError
+from coverage.misc import file_be_gone, isolate_module
+from coverage.numbits import numbits_to_nums, numbits_union, nums_to_numbits
+from coverage.sqlitedb import SqliteDb
+from coverage.types import AnyCallable, FilePath, TArc, TDebugCtl, TLineNo, TWarnFn
+from coverage.version import __version__
+
+os = isolate_module(os)
+
+# If you change the schema: increment the SCHEMA_VERSION and update the
+# docs in docs/dbschema.rst by running "make cogdoc".
+
+SCHEMA_VERSION = 7
+
+# Schema versions:
+# 1: Released in 5.0a2
+# 2: Added contexts in 5.0a3.
+# 3: Replaced line table with line_map table.
+# 4: Changed line_map.bitmap to line_map.numbits.
+# 5: Added foreign key declarations.
+# 6: Key-value in meta.
+# 7: line_map -> line_bits
+
+SCHEMA = """\
+CREATE TABLE coverage_schema (
+    -- One row, to record the version of the schema in this db.
+    version integer
+);
+
+CREATE TABLE meta (
+    -- Key-value pairs, to record metadata about the data
+    key text,
+    value text,
+    unique (key)
+    -- Possible keys:
+    --  'has_arcs' boolean      -- Is this data recording branches?
+    --  'sys_argv' text         -- The coverage command line that recorded the data.
+    --  'version' text          -- The version of coverage.py that made the file.
+    --  'when' text             -- Datetime when the file was created.
+);
+
+CREATE TABLE file (
+    -- A row per file measured.
+    id integer primary key,
+    path text,
+    unique (path)
+);
+
+CREATE TABLE context (
+    -- A row per context measured.
+    id integer primary key,
+    context text,
+    unique (context)
+);
+
+CREATE TABLE line_bits (
+    -- If recording lines, a row per context per file executed.
+    -- All of the line numbers for that file/context are in one numbits.
+    file_id integer,            -- foreign key to `file`.
+    context_id integer,         -- foreign key to `context`.
+    numbits blob,               -- see the numbits functions in coverage.numbits
+    foreign key (file_id) references file (id),
+    foreign key (context_id) references context (id),
+    unique (file_id, context_id)
+);
+
+CREATE TABLE arc (
+    -- If recording branches, a row per context per from/to line transition executed.
+    file_id integer,            -- foreign key to `file`.
+    context_id integer,         -- foreign key to `context`.
+    fromno integer,             -- line number jumped from.
+    tono integer,               -- line number jumped to.
+    foreign key (file_id) references file (id),
+    foreign key (context_id) references context (id),
+    unique (file_id, context_id, fromno, tono)
+);
+
+CREATE TABLE tracer (
+    -- A row per file indicating the tracer used for that file.
+    file_id integer primary key,
+    tracer text,
+    foreign key (file_id) references file (id)
+);
+"""
+
+# An optional table, not part of SCHEMA: it's derived from `line_bits` or `arc`
+# by CoverageData.index_line_contexts, and dropped when the data changes.
+LINE_CONTEXTS_SCHEMA = """\
+CREATE TABLE line_contexts (
+    -- If indexed, a row per file per line executed.
+    file_id integer,            -- foreign key to `file`.
+    lineno integer,             -- line number executed.
+    context_bits blob,          -- the ids of the contexts that executed it, as numbits.
+    foreign key (file_id) references file (id),
+    unique (file_id, lineno)
+);
+"""
+
+
+def _locked(method: AnyCallable) -> AnyCallable:
+    """A decorator for methods that should hold self._lock."""
+
+    @functools.wraps(method)
+    def _wrapped(self: CoverageData, *args: Any, **kwargs: Any) -> Any:
+        if self._debug.should("lock"):
+            self._debug.write(f"Locking {self._lock!r} for {method.__name__}")
+        with self._lock:
+            if self._debug.should("lock"):
+                self._debug.write(f"Locked {self._lock!r} for {method.__name__}")
+            return method(self, *args, **kwargs)
+
+    return _wrapped
+
+
+# SQLite has supported "INSERT ... ON CONFLICT DO UPDATE" since 3.24.0.
+HAS_UPSERT = sqlite3.sqlite_version_info >= (3, 24, 0)
+
+# The most parameters we use in one SQL statement.  Old versions of SQLite
+# allowed at most 999.
+MAX_SQL_VARIABLES = 900
+
+# The most data files that can be merged at once by CoverageData._update_many.
+# SQLite allows ten databases to be attached to a connection by default.
+MAX_UPDATE_BATCH = 8
+
+
+class NumbitsUnionAgg:
+    """SQLite aggregate function for computing union of numbits.
+
+    The union is kept as an int, so each step is one int operation rather than
+    building a new numbits.
+
+    """
+
+    def __init__(self) -> None:
+        self.bits = 0
+        self.nbytes = 0
+
+    def step(self, value: bytes) -> None:
+        """Process one value in the aggregation."""
+        self.bits |= int.from_bytes(value, "little")
+        self.nbytes = max(self.nbytes, len(value))
+
+    def finalize(self) -> bytes:
+        """Return the final aggregated result."""
+        return self.bits.to_bytes(self.nbytes, "little")
+
+
+# A context pattern that is a literal prefix (``^abc``) or a literal name
+# (``^abc$``): no regex special characters after the caret.
+LITERAL_PREFIX_PATTERN = re.compile(r"\^([^.^$*+?{}\[\]\\|()]*)(\$?)")
+
+
+class ContextIndex:
+    """An index of the contexts in a data file, for finding them by pattern.
+
+    Query context patterns are regexes used with :func:`re.search`, so in
+    general every context has to be checked.  But the common patterns are
+    literal prefixes like ``^test_foo`` and literal names like
+    ``^test_foo$``, which are found by bisecting the sorted contexts instead.
+
+    """
+
+    def __init__(self, rows: Iterable[tuple[int, str]]) -> None:
+        self.ids = {context: context_id for context_id, context in rows}
+        self.names = {context_id: context for context, context_id in self.ids.items()}
+        self.sorted_contexts = sorted(self.ids)
+
+    def ids_matching(self, pattern: str) -> list[int]:
+        """Get the ids of the contexts that `pattern` matches with re.search."""
+        m = LITERAL_PREFIX_PATTERN.fullmatch(pattern)
+        if m:
+            prefix, dollar = m.groups()
+            if dollar:
+                # "$" also matches before a newline at the end.
+                names = [prefix, prefix + "\n"]
+                return [self.ids[name] for name in names if name in self.ids]
+            ids = []
+            start = bisect.bisect_left(self.sorted_contexts, prefix)
+            for context in itertools.islice(self.sorted_contexts, start, None):
+                if not context.startswith(prefix):
+                    break
+                ids.append(self.ids[context])
+            return ids
+        regex = re.compile(pattern)
+        return [context_id for context, context_id in self.ids.items() if regex.search(context)]
+
+
+class CoverageData:
+    """Manages collected coverage data, including file storage.
+
+    This class is the public supported API to the data that coverage.py
+    collects during program execution.  It includes information about what code
+    was executed. It does not include information from the analysis phase, to
+    determine what lines could have been executed, or what lines were not
+    executed.
+
+    .. note::
+
+        The data file is currently a SQLite database file, with a
+        :ref:`documented schema <dbschema>`. The schema is subject to change
+        though, so be careful about querying it directly. Use this API if you
+        can to isolate yourself from changes.
+
+    There are a number of kinds of data that can be collected:
+
+    * **lines**: the line numbers of source lines that were executed.
+      These are always available.
+
+    * **arcs**: pairs of source and destination line numbers for transitions
+      between source lines.  These are only available if branch coverage was
+      used.
+
+    * **file tracer names**: the module names of the file tracer plugins that
+      handled each file in the data.
+
+    Lines, arcs, and file tracer names are stored for each source file. File
+    names in this API are case-sensitive, even on platforms with
+    case-insensitive file systems.
+
+    A data file either stores lines, or arcs, but not both.
+
+    A data file is associated with the data when the :class:`CoverageData`
+    is created, using the parameters `basename`, `suffix`, and `no_disk`. The
+    base name can be queried with :meth:`base_filename`, and the actual file
+    name being used is available from :meth:`data_filename`.
+
+    To read an existing coverage.py data file, use :meth:`read`.  You can then
+    access the line, arc, or file tracer data with :meth:`lines`, :meth:`arcs`,
+    or :meth:`file_tracer`.  To only read a large data file, as reporting
+    does, use ``read(read_only=True)``.
+
+    The :meth:`has_arcs` method indicates whether arc data is available.  You
+    can get a set of the files in the data with :meth:`measured_files`.  As
+    with most Python containers, you can determine if there is any data at all
+    by using this object as a boolean value.
+
+    The contexts for each line in a file can be read with
+    :meth:`contexts_by_lineno`, or for particular lines with
+    :meth:`contexts_for_line` or :meth:`contexts_for_lines`.  To make those
+    fast for many lookups, build an index with :meth:`index_line_contexts`.
+
+    To limit querying to certain contexts, use :meth:`set_query_context` or
+    :meth:`set_query_contexts`. These will narrow the focus of subsequent
+    :meth:`lines`, :meth:`arcs`, and :meth:`contexts_by_lineno` calls. The set
+    of all measured context names can be retrieved with
+    :meth:`measured_contexts`.
+
+    Most data files will be created by coverage.py itself, but you can use
+    methods here to create data files if you like.  The :meth:`add_lines`,
+    :meth:`add_arcs`, and :meth:`add_file_tracers` methods add data, in ways
+    that are convenient for coverage.py.
+
+    To record data for contexts, use :meth:`set_context` to set a context to
+    be used for subsequent :meth:`add_lines` and :meth:`add_arcs` calls.
+
+    To add a source file without any measured data, use :meth:`touch_file`,
+    or :meth:`touch_files` for a list of such files.
+
+    Write the data to its file with :meth:`write`.
+
+    You can clear the data in memory with :meth:`erase`.  Data for specific
+    files can be removed from the database with :meth:`purge_files`.
+
+    Two data collections can be combined by using :meth:`update` on one
+    :class:`CoverageData`, passing it the other.
+
+    Data in a :class:`CoverageData` can be serialized and deserialized with
+    :meth:`dumps` and :meth:`loads`.
+
+    The methods used during the coverage.py collection phase
+    (:meth:`add_lines`, :meth:`add_arcs`, :meth:`set_context`, and
+    :meth:`add_file_tracers`) are thread-safe.  Other methods may not be.
+
+    """
+
+    def __init__(
+        self,
+        basename: FilePath | None = None,
+        suffix: str | bool | None = None,
+        no_disk: bool = False,
+        warn: TWarnFn | None = None,
+        debug: TDebugCtl | None = None,
+    ) -> None:
+        """Create a :class:`CoverageData` object to hold coverage-measured data.
+
+        Arguments:
+            basename (str): the base name of the data file, defaulting to
+                ".coverage". This can be a path to a file in another directory.
+            suffix (str or bool): has the same meaning as the `data_suffix`
+                argument to :class:`coverage.Coverage`.
+            no_disk (bool): if True, keep all data in memory, and don't
+                write any disk file.
+            warn: a warning callback function, accepting a warning message
+                argument.
+            debug: a `DebugControl` object (optional)
+
+        """
+        self._no_disk = no_disk
+        self._basename = os.path.abspath(basename or ".coverage")
+        self._suffix = suffix
+        self._warn = warn
+        self._debug = debug or NoDebugging()
+
+        self._choose_filename()
+        # Maps filenames to row ids.
+        self._file_map: dict[str, int] = {}
+        # Maps thread ids to SqliteDb objects.
+        self._dbs: dict[int, SqliteDb] = {}
+        self._pid = os.getpid()
+        # Synchronize the operations used during collection.
+        self._lock = threading.RLock()
+
+        # Are we in sync with the data file?
+        self._have_used = False
+
+        self._has_lines = False
+        self._has_arcs = False
+
+        self._current_context: str | None = None
+        self._current_context_id: int | None = None
+        self._query_context_ids: list[int] | None = None
+        self._context_index: ContextIndex | None = None
+        # Does the data file have a line_contexts table?  None if we don't know yet.
+        self._has_line_contexts: bool | None = None
+
+        # Opened with read(read_only=True)?  Then the data can't change, so
+        # the lines or arcs for all files are read at once, and kept.
+        self._read_only = False
+        self._all_line_bits: dict[int, bytes] | None = None
+        self._all_arcs: dict[int, set[TArc]] | None = None
+
+    __repr__ = auto_repr
+
+    def _debug_dataio(self, msg: str, filename: str) -> None:
+        """A helper for debug messages which are all similar."""
+        if self._debug.should("dataio"):
+            self._debug.write(f"{msg} {filename!r} ({file_summary(filename)})")
+
+    def _choose_filename(self) -> None:
+        """Set self._filename based on inited attributes."""
+        if self._no_disk:
+            self._filename = f"file:coverage-{uuid.uuid4()}?mode=memory&cache=shared"
+        else:
+            self._filename = self._basename
+            suffix = filename_suffix(self._suffix)
+            if suffix:
+                self._filename += f".{suffix}"
+
+    def _reset(self) -> None:
+        """Reset our attributes."""
+        if not self._no_disk:
+            self.close(force=self._read_only)
+        self._read_only = False
+        self._all_line_bits = None
+        self._all_arcs = None
+        self._file_map = {}
+        self._have_used = False
+        self._current_context_id = None
+        self._context_index = None
+        self._has_line_contexts = None
+
+    def close(self, force: bool = False) -> None:
+        """Really close all the database objects."""
+        if self._debug.should("dataio"):
+            self._debug.write(f"Closing dbs, force={force}: {self._dbs}")
+        for db in self._dbs.values():
+            db.close(force=force)
+        self._dbs = {}
+
+    def _open_db(self) -> None:
+        """Open an existing db file, and read its metadata."""
+        self._debug_dataio("Opening data file", self._filename)
+        self._dbs[threading.get_ident()] = SqliteDb(
+            self._filename,
+            self._debug,
+            self._no_disk,
+            read_only=self._read_only,
+        )
+        self._read_db()
+
+    def _read_db(self) -> None:
+        """Read the metadata from a database so that we are ready to use it."""
+        with self._dbs[threading.get_ident()] as db:
+            try:
+                row = db.execute_one("select version from coverage_schema")
+                assert row is not None
+            except Exception as exc:
+                if "no such table: coverage_schema" in str(exc):
+                    self._init_db(db)
+                else:
+                    raise DataError(
+                        "Data file {!r} doesn't seem to be a coverage data file: {}".format(
+                            self._filename,
+                            exc,
+                        ),
+                    ) from exc
+            else:
+                schema_version = row[0]
+                if schema_version != SCHEMA_VERSION:
+                    raise DataError(
+                        "Couldn't use data file {!r}: wrong schema: {} instead of {}".format(
+                            self._filename,
+                            schema_version,
+                            SCHEMA_VERSION,
+                        ),
+                    )
+
+            row = db.execute_one("select value from meta where key = 'has_arcs'")
+            if row is not None:
+                self._has_arcs = bool(int(row[0]))
+                self._has_lines = not self._has_arcs
+
+            with db.execute("select id, path from file") as cur:
+                for file_id, path in cur:
+                    self._file_map[path] = file_id
+
+    def _init_db(self, db: SqliteDb) -> None:
+        """Write the initial contents of the database."""
+        self._debug_dataio("Initing data file", self._filename)
+        db.executescript(SCHEMA)
+        db.execute_void("INSERT INTO coverage_schema (version) VALUES (?)", (SCHEMA_VERSION,))
+
+        # When writing metadata, avoid information that will needlessly change
+        # the hash of the data file, unless we're debugging processes.
+        meta_data = [
+            ("version", __version__),
+        ]
+        if self._debug.should("process"):
+            meta_data.extend(
+                [
+                    ("sys_argv", str(getattr(sys, "argv", None))),
+                    ("when", datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+                ]
+            )
+        db.executemany_void("INSERT OR IGNORE INTO meta (key, value) VALUES (?, ?)", meta_data)
+
+    def _connect(self) -> SqliteDb:
+        """Get the SqliteDb object to use."""
+        if threading.get_ident() not in self._dbs:
+            self._open_db()
+        return self._dbs[threading.get_ident()]
+
+    def __bool__(self) -> bool:
+        if threading.get_ident() not in self._dbs and not os.path.exists(self._filename):
+            return False
+        try:
+            with self._connect() as con:
+                with con.execute("SELECT * FROM file LIMIT 1") as cur:
+                    return bool(list(cur))
+        except CoverageException:
+            return False
+
+    def dumps(self) -> bytes:
+        """Serialize the current data to a byte string.
+
+        The format of the serialized data is not documented. It is only
+        suitable for use with :meth:`loads` in the same version of
+        coverage.py.
+
+        Note that this serialization is not what gets stored in coverage data
+        files.  This method is meant to produce bytes that can be transmitted
+        elsewhere and then deserialized with :meth:`loads`.
+
+        Returns:
+            A byte string of serialized data.
+
+        .. versionadded:: 5.0
+
+        """
+        self._debug_dataio("Dumping data from data file", self._filename)
+        with self._connect() as con:
+            script = con.dump()
+            return b"z" + zlib.compress(script.encode("utf-8"))
+
+    def loads(self, data: bytes) -> None:
+        """Deserialize data from :meth:`dumps`.
+
+        Use with a newly-created empty :class:`CoverageData` object.  It's
+        undefined what happens if the object already has data in it.
+
+        Note that this is not for reading data from a coverage data file.  It
+        is only for use on data you produced with :meth:`dumps`.
+
+        Arguments:
+            data: A byte string of serialized data produced by :meth:`dumps`.
+
+        .. versionadded:: 5.0
+
+        """
+        self._debug_dataio("Loading data into data file", self._filename)
+        if data[:1] != b"z":
+            raise DataError(
+                f"Unrecognized serialization: {data[:40]!r} (head of {len(data)} bytes)",
+            )
+        script = zlib.decompress(data[1:]).decode("utf-8")
+        self._dbs[threading.get_ident()] = db = SqliteDb(self._filename, self._debug, self._no_disk)
+        with db:
+            db.executescript(script)
+        self._read_db()
+        self._have_used = True
+
+    def _file_id(self, filename: str, add: bool = False) -> int | None:
+        """Get the file id for `filename`.
+
+        If filename is not in the database yet, add it if `add` is True.
+        If `add` is not True, return None.
+        """
+        if filename not in self._file_map:
+            if add:
+                with self._connect() as con:
+                    self._file_map[filename] = con.execute_for_rowid(
+                        "INSERT OR REPLACE INTO file (path) VALUES (?)",
+                        (filename,),
+                    )
+        return self._file_map.get(filename)
+
+    def _add_files(self, filenames: Collection[str]) -> None:
+        """Make sure all of `filenames` have ids in the database.
+
+        The files not already in the database are added with one statement,
+        and their ids read back, so that `_file_map` has all of `filenames`.
+
+        """
+        new_files = [filename for filename in filenames if filename not in self._file_map]
+        if not new_files:
+            return
+        with self._connect() as con:
+            con.executemany_void(
+                "INSERT OR IGNORE INTO file (path) VALUES (?)",
+                [(filename,) for filename in new_files],
+            )
+            for i in range(0, len(new_files), MAX_SQL_VARIABLES):
+                chunk = new_files[i : i + MAX_SQL_VARIABLES]
+                query = (
+                    "SELECT id, path FROM file WHERE path IN (" + ", ".join("?" * len(chunk)) + ")"
+                )
+                with con.execute(query, chunk) as cur:
+                    self._file_map.update({path: file_id for file_id, path in cur})
+
+    def _context_id(self, context: str) -> int | None:
+        """Get the id for a context."""
+        assert context is not None
+        self._start_using()
+        with self._connect() as con:
+            row = con.execute_one("SELECT id FROM context WHERE context = ?", (context,))
+            if row is not None:
+                return cast(int, row[0])
+            else:
+                return None
+
+    @_locked
+    def set_context(self, context: str | None) -> None:
+        """Set the current context for future :meth:`add_lines` etc.
+
+        `context` is a str, the name of the context to use for the next data
+        additions.  The context persists until the next :meth:`set_context`.
+
+        .. versionadded:: 5.0
+
+        """
+        if self._debug.should("dataop"):
+            self._debug.write(f"Setting coverage context: {context!r}")
+        self._current_context = context
+        self._current_context_id = None
+
+    def _set_context_id(self) -> None:
+        """Use the _current_context to set _current_context_id."""
+        context = self._current_context or ""
+        context_id = self._context_id(context)
+        if context_id is not None:
+            self._current_context_id = context_id
+        else:
+            with self._connect() as con:
+                self._current_context_id = con.execute_for_rowid(
+                    "INSERT INTO context (context) VALUES (?)",
+                    (context,),
+                )
+            self._context_index = None
+
+    def _get_context_index(self) -> ContextIndex:
+        """Get the ContextIndex for the contexts in the data file."""
+        if self._context_index is None:
+            with self._connect() as con:
+                with con.execute("SELECT id, context FROM context") as cur:
+                    self._context_index = ContextIndex(cur)
+        return self._context_index
+
+    def _line_contexts_indexed(self, con: SqliteDb) -> bool:
+        """Does the data file have a line_contexts table?"""
+        if self._has_line_contexts is None:
+            row = con.execute_one(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'line_contexts'"
+            )
+            self._has_line_contexts = row is not None
+        return self._has_line_contexts
+
+    def _drop_line_contexts(self, con: SqliteDb) -> None:
+        """The data is changing, so drop the line_contexts table if there is one."""
+        if self._line_contexts_indexed(con):
+            con.execute_void("DROP TABLE line_contexts")
+            self._has_line_contexts = False
+
+    def base_filename(self) -> str:
+        """The base filename for storing data.
+
+        .. versionadded:: 5.0
+
+        """
+        return self._basename
+
+    def data_filename(self) -> str:
+        """Where is the data stored?
+
+        .. versionadded:: 5.0
+
+        """
+        return self._filename
+
+    @_locked
+    def add_lines(self, line_data: Mapping[str, Collection[TLineNo]]) -> None:
+        """Add measured line data.
+
+        `line_data` is a dictionary mapping file names to iterables of ints::
+
+            { filename: { line1, line2, ... }, ...}
+
+        """
+        if self._debug.should("dataop"):
+            self._debug.write(
+                "Adding lines: %d files, %d lines total"
+                % (
+                    len(line_data),
+                    sum(len(lines) for lines in line_data.values()),
+                )
+            )
+            if self._debug.should("dataop2"):
+                for filename, linenos in sorted(line_data.items()):
+                    self._debug.write(f"  {filename}: {linenos}")
+        self._add_line_bits(
+            {filename: nums_to_numbits(linenos) for filename, linenos in line_data.items()}
+        )
+
+    def _add_line_bits(self, line_bits: Mapping[str, bytes]) -> None:
+        """Add measured line data already packed as numbits.
+
+        `line_bits` is a dictionary mapping file names to numbits.
+
+        """
+        self._start_using()
+        self._choose_lines_or_arcs(lines=True)
+        if not line_bits:
+            return
+        with self._connect() as con:
+            if self._current_context_id is None:
+                self._set_context_id()
+            context_id = self._current_context_id
+            self._drop_line_contexts(con)
+            self._add_files(line_bits)
+            data = [
+                (self._file_map[filename], context_id, numbits)
+                for filename, numbits in line_bits.items()
+            ]
+            if HAS_UPSERT:
+                assert con.con is not None
+                con.con.create_function("numbits_union", 2, numbits_union)
+                con.executemany_void(
+                    """
+                    INSERT INTO line_bits (file_id, context_id, numbits) VALUES (?, ?, ?)
+                    ON CONFLICT (file_id, context_id)
+                    DO UPDATE SET numbits = numbits_union(numbits, excluded.numbits)
+                    """,
+                    data,
+                )
+            else:
+                # Without upsert, read the existing data for these files in
+                # bulk, and merge it here.
+                existing: dict[int, bytes] = {}
+                for i in range(0, len(data), MAX_SQL_VARIABLES):
+                    file_ids = [file_id for file_id, _, _ in data[i : i + MAX_SQL_VARIABLES]]
+                    query = (
+                        "SELECT file_id, numbits FROM line_bits "
+                        + "WHERE context_id = ? AND file_id IN ("
+                        + ", ".join("?" * len(file_ids))
+                        + ")"
+                    )
+                    with con.execute(query, [context_id, *file_ids]) as cur:
+                        existing.update(cur)
+                data = [
+                    (file_id, context_id, numbits_union(line_bits, existing[file_id]))
+                    if file_id in existing
+                    else (file_id, context_id, line_bits)
+                    for file_id, context_id, line_bits in data
+                ]
+                con.executemany_void(
+                    """
+                    INSERT OR REPLACE INTO line_bits
+                    (file_id, context_id, numbits) VALUES (?, ?, ?)
+                    """,
+                    data,
+                )
+
+    @_locked
+    def add_arcs(self, arc_data: Mapping[str, Collection[TArc]]) -> None:
+        """Add measured arc data.
+
+        `arc_data` is a dictionary mapping file names to iterables of pairs of
+        ints::
+
+            { filename: { (l1,l2), (l1,l2), ... }, ...}
+
+        """
+        if self._debug.should("dataop"):
+            self._debug.write(
+                "Adding arcs: %d files, %d arcs total"
+                % (
+                    len(arc_data),
+                    sum(len(arcs) for arcs in arc_data.values()),
+                )
+            )
+            if self._debug.should("dataop2"):
+                for filename, arcs in sorted(arc_data.items()):
+                    self._debug.write(f"  {filename}: {arcs}")
+        self._start_using()
+        self._choose_lines_or_arcs(arcs=True)
+        if not arc_data:
+            return
+        with self._connect() as con:
+            if self._current_context_id is None:
+                self._set_context_id()
+            context_id = self._current_context_id
+            self._drop_line_contexts(con)
+            self._add_files([filename for filename, arcs in arc_data.items() if arcs])
+            data = [
+                (self._file_map[filename], context_id, fromno, tono)
+                for filename, arcs in arc_data.items()
+                for fromno, tono in arcs
+            ]
+            con.executemany_void(
+                """
+                INSERT OR IGNORE INTO arc
+                (file_id, context_id, fromno, tono) VALUES (?, ?, ?, ?)
+                """,
+                data,
+            )
+
+    @_locked
+    def _add_context_data(
+        self,
+        context_data: Mapping[str | None, Mapping[str, bytes] | Mapping[str, Collection[TArc]]],
+        arcs: bool,
+    ) -> None:
+        """Add measured data for a number of contexts in one transaction.
+
+        `context_data` maps contexts to the data for that context: a mapping of
+        file names to numbits of lines, or if `arcs` is true, to arcs.  The
+        current context is unchanged afterward.
+
+        """
+        self._start_using()
+        with self._connect():
+            current_context = self._current_context
+            for context, file_data in context_data.items():
+                self.set_context(context)
+                if arcs:
+                    self.add_arcs(cast(Mapping[str, Collection[TArc]], file_data))
+                else:
+                    self._add_line_bits(cast(Mapping[str, bytes], file_data))
+            self.set_context(current_context)
+
+    def _choose_lines_or_arcs(self, lines: bool = False, arcs: bool = False) -> None:
+        """Force the data file to choose between lines and arcs."""
+        assert lines or arcs
+        assert not (lines and arcs)
+        if lines and self._has_arcs:
+            if self._debug.should("dataop"):
+                self._debug.write("Error: Can't add line measurements to existing branch data")
+            raise DataError("Can't add line measurements to existing branch data")
+        if arcs and self._has_lines:
+            if self._debug.should("dataop"):
+                self._debug.write("Error: Can't add branch measurements to existing line data")
+            raise DataError("Can't add branch measurements to existing line data")
+        if not self._has_arcs and not self._has_lines:
+            self._has_lines = lines
+            self._has_arcs = arcs
+            with self._connect() as con:
+                con.execute_void(
+                    "INSERT OR IGNORE INTO meta (key, value) VALUES (?, ?)",
+                    ("has_arcs", str(int(arcs))),
+                )
+
+    @_locked
+    def add_file_tracers(self, file_tracers: Mapping[str, str]) -> None:
+        """Add per-file plugin information.
+
+        `file_tracers` is { filename: plugin_name, ... }
+
+        """
+        if self._debug.should("dataop"):
+            self._debug.write(f"Adding file tracers: {len(file_tracers)} files")
+        if not file_tracers:
+            return
+        self._start_using()
+        with self._connect() as con:
+            for filename, plugin_name in file_tracers.items():
+                file_id = self._file_id(filename, add=True)
+                existing_plugin = self.file_tracer(filename)
+                if existing_plugin:
+                    if existing_plugin != plugin_name:
+                        raise DataError(
+                            "Conflicting file tracer name for '{}': {!r} vs {!r}".format(
+                                filename,
+                                existing_plugin,
+                                plugin_name,
+                            ),
+                        )
+                elif plugin_name:
+                    con.execute_void(
+                        "INSERT INTO TRACER (file_id, tracer) VALUES (?, ?)",
+                        (file_id, plugin_name),
+                    )
+
+    def touch_file(self, filename: str, plugin_name: str = "") -> None:
+        """Ensure that `filename` appears in the data, empty if needed.
+
+        `plugin_name` is the name of the plugin responsible for this file.
+        It is used to associate the right filereporter, etc.
+        """
+        self.touch_files([filename], plugin_name)
+
+    def touch_files(self, filenames: Collection[str], plugin_name: str | None = None) -> None:
+        """Ensure that `filenames` appear in the data, empty if needed.
+
+        `plugin_name` is the name of the plugin responsible for these files.
+        It is used to associate the right filereporter, etc.
+        """
+        if self._debug.should("dataop"):
+            self._debug.write(f"Touching {filenames!r}")
+        self._start_using()
+        with self._connect():  # Use this to get one transaction.
+            if not self._has_arcs and not self._has_lines:
+                raise DataError("Can't touch files in an empty CoverageData")
+
+            self._add_files(filenames)
+            for filename in filenames:
+                if plugin_name:
+                    # Set the tracer for this file
+                    self.add_file_tracers({filename: plugin_name})
+
+    def purge_files(self, filenames: Collection[str]) -> None:
+        """Purge any existing coverage data for the given `filenames`.
+
+        .. versionadded:: 7.2
+
+        """
+        if self._debug.should("dataop"):
+            self._debug.write(f"Purging data for {filenames!r}")
+        self._start_using()
+        with self._connect() as con:
+            if self._has_lines:
+                sql = "DELETE FROM line_bits WHERE file_id=?"
+            elif self._has_arcs:
+                sql = "DELETE FROM arc WHERE file_id=?"
+            else:
+                raise DataError("Can't purge files in an empty CoverageData")
+
+            self._drop_line_contexts(con)
+            for filename in filenames:
+                file_id = self._file_id(filename, add=False)
+                if file_id is None:
+                    continue
+                con.execute_void(sql, (file_id,))
+
+    def update(
+        self,
+        other_data: CoverageData,
+        map_path: Callable[[str], str] | None = None,
+    ) -> None:
+        """Update this data with data from another :class:`CoverageData`.
+
+        If `map_path` is provided, it's a function that re-map paths to match
+        the local machine's.  Note: `map_path` is None only when called
+        directly from the test suite.
+
+        """
+        self._update_many([other_data], map_path)
+
+    def _update_many(
+        self,
+        others: Sequence[CoverageData],
+        map_path: Callable[[str], str] | None = None,
+    ) -> None:
+        """Update this data with data from a number of other CoverageData's.
+
+        All of `others` are attached to our database at once, and merged in
+        one transaction.  SQLite limits the number of attached databases, so
+        there can be at most :data:`MAX_UPDATE_BATCH` of them.
+
+        """
+        assert 0 < len(others) <= MAX_UPDATE_BATCH
+        if self._debug.should("dataop"):
+            for other_data in others:
+                self._debug.write(
+                    "Updating with data from {!r}".format(
+                        getattr(other_data, "_filename", "???"),
+                    )
+                )
+        has_lines, has_arcs = self._has_lines, self._has_arcs
+        for other_data in others:
+            if has_lines and other_data._has_arcs:
+                raise DataError(
+                    "Can't combine branch coverage data with statement data", slug="cant-combine"
+                )
+            if has_arcs and other_data._has_lines:
+                raise DataError(
+                    "Can't combine statement coverage data with branch data", slug="cant-combine"
+                )
+            has_lines = has_lines or other_data._has_lines
+            has_arcs = has_arcs or other_data._has_arcs
+
+        map_path = map_path or (lambda p: p)
+
+        # Force the database we're writing to to exist before we start nesting contexts.
+        self._start_using()
+        for other_data in others:
+            other_data.read()
+
+            # Ensure other_data has a properly initialized database
+            with other_data._connect():
+                pass
+
+        # Each other database is attached as other_db0, other_db1, etc.  Temp
+        # views combine the same table from all of them, with a `db` column
+        # to tell the rows apart.  Ids are only unique within one database, so
+        # joins between the views have to match `db` as well as ids.
+        schemas = [f"other_db{i}" for i in range(len(others))]
+
+        def union_all(select: str) -> str:
+            """Combine `select` for each of the attached databases."""
+            return " UNION ALL ".join(
+                select.format(db=i, schema=schema) for i, schema in enumerate(schemas)
+            )
+
+        with self._connect() as con:
+            assert con.con is not None
+            con.con.isolation_level = "IMMEDIATE"
+
+            # Register functions for SQLite
+            con.con.create_function("numbits_union", 2, numbits_union)
+            con.con.create_function("map_path", 1, map_path)
+            con.con.create_aggregate(
+                "numbits_union_agg",
+                1,
+                NumbitsUnionAgg,  # type: ignore[arg-type]
+            )
+
+            self._drop_line_contexts(con)
+
+            # Attach the other databases
+            for schema, other_data in zip(schemas, others):
+                con.execute_void(f"ATTACH DATABASE ? AS {schema}", (other_data.data_filename(),))
+
+            try:
+                for table, columns in [
+                    ("context", "id, context"),
+                    ("arc", "file_id, context_id, fromno, tono"),
+                    ("line_bits", "file_id, context_id, numbits"),
+                    ("tracer", "file_id, tracer"),
+                ]:
+                    con.execute_void(
+                        f"CREATE TEMP VIEW other_{table} AS "
+                        + union_all(f"SELECT {{db}} AS db, {columns} FROM {{schema}}.{table}")
+                    )
+
+                # Create temporary table with mapped file paths to avoid repeated map_path() calls
+                con.execute_void(
+                    "CREATE TEMP TABLE other_file_mapped AS "
+                    + union_all(
+                        "SELECT {db} AS db, id AS other_file_id, map_path(path) AS mapped_path "
+                        + "FROM {schema}.file"
+                    )
+                )
+
+                # Check for tracer conflicts before proceeding.  The tracer for
+                # each file from our data (db -1) and the other data is compared
+                # to the tracers for the same file in the databases after it.
+                con.execute_void("""
+                    CREATE TEMP TABLE file_tracer AS
+                    SELECT -1 AS db, main.file.path AS path, COALESCE(main.tracer.tracer, '') AS tracer
+                    FROM main.file
+                    LEFT JOIN main.tracer ON main.file.id = main.tracer.file_id
+                    WHERE main.file.path IN (SELECT mapped_path FROM other_file_mapped)
+                    UNION ALL
+                    SELECT other_file_mapped.db, other_file_mapped.mapped_path, COALESCE(other_tracer.tracer, '')
+                    FROM other_file_mapped
+                    LEFT JOIN other_tracer
+                        ON other_file_mapped.db = other_tracer.db
+                        AND other_file_mapped.other_file_id = other_tracer.file_id
+                """)
+                with con.execute("""
+                    SELECT earlier.path, earlier.tracer, later.tracer
+                    FROM file_tracer AS earlier
+                    INNER JOIN file_tracer AS later
+                        ON earlier.path = later.path AND earlier.db < later.db
+                    WHERE earlier.tracer != later.tracer
+                    ORDER BY later.db, earlier.db
+                    LIMIT 1
+                """) as cur:
+                    conflicts = list(cur)
+                    if conflicts:
+                        path, this_tracer, other_tracer = conflicts[0]
+                        raise DataError(
+                            "Conflicting file tracer name for '{}': {!r} vs {!r}".format(
+                                path,
+                                this_tracer,
+                                other_tracer,
+                            ),
+                        )
+
+                # Insert missing files from the other dbs (with map_path applied)
+                con.execute_void("""
+                    INSERT OR IGNORE INTO main.file (path)
+                    SELECT mapped_path FROM other_file_mapped
+                    ORDER BY db, other_file_id
+                """)
+
+                # Insert missing contexts from the other dbs
+                con.execute_void("""
+                    INSERT OR IGNORE INTO main.context (context)
+                    SELECT context FROM other_context
+                    ORDER BY db, id
+                """)
+                self._context_index = None
+
+                # Update file_map with any new files
+                with con.execute("SELECT id, path FROM file") as cur:
+                    self._file_map.update({path: id for id, path in cur})
+
+                with con.execute("""
+                    SELECT
+                        EXISTS(SELECT 1 FROM other_arc),
+                        EXISTS(SELECT 1 FROM other_line_bits)
+                """) as cur:
+                    has_arcs, has_lines = cur.fetchone()
+
+                # Create context mapping table for faster lookups
+                con.execute_void("""
+                    CREATE TEMP TABLE context_mapping AS
+                    SELECT
+                        other_context.db as db,
+                        other_context.id as other_id,
+                        main_context.id as main_id
+                    FROM other_context
+                    INNER JOIN main.context AS main_context ON other_context.context = main_context.context
+                """)
+
+                # Handle arcs if present in the other dbs
+                if has_arcs:
+                    self._choose_lines_or_arcs(arcs=True)
+
+                    con.execute_void("""
+                        INSERT OR IGNORE INTO main.arc (file_id, context_id, fromno, tono)
+                        SELECT
+                            main_file.id,
+                            context_mapping.main_id,
+                            other_arc.fromno,
+                            other_arc.tono
+                        FROM other_arc
+                        INNER JOIN other_file_mapped
+                            ON other_arc.db = other_file_mapped.db
+                            AND other_arc.file_id = other_file_mapped.other_file_id
+                        INNER JOIN context_mapping
+                            ON other_arc.db = context_mapping.db
+                            AND other_arc.context_id = context_mapping.other_id
+                        INNER JOIN main.file AS main_file ON other_file_mapped.mapped_path = main_file.path
+                    """)
+
+                # Handle line_bits if present in the other dbs
+                if has_lines:
+                    self._choose_lines_or_arcs(lines=True)
+
+                    # Handle line_bits by aggregating the other dbs' data by mapped
+                    # target, then inserting/updating
+                    con.execute_void("""
+                        INSERT OR REPLACE INTO main.line_bits (file_id, context_id, numbits)
+                        SELECT
+                            main_file.id,
+                            aggregated.context_id,
+                            numbits_union(
+                                COALESCE((
+                                    SELECT numbits FROM main.line_bits
+                                    WHERE file_id = main_file.id AND context_id = aggregated.context_id
+                                ), X''),
+                                aggregated.combined_numbits
+                            )
+                        FROM (
+                            SELECT
+                                other_file_mapped.mapped_path,
+                                context_mapping.main_id AS context_id,
+                                numbits_union_agg(other_line_bits.numbits) as combined_numbits
+                            FROM other_line_bits
+                            INNER JOIN other_file_mapped
+                                ON other_line_bits.db = other_file_mapped.db
+                                AND other_line_bits.file_id = other_file_mapped.other_file_id
+                            INNER JOIN context_mapping
+                                ON other_line_bits.db = context_mapping.db
+                                AND other_line_bits.context_id = context_mapping.other_id
+                            GROUP BY other_file_mapped.mapped_path, context_mapping.main_id
+                        ) AS aggregated
+                        INNER JOIN main.file AS main_file ON aggregated.mapped_path = main_file.path
+                    """)
+
+                # Insert tracers from the other dbs (avoiding conflicts we already checked)
+                con.execute_void("""
+                    INSERT OR IGNORE INTO main.tracer (file_id, tracer)
+                    SELECT
+                        main_file.id,
+                        other_tracer.tracer
+                    FROM other_tracer
+                    INNER JOIN other_file_mapped
+                        ON other_tracer.db = other_file_mapped.db
+                        AND other_tracer.file_id = other_file_mapped.other_file_id
+                    INNER JOIN main.file AS main_file ON other_file_mapped.mapped_path = main_file.path
+                    ORDER BY other_tracer.db
+                """)
+            except BaseException:
+                con.con.rollback()
+                raise
+            else:
+                con.con.commit()
+            finally:
+                # Leave the connection as we found it: it stays open for
+                # in-memory data, and could be used to merge more files.  This
+                # is after the transaction, since DETACH can't be inside one.
+                for name in ["context", "arc", "line_bits", "tracer"]:
+                    con.execute_void(f"DROP VIEW IF EXISTS temp.other_{name}", fail_ok=True)
+                for name in ["other_file_mapped", "file_tracer", "context_mapping"]:
+                    con.execute_void(f"DROP TABLE IF EXISTS temp.{name}", fail_ok=True)
+                for schema in schemas:
+                    con.execute_void(f"DETACH DATABASE {schema}", fail_ok=True)
+
+        if not self._no_disk:
+            # Update all internal cache data.
+            self._reset()
+            self.read()
+
+    def erase(self, parallel: bool = False) -> None:
+        """Erase the data in this object.
+
+        If `parallel` is true, then also deletes data files created from the
+        basename by parallel-mode.
+
+        """
+        self._reset()
+        if self._no_disk:
+            return
+        self._debug_dataio("Erasing data file", self._filename)
+        file_be_gone(self._filename)
+        if parallel:
+            data_dir, local = os.path.split(self._filename)
+            local_abs_path = os.path.join(os.path.abspath(data_dir), local)
+            pattern = glob.escape(local_abs_path) + ".*"
+            for filename in glob.glob(pattern):
+                self._debug_dataio("Erasing parallel data file", filename)
+                file_be_gone(filename)
+
+    def read(self, read_only: bool = False) -> None:
+        """Start using an existing data file.
+
+        If `read_only` is true, the file is opened only for reading, which is
+        faster for large data files.  The file must not change while this
+        object uses it, and no data can be added, until :meth:`erase`.  The
+        first :meth:`lines` or :meth:`arcs` call reads the data for all of the
+        files in one pass, for the calls that follow.
+
+        .. versionadded:: 7.12
+            The `read_only` parameter.
+
+        """
+        if os.path.exists(self._filename):
+            if read_only and not self._read_only:
+                # Re-open any connections read-only.
+                self.close(force=True)
+                self._read_only = True
+            with self._connect():
+                self._have_used = True
+
+    def write(self) -> None:
+        """Ensure the data is written to the data file."""
+        self._debug_dataio("Writing (no-op) data file", self._filename)
+
+    def _start_using(self) -> None:
+        """Call this before using the database at all."""
+        if self._pid != os.getpid():
+            # Looks like we forked! Have to start a new data file.
+            self._reset()
+            self._choose_filename()
+            self._pid = os.getpid()
+        if not self._have_used:
+            self.erase()
+        self._have_used = True
+
+    def has_arcs(self) -> bool:
+        """Does the database have arcs (True) or lines (False)."""
+        return bool(self._has_arcs)
+
+    def measured_files(self) -> set[str]:
+        """A set of all files that have been measured.
+
+        Note that a file may be mentioned as measured even though no lines or
+        arcs for that file are present in the data.
+
+        """
+        return set(self._file_map)
+
+    def measured_contexts(self) -> set[str]:
+        """A set of all contexts that have been measured.
+
+        .. versionadded:: 5.0
+
+        """
+        self._start_using()
+        with self._connect() as con:
+            with con.execute("SELECT DISTINCT(context) FROM context") as cur:
+                contexts = {row[0] for row in cur}
+        return contexts
+
+    def file_tracer(self, filename: str) -> str | None:
+        """Get the plugin name of the file tracer for a file.
+
+        Returns the name of the plugin that handles this file.  If the file was
+        measured, but didn't use a plugin, then "" is returned.  If the file
+        was not measured, then None is returned.
+
+        """
+        self._start_using()
+        with self._connect() as con:
+            file_id = self._file_id(filename)
+            if file_id is None:
+                return None
+            row = con.execute_one("SELECT tracer FROM tracer WHERE file_id = ?", (file_id,))
+            if row is not None:
+                return row[0] or ""
+            return ""  # File was measured, but no tracer associated.
+
+    def set_query_context(self, context: str) -> None:
+        """Set a context for subsequent querying.
+
+        The next :meth:`lines`, :meth:`arcs`, or :meth:`contexts_by_lineno`
+        calls will be limited to only one context.  `context` is a string which
+        must match a context exactly.  If it does not, no exception is raised,
+        but queries will return no data.
+
+        .. versionadded:: 5.0
+
+        """
+        self._start_using()
+        with self._connect() as con:
+            with con.execute("SELECT id FROM context WHERE context = ?", (context,)) as cur:
+                self._query_context_ids = [row[0] for row in cur.fetchall()]
+        self._all_line_bits = self._all_arcs = None
+
+    def set_query_contexts(self, contexts: Sequence[str] | None) -> None:
+        """Set a number of contexts for subsequent querying.
+
+        The next :meth:`lines`, :meth:`arcs`, or :meth:`contexts_by_lineno`
+        calls will be limited to the specified contexts.  `contexts` is a list
+        of Python regular expressions.  Contexts will be matched using
+        :func:`re.search <python:re.search>`.  Data will be included in query
+        results if they are part of any of the contexts matched.
+
+        .. versionadded:: 5.0
+
+        """
+        self._start_using()
+        if contexts:
+            context_index = self._get_context_index()
+            ids: set[int] = set()
+            for pattern in contexts:
+                ids.update(context_index.ids_matching(pattern))
+            self._query_context_ids = sorted(ids)
+        else:
+            self._query_context_ids = None
+        self._all_line_bits = self._all_arcs = None
+
+    def _limit_to_query_contexts(
+        self,
+        query: str,
+        data: list[Any],
+        column: str,
+    ) -> tuple[str, list[Any], Container[int] | None]:
+        """Limit `query` to the contexts set by set_query_context(s).
+
+        Returns the query and its data, and a container of context ids to
+        keep.  If it isn't None, the query wasn't limited, because there are
+        too many contexts for an IN clause, and the caller must check each
+        row's context id against the container.
+
+        """
+        ids = self._query_context_ids
+        if ids is None:
+            return query, data, None
+        if len(ids) > MAX_SQL_VARIABLES:
+            return query, data, frozenset(ids)
+        query += f" AND {column} IN (" + ", ".join("?" * len(ids)) + ")"
+        return query, data + ids, None
+
+    def lines(self, filename: str) -> list[TLineNo] | None:
+        """Get the list of lines executed for a source file.
+
+        If the file was not measured, returns None.  A file might be measured,
+        and have no lines executed, in which case an empty list is returned.
+
+        If the file was executed, returns a list of integers, the line numbers
+        executed in the file. The list is in no particular order.
+
+        """
+        line_bits = self.line_bits(filename)
+        if line_bits is None:
+            return None
+        return numbits_to_nums(line_bits)
+
+    def line_bits(self, filename: str) -> bytes | None:
+        """Get the lines executed for a source file, as a numbits.
+
+        If the file was not measured, returns None.  A file might be measured,
+        and have no lines executed, in which case an empty numbits is returned.
+
+        This is the same information as :meth:`lines`, but the data for all of
+        the queried contexts is merged without converting it to integers, so
+        it's faster when there are many contexts.  Use the functions in
+        :mod:`coverage.numbits` to work with the result.
+
+        .. versionadded:: 7.12
+
+        """
+        self._start_using()
+        if self.has_arcs():
+            arcs = self.arcs(filename)
+            if arcs is None:
+                return None
+            all_lines = itertools.chain.from_iterable(arcs)
+            return nums_to_numbits({l for l in all_lines if l > 0})
+
+        with self._connect() as con:
+            file_id = self._file_id(filename)
+            if file_id is None:
+                return None
+            elif self._read_only:
+                return self._read_all_line_bits().get(file_id, b"")
+            else:
+                query = "SELECT context_id, numbits FROM line_bits WHERE file_id = ?"
+                query, data, keep = self._limit_to_query_contexts(query, [file_id], "context_id")
+                union = NumbitsUnionAgg()
+                with con.execute(query, data) as cur:
+                    for context_id, numbits in cur:
+                        if keep is None or context_id in keep:
+                            union.step(numbits)
+                return union.finalize()
+
+    def arcs(self, filename: str) -> list[TArc] | None:
+        """Get the list of arcs executed for a file.
+
+        If the file was not measured, returns None.  A file might be measured,
+        and have no arcs executed, in which case an empty list is returned.
+
+        If the file was executed, returns a list of 2-tuples of integers. Each
+        pair is a starting line number and an ending line number for a
+        transition from one line to another. The list is in no particular
+        order.
+
+        Negative numbers have special meaning.  If the starting line number is
+        -N, it represents an entry to the code object that starts at line N.
+        If the ending ling number is -N, it's an exit from the code object that
+        starts at line N.
+
+        """
+        self._start_using()
+        with self._connect() as con:
+            file_id = self._file_id(filename)
+            if file_id is None:
+                return None
+            elif self._read_only:
+                return list(self._read_all_arcs().get(file_id, ()))
+            else:
+                query = "SELECT DISTINCT fromno, tono FROM arc WHERE file_id = ?"
+                query, data, keep = self._limit_to_query_contexts(query, [file_id], "context_id")
+                if keep is not None:
+                    query = "SELECT context_id, fromno, tono FROM arc WHERE file_id = ?"
+                    with con.execute(query, data) as cur:
+                        return list({(fromno, tono) for cid, fromno, tono in cur if cid in keep})
+                with con.execute(query, data) as cur:
+                    return list(cur)
+
+    def all_lines(self) -> Iterator[tuple[str, list[TLineNo]]]:
+        """Get the lines executed for all of the measured files.
+
+        Produces a pair for each measured file, in file name order: the file
+        name, and the list of lines executed in it, as :meth:`lines` would
+        return.  The data is read with one query rather than one for each
+        file, so this is much faster than :meth:`lines` when there are many
+        files.
+
+        .. versionadded:: 7.12
+
+        """
+        self._start_using()
+        if self.has_arcs():
+            for filename, arcs in self.all_arcs():
+                yield filename, list({l for arc in arcs for l in arc if l > 0})
+            return
+
+        if self._read_only:
+            all_bits = self._read_all_line_bits()
+            for filename, file_id in sorted(self._file_map.items()):
+                yield filename, numbits_to_nums(all_bits.get(file_id, b""))
+            return
+
+        with self._connect() as con:
+            # The contexts are limited in the join condition, not in a WHERE
+            # clause, so that files with no data in them are still produced.
+            query = (
+                "SELECT file.path, line_bits.context_id, line_bits.numbits FROM file "
+                + "LEFT JOIN line_bits ON (line_bits.file_id = file.id"
+            )
+            query, data, keep = self._limit_to_query_contexts(query, [], "line_bits.context_id")
+            query += ") ORDER BY file.path"
+            with con.execute(query, data) as cur:
+                for filename, rows in itertools.groupby(cur, key=lambda row: row[0]):
+                    union = NumbitsUnionAgg()
+                    for _, context_id, numbits in rows:
+                        if numbits is not None and (keep is None or context_id in keep):
+                            union.step(numbits)
+                    yield filename, numbits_to_nums(union.finalize())
+
+    def all_arcs(self) -> Iterator[tuple[str, list[TArc]]]:
+        """Get the arcs executed for all of the measured files.
+
+        Produces a pair for each measured file, in file name order: the file
+        name, and the list of arcs executed in it, as :meth:`arcs` would
+        return.  The data is read with one query rather than one for each
+        file, so this is much faster than :meth:`arcs` when there are many
+        files.
+
+        .. versionadded:: 7.12
+
+        """
+        self._start_using()
+        if self._read_only:
+            all_arcs = self._read_all_arcs()
+            for filename, file_id in sorted(self._file_map.items()):
+                yield filename, list(all_arcs.get(file_id, ()))
+            return
+
+        with self._connect() as con:
+            # The contexts are limited in the join condition, not in a WHERE
+            # clause, so that files with no data in them are still produced.
+            query = (
+                "SELECT file.path, arc.context_id, arc.fromno, arc.tono FROM file "
+                + "LEFT JOIN arc ON (arc.file_id = file.id"
+            )
+            query, data, keep = self._limit_to_query_contexts(query, [], "arc.context_id")
+            query += ") ORDER BY file.path"
+            with con.execute(query, data) as cur:
+                for filename, rows in itertools.groupby(cur, key=lambda row: row[0]):
+                    arcs = {
+                        (fromno, tono)
+                        for _, context_id, fromno, tono in rows
+                        if fromno is not None and (keep is None or context_id in keep)
+                    }
+                    yield filename, list(arcs)
+
+    def _read_all_line_bits(self) -> dict[int, bytes]:
+        """Read the lines for all files, for a read-only data file.
+
+        Returns a dict mapping file ids to numbits, for the query contexts.
+        The table is scanned once, in the order it's stored.
+
+        """
+        if self._all_line_bits is None:
+            keep = None if self._query_context_ids is None else set(self._query_context_ids)
+            all_bits: dict[int, int] = collections.defaultdict(int)
+            with self._connect() as con:
+                with con.execute("SELECT file_id, context_id, numbits FROM line_bits") as cur:
+                    for file_id, context_id, numbits in cur:
+                        if keep is None or context_id in keep:
+                            all_bits[file_id] |= int.from_bytes(numbits, "little")
+            self._all_line_bits = {
+                file_id: bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+                for file_id, bits in all_bits.items()
+            }
+        return self._all_line_bits
+
+    def _read_all_arcs(self) -> dict[int, set[TArc]]:
+        """Read the arcs for all files, for a read-only data file.
+
+        Returns a dict mapping file ids to sets of arcs, for the query
+        contexts.  The table is scanned once, in the order it's stored.
+
+        """
+        if self._all_arcs is None:
+            keep = None if self._query_context_ids is None else set(self._query_context_ids)
+            all_arcs: dict[int, set[TArc]] = collections.defaultdict(set)
+            with self._connect() as con:
+                query = "SELECT file_id, context_id, fromno, tono FROM arc"
+                with con.execute(query) as cur:
+                    for file_id, context_id, fromno, tono in cur:
+                        if keep is None or context_id in keep:
+                            all_arcs[file_id].add((fromno, tono))
+            self._all_arcs = dict(all_arcs)
+        return self._all_arcs
+
+    def contexts_by_lineno(self, filename: str) -> dict[TLineNo, list[str]]:
+        """Get the contexts for each line in a file.
+
+        Returns:
+            A dict mapping line numbers to a list of context names.
+
+        .. versionadded:: 5.0
+
+        """
+        self._start_using()
+        with self._connect() as con:
+            file_id = self._file_id(filename)
+            if file_id is None:
+                return {}
+
+            lineno_contexts_map = collections.defaultdict(set)
+            if self.has_arcs():
+                query = """
+                    SELECT arc.context_id, arc.fromno, arc.tono, context.context
+                    FROM arc, context
+                    WHERE arc.file_id = ? AND arc.context_id = context.id
+                """
+                query, data, keep = self._limit_to_query_contexts(
+                    query, [file_id], "arc.context_id"
+                )
+                with con.execute(query, data) as cur:
+                    for context_id, fromno, tono, context in cur:
+                        if keep is not None and context_id not in keep:
+                            continue
+                        if fromno > 0:
+                            lineno_contexts_map[fromno].add(context)
+                        if tono > 0:
+                            lineno_contexts_map[tono].add(context)
+            else:
+                query = """
+                    SELECT l.context_id, l.numbits, c.context FROM line_bits l, context c
+                    WHERE l.context_id = c.id
+                    AND file_id = ?
+                """
+                query, data, keep = self._limit_to_query_contexts(query, [file_id], "l.context_id")
+                with con.execute(query, data) as cur:
+                    for context_id, numbits, context in cur:
+                        if keep is not None and context_id not in keep:
+                            continue
+                        for lineno in numbits_to_nums(numbits):
+                            lineno_contexts_map[lineno].add(context)
+
+        return {lineno: list(contexts) for lineno, contexts in lineno_contexts_map.items()}
+
+    def index_line_contexts(self) -> None:
+        """Build an index of the contexts that executed each line.
+
+        The index is stored in the data file, and makes :meth:`contexts_for_line`
+        a single lookup instead of reading all of the data for the file.  Any
+        change to the data drops the index, so build it once all of the data
+        has been collected or combined.  Building it again while it's current
+        does nothing.
+
+        .. versionadded:: 7.12
+
+        """
+        self._start_using()
+        with self._connect() as con:
+            if self._line_contexts_indexed(con):
+                return
+            has_arcs = self.has_arcs()
+            if has_arcs:
+                query = "SELECT file_id, context_id, fromno, tono FROM arc ORDER BY file_id"
+            else:
+                query = "SELECT file_id, context_id, numbits FROM line_bits ORDER BY file_id"
+            con.execute_void(LINE_CONTEXTS_SCHEMA)
+            insert = "INSERT INTO line_contexts (file_id, lineno, context_bits) VALUES (?, ?, ?)"
+            with con.execute(query) as cur:
+                # Working on one file at a time keeps the per-line dict small.
+                for file_id, file_rows in itertools.groupby(cur, key=lambda row: row[0]):
+                    # Context ids can repeat for arcs, but numbits ignores that.
+                    line_contexts: dict[TLineNo, list[int]] = collections.defaultdict(list)
+                    if has_arcs:
+                        for _, context_id, fromno, tono in file_rows:
+                            if fromno > 0:
+                                line_contexts[fromno].append(context_id)
+                            if tono > 0:
+                                line_contexts[tono].append(context_id)
+                    else:
+                        for _, context_id, numbits in file_rows:
+                            for lineno in numbits_to_nums(numbits):
+                                line_contexts[lineno].append(context_id)
+                    con.executemany_void(
+                        insert,
+                        [
+                            (file_id, lineno, nums_to_numbits(context_ids))
+                            for lineno, context_ids in line_contexts.items()
+                        ],
+                    )
+            self._has_line_contexts = True
+
+    def contexts_for_line(self, filename: str, lineno: TLineNo) -> list[str]:
+        """Get the contexts that executed one line of a file.
+
+        Returns a sorted list of context names, empty if the line wasn't
+        executed.  The contexts are limited by :meth:`set_query_context` or
+        :meth:`set_query_contexts`, like :meth:`contexts_by_lineno`.
+
+        If :meth:`index_line_contexts` has built the index, this reads one row
+        of it.  Otherwise, it's computed from :meth:`contexts_by_lineno`.
+
+        .. versionadded:: 7.12
+
+        """
+        return sorted(self.contexts_for_lines(filename, [lineno]))
+
+    def contexts_for_lines(self, filename: str, linenos: Iterable[TLineNo]) -> set[str]:
+        """Get the contexts that executed any of a number of lines of a file.
+
+        Returns a set of context names, limited like :meth:`contexts_for_line`.
+        The data for the file is read once, however many lines there are: if
+        :meth:`index_line_contexts` has built the index, only the rows for
+        `linenos` are read.
+
+        .. versionadded:: 7.12
+
+        """
+        self._start_using()
+        with self._connect() as con:
+            if not self._line_contexts_indexed(con):
+                by_lineno = self.contexts_by_lineno(filename)
+                return {context for lineno in linenos for context in by_lineno.get(lineno, ())}
+            file_id = self._file_id(filename)
+            if file_id is None:
+                return set()
+            wanted = sorted(set(linenos))
+            union = NumbitsUnionAgg()
+            for i in range(0, len(wanted), MAX_SQL_VARIABLES):
+                chunk = wanted[i : i + MAX_SQL_VARIABLES]
+                query = (
+                    "SELECT context_bits FROM line_contexts WHERE file_id = ? AND lineno IN ("
+                    + ", ".join("?" * len(chunk))
+                    + ")"
+                )
+                with con.execute(query, [file_id, *chunk]) as cur:
+                    for (context_bits,) in cur:
+                        union.step(context_bits)
+        context_ids = numbits_to_nums(union.finalize())
+        if self._query_context_ids is not None:
+            keep = set(self._query_context_ids)
+            context_ids = [context_id for context_id in context_ids if context_id in keep]
+        names = self._get_context_index().names
+        return {names[context_id] for context_id in context_ids}
+
+    @classmethod
+    def sys_info(cls) -> list[tuple[str, Any]]:
+        """Our information for `Coverage.sys_info`.
+
+        Returns a list of (key, value) pairs.
+
+        """
+        with SqliteDb(":memory:", debug=NoDebugging()) as db:
+            with db.execute("PRAGMA temp_store") as cur:
+                temp_store = [row[0] for row in cur]
+            with db.execute("PRAGMA compile_options") as cur:
+                copts = [row[0] for row in cur]
+            copts = textwrap.wrap(", ".join(copts), width=75)
+
+        return [
+            ("sqlite3_sqlite_version", sqlite3.sqlite_version),
+            ("sqlite3_temp_store", temp_store),
+            ("sqlite3_compile_options", copts),
+        ]
+
+
+def filename_suffix(suffix: str | bool | None) -> str | None:
+    """Compute a filename suffix for a data file.
+
+    If `suffix` is a string or None, simply return it. If `suffix` is True,
+    then build a suffix incorporating the hostname, process id, and a random
+    number.
+
+    Returns a string or None.
+
+    """
+    if suffix is True:
+        # If data_suffix was a simple true value, then make a suffix with
+        # plenty of distinguishing information.  We do this here in
+        # `save()` at the last minute so that the pid will be correct even
+        # if the process forks.
+        die = random.Random(os.urandom(8))
+        letters = string.ascii_uppercase + string.ascii_lowercase
+        rolls = "".join(die.choice(letters) for _ in range(6))
+        suffix = f"{socket.gethostname()}.{os.getpid()}.X{rolls}x"
+    elif suffix is False:
+        suffix = None
+    return suffix
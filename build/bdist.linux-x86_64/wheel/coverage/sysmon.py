@@ -0,0 +1,848 @@
+# Licensed under the Apache License: http://www.apache.org/licenses/LICENSE-2.0
+# For details: https://github.com/coveragepy/coveragepy/blob/main/NOTICE.txt
+
+"""Callback functions and support for sys.monitoring data collection."""
+
+from __future__ import annotations
+
+import collections
+import functools
+import inspect
+import os
+import os.path
+import sys
+import threading
+import traceback
+import weakref
+from dataclasses import dataclass
+from types import CodeType, FrameType
+from typing import Any, Callable, NewType, Optional, cast
+
+from coverage import env
+from coverage.bytecode import TBranchTrails, always_jumps, branch_trails
+from coverage.debug import short_filename, short_stack
+from coverage.exceptions import NotPython
+from coverage.misc import Hasher, isolate_module
+from coverage.parser import PythonParser
+from coverage.tracecache import TraceCache
+from coverage.types import (
+    AnyCallable,
+    TArc,
+    TFileDisposition,
+    TLineNo,
+    TOffset,
+    Tracer,
+    TShouldStartContextFn,
+    TShouldTraceFn,
+    TTraceData,
+    TTraceFileData,
+    TWarnFn,
+)
+from coverage.version import __version__
+
+# Only needed for some of the commented-out logging:
+# from coverage.debug import ppformat
+
+os = isolate_module(os)
+
+# pylint: disable=unused-argument
+
+# $set_env.py: COVERAGE_SYSMON_LOG - Log sys.monitoring activity
+LOG = bool(int(os.getenv("COVERAGE_SYSMON_LOG", 0)))
+
+# $set_env.py: COVERAGE_SYSMON_STATS - Collect sys.monitoring stats
+COLLECT_STATS = bool(int(os.getenv("COVERAGE_SYSMON_STATS", 0)))
+
+# This module will be imported in all versions of Python, but only used in 3.12+
+# It will be type-checked for 3.12, but not for earlier versions.
+sys_monitoring = getattr(sys, "monitoring", None)
+
+DISABLE_TYPE = NewType("DISABLE_TYPE", object)
+MonitorReturn = Optional[DISABLE_TYPE]
+DISABLE = cast(MonitorReturn, getattr(sys_monitoring, "DISABLE", None))
+
+
+if LOG:  # pragma: debugging
+
+    class LoggingWrapper:
+        """Wrap a namespace to log all its functions."""
+
+        def __init__(self, wrapped: Any, namespace: str) -> None:
+            self.wrapped = wrapped
+            self.namespace = namespace
+
+        def __getattr__(self, name: str) -> Callable[..., Any]:
+            def _wrapped(*args: Any, **kwargs: Any) -> Any:
+                log(f"{self.namespace}.{name}{args}{kwargs}")
+                return getattr(self.wrapped, name)(*args, **kwargs)
+
+            return _wrapped
+
+    sys_monitoring = LoggingWrapper(sys_monitoring, "sys.monitoring")
+    assert sys_monitoring is not None
+
+    short_stack = functools.partial(
+        short_stack,
+        full=True,
+        short_filenames=True,
+        frame_ids=True,
+    )
+    seen_threads: set[int] = set()
+
+    def log(msg: str) -> None:
+        """Write a message to our detailed debugging log(s)."""
+        # Thread ids are reused across processes?
+        # Make a shorter number more likely to be unique.
+        pid = os.getpid()
+        tid = cast(int, threading.current_thread().ident)
+        tslug = f"{(pid * tid) % 9_999_991:07d}"
+        if tid not in seen_threads:
+            seen_threads.add(tid)
+            log(f"New thread {tid} {tslug}:\n{short_stack()}")
+        # log_seq = int(os.getenv("PANSEQ", "0"))
+        # root = f"/tmp/pan.{log_seq:03d}"
+        for filename in [
+            "/tmp/foo.out",
+            # f"{root}.out",
+            # f"{root}-{pid}.out",
+            # f"{root}-{pid}-{tslug}.out",
+        ]:
+            with open(filename, "a", encoding="utf-8") as f:
+                try:
+                    print(f"{pid}:{tslug}: {msg}", file=f, flush=True)
+                except UnicodeError:
+                    print(f"{pid}:{tslug}: {ascii(msg)}", file=f, flush=True)
+
+    def arg_repr(arg: Any) -> str:
+        """Make a customized repr for logged values."""
+        if isinstance(arg, CodeType):
+            return (
+                f"<code @{id(arg):#x}"
+                + f" name={arg.co_name},"
+                + f" file={short_filename(arg.co_filename)!r}#{arg.co_firstlineno}>"
+            )
+        return repr(arg)
+
+    def panopticon(*names: str | None) -> AnyCallable:
+        """Decorate a function to log its calls."""
+
+        def _decorator(method: AnyCallable) -> AnyCallable:
+            @functools.wraps(method)
+            def _wrapped(self: Any, *args: Any) -> Any:
+                try:
+                    # log(f"{method.__name__}() stack:\n{short_stack()}")
+                    args_reprs = []
+                    for name, arg in zip(names, args):
+                        if name is None:
+                            continue
+                        args_reprs.append(f"{name}={arg_repr(arg)}")
+                    log(f"{id(self):#x}:{method.__name__}({', '.join(args_reprs)})")
+                    ret = method(self, *args)
+                    # log(f" end {id(self):#x}:{method.__name__}({', '.join(args_reprs)})")
+                    return ret
+                except Exception as exc:
+                    log(f"!!{exc.__class__.__name__}: {exc}")
+                    if 1:
+                        log("".join(traceback.format_exception(exc)))
+                    try:
+                        assert sys_monitoring is not None
+                        sys_monitoring.set_events(sys.monitoring.COVERAGE_ID, 0)
+                    except ValueError:
+                        # We might have already shut off monitoring.
+                        log("oops, shutting off events with disabled tool id")
+                    raise
+
+            return _wrapped
+
+        return _decorator
+
+else:
+
+    def log(msg: str) -> None:
+        """Write a message to our detailed debugging log(s), but not really."""
+
+    def panopticon(*names: str | None) -> AnyCallable:
+        """Decorate a function to log its calls, but not really."""
+
+        def _decorator(meth: AnyCallable) -> AnyCallable:
+            return meth
+
+        return _decorator
+
+
+@dataclass
+class CodeInfo:
+    """The information we want about each code object."""
+
+    tracing: bool
+    file_data: TTraceFileData | None
+    byte_to_line: dict[TOffset, TLineNo] | None
+
+    # Keys are start instruction offsets for branches.
+    # Values are dicts:
+    #   {
+    #       (from_line, to_line): {offset, offset, ...},
+    #       (from_line, to_line): {offset, offset, ...},
+    #   }
+    branch_trails: TBranchTrails
+
+    # Always-jumps are bytecode offsets that do no work but move
+    # to another offset.
+    always_jumps: dict[TOffset, TOffset]
+
+
+def bytes_to_lines(code: CodeType) -> dict[TOffset, TLineNo]:
+    """Make a dict mapping byte code offsets to line numbers."""
+    b2l = {}
+    for bstart, bend, lineno in code.co_lines():
+        if lineno is not None:
+            for boffset in range(bstart, bend, 2):
+                b2l[boffset] = lineno
+    return b2l
+
+
+class SysMonitor(Tracer):
+    """Python implementation of the raw data tracer for PEP669 implementations."""
+
+    # One of these will be used across threads. Be careful.
+
+    # Greenlet-based concurrency needs nothing special.  sys.monitoring events
+    # don't depend on which greenlet is running, and we don't keep a stack of
+    # data per call the way trace functions do.  This is set by the Collector,
+    # and its presence means the concurrency libraries are supported.
+    concur_id_func: Callable[[], Any] | None = None
+
+    def __init__(
+        self,
+        tool_id: int,
+        trace_cache_dir: str | None = None,
+        callbacks_class: type[Any] | None = None,
+    ) -> None:
+        # Attributes set from the collector:
+        self.data: TTraceData
+        self.trace_arcs = False
+        self.should_trace: TShouldTraceFn
+        self.should_trace_cache: dict[str, TFileDisposition | None]
+        self.should_start_context: TShouldStartContextFn | None = None
+        self.switch_context: Callable[[str | None], None] | None = None
+        self.lock_data: Callable[[], None]
+        self.unlock_data: Callable[[], None]
+        # TODO: warn is unused.
+        self.warn: TWarnFn
+
+        self.myid = tool_id
+
+        # Map id(code_object) -> CodeInfo
+        self.code_infos: dict[int, CodeInfo] = {}
+        # Map id(code_object) -> weak reference to the code object.  When the
+        # code object is collected, its entries are removed, so ids are useful
+        # as identity without keeping every code object alive forever.
+        self.code_refs: dict[int, weakref.ref[CodeType]] = {}
+
+        # Map filename:__name__ -> set(id(code_object))
+        self.filename_code_ids: dict[str, set[int]] = collections.defaultdict(set)
+
+        self.sysmon_on = False
+        self.lock = threading.Lock()
+
+        # The dynamic context started by should_start_context, and the frame
+        # that started it.  The context ends when that frame returns.  These
+        # are shared by all threads, as the collector's current context is.
+        self.context: str | None = None
+        self.context_frame: FrameType | None = None
+
+        branch_trail_dir = None
+        if trace_cache_dir is not None:
+            branch_trail_dir = os.path.join(trace_cache_dir, "branch_trails")
+        self.branch_trail_cache = get_branch_trail_cache(branch_trail_dir)
+
+        self.stats: dict[str, int] | None = None
+        if COLLECT_STATS:
+            self.stats = dict.fromkeys(
+                (
+                    "starts start_tracing returns line_lines line_arcs branches branch_trails"
+                    + " code_infos_freed"
+                ).split(),
+                0,
+            )
+
+        # The C implementation of the hot callbacks, if we have one.  It records
+        # into the same CodeInfo objects as the Python callbacks do.  Stats and
+        # logging are only done by the Python callbacks.
+        self.c_callbacks: Any = None
+        if callbacks_class is not None and self.stats is None and not LOG:
+            self.c_callbacks = callbacks_class()
+            self.c_callbacks.code_infos = self.code_infos
+            self.c_callbacks.disable = DISABLE
+            self.c_callbacks.branch_fallback = self.sysmon_branch_either
+
+        self._activity = False
+
+    def __repr__(self) -> str:
+        points = sum(len(v) for v in self.data.values())
+        files = len(self.data)
+        return f"<SysMonitor at {id(self):#x}: {points} data points in {files} files>"
+
+    @panopticon()
+    def start(self) -> None:
+        """Start this Tracer."""
+        with self.lock:
+            assert sys_monitoring is not None
+            sys_monitoring.use_tool_id(self.myid, "coverage.py")
+            register = functools.partial(sys_monitoring.register_callback, self.myid)
+            events = sys.monitoring.events
+
+            callbacks = self.c_callbacks
+            if callbacks is not None:
+                py_return = callbacks.py_return
+                line_arcs = callbacks.line_arcs
+                line_lines = callbacks.line_lines
+                branch_either = callbacks.branch_either
+            else:
+                py_return = self.sysmon_py_return
+                line_arcs = self.sysmon_line_arcs
+                line_lines = self.sysmon_line_lines
+                branch_either = self.sysmon_branch_either
+
+            global_events = events.PY_START
+            if self.should_start_context is not None:
+                # Returns and unwinds have to be seen to end contexts.  Changing
+                # the global events re-instruments all code, so PY_UNWIND stays
+                # on even between contexts.
+                py_return = self.sysmon_py_return_contexts
+                register(events.PY_UNWIND, self.sysmon_py_unwind)
+                global_events |= events.PY_UNWIND
+
+            sys_monitoring.set_events(self.myid, global_events)
+            register(events.PY_START, self.sysmon_py_start)
+            if self.trace_arcs or self.should_start_context is not None:
+                register(events.PY_RETURN, py_return)
+            if self.trace_arcs:
+                register(events.LINE, line_arcs)
+                if env.PYBEHAVIOR.branch_right_left:
+                    register(
+                        events.BRANCH_RIGHT,  # type:ignore[attr-defined]
+                        branch_either,
+                    )
+                    register(
+                        events.BRANCH_LEFT,  # type:ignore[attr-defined]
+                        branch_either,
+                    )
+            else:
+                register(events.LINE, line_lines)
+            sys_monitoring.restart_events()
+            self.sysmon_on = True
+
+    @panopticon()
+    def stop(self) -> None:
+        """Stop this Tracer."""
+        with self.lock:
+            if not self.sysmon_on:
+                # In forking situations, we might try to stop when we are not
+                # started.  Do nothing in that case.
+                return
+            assert sys_monitoring is not None
+            sys_monitoring.set_events(self.myid, 0)
+            self.sysmon_on = False
+            sys_monitoring.free_tool_id(self.myid)
+
+        self.branch_trail_cache.save()
+
+        if LOG:  # pragma: debugging
+            items = sorted(
+                self.filename_code_ids.items(),
+                key=lambda item: len(item[1]),
+                reverse=True,
+            )
+            code_objs = sum(len(code_ids) for _, code_ids in items)
+            dupes = code_objs - len(items)
+            if dupes:
+                log(f"==== Duplicate code objects: {dupes} duplicates, {code_objs} total")
+                for filename, code_ids in items:
+                    if len(code_ids) > 1:
+                        log(f"{len(code_ids):>5} objects: {filename}")
+            else:
+                log("==== Duplicate code objects: none")
+
+    @panopticon()
+    def restart_events(self) -> None:
+        """Re-enable all the events our callbacks have disabled.
+
+        Each line is reported only once, then disabled.  After a context
+        switch, lines have to be reported again to be recorded in the new
+        context.
+
+        """
+        with self.lock:
+            if self.sysmon_on:
+                assert sys_monitoring is not None
+                sys_monitoring.restart_events()
+
+    @panopticon()
+    def post_fork(self) -> None:
+        """The process has forked, clean up as needed."""
+        self.stop()
+
+    def activity(self) -> bool:
+        """Has there been any activity?"""
+        if self.c_callbacks is not None and self.c_callbacks.activity():
+            return True
+        return self._activity
+
+    def reset_activity(self) -> None:
+        """Reset the activity() flag."""
+        self._activity = False
+        if self.c_callbacks is not None:
+            self.c_callbacks.reset_activity()
+
+    def get_stats(self) -> dict[str, int] | None:
+        """Return a dictionary of statistics, or None."""
+        if self.stats is None:
+            return None
+        return {**self.stats, "code_infos": len(self.code_infos)}
+
+    def _forget_code(self, code_id: int, ref_unused: weakref.ref[CodeType]) -> None:
+        """A code object has been collected, forget what we knew about it.
+
+        This is called before the object's memory is freed, so its id can't
+        have been reused yet.
+
+        """
+        self.code_infos.pop(code_id, None)
+        self.code_refs.pop(code_id, None)
+        if self.stats is not None:
+            self.stats["code_infos_freed"] += 1
+
+    @panopticon("code", "@")
+    def sysmon_py_start(self, code: CodeType, instruction_offset: TOffset) -> MonitorReturn:
+        """Handle sys.monitoring.events.PY_START events."""
+        self._activity = True
+        if self.stats is not None:
+            self.stats["starts"] += 1
+
+        # Entering a new frame.  Decide if we should trace in this file.
+        code_info = self.code_infos.get(id(code))
+        tracing_code: bool | None = None
+        file_data: TTraceFileData | None = None
+        if code_info is not None:
+            tracing_code = code_info.tracing
+            file_data = code_info.file_data
+
+        if tracing_code is None:
+            filename = code.co_filename
+            disp = self.should_trace_cache.get(filename)
+            if disp is None:
+                disp = self.should_trace(filename, self._monitored_frame())
+                self.should_trace_cache[filename] = disp
+
+            tracing_code = disp.trace
+            if tracing_code:
+                tracename = disp.source_filename
+                assert tracename is not None
+                self.lock_data()
+                try:
+                    if tracename not in self.data:
+                        self.data[tracename] = set()
+                finally:
+                    self.unlock_data()
+                file_data = self.data[tracename]
+                b2l = bytes_to_lines(code)
+            else:
+                file_data = None
+                b2l = None
+
+            code_info = CodeInfo(
+                tracing=tracing_code,
+                file_data=file_data,
+                byte_to_line=b2l,
+                branch_trails={},
+                always_jumps={},
+            )
+            code_id = id(code)
+            self.code_infos[code_id] = code_info
+            self.code_refs[code_id] = weakref.ref(
+                code, functools.partial(self._forget_code, code_id)
+            )
+
+            if tracing_code:
+                if self.stats is not None:
+                    self.stats["start_tracing"] += 1
+                events = sys.monitoring.events
+                with self.lock:
+                    if self.sysmon_on:
+                        assert sys_monitoring is not None
+                        local_events = events.PY_RETURN | events.PY_RESUME | events.LINE
+                        if self.trace_arcs:
+                            assert env.PYBEHAVIOR.branch_right_left
+                            local_events |= (
+                                events.BRANCH_RIGHT  # type:ignore[attr-defined]
+                                | events.BRANCH_LEFT  # type:ignore[attr-defined]
+                            )
+                        sys_monitoring.set_local_events(self.myid, code, local_events)
+
+                        if LOG:  # pragma: debugging
+                            if code.co_filename not in {"<string>"}:
+                                self.filename_code_ids[f"{code.co_filename}:{code.co_name}"].add(
+                                    id(code)
+                                )
+
+        if self.should_start_context is not None and self.context is None:
+            return self._start_context_maybe(code, self._monitored_frame())
+        return DISABLE
+
+    def _monitored_frame(self) -> FrameType:
+        """Get the frame that the event being handled by our caller is for."""
+        frame = inspect.currentframe().f_back.f_back  # type: ignore[union-attr]
+        if LOG:  # pragma: debugging
+            # @panopticon adds a frame.
+            frame = frame.f_back  # type: ignore[union-attr]
+        return frame  # type: ignore[return-value]
+
+    def _start_context_maybe(self, code: CodeType, frame: FrameType) -> MonitorReturn:
+        """Start a dynamic context if `frame`, running `code`, should start one.
+
+        This is called from the PY_START callback, and returns what it should
+        return.  Until a context starts, PY_START stays enabled everywhere so
+        that any call can start one.
+
+        """
+        assert self.should_start_context is not None
+        context = self.should_start_context(frame)  # pylint: disable=not-callable
+        if context is None:
+            return None
+
+        self.context = context
+        self.context_frame = frame
+        events = sys.monitoring.events
+        with self.lock:
+            if self.sysmon_on:
+                assert sys_monitoring is not None
+                local_events = sys_monitoring.get_local_events(self.myid, code)
+                sys_monitoring.set_local_events(self.myid, code, local_events | events.PY_RETURN)
+        assert self.switch_context is not None
+        self.switch_context(context)  # pylint: disable=not-callable
+        return DISABLE
+
+    def _end_context(self) -> None:
+        """The frame that started the current dynamic context is done."""
+        self.context = None
+        self.context_frame = None
+        assert self.switch_context is not None
+        self.switch_context(None)  # pylint: disable=not-callable
+
+    @panopticon("code", "@", None)
+    def sysmon_py_return_contexts(
+        self,
+        code: CodeType,
+        instruction_offset: TOffset,
+        retval: object,
+    ) -> MonitorReturn:
+        """Handle sys.monitoring.events.PY_RETURN events with dynamic contexts."""
+        if self.trace_arcs:
+            code_info = self.code_infos.get(id(code))
+            if code_info is not None and code_info.file_data is not None:
+                self.sysmon_py_return(code, instruction_offset, retval)
+        context_frame = self.context_frame
+        if context_frame is not None and code is context_frame.f_code:
+            # Other calls of this code can return here too, so keep this enabled.
+            if self._monitored_frame() is context_frame:
+                self._end_context()
+            return None
+        return DISABLE
+
+    @panopticon("code", "@", None)
+    def sysmon_py_unwind(
+        self,
+        code: CodeType,
+        instruction_offset: TOffset,
+        exception: BaseException,
+    ) -> None:
+        """Handle sys.monitoring.events.PY_UNWIND events, only used for contexts.
+
+        PY_UNWIND events can't be disabled, so this returns nothing.
+
+        """
+        context_frame = self.context_frame
+        if context_frame is not None and code is context_frame.f_code:
+            if self._monitored_frame() is context_frame:
+                self._end_context()
+
+    @panopticon("code", "@", None)
+    def sysmon_py_return(
+        self,
+        code: CodeType,
+        instruction_offset: TOffset,
+        retval: object,
+    ) -> MonitorReturn:
+        """Handle sys.monitoring.events.PY_RETURN events for branch coverage."""
+        self._activity = True
+        if self.stats is not None:
+            self.stats["returns"] += 1
+        code_info = self.code_infos.get(id(code))
+        # code_info is not None and code_info.file_data is not None, since we
+        # wouldn't have enabled this event if they were.
+        last_line = code_info.byte_to_line.get(instruction_offset)  # type: ignore
+        if last_line is not None:
+            arc = (last_line, -code.co_firstlineno)
+            code_info.file_data.add(arc)  # type: ignore
+            # log(f"adding {arc=}")
+        return DISABLE
+
+    @panopticon("code", "line")
+    def sysmon_line_lines(self, code: CodeType, line_number: TLineNo) -> MonitorReturn:
+        """Handle sys.monitoring.events.LINE events for line coverage."""
+        self._activity = True
+        if self.stats is not None:
+            self.stats["line_lines"] += 1
+        code_info = self.code_infos.get(id(code))
+        # It should be true that code_info is not None and code_info.file_data
+        # is not None, since we wouldn't have enabled this event if they were.
+        # But somehow code_info can be None here, so we have to check.
+        if code_info is not None and code_info.file_data is not None:
+            code_info.file_data.add(line_number)  # type: ignore
+        # log(f"adding {line_number=}")
+        return DISABLE
+
+    @panopticon("code", "line")
+    def sysmon_line_arcs(self, code: CodeType, line_number: TLineNo) -> MonitorReturn:
+        """Handle sys.monitoring.events.LINE events for branch coverage."""
+        self._activity = True
+        if self.stats is not None:
+            self.stats["line_arcs"] += 1
+        code_info = self.code_infos[id(code)]
+        # code_info is not None and code_info.file_data is not None, since we
+        # wouldn't have enabled this event if they were.
+        arc = (line_number, line_number)
+        code_info.file_data.add(arc)  # type: ignore
+        # log(f"adding {arc=}")
+        return DISABLE
+
+    @panopticon("code", "@", "@")
+    def sysmon_branch_either(
+        self, code: CodeType, instruction_offset: TOffset, destination_offset: TOffset
+    ) -> MonitorReturn:
+        """Handle BRANCH_RIGHT and BRANCH_LEFT events."""
+        self._activity = True
+        if self.stats is not None:
+            self.stats["branches"] += 1
+        code_info = self.code_infos[id(code)]
+        # code_info is not None and code_info.file_data is not None, since we
+        # wouldn't have enabled this event if they were.
+        if not code_info.branch_trails:
+            if self.stats is not None:
+                self.stats["branch_trails"] += 1
+            trails, jumps = self.branch_trail_cache.get(code)
+            # Other threads can be handling branches in this code.  They
+            # use always_jumps once they see non-empty branch_trails, so set
+            # always_jumps first.
+            code_info.always_jumps = jumps
+            code_info.branch_trails = trails
+            # log(f"branch_trails for {code}:\n{ppformat(code_info.branch_trails)}")
+        added_arc = False
+        dest_info = code_info.branch_trails.get(instruction_offset)
+
+        # Re-map the destination offset through always-jumps to deal with NOP etc.
+        dests = {destination_offset}
+        while (dest := code_info.always_jumps.get(destination_offset)) is not None:
+            destination_offset = dest
+            dests.add(destination_offset)
+
+        # log(f"dest_info = {ppformat(dest_info)}")
+        if dest_info is not None:
+            for arc, offsets in dest_info.items():
+                if arc is None:
+                    continue
+                if dests & offsets:
+                    code_info.file_data.add(arc)  # type: ignore
+                    # log(f"adding {arc=}")
+                    added_arc = True
+                    break
+
+        if not added_arc:
+            # This could be an exception jumping from line to line.
+            assert code_info.byte_to_line is not None
+            l1 = code_info.byte_to_line.get(instruction_offset)
+            if l1 is not None:
+                l2 = code_info.byte_to_line.get(destination_offset)
+                if l2 is not None and l1 != l2:
+                    arc = (l1, l2)
+                    code_info.file_data.add(arc)  # type: ignore
+                    # log(f"adding unforeseen {arc=}")
+
+        return DISABLE
+
+
+@functools.lru_cache(maxsize=100)
+def get_multiline_map(filename: str) -> dict[TLineNo, TLineNo]:
+    """Get a PythonParser for the given filename, cached."""
+    parser = PythonParser(filename=filename)
+    try:
+        parser.parse_source()
+    except NotPython:
+        # The file was not Python. This can happen when the code object refers
+        # to an original non-Python source file, like a Jinja template.
+        # In that case, just return an empty map, which might lead to slightly
+        # wrong branch coverage, but we don't have any better option.
+        return {}
+    return parser.multiline_map
+
+
+def _trails_size(trails: TBranchTrails, jumps: dict[TOffset, TOffset]) -> int:
+    """Estimate the memory used by branch trails and always-jumps."""
+    size = sys.getsizeof(trails) + sys.getsizeof(jumps)
+    for dests in trails.values():
+        size += sys.getsizeof(dests)
+        for offsets in dests.values():
+            size += sys.getsizeof(offsets)
+    return size
+
+
+def _trails_to_json(trails: TBranchTrails, jumps: dict[TOffset, TOffset]) -> list[Any]:
+    """Convert branch trails and always-jumps to JSON-compatible data."""
+    return [
+        [
+            [offset, [[arc, sorted(offsets)] for arc, offsets in dests.items()]]
+            for offset, dests in trails.items()
+        ],
+        list(jumps.items()),
+    ]
+
+
+def _trails_from_json(data: list[Any]) -> tuple[TBranchTrails, dict[TOffset, TOffset]]:
+    """Convert data from :func:`_trails_to_json` back to trails and jumps."""
+    json_trails, json_jumps = data
+    trails: TBranchTrails = {}
+    for offset, json_dests in json_trails:
+        dests: dict[TArc | None, set[TOffset]] = {}
+        for arc, offsets in json_dests:
+            dests[(arc[0], arc[1]) if arc is not None else None] = set(offsets)
+        trails[offset] = dests
+    return trails, dict(json_jumps)
+
+
+class BranchTrailCache:
+    """A cache of branch trails and always-jumps for code objects.
+
+    Computing branch trails means parsing the source file and walking the
+    bytecode.  Identical code objects, like those made again by `exec` or
+    re-importing, or those in a forked process, share the results here.
+    Entries are keyed on the file name and a hash of the bytecode and line
+    table.  The least-recently used entries are discarded when the estimated
+    memory used is more than `max_size` bytes.
+
+    If `directory` is given, entries are also saved on disk there, with one
+    :class:`TraceCache` file for each source file, so that other processes
+    can use them.  Entries read from or waiting to be written to disk are
+    also limited to about `max_size` bytes: past that, they are written and
+    forgotten.
+
+    """
+
+    def __init__(self, max_size: int, directory: str | None = None) -> None:
+        self.max_size = max_size
+        self.size = 0
+        self.entries: collections.OrderedDict[
+            tuple[str, str],
+            tuple[TBranchTrails, dict[TOffset, TOffset], int],
+        ] = collections.OrderedDict()
+        self.directory = directory
+        self.disk_caches: dict[str, TraceCache] = {}
+        self.disk_size = 0
+        self.lock = threading.Lock()
+
+    def _disk_cache(self, filename: str) -> TraceCache:
+        """Get the on-disk cache for the code in `filename`."""
+        disk_cache = self.disk_caches.get(filename)
+        if disk_cache is None:
+            assert self.directory is not None
+            hasher = Hasher()
+            hasher.update(__version__)
+            hasher.update(sys.version)
+            hasher.update(filename)
+            disk_cache = TraceCache(self.directory, hasher.hexdigest())
+            self.disk_caches[filename] = disk_cache
+        return disk_cache
+
+    def get(self, code: CodeType) -> tuple[TBranchTrails, dict[TOffset, TOffset]]:
+        """Get the branch trails and always-jumps for `code`.
+
+        The results are shared, and must not be changed.
+
+        """
+        hasher = Hasher()
+        hasher.update(code.co_qualname)
+        hasher.update(code.co_firstlineno)
+        hasher.update(code.co_code)
+        hasher.update(code.co_linetable)
+        hasher.update(code.co_exceptiontable)
+        key = (code.co_filename, hasher.hexdigest())
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                return entry[0], entry[1]
+
+            disk_cache = None
+            data = None
+            if self.directory is not None:
+                disk_cache = self._disk_cache(code.co_filename)
+                data = disk_cache.get(key[1])
+
+        if data is not None:
+            trails, jumps = _trails_from_json(data)
+        else:
+            multiline_map = get_multiline_map(code.co_filename)
+            trails = branch_trails(code, multiline_map=multiline_map)
+            jumps = always_jumps(code)
+
+        size = _trails_size(trails, jumps)
+        with self.lock:
+            if key not in self.entries:
+                self.entries[key] = (trails, jumps, size)
+                self.size += size
+                while self.size > self.max_size and len(self.entries) > 1:
+                    _, (_, _, old_size) = self.entries.popitem(last=False)
+                    self.size -= old_size
+            if disk_cache is not None:
+                if data is None:
+                    disk_cache.add(key[1], _trails_to_json(trails, jumps))
+                self.disk_size += size
+                if self.disk_size > self.max_size:
+                    self._save()
+        return trails, jumps
+
+    def save(self) -> None:
+        """Write new entries to disk, if we are using a directory."""
+        with self.lock:
+            self._save()
+
+    def _save(self) -> None:
+        """Write new entries to disk, and forget the disk caches.
+
+        They will be read again when needed.  Call with the lock held.
+
+        """
+        for disk_cache in self.disk_caches.values():
+            disk_cache.save()
+        self.disk_caches = {}
+        self.disk_size = 0
+
+
+# The most memory to use for the branch trails of one BranchTrailCache.
+BRANCH_TRAIL_CACHE_SIZE = 64 * 1024 * 1024
+
+# The branch trail caches, by directory.  All the SysMonitor instances in a
+# process using the same directory share a cache.
+_BRANCH_TRAIL_CACHES: dict[str | None, BranchTrailCache] = {}
+_BRANCH_TRAIL_CACHES_LOCK = threading.Lock()
+
+
+def get_branch_trail_cache(directory: str | None) -> BranchTrailCache:
+    """Get the shared :class:`BranchTrailCache` saving entries in `directory`."""
+    with _BRANCH_TRAIL_CACHES_LOCK:
+        cache = _BRANCH_TRAIL_CACHES.get(directory)
+        if cache is None:
+            cache = BranchTrailCache(max_size=BRANCH_TRAIL_CACHE_SIZE, directory=directory)
+            _BRANCH_TRAIL_CACHES[directory] = cache
+    return cache
@@ -0,0 +1,376 @@
+# Licensed under the Apache License: http://www.apache.org/licenses/LICENSE-2.0
+# For details: https://github.com/coveragepy/coveragepy/blob/main/NOTICE.txt
+
+"""Coverage data for coverage.py.
+
+This file had the 4.x JSON data support, which is now gone.  This file still
+has storage-agnostic helpers, and is kept to avoid changing too many imports.
+CoverageData is now defined in sqldata.py, and imported here to keep the
+imports working.
+
+"""
+
+from __future__ import annotations
+
+import functools
+import glob
+import hashlib
+import itertools
+import os.path
+import tempfile
+import time
+from collections.abc import Iterable
+from typing import Callable
+
+from coverage.exceptions import CoverageException, NoDataError
+from coverage.files import PathAliases
+from coverage.misc import Hasher, file_be_gone, human_sorted, plural
+from coverage.sqldata import CoverageData as CoverageData  # pylint: disable=useless-import-alias
+from coverage.sqldata import MAX_UPDATE_BATCH
+
+# How much of a data file to read at once when hashing it.
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def line_counts(data: CoverageData, fullpath: bool = False) -> dict[str, int]:
+    """Return a dict summarizing the line coverage data.
+
+    Keys are based on the file names, and values are the number of executed
+    lines.  If `fullpath` is true, then the keys are the full pathnames of
+    the files, otherwise they are the basenames of the files.
+
+    Returns a dict mapping file names to counts of lines.
+
+    """
+    summ = {}
+    filename_fn: Callable[[str], str]
+    if fullpath:
+        # pylint: disable=unnecessary-lambda-assignment
+        filename_fn = lambda f: f
+    else:
+        filename_fn = os.path.basename
+    for filename in data.measured_files():
+        lines = data.lines(filename)
+        assert lines is not None
+        summ[filename_fn(filename)] = len(lines)
+    return summ
+
+
+def add_data_to_hash(data: CoverageData, filename: str, hasher: Hasher) -> None:
+    """Contribute `filename`'s data to the `hasher`.
+
+    `hasher` is a `coverage.misc.Hasher` instance to be updated with
+    the file's data.  It should only get the results data, not the run
+    data.
+
+    """
+    if data.has_arcs():
+        hasher.update(sorted(data.arcs(filename) or []))
+    else:
+        hasher.update(sorted_lines(data, filename))
+    hasher.update(data.file_tracer(filename))
+
+
+def combinable_files(data_file: str, data_paths: Iterable[str] | None = None) -> list[str]:
+    """Make a list of data files to be combined.
+
+    `data_file` is a path to a data file.  `data_paths` is a list of files or
+    directories of files.
+
+    Returns a list of absolute file paths.
+    """
+    data_dir, local = os.path.split(os.path.abspath(data_file))
+
+    data_paths = data_paths or [data_dir]
+    files_to_combine = []
+    for p in data_paths:
+        if os.path.isfile(p):
+            files_to_combine.append(os.path.abspath(p))
+        elif os.path.isdir(p):
+            pattern = glob.escape(os.path.join(os.path.abspath(p), local)) + ".*"
+            files_to_combine.extend(glob.glob(pattern))
+        else:
+            raise NoDataError(f"Couldn't combine from non-existent path '{p}'")
+
+    # SQLite might have made journal files alongside our database files.
+    # We never want to combine those.
+    files_to_combine = [fnm for fnm in files_to_combine if not fnm.endswith("-journal")]
+
+    # Sorting isn't usually needed, since it shouldn't matter what order files
+    # are combined, but sorting makes tests more predictable, and makes
+    # debugging more understandable when things go wrong.
+    return sorted(files_to_combine)
+
+
+def _file_hash(filename: str) -> bytes:
+    """Compute a hash of the contents of `filename`.
+
+    The file is read in chunks, so large data files don't have to fit in
+    memory.
+
+    """
+    hasher = hashlib.new("sha3_256", usedforsecurity=False)
+    with open(filename, "rb") as fobj:
+        while chunk := fobj.read(HASH_CHUNK_SIZE):
+            hasher.update(chunk)
+    return hasher.digest()
+
+
+# A data file to combine: (file name, relative file name for messages).
+TDataFile = tuple[str, str]
+
+
+def _combine_files(
+    data: CoverageData,
+    files: Iterable[TDataFile],
+    map_path: Callable[[str], str] | None,
+    report: Callable[[TDataFile, str | None], None],
+) -> None:
+    """Combine the data `files` into `data`.
+
+    Files are combined in batches of up to `MAX_UPDATE_BATCH` files, each
+    batch in one transaction.  `report` is called for each file once it has
+    been combined, with None, or once it has failed to be read, with the error
+    message.
+
+    """
+    batch: list[tuple[TDataFile, CoverageData]] = []
+
+    def combine_batch() -> None:
+        """Combine the data files in `batch` in one transaction."""
+        if data._debug.should("dataio"):
+            data._debug.write(f"Combining {len(batch)} data file{plural(len(batch))}")
+        data._update_many([new_data for _, new_data in batch], map_path=map_path)
+        for data_file, _ in batch:
+            report(data_file, None)
+        batch.clear()
+
+    for data_file in files:
+        if data._debug.should("dataio"):
+            data._debug.write(f"Combining data file {data_file[0]!r}")
+        try:
+            new_data = CoverageData(data_file[0], debug=data._debug)
+            new_data.read()
+        except CoverageException as exc:
+            report(data_file, str(exc))
+        else:
+            batch.append((data_file, new_data))
+            if len(batch) == MAX_UPDATE_BATCH:
+                combine_batch()
+
+    if batch:
+        combine_batch()
+
+
+def _combine_group(
+    args: tuple[str, list[TDataFile], PathAliases | None],
+) -> list[tuple[TDataFile, str | None]]:
+    """Combine a group of data files in a worker process, for `combine_in_parallel`.
+
+    The files are combined into an intermediate data file.  Returns the
+    results that `_combine_files` reported for each file.
+
+    """
+    filename, files, aliases = args
+    map_path = None if aliases is None else functools.cache(aliases.map)
+
+    results: list[tuple[TDataFile, str | None]] = []
+    intermediate = CoverageData(filename)
+    _combine_files(intermediate, files, map_path, lambda *result: results.append(result))
+    return results
+
+
+def combine_in_parallel(
+    data: CoverageData,
+    files: list[TDataFile],
+    aliases: PathAliases | None,
+    jobs: int,
+    report: Callable[[TDataFile, str | None], None],
+) -> None:
+    """Combine the data `files` into `data` using `jobs` processes.
+
+    The files are split into groups, one per process.  Each process combines
+    its group into an intermediate data file, and then the intermediate files
+    are combined into `data`.  `report` is called for each file as with
+    `_combine_files`.  If an intermediate file can't be combined, the error
+    is reported for all of the files in its group.
+
+    """
+    # Imported here to keep from slowing down the start of measurement.
+    import concurrent.futures
+
+    groups = [files[i::jobs] for i in range(jobs)]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        args = [
+            (os.path.join(tmp_dir, f".coverage.{i}"), group, aliases)
+            for i, group in enumerate(groups)
+        ]
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+            all_results = list(executor.map(_combine_group, args))
+        results = dict(itertools.chain.from_iterable(all_results))
+        group_results = {arg[0]: group_result for arg, group_result in zip(args, all_results)}
+
+        def report_intermediate(data_file: TDataFile, error: str | None) -> None:
+            """The files combined into a failed intermediate file have failed too."""
+            if error is not None:
+                for group_file, group_error in group_results[data_file[0]]:
+                    if group_error is None:
+                        results[group_file] = error
+
+        # The intermediate files have already had their paths mapped.
+        intermediates = [
+            (arg[0], arg[0])
+            for arg, group_result in zip(args, all_results)
+            if any(error is None for _, error in group_result)
+        ]
+        _combine_files(data, intermediates, None, report_intermediate)
+
+    for data_file in files:
+        report(data_file, results[data_file])
+
+
+def combine_parallel_data(
+    data: CoverageData,
+    aliases: PathAliases | None = None,
+    data_paths: Iterable[str] | None = None,
+    strict: bool = False,
+    keep: bool = False,
+    message: Callable[[str], None] | None = None,
+    jobs: int = 1,
+) -> None:
+    """Combine a number of data files together.
+
+    `data` is a CoverageData.
+
+    Treat `data.filename` as a file prefix, and combine the data from all
+    of the data files starting with that prefix plus a dot.
+
+    If `aliases` is provided, it's a `PathAliases` object that is used to
+    re-map paths to match the local machine's.
+
+    If `data_paths` is provided, it is a list of directories or files to
+    combine.  Directories are searched for files that start with
+    `data.filename` plus dot as a prefix, and those files are combined.
+
+    If `data_paths` is not provided, then the directory portion of
+    `data.filename` is used as the directory to search for data files.
+
+    Unless `keep` is True every data file found and combined is then deleted
+    from disk. If a file cannot be read, a warning will be issued, and the
+    file will not be deleted.
+
+    If `strict` is true, and no files are found to combine, an error is
+    raised.
+
+    `message` is a function to use for printing messages to the user.
+
+    If `jobs` is more than 1, the files are combined using that many
+    processes.
+
+    """
+    files_to_combine = combinable_files(data.base_filename(), data_paths)
+
+    if strict and not files_to_combine:
+        raise NoDataError("No data to combine")
+
+    file_hashes = set()
+    unique_files: list[TDataFile] = []
+    for f in files_to_combine:
+        if f == data.data_filename():
+            # Sometimes we are combining into a file which is one of the
+            # parallel files.  Skip that file.
+            if data._debug.should("dataio"):
+                data._debug.write(f"Skipping combining ourself: {f!r}")
+            continue
+
+        try:
+            rel_file_name = os.path.relpath(f)
+        except ValueError:
+            # ValueError can be raised under Windows when os.getcwd() returns a
+            # folder from a different drive than the drive of f, in which case
+            # we print the original value of f instead of its relative path
+            rel_file_name = f
+
+        sha = _file_hash(f)
+        if sha in file_hashes:
+            if message:
+                message(f"Skipping duplicate data {rel_file_name}")
+            if not keep:
+                if data._debug.should("dataio"):
+                    data._debug.write(f"Deleting data file {f!r}")
+                file_be_gone(f)
+        else:
+            file_hashes.add(sha)
+            unique_files.append((f, rel_file_name))
+
+    ncombined = 0
+    nbytes = 0
+    start = time.perf_counter()
+
+    def report(data_file: TDataFile, error: str | None) -> None:
+        """Tell the user about one data file, and delete it if combined."""
+        nonlocal ncombined, nbytes
+        f, rel_file_name = data_file
+        if error is not None:
+            if data._warn:
+                # The error has the file name in it, so just use the message
+                # as the warning.
+                data._warn(error)
+            if message:
+                message(f"Couldn't combine data file {rel_file_name}: {error}")
+            return
+
+        ncombined += 1
+        nbytes += os.path.getsize(f)
+        if message:
+            message(f"Combined data file {rel_file_name}")
+        if not keep:
+            if data._debug.should("dataio"):
+                data._debug.write(f"Deleting data file {f!r}")
+            file_be_gone(f)
+
+    jobs = min(jobs, len(unique_files))
+    if jobs > 1:
+        combine_in_parallel(data, unique_files, aliases, jobs, report)
+    else:
+        map_path = None if aliases is None else functools.cache(aliases.map)
+        _combine_files(data, unique_files, map_path, report)
+
+    if ncombined and data._debug.should("dataio"):
+        elapsed = time.perf_counter() - start
+        rate = f" ({ncombined / elapsed:.1f} files/s)" if elapsed else ""
+        data._debug.write(
+            f"Combined {ncombined} data file{plural(ncombined)}, "
+            + f"{nbytes / 1_000_000:.1f} MB, in {elapsed:.2f}s{rate}"
+        )
+
+    if strict and not ncombined:
+        raise NoDataError("No usable data files")
+
+
+def debug_data_file(filename: str) -> None:
+    """Implementation of 'coverage debug data'."""
+    data = CoverageData(filename)
+    filename = data.data_filename()
+    print(f"path: {filename}")
+    if not os.path.exists(filename):
+        print("No data collected: file doesn't exist")
+        return
+    data.read()
+    print(f"has_arcs: {data.has_arcs()!r}")
+    summary = line_counts(data, fullpath=True)
+    filenames = human_sorted(summary.keys())
+    nfiles = len(filenames)
+    print(f"{nfiles} file{plural(nfiles)}:")
+    for f in filenames:
+        line = f"{f}: {summary[f]} line{plural(summary[f])}"
+        plugin = data.file_tracer(f)
+        if plugin:
+            line += f" [{plugin}]"
+        print(line)
+
+
+def sorted_lines(data: CoverageData, filename: str) -> list[int]:
+    """Get the sorted lines for a file, for tests."""
+    lines = data.lines(filename)
+    return sorted(lines or [])
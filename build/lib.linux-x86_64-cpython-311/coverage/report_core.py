@@ -0,0 +1,201 @@
+# Licensed under the Apache License: http://www.apache.org/licenses/LICENSE-2.0
+# For details: https://github.com/coveragepy/coveragepy/blob/main/NOTICE.txt
+
+"""Reporter foundation for coverage.py."""
+
+from __future__ import annotations
+
+import sys
+from collections.abc import Iterable
+from typing import IO, TYPE_CHECKING, Any, Callable, Protocol
+
+from coverage.exceptions import NoDataError, NoSource, NotPython
+from coverage.files import GlobMatcher, prep_patterns
+from coverage.misc import ensure_dir_for_file, file_be_gone
+from coverage.parsecache import ParseCache, parse_results
+from coverage.parser import PythonParser
+from coverage.plugin import FileReporter
+from coverage.python import PythonFileReporter
+from coverage.results import Analysis, analysis_from_file_reporter
+from coverage.types import TArc, TLineNo, TMorf
+
+if TYPE_CHECKING:
+    from coverage import Coverage
+
+
+class Reporter(Protocol):
+    """What we expect of reporters."""
+
+    report_type: str
+
+    def report(self, morfs: Iterable[TMorf] | None, outfile: IO[str]) -> float:
+        """Generate a report of `morfs`, written to `outfile`."""
+
+
+def render_report(
+    output_path: str,
+    reporter: Reporter,
+    morfs: Iterable[TMorf] | None,
+    msgfn: Callable[[str], None],
+) -> float:
+    """Run a one-file report generator, managing the output file.
+
+    This function ensures the output file is ready to be written to. Then writes
+    the report to it. Then closes the file and cleans up.
+
+    """
+    file_to_close = None
+    delete_file = False
+
+    if output_path == "-":
+        outfile = sys.stdout
+    else:
+        # Ensure that the output directory is created; done here because this
+        # report pre-opens the output file.  HtmlReporter does this on its own
+        # because its task is more complex, being multiple files.
+        ensure_dir_for_file(output_path)
+        outfile = open(output_path, "w", encoding="utf-8")
+        file_to_close = outfile
+        delete_file = True
+
+    try:
+        ret = reporter.report(morfs, outfile=outfile)
+        if file_to_close is not None:
+            msgfn(f"Wrote {reporter.report_type} to {output_path}")
+        delete_file = False
+        return ret
+    finally:
+        if file_to_close is not None:
+            file_to_close.close()
+            if delete_file:
+                file_be_gone(output_path)  # pragma: part covered (doesn't return)
+
+
+def get_analysis_to_report(
+    coverage: Coverage,
+    morfs: Iterable[TMorf] | None,
+) -> Iterable[tuple[FileReporter, Analysis]]:
+    """Get the files to report on.
+
+    For each morf in `morfs`, if it should be reported on (based on the omit
+    and include configuration options), yield a pair, the `FileReporter` and
+    `Analysis` for the morf.
+
+    """
+    fr_morfs = coverage._get_file_reporters(morfs)
+    config = coverage.config
+
+    if config.report_include:
+        matcher = GlobMatcher(prep_patterns(config.report_include), "report_include")
+        fr_morfs = [(fr, morf) for (fr, morf) in fr_morfs if matcher.match(fr.filename)]
+
+    if config.report_omit:
+        matcher = GlobMatcher(prep_patterns(config.report_omit), "report_omit")
+        fr_morfs = [(fr, morf) for (fr, morf) in fr_morfs if not matcher.match(fr.filename)]
+
+    if not fr_morfs:
+        raise NoDataError("No data to report.")
+
+    fr_morfs = sorted(fr_morfs)
+    if config.jobs > 1:
+        parse_in_parallel(coverage, [fr for fr, _ in fr_morfs], config.jobs)
+
+    data = coverage.get_data()
+    all_lines: dict[str, list[TLineNo]] | None = None
+    all_arcs: dict[str, list[TArc]] | None = None
+    if morfs is None:
+        # Reporting on all of the measured files: read their data in bulk,
+        # rather than with queries for each file.
+        if data.has_arcs():
+            all_arcs = dict(data.all_arcs())
+            all_lines = {
+                filename: list({l for arc in arcs for l in arc if l > 0})
+                for filename, arcs in all_arcs.items()
+            }
+        else:
+            all_lines = dict(data.all_lines())
+
+    for fr, morf in fr_morfs:
+        try:
+            filename = coverage._file_mapper(fr.filename)
+            analysis = analysis_from_file_reporter(
+                data,
+                config.precision,
+                fr,
+                filename,
+                lines=None if all_lines is None else all_lines.get(filename, []),
+                arcs=None if all_arcs is None else all_arcs.get(filename, []),
+            )
+        except NotPython:
+            # Only report errors for .py files, and only if we didn't
+            # explicitly suppress those errors.
+            # NotPython is only raised by PythonFileReporter, which has a
+            # should_be_python() method.
+            if fr.should_be_python():  # type: ignore[attr-defined]
+                if config.ignore_errors:
+                    msg = f"Couldn't parse Python file '{fr.filename}'"
+                    coverage._warn(msg, slug="couldnt-parse")
+                else:
+                    raise
+        except Exception as exc:
+            if config.ignore_errors:
+                msg = f"Couldn't parse '{fr.filename}': {exc}".rstrip()
+                coverage._warn(msg, slug="couldnt-parse")
+            else:
+                raise
+        else:
+            yield (fr, analysis)
+
+
+def _parse_python_file(args: tuple[str, str, bool, str | None]) -> dict[str, Any] | None:
+    """Parse one Python file in a worker process, for `parse_in_parallel`.
+
+    Returns the results from `parse_results`, or None if the file couldn't be
+    parsed.
+
+    """
+    filename, exclude, branch, cache_dir = args
+    cache = ParseCache(cache_dir) if cache_dir is not None else None
+    try:
+        parser = PythonParser(filename=filename, exclude=exclude, cache=cache)
+        parser.parse_source()
+        if branch:
+            parser.arcs()
+    except (NoSource, NotPython):
+        # The file will be parsed again in the main process, which will deal
+        # with the error the usual way.
+        return None
+    return parse_results(parser)
+
+
+def parse_in_parallel(
+    coverage: Coverage,
+    file_reporters: Iterable[FileReporter],
+    jobs: int,
+) -> None:
+    """Parse the Python files among `file_reporters` using `jobs` processes.
+
+    Parsing is most of the work of analyzing a file.  The results are handed
+    to the file reporters, so that analyzing them and writing the report can
+    happen in this process, in the usual order.
+
+    """
+    pyfrs = [
+        fr for fr in file_reporters if isinstance(fr, PythonFileReporter) and fr._parser is None
+    ]
+    if len(pyfrs) < 2:
+        return
+
+    # Imported here to keep from slowing down the start of measurement.
+    import concurrent.futures
+
+    exclude = coverage._exclude_regex("exclude")
+    branch = coverage.get_data().has_arcs()
+    cache = coverage._parse_cache()
+    cache_dir = cache.directory if cache is not None else None
+    args = [(fr.filename, exclude, branch, cache_dir) for fr in pyfrs]
+    chunksize = max(1, len(args) // (jobs * 4))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        for fr, results in zip(pyfrs, executor.map(_parse_python_file, args, chunksize=chunksize)):
+            if results is not None:
+                fr.use_parse_results(results)
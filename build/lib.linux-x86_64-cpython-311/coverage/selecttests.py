@@ -0,0 +1,146 @@
+# Licensed under the Apache License: http://www.apache.org/licenses/LICENSE-2.0
+# For details: https://github.com/coveragepy/coveragepy/blob/main/NOTICE.txt
+
+"""Select the contexts that ran changed lines, for `coverage select-tests`."""
+
+from __future__ import annotations
+
+import os
+import os.path
+import re
+from collections.abc import Iterable, Iterator, Mapping
+
+from coverage.misc import isolate_module
+from coverage.sqldata import CoverageData
+from coverage.types import TLineNo
+
+os = isolate_module(os)
+
+# A hunk header in a unified diff: "@@ -OLD_START[,OLD_COUNT] +NEW_START[,NEW_COUNT] @@".
+HUNK_HEADER = re.compile(r"@@ -(\d+)(?:,(\d+))? \+\d+(?:,(\d+))? @@")
+
+
+def _diff_path(line: str) -> str:
+    """Get the file name from a "--- " or "+++ " line of a unified diff."""
+    path = line[4:].rstrip("\r\n")
+    # Some diff programs put a tab and a timestamp after the file name.
+    path = path.split("\t")[0]
+    if len(path) > 1 and path[0] == path[-1] == '"':
+        path = path[1:-1]
+    return path
+
+
+def _old_file_path(old_path: str, new_path: str, git_prefixes: bool) -> str:
+    """Get the file name of the old side of a file's diff, without any "a/"."""
+    if old_path.startswith("a/"):
+        if new_path.startswith("b/") or (new_path == "/dev/null" and git_prefixes):
+            return old_path[2:]
+    return old_path
+
+
+def parse_unified_diff(diff_lines: Iterable[str]) -> dict[str, set[TLineNo]]:
+    """Find the changed lines in a unified diff.
+
+    The coverage data was measured on the code before the change, so the line
+    numbers are on the old side of the diff: the lines that were removed or
+    replaced, and the lines on either side of where lines were added.
+
+    Returns a dict mapping the old file names to sets of line numbers.  Files
+    created by the diff aren't included, since they can't have been measured.
+    The "a/" and "b/" prefixes from git diffs are removed.
+
+    """
+    changes: dict[str, set[TLineNo]] = {}
+    old_path: str | None = None
+    git_prefixes = False
+    lines: set[TLineNo] | None = None
+    old_lineno = old_left = new_left = 0
+    # Are we in lines replacing removed lines, rather than only adding lines?
+    replacing = False
+    for line in diff_lines:
+        if old_left > 0 or new_left > 0:
+            # In a hunk.
+            # Some tools strip the space from empty context lines.
+            kind = line[:1] if line.rstrip("\r\n") else " "
+            if kind == "+":
+                if lines is not None and not replacing:
+                    # Inserted lines are between two old lines: use both.
+                    lines.update(n for n in (old_lineno - 1, old_lineno) if n > 0)
+                new_left -= 1
+            elif kind in {" ", "-"}:
+                if kind == "-":
+                    if lines is not None:
+                        lines.add(old_lineno)
+                    replacing = True
+                else:
+                    new_left -= 1
+                    replacing = False
+                old_lineno += 1
+                old_left -= 1
+        elif line.startswith("diff --git "):
+            git_prefixes = line.startswith("diff --git a/")
+        elif line.startswith("--- "):
+            old_path = _diff_path(line)
+            lines = None
+        elif line.startswith("+++ ") and old_path is not None:
+            old_path = _old_file_path(old_path, _diff_path(line), git_prefixes)
+            if old_path != "/dev/null":
+                lines = changes.setdefault(old_path, set())
+        elif line.startswith("@@ "):
+            m = HUNK_HEADER.match(line)
+            if m:
+                old_lineno = int(m[1])
+                old_left = int(m[2]) if m[2] is not None else 1
+                new_left = int(m[3]) if m[3] is not None else 1
+                replacing = False
+    return changes
+
+
+def parse_line_spec(spec: str) -> tuple[str, set[TLineNo] | None]:
+    """Parse a FILE[:LINES] argument to `coverage select-tests`.
+
+    LINES is a comma-separated list of line numbers or ranges like "10-20".
+    Returns the file name, and a set of line numbers, or None if no lines were
+    given, meaning the whole file.  Raises ValueError if LINES is malformed.
+
+    """
+    m = re.fullmatch(r"(.+):([\d,-]+)", spec)
+    if m is None:
+        return spec, None
+    path, line_list = m.groups()
+    lines: set[TLineNo] = set()
+    for part in line_list.split(","):
+        m = re.fullmatch(r"(\d+)(?:-(\d+))?", part)
+        if m is None or (m[2] is not None and int(m[2]) < int(m[1])):
+            raise ValueError(f"Couldn't understand line numbers in {spec!r}")
+        lines.update(range(int(m[1]), int(m[2] or m[1]) + 1))
+    return path, lines
+
+
+def select_contexts(
+    data: CoverageData,
+    changes: Mapping[str, set[TLineNo] | None],
+) -> Iterator[str]:
+    """Find the contexts in `data` that executed the `changes`.
+
+    `changes` maps file names to sets of line numbers, or to None for all of
+    the lines in the file.  File names are matched to measured files as
+    absolute paths.
+
+    The contexts are produced as they are found, each once.  The empty
+    context, for code run outside of any test, isn't produced.
+
+    """
+    measured = {
+        os.path.normcase(os.path.abspath(filename)): filename for filename in data.measured_files()
+    }
+    seen = {""}
+    for path, lines in changes.items():
+        filename = measured.get(os.path.normcase(os.path.abspath(path)))
+        if filename is None:
+            continue
+        if lines is None:
+            lines = set(data.lines(filename) or ())
+        for context in sorted(data.contexts_for_lines(filename, lines) - seen):
+            seen.add(context)
+            yield context
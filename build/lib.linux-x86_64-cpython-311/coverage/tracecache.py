@@ -0,0 +1,110 @@
+# Licensed under the Apache License: http://www.apache.org/licenses/LICENSE-2.0
+# For details: https://github.com/coveragepy/coveragepy/blob/main/NOTICE.txt
+
+"""A persistent on-disk cache of information used while tracing."""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from typing import TYPE_CHECKING, Any
+
+from coverage.debug import NoDebugging
+from coverage.misc import isolate_module
+from coverage.types import TDebugCtl
+
+if TYPE_CHECKING:
+    from coverage.config import CoverageConfig
+
+os = isolate_module(os)
+
+
+def trace_cache_dir(config: CoverageConfig) -> str:
+    """The directory to use for trace caches with `config`."""
+    cache_dir = config.trace_cache_dir
+    if cache_dir is None:
+        cache_dir = os.path.abspath(config.data_file) + "-trace-cache"
+    return cache_dir
+
+
+class TraceCache:
+    """Save and restore information used while tracing.
+
+    This is used for the decisions made by :meth:`InOrOut.should_trace`, and
+    for the branch trails of code measured by :class:`SysMonitor`.  `key` is a
+    hash of everything the entries depend on, so the entries for one key are
+    never stale.
+
+    Each key's entries are kept in one JSON file in `directory`, mapping names
+    to lists of values.  The file is read the first time an entry is needed,
+    and new entries are merged into it by :meth:`save`.  Files are written
+    atomically, so a number of processes can share the same directory.
+    Entries can be lost when processes save at the same time, but that only
+    means they will be computed again.
+
+    """
+
+    def __init__(self, directory: str, key: str, debug: TDebugCtl | None = None) -> None:
+        self.directory = directory
+        self.path = os.path.join(directory, key + ".json")
+        self.debug = debug or NoDebugging()
+        self.entries: dict[str, list[Any]] | None = None
+        self.new_entries: dict[str, list[Any]] = {}
+
+    def _read(self) -> dict[str, list[Any]]:
+        """Read the entries stored on disk, or an empty dict if there are none."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(entries, dict):
+            return {}
+        return entries
+
+    def get(self, name: str) -> list[Any] | None:
+        """Get the entry for `name`, or None if there isn't one."""
+        return self._entries().get(name)
+
+    def add(self, name: str, entry: list[Any]) -> None:
+        """Add an `entry` for `name`, to be written by :meth:`save`."""
+        self._entries()[name] = entry
+        self.new_entries[name] = entry
+
+    def _entries(self) -> dict[str, list[Any]]:
+        """Get all the entries, reading them from disk the first time."""
+        if self.entries is None:
+            self.entries = self._read()
+            if self.debug.should("dataio"):
+                self.debug.write(f"Read {len(self.entries)} entries from {self.path!r}")
+        return self.entries
+
+    def save(self) -> None:
+        """Merge the new entries into the file on disk.
+
+        If the cache can't be written, it's simply not written.
+
+        """
+        if not self.new_entries:
+            return
+        entries = self._read()
+        entries.update(self.new_entries)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(entries, f)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+        except OSError as exc:
+            if self.debug.should("dataio"):
+                self.debug.write(f"Couldn't write trace cache {self.path!r}: {exc}")
+            return
+
+        if self.debug.should("dataio"):
+            self.debug.write(f"Wrote {len(self.new_entries)} entries to {self.path!r}")
+        self.new_entries = {}
@@ -27,6 +27,8 @@ from coverage.debug import info_header, short_stack, write_formatted_info
 from coverage.exceptions import NoSource, CoverageException, _ExceptionDuringRun
 from coverage.execfile import PyRunner
 from coverage.results import display_covered, should_fail_under
+from coverage.selecttests import parse_line_spec, parse_unified_diff, select_contexts
+from coverage.types import TLineNo
 from coverage.version import __url__
 
 # When adding to this file, alphabetization is important.  Look for
@@ -56,6 +58,27 @@ class Opts:
         action="store_true",
         help="Measure branch coverage in addition to statement coverage.",
     )
+    changed = optparse.make_option(
+        "",
+        "--changed",
+        action="store",
+        metavar="DIFF",
+        help=oneline(
+            """
+            Read the changed lines from this unified diff file,
+            or '-' to read the diff from stdin.
+            """
+        ),
+    )
+    combine_jobs = optparse.make_option(
+        "-j",
+        "--jobs",
+        action="store",
+        dest="jobs",
+        metavar="N",
+        type=int,
+        help="Use N processes to combine data files. Defaults to 1.",
+    )
     concurrency = optparse.make_option(
         "",
         "--concurrency",
@@ -176,6 +199,14 @@ class Opts:
             """
         ),
     )
+    jobs = optparse.make_option(
+        "-j",
+        "--jobs",
+        action="store",
+        metavar="N",
+        type=int,
+        help="Use N processes to parse source files. Defaults to 1.",
+    )
     keep = optparse.make_option(
         "",
         "--keep",
@@ -383,6 +414,7 @@ class CoverageOptionParser(optparse.OptionParser):
             action=None,
             append=None,
             branch=None,
+            changed=None,
             concurrency=None,
             context=None,
             contexts=None,
@@ -394,6 +426,7 @@ class CoverageOptionParser(optparse.OptionParser):
             help=None,
             ignore_errors=None,
             include=None,
+            jobs=None,
             keep=None,
             module=None,
             omit=None,
@@ -532,6 +565,7 @@ COMMANDS = {
         [
             Opts.append,
             Opts.datafile,
+            Opts.combine_jobs,
             Opts.keep,
             Opts.quiet,
         ]
@@ -589,6 +623,7 @@ COMMANDS = {
             Opts.fail_under,
             Opts.ignore_errors,
             Opts.include,
+            Opts.jobs,
             Opts.omit,
             Opts.precision,
             Opts.quiet,
@@ -616,6 +651,7 @@ COMMANDS = {
             Opts.fail_under,
             Opts.ignore_errors,
             Opts.include,
+            Opts.jobs,
             Opts.omit,
             Opts.output_json,
             Opts.json_pretty_print,
@@ -633,6 +669,7 @@ COMMANDS = {
             Opts.fail_under,
             Opts.ignore_errors,
             Opts.include,
+            Opts.jobs,
             Opts.output_lcov,
             Opts.omit,
             Opts.quiet,
@@ -650,6 +687,7 @@ COMMANDS = {
             Opts.format,
             Opts.ignore_errors,
             Opts.include,
+            Opts.jobs,
             Opts.omit,
             Opts.precision,
             Opts.sort,
@@ -683,6 +721,26 @@ COMMANDS = {
         usage="[options] <pyfile> [program options]",
         description="Run a Python program, measuring code execution.",
     ),
+    "select-tests": CmdOptionParser(
+        "select-tests",
+        [
+            Opts.changed,
+            Opts.contexts,
+            Opts.datafle_input,
+        ]
+        + GLOBAL_ARGS,
+        usage="[options] [FILE[:LINES] ...]",
+        description=oneline(
+            """
+            Print the contexts that executed changed lines, one per line.
+            The changed lines are read from a unified diff with --changed,
+            or given as arguments: a file name, with an optional colon and
+            comma-separated line numbers or ranges, like 'mod.py:10-20,34'.
+            If test names were recorded as dynamic contexts, these are the
+            tests to run.
+            """
+        ),
+    ),
     "xml": CmdOptionParser(
         "xml",
         [
@@ -690,6 +748,7 @@ COMMANDS = {
             Opts.fail_under,
             Opts.ignore_errors,
             Opts.include,
+            Opts.jobs,
             Opts.omit,
             Opts.output_xml,
             Opts.quiet,
@@ -838,10 +897,18 @@ class CoverageScript:
             if options.append:
                 self.coverage.load()
             data_paths = args or None
-            self.coverage.combine(data_paths, strict=True, keep=bool(options.keep))
+            self.coverage.combine(
+                data_paths,
+                strict=True,
+                keep=bool(options.keep),
+                jobs=options.jobs or 1,
+            )
             self.coverage.save()
             return OK
 
+        elif options.action == "select-tests":
+            return self.do_select_tests(options, args, contexts)
+
         # Remaining actions are reporting, with some common options.
         report_args = dict(
             morfs=unglob_args(args),
@@ -855,7 +922,10 @@ class CoverageScript:
         # plugins may try to, for example, to read Django settings.
         sys.path.insert(0, "")
 
-        self.coverage.load()
+        if options.jobs is not None:
+            self.coverage.set_option("report:jobs", options.jobs)
+
+        self.coverage.load(read_only=True)
 
         total = None
         if options.action == "report":
@@ -1032,6 +1102,45 @@ class CoverageScript:
 
         return OK
 
+    def do_select_tests(
+        self,
+        options: optparse.Values,
+        args: list[str],
+        contexts: list[str] | None,
+    ) -> int:
+        """Implementation of 'coverage select-tests'."""
+        if not options.changed and not args:
+            show_help("Nothing to do: use --changed, or name files and lines.")
+            return ERR
+
+        changes: dict[str, set[TLineNo] | None] = {}
+        if options.changed == "-":
+            changes.update(parse_unified_diff(sys.stdin))
+        elif options.changed:
+            with open(options.changed, encoding="utf-8", errors="replace") as diff:
+                changes.update(parse_unified_diff(diff))
+        for arg in args:
+            try:
+                path, lines = parse_line_spec(arg)
+            except ValueError as exc:
+                show_help(str(exc))
+                return ERR
+            if lines is None:
+                changes[path] = None
+            elif path not in changes:
+                changes[path] = lines
+            else:
+                changed_lines = changes[path]
+                if changed_lines is not None:
+                    changed_lines.update(lines)
+
+        self.coverage.load(read_only=True)
+        data = self.coverage.get_data()
+        data.set_query_contexts(contexts)
+        for context in select_contexts(data, changes):
+            print(context, flush=True)
+        return OK
+
     def do_debug(self, args: list[str]) -> int:
         """Implementation of 'coverage debug'."""
 
@@ -1105,17 +1214,18 @@ HELP_TOPICS = {
         usage: {program_name} <command> [options] [args]
 
         Commands:
-            annotate    Annotate source files with execution information.
-            combine     Combine a number of data files.
-            debug       Display information about the internals of coverage.py
-            erase       Erase previously collected coverage data.
-            help        Get help on using coverage.py.
-            html        Create an HTML report.
-            json        Create a JSON report of coverage results.
-            lcov        Create an LCOV report of coverage results.
-            report      Report coverage stats on modules.
-            run         Run a Python program and measure code execution.
-            xml         Create an XML report of coverage results.
+            annotate        Annotate source files with execution information.
+            combine         Combine a number of data files.
+            debug           Display information about the internals of coverage.py
+            erase           Erase previously collected coverage data.
+            help            Get help on using coverage.py.
+            html            Create an HTML report.
+            json            Create a JSON report of coverage results.
+            lcov            Create an LCOV report of coverage results.
+            report          Report coverage stats on modules.
+            run             Run a Python program and measure code execution.
+            select-tests    Select the tests that ran changed lines.
+            xml             Create an XML report of coverage results.
 
         Use "{program_name} help <command>" for detailed help on any command.
     """,
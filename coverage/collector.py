@@ -19,9 +19,9 @@ from coverage.data import CoverageData
 from coverage.debug import short_stack
 from coverage.exceptions import ConfigError
 from coverage.misc import human_sorted_items, isolate_module
+from coverage.numbits import numbits_union, nums_to_numbits
 from coverage.plugin import CoveragePlugin
 from coverage.types import (
-    TArc,
     TCheckIncludeFn,
     TFileDisposition,
     Tracer,
@@ -43,7 +43,8 @@ class Collector:
 
     Creates a Tracer object for each thread, since they track stack
     information.  Each Tracer points to the same shared data, contributing
-    traced data points.
+    traced data points.  If the core uses sharded data, each Tracer has its
+    own data instead, and they are merged when the data is flushed.
 
     When the Collector is started, it creates a Tracer for the current thread,
     and installs a function to create Tracers for each new thread started.
@@ -69,6 +70,8 @@ class Collector:
         branch: bool,
         warn: TWarnFn,
         concurrency: list[str],
+        dynamic_context_buffer: int = 0,
+        flush_interval: float = 0.0,
     ) -> None:
         """Create a collector.
 
@@ -100,6 +103,16 @@ class Collector:
         (the default).  "thread" can be combined with one of the other three.
         Other values are ignored.
 
+        `dynamic_context_buffer` is how many measured lines or arcs to keep in
+        memory when switching dynamic contexts.  Data for a number of contexts
+        is written to the CoverageData at once when there's more than that,
+        when `flush_data` is called, or when stopping.  If zero, data is
+        written at every switch.
+
+        `flush_interval` is how many seconds to wait between writes of the data
+        to the CoverageData by a background thread.  If zero, data is only
+        written when `flush_data` is called.
+
         """
         self.core = core
         self.should_trace = should_trace
@@ -108,6 +121,8 @@ class Collector:
         self.file_mapper = file_mapper
         self.branch = branch
         self.warn = warn
+        self.dynamic_context_buffer = dynamic_context_buffer
+        self.flush_interval = flush_interval
         assert isinstance(concurrency, list), f"Expected a list: {concurrency!r}"
 
         self.pid = os.getpid()
@@ -115,6 +130,7 @@ class Collector:
         self.covdata: CoverageData
         self.threading = None
         self.static_context: str | None = None
+        self.current_context: str | None = None
 
         self.origin = short_stack()
 
@@ -162,6 +178,20 @@ class Collector:
 
             self.threading = threading
 
+        if self.flush_interval and not self.threading:
+            raise ConfigError(
+                "Can't use flush_interval with concurrency={}, threads are needed.".format(
+                    ",".join(concurrency),
+                ),
+            )
+
+        # The background thread writing data every flush_interval seconds.
+        self.flush_thread: Any = None
+        self.flush_stop: Any = None
+
+        # Data since the last reset snapshot, also written as we flush.
+        self.snapshot_data: CoverageData | None = None
+
         self.reset()
 
     def __repr__(self) -> str:
@@ -171,7 +201,15 @@ class Collector:
         """Use `covdata` for recording data."""
         self.covdata = covdata
         self.static_context = context
+        self.current_context = context
         self.covdata.set_context(self.static_context)
+        self.snapshot_data = None
+
+    def _covdatas(self) -> list[CoverageData]:
+        """The CoverageData objects to write flushed data to."""
+        if self.snapshot_data is None:
+            return [self.covdata]
+        return [self.covdata, self.snapshot_data]
 
     def tracer_name(self) -> str:
         """Return the class name of the tracer we're using."""
@@ -183,25 +221,46 @@ class Collector:
         # keys and data values that were still in use higher up the stack
         # when we are called as part of switch_context.
         with self.data_lock or contextlib.nullcontext():
-            for d in self.data.values():
-                d.clear()
+            for data in self.data_shards.values():
+                for d in data.values():
+                    d.clear()
 
+        self._reset_activity()
+
+    def _reset_activity(self) -> None:
+        """Start noticing activity in the tracers afresh."""
         for tracer in self.tracers:
             tracer.reset_activity()
 
     def reset(self) -> None:
         """Clear collected data, and prepare to collect more."""
         self.data_lock = self.threading.Lock() if self.threading else None
+        # Held while data is written to the CoverageData, which can happen
+        # in the flush thread as well as in the measured threads.
+        self.flush_lock = self.threading.RLock() if self.threading else None
 
         # The trace data we are collecting.
         self.data: TTraceData = {}
 
+        # All the trace data dicts the tracers write to, keyed by thread: just
+        # self.data under None, or with sharded data, one for each thread, so
+        # that tracers in different threads don't contend for the same dict
+        # and sets.  Shards of threads that have ended are dropped by
+        # _take_data once their data is taken.
+        self.data_shards: dict[Any, TTraceData] = {None: self.data}
+
         # A dictionary mapping file names to file tracer plugin names that will
         # handle them.
         self.file_tracers: dict[str, str] = {}
 
         self.disabled_plugins: set[str] = set()
 
+        # Data from dynamic contexts not yet written to the CoverageData:
+        # {context: {mapped file name: numbits or set of arcs}}, and how many
+        # lines or arcs it holds.
+        self.buffered_data: dict[str | None, dict[str, Any]] = {}
+        self.buffered_count = 0
+
         # The .should_trace_cache attribute is a cache from file names to
         # coverage.FileDisposition objects, or None.  When a file is first
         # considered for tracing, a FileDisposition is obtained from
@@ -249,7 +308,13 @@ class Collector:
     def _start_tracer(self) -> TTraceFn | None:
         """Start a new Tracer object, and store it in self.tracers."""
         tracer = self.core.tracer_class(**self.core.tracer_kwargs)
-        tracer.data = self.data
+        if self.core.sharded_data and self.threading:
+            # A tracer started again on the same thread uses the same shard.
+            thread = self.threading.current_thread()
+            with self.data_lock or contextlib.nullcontext():
+                tracer.data = self.data_shards.setdefault(thread, {})
+        else:
+            tracer.data = self.data
         tracer.lock_data = self.lock_data
         tracer.unlock_data = self.unlock_data
         tracer.trace_arcs = self.branch
@@ -316,6 +381,9 @@ class Collector:
 
         self.tracers = []
 
+        if self.flush_interval:
+            self._start_flush_thread()
+
         try:
             # Install the tracer on this thread.
             self._start_tracer()
@@ -345,6 +413,11 @@ class Collector:
         )
 
         self.pause()
+        self._stop_flush_thread()
+        if self.dynamic_context_buffer:
+            # Buffered data shouldn't wait in memory for a save that might
+            # never come.
+            self.flush_data()
 
         # Remove this Collector from the stack, and resume the one underneath (if any).
         self._collectors.pop()
@@ -373,6 +446,34 @@ class Collector:
             else:
                 self._start_tracer()
 
+    def _start_flush_thread(self) -> None:
+        """Start a thread to write the data every flush_interval seconds."""
+        assert self.threading is not None
+        running = self.threading.Event()
+        self.flush_stop = self.threading.Event()
+
+        def flush_periodically() -> None:
+            running.set()
+            while not self.flush_stop.wait(self.flush_interval):
+                self.flush_data()
+
+        self.flush_thread = self.threading.Thread(
+            target=flush_periodically,
+            name="coverage-flush",
+            daemon=True,
+        )
+        self.flush_thread.start()
+        # Wait until the thread is running, so that it won't be traced by the
+        # tracer we're about to install for new threads.
+        running.wait()
+
+    def _stop_flush_thread(self) -> None:
+        """Stop the thread started by _start_flush_thread, if there is one."""
+        if self.flush_thread is not None:
+            self.flush_stop.set()
+            self.flush_thread.join()
+            self.flush_thread = None
+
     def post_fork(self) -> None:
         """After a fork, tracers might need to adjust."""
         for tracer in self.tracers:
@@ -389,15 +490,59 @@ class Collector:
 
     def switch_context(self, new_context: str | None) -> None:
         """Switch to a new dynamic context."""
+        with self.flush_lock or contextlib.nullcontext():
+            self._switch_context(new_context)
+
+    def _switch_context(self, new_context: str | None) -> None:
+        """Switch to a new dynamic context, holding the flush lock."""
         context: str | None
-        self.flush_data()
+        if self.dynamic_context_buffer:
+            self._buffer_data()
+            if self.buffered_count > self.dynamic_context_buffer:
+                self._write_buffered_data()
+        else:
+            self.flush_data()
         if self.static_context:
             context = self.static_context
             if new_context:
                 context += "|" + new_context
         else:
             context = new_context
-        self.covdata.set_context(context)
+        self.current_context = context
+        for covdata in self._covdatas():
+            covdata.set_context(context)
+        self._restart_events()
+
+    def _restart_events(self) -> None:
+        """Have tracers that report each line only once start again."""
+        for tracer in self.tracers:
+            if hasattr(tracer, "restart_events"):
+                tracer.restart_events()
+
+    def snapshot(self, reset: bool) -> CoverageData:
+        """Get the data collected since the last reset snapshot.
+
+        Returns a new in-memory CoverageData.  If there hasn't been a reset
+        snapshot, it has everything collected so far.  If `reset` is true,
+        the next snapshot will start from now.
+
+        """
+        with self.flush_lock or contextlib.nullcontext():
+            return self._snapshot(reset)
+
+    def _snapshot(self, reset: bool) -> CoverageData:
+        """Take a snapshot, holding the flush lock."""
+        self.flush_data()
+        snapshot = CoverageData(no_disk=True, warn=self.warn)
+        if self.snapshot_data is not None:
+            snapshot.update(self.snapshot_data)
+        else:
+            snapshot.update(self.covdata)
+        if reset:
+            self.snapshot_data = CoverageData(no_disk=True, warn=self.warn)
+            self.snapshot_data.set_context(self.current_context)
+            self._restart_events()
+        return snapshot
 
     def disable_plugin(self, disposition: TFileDisposition) -> None:
         """Disable the plugin mentioned in `disposition`."""
@@ -438,49 +583,119 @@ class Collector:
         """Record that `plugin` was disabled during the run."""
         self.disabled_plugins.add(plugin._coverage_plugin_name)
 
-    def flush_data(self) -> bool:
-        """Save the collected data to our associated `CoverageData`.
+    def _take_data(self) -> dict[str, Any]:
+        """Remove the collected lines or arcs, keyed by mapped file names.
 
-        Data may have also been saved along the way. This forces the
-        last of the data to be saved.
+        Tracers in other threads can go on recording while this runs.  Data
+        they record after it's been taken is kept for the next time.
 
-        Returns True if there was data to save, False if not.
         """
-        if not self._activity():
-            return False
-
-        if self.branch:
-            if self.core.packed_arcs:
-                # Unpack the line number pairs packed into integers.  See
-                # tracer.c:CTracer_record_pair for the C code that creates
-                # these packed ints.
-                arc_data: dict[str, list[TArc]] = {}
-                packed_data = cast(dict[str, set[int]], self.data)
-
-                # The list() here and in the inner loop are to get a clean copy
-                # even as tracers are continuing to add data.
-                for fname, packeds in list(packed_data.items()):
-                    tuples = []
-                    for packed in list(packeds):
-                        l1 = packed & 0xFFFFF
-                        l2 = (packed & (0xFFFFF << 20)) >> 20
-                        if packed & (1 << 40):
-                            l1 *= -1
-                        if packed & (1 << 41):
-                            l2 *= -1
-                        tuples.append((l1, l2))
-                    arc_data[fname] = tuples
-            else:
-                arc_data = cast(dict[str, list[TArc]], self.data)
-            self.covdata.add_arcs(self.mapped_file_dict(arc_data))
-        else:
-            line_data = cast(dict[str, set[int]], self.data)
-            self.covdata.add_lines(self.mapped_file_dict(line_data))
+        # Reset the activity first: anything recorded from now on needs to be
+        # taken by the next flush.
+        self._reset_activity()
 
+        taken: dict[str, Any] = {}
+        with self.data_lock or contextlib.nullcontext():
+            data_shards = list(self.data_shards.values())
+            # Threads that have already ended won't record any more, so once
+            # their data is taken, their shards can go.
+            ended = [
+                thread
+                for thread in self.data_shards
+                if thread is not None and not thread.is_alive()
+            ]
+        for data in data_shards:
+            file_datas = cast(dict[str, Any], data)
+            # The list() here is to get a clean copy even as tracers are
+            # continuing to add files.
+            for fname, file_data in list(file_datas.items()):
+                if self.branch and self.core.packed_arcs:
+                    # The C tracer keeps arcs packed into integers in CArcSet
+                    # objects, which unpack themselves in C.  See
+                    # ctracer/arcset.c for the details.
+                    items = set(file_data.pop_arcs())
+                else:
+                    # Copying and then removing the copied items are each
+                    # atomic, so items added in between aren't lost.
+                    items = set(file_data)
+                    file_data -= items
+                if fname in taken:
+                    taken[fname].update(items)
+                else:
+                    taken[fname] = items
+        if ended:
+            with self.data_lock or contextlib.nullcontext():
+                for thread in ended:
+                    # The ended thread's tracer still refers to the shard, so
+                    # empty it to free the memory.
+                    shard = self.data_shards.pop(thread, None)
+                    if shard is not None:
+                        shard.clear()
+        return self.mapped_file_dict(taken)
+
+    def _add_file_tracers(self) -> None:
+        """Record the file tracers that were used in our CoverageData."""
         file_tracers = {
             k: v for k, v in self.file_tracers.items() if v not in self.disabled_plugins
         }
-        self.covdata.add_file_tracers(self.mapped_file_dict(file_tracers))
+        for covdata in self._covdatas():
+            covdata.add_file_tracers(self.mapped_file_dict(file_tracers))
 
-        self._clear_data()
+    def _buffer_data(self) -> None:
+        """Move the collected data into the buffer for the current context."""
+        if not self._activity():
+            return
+
+        buffered = self.buffered_data.setdefault(self.current_context, {})
+        for fname, items in self._take_data().items():
+            if self.branch:
+                arcs = buffered.setdefault(fname, set())
+                before = len(arcs)
+                arcs.update(items)
+                self.buffered_count += len(arcs) - before
+            else:
+                line_bits = nums_to_numbits(items)
+                if fname in buffered:
+                    line_bits = numbits_union(buffered[fname], line_bits)
+                buffered[fname] = line_bits
+                self.buffered_count += len(items)
+
+    def _write_buffered_data(self) -> bool:
+        """Write the buffered data for all contexts to our CoverageData.
+
+        Returns True if there was data to write, False if not.
+
+        """
+        if not self.buffered_data:
+            return False
+        for covdata in self._covdatas():
+            covdata._add_context_data(self.buffered_data, arcs=self.branch)
+        self._add_file_tracers()
+        self.buffered_data = {}
+        self.buffered_count = 0
         return True
+
+    def flush_data(self) -> bool:
+        """Save the collected data to our associated `CoverageData`.
+
+        Data may have also been saved along the way. This forces the
+        last of the data to be saved.
+
+        Returns True if there was data to save, False if not.
+        """
+        with self.flush_lock or contextlib.nullcontext():
+            if self.dynamic_context_buffer:
+                self._buffer_data()
+                return self._write_buffered_data()
+
+            if not self._activity():
+                return False
+
+            mapped_data = self._take_data()
+            for covdata in self._covdatas():
+                if self.branch:
+                    covdata.add_arcs(mapped_data)
+                else:
+                    covdata.add_lines(mapped_data)
+            self._add_file_tracers()
+            return True
@@ -204,6 +204,9 @@ class CoverageConfig(TConfigurable, TPluginConfig):
         self.debug_file: str | None = None
         self.disable_warnings: list[str] = []
         self.dynamic_context: str | None = None
+        self.dynamic_context_buffer = 0
+        self.flush_interval = 0.0
+        self.index_line_contexts = False
         self.parallel = False
         self.patch: list[str] = []
         self.plugins: list[str] = []
@@ -215,6 +218,8 @@ class CoverageConfig(TConfigurable, TPluginConfig):
         self.source_pkgs: list[str] = []
         self.source_dirs: list[str] = []
         self.timid = False
+        self.trace_cache = False
+        self.trace_cache_dir: str | None = None
         self._crash: str | None = None
 
         # Defaults for [report]
@@ -224,11 +229,14 @@ class CoverageConfig(TConfigurable, TPluginConfig):
         self.format: str | None = None
         self.ignore_errors = False
         self.include_namespace_packages = False
+        self.jobs = 1
         self.report_include: list[str] | None = None
         self.report_omit: list[str] | None = None
         self.partial_always_list = DEFAULT_PARTIAL_ALWAYS[:]
         self.partial_list = DEFAULT_PARTIAL[:]
         self.partial_also: list[str] = []
+        self.parse_cache = False
+        self.parse_cache_dir: str | None = None
         self.precision = 0
         self.report_contexts: list[str] | None = None
         self.show_missing = False
@@ -414,6 +422,9 @@ class CoverageConfig(TConfigurable, TPluginConfig):
         ("debug_file", "run:debug_file", "file"),
         ("disable_warnings", "run:disable_warnings", "list"),
         ("dynamic_context", "run:dynamic_context"),
+        ("dynamic_context_buffer", "run:dynamic_context_buffer", "int"),
+        ("flush_interval", "run:flush_interval", "float"),
+        ("index_line_contexts", "run:index_line_contexts", "boolean"),
         ("parallel", "run:parallel", "boolean"),
         ("patch", "run:patch", "list"),
         ("plugins", "run:plugins", "list"),
@@ -425,6 +436,8 @@ class CoverageConfig(TConfigurable, TPluginConfig):
         ("source_pkgs", "run:source_pkgs", "list"),
         ("source_dirs", "run:source_dirs", "list"),
         ("timid", "run:timid", "boolean"),
+        ("trace_cache", "run:trace_cache", "boolean"),
+        ("trace_cache_dir", "run:trace_cache_dir", "file"),
         ("_crash", "run:_crash"),
         #
         # [report]
@@ -434,9 +447,12 @@ class CoverageConfig(TConfigurable, TPluginConfig):
         ("format", "report:format"),
         ("ignore_errors", "report:ignore_errors", "boolean"),
         ("include_namespace_packages", "report:include_namespace_packages", "boolean"),
+        ("jobs", "report:jobs", "int"),
         ("partial_always_list", "report:partial_branches_always", "regexlist"),
         ("partial_list", "report:partial_branches", "regexlist"),
         ("partial_also", "report:partial_also", "regexlist"),
+        ("parse_cache", "report:parse_cache", "boolean"),
+        ("parse_cache_dir", "report:parse_cache_dir", "file"),
         ("precision", "report:precision", "int"),
         ("report_contexts", "report:contexts", "list"),
         ("report_include", "report:include", "list"),
@@ -51,6 +51,7 @@ from coverage.misc import (
     join_regex,
 )
 from coverage.multiproc import patch_multiprocessing
+from coverage.parsecache import ParseCache
 from coverage.patch import apply_patches
 from coverage.plugin import FileReporter
 from coverage.plugin_support import Plugins, TCoverageInit
@@ -58,6 +59,7 @@ from coverage.python import PythonFileReporter
 from coverage.report import SummaryReporter
 from coverage.report_core import render_report
 from coverage.results import Analysis, analysis_from_file_reporter
+from coverage.tracecache import TraceCache, trace_cache_dir
 from coverage.types import (
     FilePath,
     TConfigSectionIn,
@@ -547,8 +549,18 @@ class Coverage(TConfigurable):
         """
         self.config.set_option(option_name, value)
 
-    def load(self) -> None:
-        """Load previously-collected coverage data from the data file."""
+    def load(self, read_only: bool = False) -> None:
+        """Load previously-collected coverage data from the data file.
+
+        If `read_only` is true, the data file is opened only for reading,
+        which is faster for reporting on large data files.  The data file must
+        not change while it's in use, and no more data can be collected or
+        combined into it until :meth:`erase` is called.
+
+        .. versionadded:: 7.12
+            The `read_only` parameter.
+
+        """
         self._init()
         if self._collector is not None:
             self._collector.reset()
@@ -558,7 +570,7 @@ class Coverage(TConfigurable):
         self._post_init()
         if not should_skip:
             assert self._data is not None
-            self._data.read()
+            self._data.read(read_only=read_only)
 
     def _init_for_start(self) -> None:
         """Initialization for start()"""
@@ -587,7 +599,6 @@ class Coverage(TConfigurable):
             warn=self._warn,
             debug=(self._debug if self._debug.should("core") else None),
             config=self.config,
-            dynamic_contexts=(should_start_context is not None),
             metacov=self._metacov,
         )
         self._collector = Collector(
@@ -599,6 +610,8 @@ class Coverage(TConfigurable):
             branch=self.config.branch,
             warn=self._warn,
             concurrency=concurrency,
+            dynamic_context_buffer=self.config.dynamic_context_buffer,
+            flush_interval=self.config.flush_interval,
         )
 
         suffix = self._data_suffix_specified
@@ -641,6 +654,7 @@ class Coverage(TConfigurable):
         )
         self._inorout.plugins = self._plugins
         self._inorout.disp_class = self._core.file_disposition_class
+        self._inorout.trace_cache = self._trace_cache()
 
         # It's useful to write debug info after initing for start.
         self._should_write_debug = True
@@ -658,6 +672,14 @@ class Coverage(TConfigurable):
                     self._on_sigterm,
                 )
 
+    def _trace_cache(self) -> TraceCache | None:
+        """Get the TraceCache to use for should_trace decisions, if configured."""
+        if not self.config.trace_cache:
+            return None
+        assert self._inorout is not None
+        cache_dir = trace_cache_dir(self.config)
+        return TraceCache(cache_dir, self._inorout.trace_cache_key(), debug=self._debug)
+
     def _init_data(self, suffix: str | bool | None) -> None:
         """Create a data file if we don't have one yet."""
         if self._data is None:
@@ -722,6 +744,9 @@ class Coverage(TConfigurable):
         if self._started:
             assert self._collector is not None
             self._collector.stop()
+            assert self._inorout is not None
+            if self._inorout.trace_cache is not None:
+                self._inorout.trace_cache.save()
         self._started = False
 
     @contextlib.contextmanager
@@ -795,6 +820,30 @@ class Coverage(TConfigurable):
 
         self._collector.switch_context(new_context)
 
+    def snapshot(self, reset: bool = True) -> CoverageData:
+        """Get the data measured since the last snapshot.
+
+        Returns a new in-memory :class:`CoverageData` with the data measured
+        since the last call to :meth:`snapshot` with `reset` true, or since
+        measurement started if there hasn't been one.  This is useful in
+        long-running processes to see what ran during a period of time.  All
+        the data is also recorded in the usual data file.
+
+        If `reset` is true, the next snapshot will only have what is measured
+        after this call.  The sys.monitoring core reports each line only once,
+        so its events are re-enabled to report lines again.
+
+        Coverage collection must be started already.
+
+        .. versionadded:: 7.12
+
+        """
+        if not self._started:
+            raise CoverageException("Cannot take a snapshot, coverage is not started")
+
+        assert self._collector is not None
+        return self._collector.snapshot(reset)
+
     def clear_exclude(self, which: str = "exclude") -> None:
         """Clear the exclude list."""
         self._init()
@@ -832,6 +881,15 @@ class Coverage(TConfigurable):
             self._exclude_re[which] = join_regex(excl_list)
         return self._exclude_re[which]
 
+    def _parse_cache(self) -> ParseCache | None:
+        """Get the ParseCache to use for Python files, if configured."""
+        if not self.config.parse_cache:
+            return None
+        cache_dir = self.config.parse_cache_dir
+        if cache_dir is None:
+            cache_dir = os.path.abspath(self.config.data_file) + "-parse-cache"
+        return ParseCache(cache_dir, debug=self._debug)
+
     def get_exclude_list(self, which: str = "exclude") -> list[str]:
         """Return a list of excluded regex strings.
 
@@ -845,6 +903,8 @@ class Coverage(TConfigurable):
     def save(self) -> None:
         """Save the collected coverage data to the data file."""
         data = self.get_data()
+        if self.config.index_line_contexts and data.data_filename() == data.base_filename():
+            data.index_line_contexts()
         data.write()
 
     def _make_aliases(self) -> PathAliases:
@@ -864,6 +924,7 @@ class Coverage(TConfigurable):
         data_paths: Iterable[str] | None = None,
         strict: bool = False,
         keep: bool = False,
+        jobs: int = 1,
     ) -> None:
         """Combine together a number of similarly-named coverage data files.
 
@@ -881,6 +942,10 @@ class Coverage(TConfigurable):
 
         If `keep` is true, then original input data files won't be deleted.
 
+        If `jobs` is more than 1, then the data files are combined using that
+        many processes.  Each process combines a share of the files, and then
+        those intermediate results are combined.
+
         .. versionadded:: 4.0
             The `data_paths` parameter.
 
@@ -889,6 +954,9 @@ class Coverage(TConfigurable):
 
         .. versionadded: 5.5
             The `keep` parameter.
+
+        .. versionadded:: 7.12
+            The `jobs` parameter.
         """
         self._init()
         self._init_data(suffix=None)
@@ -903,7 +971,10 @@ class Coverage(TConfigurable):
             strict=strict,
             keep=keep,
             message=self._message,
+            jobs=jobs,
         )
+        if self.config.index_line_contexts:
+            self._data.index_line_contexts()
 
     def get_data(self) -> CoverageData:
         """Get the collected data.
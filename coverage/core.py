@@ -16,6 +16,7 @@ from coverage.exceptions import ConfigError
 from coverage.misc import isolate_module
 from coverage.pytracer import PyTracer
 from coverage.sysmon import SysMonitor
+from coverage.tracecache import trace_cache_dir
 from coverage.types import TDebugCtl, TFileDisposition, Tracer, TWarnFn
 
 os = isolate_module(os)
@@ -52,6 +53,7 @@ class Core:
     file_disposition_class: type[TFileDisposition]
     supports_plugins: bool
     packed_arcs: bool
+    sharded_data: bool
     systrace: bool
 
     def __init__(
@@ -60,7 +62,6 @@ class Core:
         warn: TWarnFn,
         debug: TDebugCtl | None,
         config: CoverageConfig,
-        dynamic_contexts: bool,
         metacov: bool,
     ) -> None:
         def _debug(msg: str) -> None:
@@ -75,10 +76,6 @@ class Core:
             reason_no_sysmon = "sys.monitoring isn't available in this version"
         elif config.branch and not env.PYBEHAVIOR.branch_right_left:
             reason_no_sysmon = "sys.monitoring can't measure branches in this version"
-        elif dynamic_contexts:
-            reason_no_sysmon = "it doesn't yet support dynamic contexts"
-        elif any((bad := c) in config.concurrency for c in ["greenlet", "eventlet", "gevent"]):
-            reason_no_sysmon = f"it doesn't support concurrency={bad}"
 
         core_name: str | None = None
         if config.timid:
@@ -116,21 +113,29 @@ class Core:
         if core_name == "sysmon":
             self.tracer_class = SysMonitor
             self.tracer_kwargs["tool_id"] = 3 if metacov else 1
+            if config.trace_cache:
+                self.tracer_kwargs["trace_cache_dir"] = trace_cache_dir(config)
+            if CTRACER_FILE:
+                self.tracer_kwargs["callbacks_class"] = coverage.tracer.CSysMonCallbacks
+                _debug("core.py: sysmon will use C callbacks")
             self.file_disposition_class = FileDisposition
             self.supports_plugins = False
             self.packed_arcs = False
+            self.sharded_data = False
             self.systrace = False
         elif core_name == "ctrace":
             self.tracer_class = coverage.tracer.CTracer
             self.file_disposition_class = coverage.tracer.CFileDisposition
             self.supports_plugins = True
             self.packed_arcs = True
+            self.sharded_data = True
             self.systrace = True
         elif core_name == "pytrace":
             self.tracer_class = PyTracer
             self.file_disposition_class = FileDisposition
             self.supports_plugins = False
             self.packed_arcs = False
+            self.sharded_data = False
             self.systrace = True
         else:
             raise ConfigError(f"Unknown core value: {core_name!r}")
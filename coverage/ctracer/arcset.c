@@ -0,0 +1,339 @@
+/* Licensed under the Apache License: http://www.apache.org/licenses/LICENSE-2.0 */
+/* For details: https://github.com/coveragepy/coveragepy/blob/main/NOTICE.txt */
+
+/* A compact set of arcs for CTracer. */
+
+/*
+    Conceptually, arc data is a set of tuples (l1, l2), but literally making
+    a set of tuples would mean constructing a tuple just to see if we'd
+    already recorded an arc.  Instead, the two line numbers are packed into
+    one 64-bit integer, and the integers are kept in a C hash table, so
+    recording an arc that's already been seen allocates nothing.
+
+    The tuples are only made when the collector asks for them with arcs() or
+    pop_arcs(), which unpack the whole table in one pass.
+*/
+
+#include "util.h"
+#include "arcset.h"
+
+#if PY_VERSION_HEX < 0x030D0000
+/* Critical sections are only needed on free-threaded builds, 3.13+. */
+#define Py_BEGIN_CRITICAL_SECTION(op)   {
+#define Py_END_CRITICAL_SECTION()       }
+#endif
+
+/* The value in unused slots.  Packed arcs never have the high bits set. */
+#define ARCSET_EMPTY        (~(uint64)0)
+
+/* The size of a table when the first arc is added. */
+#define ARCSET_MIN_SIZE     64
+
+/* Line numbers are packed into 20 bits, with sign bits above them. */
+#define PACK_MASK           0xFFFFF
+#define PACK_SHIFT          20
+#define PACK_NEG1           (((uint64)1) << 40)
+#define PACK_NEG2           (((uint64)1) << 41)
+
+static uint64
+pack_arc(int l1, int l2)
+{
+    uint64 packed = 0;
+
+    if (l1 < 0) {
+        packed |= PACK_NEG1;
+        l1 = -l1;
+    }
+    if (l2 < 0) {
+        packed |= PACK_NEG2;
+        l2 = -l2;
+    }
+    packed |= (((uint64)l2) << PACK_SHIFT) + (uint64)l1;
+    return packed;
+}
+
+static void
+unpack_arc(uint64 packed, long *l1, long *l2)
+{
+    *l1 = (long)(packed & PACK_MASK);
+    *l2 = (long)((packed >> PACK_SHIFT) & PACK_MASK);
+    if (packed & PACK_NEG1) {
+        *l1 = -*l1;
+    }
+    if (packed & PACK_NEG2) {
+        *l2 = -*l2;
+    }
+}
+
+/* Find the slot for `packed` in `table`: either where it is, or where it goes. */
+static Py_ssize_t
+find_slot(uint64 * table, Py_ssize_t size, uint64 packed)
+{
+    uint64 mask = (uint64)size - 1;
+    uint64 h = packed * 0x9E3779B97F4A7C15ULL;
+    uint64 i = (h ^ (h >> 32)) & mask;
+
+    while (table[i] != ARCSET_EMPTY && table[i] != packed) {
+        i = (i + 1) & mask;
+    }
+    return (Py_ssize_t)i;
+}
+
+/* Make the table bigger, rehashing all the entries. */
+static int
+CArcSet_grow(CArcSet *self)
+{
+    Py_ssize_t new_size = self->size ? self->size * 2 : ARCSET_MIN_SIZE;
+    uint64 * new_table = NULL;
+    Py_ssize_t i;
+
+    new_table = PyMem_New(uint64, new_size);
+    if (new_table == NULL) {
+        PyErr_NoMemory();
+        return RET_ERROR;
+    }
+    for (i = 0; i < new_size; i++) {
+        new_table[i] = ARCSET_EMPTY;
+    }
+    for (i = 0; i < self->size; i++) {
+        if (self->table[i] != ARCSET_EMPTY) {
+            new_table[find_slot(new_table, new_size, self->table[i])] = self->table[i];
+        }
+    }
+
+    PyMem_Free(self->table);
+    self->table = new_table;
+    self->size = new_size;
+    return RET_OK;
+}
+
+/* Record a packed arc.  The caller must be in a critical section. */
+static int
+CArcSet_add_packed(CArcSet *self, uint64 packed)
+{
+    Py_ssize_t slot;
+
+    /* Keep the table no more than two-thirds full. */
+    if ((self->count + 1) * 3 > self->size * 2) {
+        if (CArcSet_grow(self) < 0) {
+            return RET_ERROR;
+        }
+    }
+    slot = find_slot(self->table, self->size, packed);
+    if (self->table[slot] == ARCSET_EMPTY) {
+        self->table[slot] = packed;
+        self->count++;
+    }
+    return RET_OK;
+}
+
+/* Record the arc (l1, l2). */
+int
+CArcSet_add(CArcSet *self, int l1, int l2)
+{
+    int ret;
+    uint64 packed = pack_arc(l1, l2);
+
+    Py_BEGIN_CRITICAL_SECTION(self);
+    ret = CArcSet_add_packed(self, packed);
+    Py_END_CRITICAL_SECTION();
+
+    return ret;
+}
+
+static void
+CArcSet_dealloc(CArcSet *self)
+{
+    PyMem_Free(self->table);
+
+    Py_TYPE(self)->tp_free((PyObject*)self);
+}
+
+static Py_ssize_t
+CArcSet_len(CArcSet *self)
+{
+    return self->count;
+}
+
+static PyObject *
+CArcSet_py_add(CArcSet *self, PyObject *args)
+{
+    int l1, l2;
+
+    if (!PyArg_ParseTuple(args, "ii:add", &l1, &l2)) {
+        return NULL;
+    }
+    if (CArcSet_add(self, l1, l2) < 0) {
+        return NULL;
+    }
+    Py_RETURN_NONE;
+}
+
+/* Remove all the arcs.  The caller must be in a critical section. */
+static void
+CArcSet_empty(CArcSet *self)
+{
+    PyMem_Free(self->table);
+    self->table = NULL;
+    self->size = 0;
+    self->count = 0;
+}
+
+static PyObject *
+CArcSet_clear(CArcSet *self, PyObject *Py_UNUSED(ignored))
+{
+    Py_BEGIN_CRITICAL_SECTION(self);
+    CArcSet_empty(self);
+    Py_END_CRITICAL_SECTION();
+
+    Py_RETURN_NONE;
+}
+
+/*
+ * Make a list of (l1, l2) tuples from the packed arcs, maybe clearing them.
+ *
+ * Making objects can run the garbage collector and finalizers, which can add
+ * arcs and re-allocate the table.  On free-threaded builds it can also
+ * suspend our critical section.  So the packed arcs are copied out of the
+ * table first, and the tuples are made from the copy.
+ */
+static PyObject *
+CArcSet_unpack(CArcSet *self, BOOL clear)
+{
+    uint64 * packed = NULL;
+    PyObject * arcs = NULL;
+    PyObject * arc;
+    BOOL had_error = FALSE;
+    Py_ssize_t i, n = 0;
+    long l1, l2;
+
+    Py_BEGIN_CRITICAL_SECTION(self);
+    if (self->count > 0) {
+        packed = PyMem_New(uint64, self->count);
+        if (packed == NULL) {
+            had_error = TRUE;
+        }
+        else {
+            for (i = 0; i < self->size; i++) {
+                if (self->table[i] != ARCSET_EMPTY) {
+                    packed[n++] = self->table[i];
+                }
+            }
+            if (clear) {
+                CArcSet_empty(self);
+            }
+        }
+    }
+    Py_END_CRITICAL_SECTION();
+
+    if (had_error) {
+        PyErr_NoMemory();
+        return NULL;
+    }
+
+    arcs = PyList_New(n);
+    if (arcs == NULL) {
+        goto error;
+    }
+    for (i = 0; i < n; i++) {
+        unpack_arc(packed[i], &l1, &l2);
+        arc = Py_BuildValue("(ll)", l1, l2);
+        if (arc == NULL) {
+            goto error;
+        }
+        PyList_SET_ITEM(arcs, i, arc);
+    }
+    PyMem_Free(packed);
+    return arcs;
+
+error:
+    Py_XDECREF(arcs);
+    if (clear) {
+        /* Put the arcs back, so that they aren't lost. */
+        Py_BEGIN_CRITICAL_SECTION(self);
+        for (i = 0; i < n; i++) {
+            if (CArcSet_add_packed(self, packed[i]) < 0) {
+                break;
+            }
+        }
+        Py_END_CRITICAL_SECTION();
+    }
+    PyMem_Free(packed);
+    return NULL;
+}
+
+static PyObject *
+CArcSet_arcs(CArcSet *self, PyObject *Py_UNUSED(ignored))
+{
+    return CArcSet_unpack(self, FALSE);
+}
+
+static PyObject *
+CArcSet_pop_arcs(CArcSet *self, PyObject *Py_UNUSED(ignored))
+{
+    return CArcSet_unpack(self, TRUE);
+}
+
+static PySequenceMethods
+CArcSet_as_sequence = {
+    (lenfunc)CArcSet_len,      /* sq_length */
+};
+
+static PyMethodDef
+CArcSet_methods[] = {
+    { "add",    (PyCFunction) CArcSet_py_add,   METH_VARARGS,
+            PyDoc_STR("Record the arc (l1, l2).") },
+
+    { "clear",  (PyCFunction) CArcSet_clear,    METH_NOARGS,
+            PyDoc_STR("Remove all the arcs.") },
+
+    { "arcs",   (PyCFunction) CArcSet_arcs,     METH_NOARGS,
+            PyDoc_STR("Get a list of the (l1, l2) arcs recorded.") },
+
+    { "pop_arcs", (PyCFunction) CArcSet_pop_arcs, METH_NOARGS,
+            PyDoc_STR("Get a list of the (l1, l2) arcs recorded, and remove them.") },
+
+    { NULL }
+};
+
+PyTypeObject
+CArcSetType = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    "coverage.CArcSet",        /*tp_name*/
+    sizeof(CArcSet),           /*tp_basicsize*/
+    0,                         /*tp_itemsize*/
+    (destructor)CArcSet_dealloc, /*tp_dealloc*/
+    0,                         /*tp_print*/
+    0,                         /*tp_getattr*/
+    0,                         /*tp_setattr*/
+    0,                         /*tp_compare*/
+    0,                         /*tp_repr*/
+    0,                         /*tp_as_number*/
+    &CArcSet_as_sequence,      /*tp_as_sequence*/
+    0,                         /*tp_as_mapping*/
+    0,                         /*tp_hash */
+    0,                         /*tp_call*/
+    0,                         /*tp_str*/
+    0,                         /*tp_getattro*/
+    0,                         /*tp_setattro*/
+    0,                         /*tp_as_buffer*/
+    Py_TPFLAGS_DEFAULT,        /*tp_flags*/
+    "CArcSet objects",         /* tp_doc */
+    0,                         /* tp_traverse */
+    0,                         /* tp_clear */
+    0,                         /* tp_richcompare */
+    0,                         /* tp_weaklistoffset */
+    0,                         /* tp_iter */
+    0,                         /* tp_iternext */
+    CArcSet_methods,           /* tp_methods */
+    0,                         /* tp_members */
+    0,                         /* tp_getset */
+    0,                         /* tp_base */
+    0,                         /* tp_dict */
+    0,                         /* tp_descr_get */
+    0,                         /* tp_descr_set */
+    0,                         /* tp_dictoffset */
+    0,                         /* tp_init */
+    0,                         /* tp_alloc */
+    0,                         /* tp_new */
+};
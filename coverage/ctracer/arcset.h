@@ -0,0 +1,25 @@
+/* Licensed under the Apache License: http://www.apache.org/licenses/LICENSE-2.0 */
+/* For details: https://github.com/coveragepy/coveragepy/blob/main/NOTICE.txt */
+
+#ifndef _COVERAGE_ARCSET_H
+#define _COVERAGE_ARCSET_H
+
+#include "util.h"
+
+/* The CArcSet type: a set of arcs, stored as packed 64-bit integers. */
+
+typedef struct CArcSet {
+    PyObject_HEAD
+
+    /* An open-addressed hash table of packed arcs.  Empty slots hold
+       ARCSET_EMPTY.  The size is always a power of two. */
+    uint64 * table;
+    Py_ssize_t size;
+    Py_ssize_t count;
+} CArcSet;
+
+int CArcSet_add(CArcSet *self, int l1, int l2);
+
+extern PyTypeObject CArcSetType;
+
+#endif /* _COVERAGE_ARCSET_H */
@@ -4,6 +4,8 @@
 #include "util.h"
 #include "tracer.h"
 #include "filedisp.h"
+#include "sysmon.h"
+#include "arcset.h"
 
 /* Module definition */
 
@@ -22,6 +24,10 @@ tracer_exec(PyObject *mod)
         return -1;
     }
 
+    if (CSysMonCallbacks_intern_strings() < 0) {
+        return -1;
+    }
+
     /* Initialize CTracer */
     CTracerType.tp_new = PyType_GenericNew;
     if (PyType_Ready(&CTracerType) < 0) {
@@ -48,6 +54,40 @@ tracer_exec(PyObject *mod)
         return -1;
     }
 
+    /* Initialize CSysMonCallbacks */
+    CSysMonCallbacksType.tp_new = PyType_GenericNew;
+    if (PyType_Ready(&CSysMonCallbacksType) < 0) {
+        Py_DECREF(&CTracerType);
+        Py_DECREF(&CFileDispositionType);
+        return -1;
+    }
+
+    Py_INCREF(&CSysMonCallbacksType);
+    if (PyModule_AddObject(mod, "CSysMonCallbacks", (PyObject *)&CSysMonCallbacksType) < 0) {
+        Py_DECREF(&CTracerType);
+        Py_DECREF(&CFileDispositionType);
+        Py_DECREF(&CSysMonCallbacksType);
+        return -1;
+    }
+
+    /* Initialize CArcSet */
+    CArcSetType.tp_new = PyType_GenericNew;
+    if (PyType_Ready(&CArcSetType) < 0) {
+        Py_DECREF(&CTracerType);
+        Py_DECREF(&CFileDispositionType);
+        Py_DECREF(&CSysMonCallbacksType);
+        return -1;
+    }
+
+    Py_INCREF(&CArcSetType);
+    if (PyModule_AddObject(mod, "CArcSet", (PyObject *)&CArcSetType) < 0) {
+        Py_DECREF(&CTracerType);
+        Py_DECREF(&CFileDispositionType);
+        Py_DECREF(&CSysMonCallbacksType);
+        Py_DECREF(&CArcSetType);
+        return -1;
+    }
+
     module_inited = TRUE;
     return 0;
 }
@@ -0,0 +1,509 @@
+/* Licensed under the Apache License: http://www.apache.org/licenses/LICENSE-2.0 */
+/* For details: https://github.com/coveragepy/coveragepy/blob/main/NOTICE.txt */
+
+/* C implementations of the sys.monitoring callbacks used by SysMonitor. */
+
+/*
+    SysMonitor in sysmon.py decides which code objects to measure, and keeps
+    a CodeInfo for each one in its code_infos dict, keyed by id(code).  The
+    callbacks here are the hot paths: they find the CodeInfo and add lines or
+    arcs to its file_data set, exactly as the Python callbacks do.  Anything
+    more complicated is left to Python.
+*/
+
+#include "util.h"
+#include "sysmon.h"
+
+/* Interned strings to speed GetAttr etc. */
+
+static PyObject *str_file_data;
+static PyObject *str_byte_to_line;
+static PyObject *str_branch_trails;
+static PyObject *str_always_jumps;
+
+int
+CSysMonCallbacks_intern_strings(void)
+{
+    int ret = RET_ERROR;
+
+#define INTERN_STRING(v, s)                     \
+    v = PyUnicode_InternFromString(s);          \
+    if (v == NULL) {                            \
+        goto error;                             \
+    }
+
+    INTERN_STRING(str_file_data, "file_data")
+    INTERN_STRING(str_byte_to_line, "byte_to_line")
+    INTERN_STRING(str_branch_trails, "branch_trails")
+    INTERN_STRING(str_always_jumps, "always_jumps")
+
+    ret = RET_OK;
+
+error:
+    return ret;
+}
+
+static void
+CSysMonCallbacks_dealloc(CSysMonCallbacks *self)
+{
+    Py_XDECREF(self->code_infos);
+    Py_XDECREF(self->disable);
+    Py_XDECREF(self->branch_fallback);
+
+    Py_TYPE(self)->tp_free((PyObject*)self);
+}
+
+/* Check the number of arguments passed to a callback. */
+static int
+check_nargs(const char * name, Py_ssize_t nargs, Py_ssize_t expected)
+{
+    if (nargs != expected) {
+        PyErr_Format(PyExc_TypeError, "%s() takes %zd arguments (%zd given)", name, expected, nargs);
+        return RET_ERROR;
+    }
+    return RET_OK;
+}
+
+/*
+ * Find the CodeInfo for `code`.  Returns a new reference, or NULL if there
+ * isn't one.  NULL with an exception set means an error.  A borrowed
+ * reference wouldn't be safe on free-threaded builds, where another thread
+ * can remove the CodeInfo.
+ */
+static PyObject *
+CSysMonCallbacks_code_info(CSysMonCallbacks *self, PyObject * code)
+{
+    PyObject * code_id = NULL;
+    PyObject * code_info = NULL;
+
+    /* This is the same value as id(code) in Python. */
+    code_id = PyLong_FromVoidPtr(code);
+    if (code_id == NULL) {
+        return NULL;
+    }
+    MyDict_GetItemRef(self->code_infos, code_id, &code_info);
+    Py_DECREF(code_id);
+    return code_info;
+}
+
+/* Get the file_data set from `code_info`, or NULL with an exception. */
+static PyObject *
+get_file_data(PyObject * code_info)
+{
+    return PyObject_GetAttr(code_info, str_file_data);
+}
+
+/* Add the arc (l1, l2) to `file_data`. */
+static int
+add_arc(PyObject * file_data, PyObject * l1, PyObject * l2)
+{
+    int ret = RET_ERROR;
+    PyObject * arc = NULL;
+
+    arc = PyTuple_Pack(2, l1, l2);
+    if (arc == NULL) {
+        goto error;
+    }
+    if (PySet_Add(file_data, arc) < 0) {
+        goto error;
+    }
+
+    ret = RET_OK;
+
+error:
+    Py_XDECREF(arc);
+    return ret;
+}
+
+/* Handle sys.monitoring.events.LINE events for line coverage. */
+static PyObject *
+CSysMonCallbacks_line_lines(CSysMonCallbacks *self, PyObject *const *args, Py_ssize_t nargs)
+{
+    PyObject * ret = NULL;
+    PyObject * code_info = NULL;
+    PyObject * file_data = NULL;
+
+    if (check_nargs("line_lines", nargs, 2) < 0) {
+        goto error;
+    }
+
+    code_info = CSysMonCallbacks_code_info(self, args[0]);
+    if (code_info == NULL) {
+        if (PyErr_Occurred()) {
+            goto error;
+        }
+        /* Somehow code_info can be missing here, the Python code checks too. */
+        goto ok;
+    }
+
+    file_data = get_file_data(code_info);
+    if (file_data == NULL) {
+        goto error;
+    }
+    if (file_data != Py_None) {
+        atomic_store(&self->activity, TRUE);
+        if (PySet_Add(file_data, args[1]) < 0) {
+            goto error;
+        }
+    }
+
+ok:
+    ret = self->disable;
+    Py_INCREF(ret);
+
+error:
+    Py_XDECREF(file_data);
+    Py_XDECREF(code_info);
+    return ret;
+}
+
+/* Handle sys.monitoring.events.LINE events for branch coverage. */
+static PyObject *
+CSysMonCallbacks_line_arcs(CSysMonCallbacks *self, PyObject *const *args, Py_ssize_t nargs)
+{
+    PyObject * ret = NULL;
+    PyObject * code_info = NULL;
+    PyObject * file_data = NULL;
+
+    if (check_nargs("line_arcs", nargs, 2) < 0) {
+        goto error;
+    }
+
+    code_info = CSysMonCallbacks_code_info(self, args[0]);
+    if (code_info == NULL) {
+        if (PyErr_Occurred()) {
+            goto error;
+        }
+        goto ok;
+    }
+
+    file_data = get_file_data(code_info);
+    if (file_data == NULL) {
+        goto error;
+    }
+    if (file_data != Py_None) {
+        atomic_store(&self->activity, TRUE);
+        if (add_arc(file_data, args[1], args[1]) < 0) {
+            goto error;
+        }
+    }
+
+ok:
+    ret = self->disable;
+    Py_INCREF(ret);
+
+error:
+    Py_XDECREF(file_data);
+    Py_XDECREF(code_info);
+    return ret;
+}
+
+/* Handle sys.monitoring.events.PY_RETURN events for branch coverage. */
+static PyObject *
+CSysMonCallbacks_py_return(CSysMonCallbacks *self, PyObject *const *args, Py_ssize_t nargs)
+{
+    PyObject * ret = NULL;
+    PyObject * code_info = NULL;
+    PyObject * file_data = NULL;
+    PyObject * byte_to_line = NULL;
+    PyObject * last_line = NULL;
+    PyObject * neg_first = NULL;
+
+    if (check_nargs("py_return", nargs, 3) < 0) {
+        goto error;
+    }
+
+    code_info = CSysMonCallbacks_code_info(self, args[0]);
+    if (code_info == NULL) {
+        if (PyErr_Occurred()) {
+            goto error;
+        }
+        goto ok;
+    }
+
+    byte_to_line = PyObject_GetAttr(code_info, str_byte_to_line);
+    if (byte_to_line == NULL) {
+        goto error;
+    }
+    if (byte_to_line == Py_None) {
+        goto ok;
+    }
+    last_line = PyDict_GetItemWithError(byte_to_line, args[1]);
+    if (last_line == NULL) {
+        if (PyErr_Occurred()) {
+            goto error;
+        }
+        goto ok;
+    }
+
+    file_data = get_file_data(code_info);
+    if (file_data == NULL) {
+        goto error;
+    }
+    neg_first = PyLong_FromLong(-((PyCodeObject *)args[0])->co_firstlineno);
+    if (neg_first == NULL) {
+        goto error;
+    }
+    atomic_store(&self->activity, TRUE);
+    if (add_arc(file_data, last_line, neg_first) < 0) {
+        goto error;
+    }
+
+ok:
+    ret = self->disable;
+    Py_INCREF(ret);
+
+error:
+    Py_XDECREF(neg_first);
+    Py_XDECREF(file_data);
+    Py_XDECREF(byte_to_line);
+    Py_XDECREF(code_info);
+    return ret;
+}
+
+/*
+ * Handle BRANCH_RIGHT and BRANCH_LEFT events.
+ *
+ * The first branch event in a code object needs its branch trails computed,
+ * which is done by calling branch_fallback, the Python implementation.
+ */
+static PyObject *
+CSysMonCallbacks_branch_either(CSysMonCallbacks *self, PyObject *const *args, Py_ssize_t nargs)
+{
+    PyObject * ret = NULL;
+    PyObject * code_info = NULL;
+    PyObject * branch_trails = NULL;
+    PyObject * always_jumps = NULL;
+    PyObject * byte_to_line = NULL;
+    PyObject * file_data = NULL;
+    PyObject * dests = NULL;
+    PyObject * dest_info;
+    PyObject * dest_offset;
+    PyObject * next_offset;
+    PyObject * arc;
+    PyObject * offsets;
+    PyObject * l1;
+    PyObject * l2;
+    Py_ssize_t pos;
+    Py_ssize_t i;
+    BOOL added_arc = FALSE;
+    int found;
+
+    if (check_nargs("branch_either", nargs, 3) < 0) {
+        goto error;
+    }
+
+    code_info = CSysMonCallbacks_code_info(self, args[0]);
+    if (code_info == NULL) {
+        if (PyErr_Occurred()) {
+            goto error;
+        }
+        goto ok;
+    }
+    atomic_store(&self->activity, TRUE);
+
+    branch_trails = PyObject_GetAttr(code_info, str_branch_trails);
+    if (branch_trails == NULL) {
+        goto error;
+    }
+    if (!PyDict_Check(branch_trails) || PyDict_GET_SIZE(branch_trails) == 0) {
+        ret = PyObject_Vectorcall(self->branch_fallback, args, nargs, NULL);
+        goto done;
+    }
+
+    always_jumps = PyObject_GetAttr(code_info, str_always_jumps);
+    if (always_jumps == NULL) {
+        goto error;
+    }
+    file_data = get_file_data(code_info);
+    if (file_data == NULL) {
+        goto error;
+    }
+
+    /* Re-map the destination offset through always-jumps to deal with NOP etc. */
+    dests = PyList_New(0);
+    if (dests == NULL) {
+        goto error;
+    }
+    dest_offset = args[2];
+    if (PyList_Append(dests, dest_offset) < 0) {
+        goto error;
+    }
+    while ((next_offset = PyDict_GetItemWithError(always_jumps, dest_offset)) != NULL) {
+        dest_offset = next_offset;
+        if (PyList_Append(dests, dest_offset) < 0) {
+            goto error;
+        }
+    }
+    if (PyErr_Occurred()) {
+        goto error;
+    }
+
+    dest_info = PyDict_GetItemWithError(branch_trails, args[1]);
+    if (dest_info == NULL && PyErr_Occurred()) {
+        goto error;
+    }
+    if (dest_info != NULL) {
+        pos = 0;
+        while (!added_arc && PyDict_Next(dest_info, &pos, &arc, &offsets)) {
+            if (arc == Py_None) {
+                continue;
+            }
+            for (i = 0; i < PyList_GET_SIZE(dests); i++) {
+                found = PySet_Contains(offsets, PyList_GET_ITEM(dests, i));
+                if (found < 0) {
+                    goto error;
+                }
+                if (found) {
+                    if (PySet_Add(file_data, arc) < 0) {
+                        goto error;
+                    }
+                    added_arc = TRUE;
+                    break;
+                }
+            }
+        }
+    }
+
+    if (!added_arc) {
+        /* This could be an exception jumping from line to line. */
+        byte_to_line = PyObject_GetAttr(code_info, str_byte_to_line);
+        if (byte_to_line == NULL) {
+            goto error;
+        }
+        l1 = PyDict_GetItemWithError(byte_to_line, args[1]);
+        if (l1 == NULL) {
+            if (PyErr_Occurred()) {
+                goto error;
+            }
+            goto ok;
+        }
+        l2 = PyDict_GetItemWithError(byte_to_line, dest_offset);
+        if (l2 == NULL) {
+            if (PyErr_Occurred()) {
+                goto error;
+            }
+            goto ok;
+        }
+        found = PyObject_RichCompareBool(l1, l2, Py_NE);
+        if (found < 0) {
+            goto error;
+        }
+        if (found) {
+            if (add_arc(file_data, l1, l2) < 0) {
+                goto error;
+            }
+        }
+    }
+
+ok:
+    ret = self->disable;
+    Py_INCREF(ret);
+
+error:
+done:
+    Py_XDECREF(dests);
+    Py_XDECREF(file_data);
+    Py_XDECREF(byte_to_line);
+    Py_XDECREF(always_jumps);
+    Py_XDECREF(branch_trails);
+    Py_XDECREF(code_info);
+    return ret;
+}
+
+static PyMemberDef
+CSysMonCallbacks_members[] = {
+    { "code_infos",         T_OBJECT, offsetof(CSysMonCallbacks, code_infos), 0,
+            PyDoc_STR("The SysMonitor's dict of CodeInfo objects.") },
+
+    { "disable",            T_OBJECT, offsetof(CSysMonCallbacks, disable), 0,
+            PyDoc_STR("The value to return to disable an event.") },
+
+    { "branch_fallback",    T_OBJECT, offsetof(CSysMonCallbacks, branch_fallback), 0,
+            PyDoc_STR("Function for branch events that need more work.") },
+
+    { NULL }
+};
+
+static PyObject *
+CSysMonCallbacks_activity(CSysMonCallbacks *self, PyObject *args_unused)
+{
+    if (atomic_load(&self->activity)) {
+        Py_RETURN_TRUE;
+    }
+    else {
+        Py_RETURN_FALSE;
+    }
+}
+
+static PyObject *
+CSysMonCallbacks_reset_activity(CSysMonCallbacks *self, PyObject *args_unused)
+{
+    atomic_store(&self->activity, FALSE);
+    Py_RETURN_NONE;
+}
+
+static PyMethodDef
+CSysMonCallbacks_methods[] = {
+    { "line_lines",     (PyCFunction)(void(*)(void)) CSysMonCallbacks_line_lines, METH_FASTCALL,
+            PyDoc_STR("Handle LINE events for line coverage.") },
+
+    { "line_arcs",      (PyCFunction)(void(*)(void)) CSysMonCallbacks_line_arcs, METH_FASTCALL,
+            PyDoc_STR("Handle LINE events for branch coverage.") },
+
+    { "py_return",      (PyCFunction)(void(*)(void)) CSysMonCallbacks_py_return, METH_FASTCALL,
+            PyDoc_STR("Handle PY_RETURN events for branch coverage.") },
+
+    { "branch_either",  (PyCFunction)(void(*)(void)) CSysMonCallbacks_branch_either, METH_FASTCALL,
+            PyDoc_STR("Handle BRANCH_RIGHT and BRANCH_LEFT events.") },
+
+    { "activity",       (PyCFunction) CSysMonCallbacks_activity, METH_NOARGS,
+            PyDoc_STR("Has there been any activity?") },
+
+    { "reset_activity", (PyCFunction) CSysMonCallbacks_reset_activity, METH_NOARGS,
+            PyDoc_STR("Reset the activity flag") },
+
+    { NULL }
+};
+
+PyTypeObject
+CSysMonCallbacksType = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    "coverage.CSysMonCallbacks", /*tp_name*/
+    sizeof(CSysMonCallbacks),  /*tp_basicsize*/
+    0,                         /*tp_itemsize*/
+    (destructor)CSysMonCallbacks_dealloc, /*tp_dealloc*/
+    0,                         /*tp_print*/
+    0,                         /*tp_getattr*/
+    0,                         /*tp_setattr*/
+    0,                         /*tp_compare*/
+    0,                         /*tp_repr*/
+    0,                         /*tp_as_number*/
+    0,                         /*tp_as_sequence*/
+    0,                         /*tp_as_mapping*/
+    0,                         /*tp_hash */
+    0,                         /*tp_call*/
+    0,                         /*tp_str*/
+    0,                         /*tp_getattro*/
+    0,                         /*tp_setattro*/
+    0,                         /*tp_as_buffer*/
+    Py_TPFLAGS_DEFAULT | Py_TPFLAGS_BASETYPE, /*tp_flags*/
+    "CSysMonCallbacks objects", /* tp_doc */
+    0,                         /* tp_traverse */
+    0,                         /* tp_clear */
+    0,                         /* tp_richcompare */
+    0,                         /* tp_weaklistoffset */
+    0,                         /* tp_iter */
+    0,                         /* tp_iternext */
+    CSysMonCallbacks_methods,  /* tp_methods */
+    CSysMonCallbacks_members,  /* tp_members */
+    0,                         /* tp_getset */
+    0,                         /* tp_base */
+    0,                         /* tp_dict */
+    0,                         /* tp_descr_get */
+    0,                         /* tp_descr_set */
+    0,                         /* tp_dictoffset */
+    0,                         /* tp_init */
+    0,                         /* tp_alloc */
+    0,                         /* tp_new */
+};
@@ -0,0 +1,28 @@
+/* Licensed under the Apache License: http://www.apache.org/licenses/LICENSE-2.0 */
+/* For details: https://github.com/coveragepy/coveragepy/blob/main/NOTICE.txt */
+
+#ifndef _COVERAGE_SYSMON_H
+#define _COVERAGE_SYSMON_H
+
+#include "util.h"
+#include "structmember.h"
+
+/* The CSysMonCallbacks type: sys.monitoring callbacks for SysMonitor. */
+
+typedef struct CSysMonCallbacks {
+    PyObject_HEAD
+
+    /* Python objects manipulated directly by the SysMonitor class. */
+    PyObject * code_infos;
+    PyObject * disable;
+    PyObject * branch_fallback;
+
+    /* Have we had any activity? */
+    _Atomic BOOL activity;
+} CSysMonCallbacks;
+
+int CSysMonCallbacks_intern_strings(void);
+
+extern PyTypeObject CSysMonCallbacksType;
+
+#endif /* _COVERAGE_SYSMON_H */
@@ -170,41 +170,9 @@ static const char * what_sym[] = {"CALL", "EXC ", "LINE", "RET "};
 static int
 CTracer_record_pair(CTracer *self, int l1, int l2)
 {
-    int ret = RET_ERROR;
-    PyObject * packed_obj = NULL;
-    uint64 packed = 0;
-
-    // Conceptually, data is a set of tuples (l1, l2), but that literally
-    // making a set of tuples would require us to construct a tuple just to
-    // see if we'd already recorded an arc.  On many-times-executed code,
-    // that would mean we construct a tuple, find the tuple is already in the
-    // set, then discard the tuple.  We can avoid that overhead by packing
-    // the two line numbers into one integer instead.
-    // See collector.py:flush_data for the Python code that unpacks this.
-    if (l1 < 0) {
-        packed |= (1LL << 40);
-        l1 = -l1;
-    }
-    if (l2 < 0) {
-        packed |= (1LL << 41);
-        l2 = -l2;
-    }
-    packed |= (((uint64)l2) << 20) + (uint64)l1;
-    packed_obj = PyLong_FromUnsignedLongLong(packed);
-    if (packed_obj == NULL) {
-        goto error;
-    }
-
-    if (PySet_Add(self->pcur_entry->file_data, packed_obj) < 0) {
-        goto error;
-    }
-
-    ret = RET_OK;
-
-error:
-    Py_XDECREF(packed_obj);
-
-    return ret;
+    // When tracing arcs, file_data is a CArcSet, which packs the pair into
+    // a 64-bit integer in a C hash table.  See arcset.c for the details.
+    return CArcSet_add((CArcSet *)self->pcur_entry->file_data, l1, l2);
 }
 
 /* Set self->pdata_stack to the proper data_stack to use. */
@@ -371,11 +339,11 @@ CTracer_handle_call(CTracer *self, PyFrameObject *frame)
 
     /* Check if we should trace this line. */
     filename = MyFrame_BorrowCode(frame)->co_filename;
-    disposition = PyDict_GetItem(self->should_trace_cache, filename);
-    if (disposition == NULL) {
-        if (PyErr_Occurred()) {
-            goto error;
-        }
+    ret2 = MyDict_GetItemRef(self->should_trace_cache, filename, &disposition);
+    if (ret2 < 0) {
+        goto error;
+    }
+    if (ret2 == 0) {
         STATS( self->stats.files++; )
 
         /* We've never considered this file before. */
@@ -390,9 +358,6 @@ CTracer_handle_call(CTracer *self, PyFrameObject *frame)
             goto error;
         }
     }
-    else {
-        Py_INCREF(disposition);
-    }
 
     if (disposition == Py_None) {
         /* A later check_include returned false, so don't trace it. */
@@ -451,12 +416,12 @@ CTracer_handle_call(CTracer *self, PyFrameObject *frame)
                 /* Check the dynamic source filename against the include rules. */
                 PyObject * included = NULL;
                 int should_include;
-                included = PyDict_GetItem(self->should_trace_cache, tracename);
-                if (included == NULL) {
+                ret2 = MyDict_GetItemRef(self->should_trace_cache, tracename, &included);
+                if (ret2 < 0) {
+                    goto error;
+                }
+                if (ret2 == 0) {
                     PyObject * should_include_bool;
-                    if (PyErr_Occurred()) {
-                        goto error;
-                    }
                     STATS( self->stats.files++; )
                     STATS( self->stats.pycalls++; )
                     should_include_bool = PyObject_CallFunctionObjArgs(self->check_include, tracename, frame, NULL);
@@ -471,6 +436,7 @@ CTracer_handle_call(CTracer *self, PyFrameObject *frame)
                 }
                 else {
                     should_include = (included != Py_None);
+                    Py_DECREF(included);
                 }
                 if (!should_include) {
                     tracename = Py_None;
@@ -492,14 +458,19 @@ CTracer_handle_call(CTracer *self, PyFrameObject *frame)
             goto error;
         }
 
-        file_data = PyDict_GetItem(self->data, tracename);
+        ret2 = MyDict_GetItemRef(self->data, tracename, &file_data);
+        if (ret2 < 0) {
+            had_error = TRUE;
+            goto unlock;
+        }
 
-        if (file_data == NULL) {
-            if (PyErr_Occurred()) {
-                had_error = TRUE;
-                goto unlock;
+        if (ret2 == 0) {
+            if (self->tracing_arcs) {
+                file_data = PyObject_CallNoArgs((PyObject *)&CArcSetType);
+            }
+            else {
+                file_data = PySet_New(NULL);
             }
-            file_data = PySet_New(NULL);
             if (file_data == NULL) {
                 had_error = TRUE;
                 goto unlock;
@@ -519,10 +490,6 @@ CTracer_handle_call(CTracer *self, PyFrameObject *frame)
                 }
             }
         }
-        else {
-            /* PyDict_GetItem gives a borrowed reference. Own it. */
-            Py_INCREF(file_data);
-        }
 
         unlock:
 
@@ -9,6 +9,7 @@
 #include "frameobject.h"
 #include "opcode.h"
 
+#include "arcset.h"
 #include "datastack.h"
 
 /* The CTracer type. */
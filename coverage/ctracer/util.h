@@ -49,6 +49,24 @@
 #define MyCode_FreeCode(code)
 #endif
 
+// Get a new reference to a dict item: 1 if found, 0 if not, -1 for an error.
+// On free-threaded builds, a borrowed reference from PyDict_GetItem could be
+// freed by another thread replacing the item.
+#if PY_VERSION_HEX >= 0x030D0000
+#define MyDict_GetItemRef(d, k, pv)     (PyDict_GetItemRef((d), (k), (pv)))
+#else
+static inline int
+MyDict_GetItemRef(PyObject *d, PyObject *k, PyObject **pv)
+{
+    *pv = PyDict_GetItemWithError(d, k);
+    if (*pv == NULL) {
+        return PyErr_Occurred() ? -1 : 0;
+    }
+    Py_INCREF(*pv);
+    return 1;
+}
+#endif
+
 // Where does frame.f_lasti point when yielding from a generator?
 // It used to point at the YIELD, in 3.13 it points at the RESUME,
 // then it went back to the YIELD.
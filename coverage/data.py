@@ -15,7 +15,10 @@ from __future__ import annotations
 import functools
 import glob
 import hashlib
+import itertools
 import os.path
+import tempfile
+import time
 from collections.abc import Iterable
 from typing import Callable
 
@@ -23,6 +26,10 @@ from coverage.exceptions import CoverageException, NoDataError
 from coverage.files import PathAliases
 from coverage.misc import Hasher, file_be_gone, human_sorted, plural
 from coverage.sqldata import CoverageData as CoverageData  # pylint: disable=useless-import-alias
+from coverage.sqldata import MAX_UPDATE_BATCH
+
+# How much of a data file to read at once when hashing it.
+HASH_CHUNK_SIZE = 1024 * 1024
 
 
 def line_counts(data: CoverageData, fullpath: bool = False) -> dict[str, int]:
@@ -95,6 +102,133 @@ def combinable_files(data_file: str, data_paths: Iterable[str] | None = None) ->
     return sorted(files_to_combine)
 
 
+def _file_hash(filename: str) -> bytes:
+    """Compute a hash of the contents of `filename`.
+
+    The file is read in chunks, so large data files don't have to fit in
+    memory.
+
+    """
+    hasher = hashlib.new("sha3_256", usedforsecurity=False)
+    with open(filename, "rb") as fobj:
+        while chunk := fobj.read(HASH_CHUNK_SIZE):
+            hasher.update(chunk)
+    return hasher.digest()
+
+
+# A data file to combine: (file name, relative file name for messages).
+TDataFile = tuple[str, str]
+
+
+def _combine_files(
+    data: CoverageData,
+    files: Iterable[TDataFile],
+    map_path: Callable[[str], str] | None,
+    report: Callable[[TDataFile, str | None], None],
+) -> None:
+    """Combine the data `files` into `data`.
+
+    Files are combined in batches of up to `MAX_UPDATE_BATCH` files, each
+    batch in one transaction.  `report` is called for each file once it has
+    been combined, with None, or once it has failed to be read, with the error
+    message.
+
+    """
+    batch: list[tuple[TDataFile, CoverageData]] = []
+
+    def combine_batch() -> None:
+        """Combine the data files in `batch` in one transaction."""
+        if data._debug.should("dataio"):
+            data._debug.write(f"Combining {len(batch)} data file{plural(len(batch))}")
+        data._update_many([new_data for _, new_data in batch], map_path=map_path)
+        for data_file, _ in batch:
+            report(data_file, None)
+        batch.clear()
+
+    for data_file in files:
+        if data._debug.should("dataio"):
+            data._debug.write(f"Combining data file {data_file[0]!r}")
+        try:
+            new_data = CoverageData(data_file[0], debug=data._debug)
+            new_data.read()
+        except CoverageException as exc:
+            report(data_file, str(exc))
+        else:
+            batch.append((data_file, new_data))
+            if len(batch) == MAX_UPDATE_BATCH:
+                combine_batch()
+
+    if batch:
+        combine_batch()
+
+
+def _combine_group(
+    args: tuple[str, list[TDataFile], PathAliases | None],
+) -> list[tuple[TDataFile, str | None]]:
+    """Combine a group of data files in a worker process, for `combine_in_parallel`.
+
+    The files are combined into an intermediate data file.  Returns the
+    results that `_combine_files` reported for each file.
+
+    """
+    filename, files, aliases = args
+    map_path = None if aliases is None else functools.cache(aliases.map)
+
+    results: list[tuple[TDataFile, str | None]] = []
+    intermediate = CoverageData(filename)
+    _combine_files(intermediate, files, map_path, lambda *result: results.append(result))
+    return results
+
+
+def combine_in_parallel(
+    data: CoverageData,
+    files: list[TDataFile],
+    aliases: PathAliases | None,
+    jobs: int,
+    report: Callable[[TDataFile, str | None], None],
+) -> None:
+    """Combine the data `files` into `data` using `jobs` processes.
+
+    The files are split into groups, one per process.  Each process combines
+    its group into an intermediate data file, and then the intermediate files
+    are combined into `data`.  `report` is called for each file as with
+    `_combine_files`.  If an intermediate file can't be combined, the error
+    is reported for all of the files in its group.
+
+    """
+    # Imported here to keep from slowing down the start of measurement.
+    import concurrent.futures
+
+    groups = [files[i::jobs] for i in range(jobs)]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        args = [
+            (os.path.join(tmp_dir, f".coverage.{i}"), group, aliases)
+            for i, group in enumerate(groups)
+        ]
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+            all_results = list(executor.map(_combine_group, args))
+        results = dict(itertools.chain.from_iterable(all_results))
+        group_results = {arg[0]: group_result for arg, group_result in zip(args, all_results)}
+
+        def report_intermediate(data_file: TDataFile, error: str | None) -> None:
+            """The files combined into a failed intermediate file have failed too."""
+            if error is not None:
+                for group_file, group_error in group_results[data_file[0]]:
+                    if group_error is None:
+                        results[group_file] = error
+
+        # The intermediate files have already had their paths mapped.
+        intermediates = [
+            (arg[0], arg[0])
+            for arg, group_result in zip(args, all_results)
+            if any(error is None for _, error in group_result)
+        ]
+        _combine_files(data, intermediates, None, report_intermediate)
+
+    for data_file in files:
+        report(data_file, results[data_file])
+
+
 def combine_parallel_data(
     data: CoverageData,
     aliases: PathAliases | None = None,
@@ -102,6 +236,7 @@ def combine_parallel_data(
     strict: bool = False,
     keep: bool = False,
     message: Callable[[str], None] | None = None,
+    jobs: int = 1,
 ) -> None:
     """Combine a number of data files together.
 
@@ -129,20 +264,17 @@ def combine_parallel_data(
 
     `message` is a function to use for printing messages to the user.
 
+    If `jobs` is more than 1, the files are combined using that many
+    processes.
+
     """
     files_to_combine = combinable_files(data.base_filename(), data_paths)
 
     if strict and not files_to_combine:
         raise NoDataError("No data to combine")
 
-    if aliases is None:
-        map_path = None
-    else:
-        map_path = functools.cache(aliases.map)
-
     file_hashes = set()
-    combined_any = False
-
+    unique_files: list[TDataFile] = []
     for f in files_to_combine:
         if f == data.data_filename():
             # Sometimes we are combining into a file which is one of the
@@ -159,43 +291,60 @@ def combine_parallel_data(
             # we print the original value of f instead of its relative path
             rel_file_name = f
 
-        with open(f, "rb") as fobj:
-            hasher = hashlib.new("sha3_256", usedforsecurity=False)
-            hasher.update(fobj.read())
-            sha = hasher.digest()
-            combine_this_one = sha not in file_hashes
-
-        delete_this_one = not keep
-        if combine_this_one:
-            if data._debug.should("dataio"):
-                data._debug.write(f"Combining data file {f!r}")
-            file_hashes.add(sha)
-            try:
-                new_data = CoverageData(f, debug=data._debug)
-                new_data.read()
-            except CoverageException as exc:
-                if data._warn:
-                    # The CoverageException has the file name in it, so just
-                    # use the message as the warning.
-                    data._warn(str(exc))
-                if message:
-                    message(f"Couldn't combine data file {rel_file_name}: {exc}")
-                delete_this_one = False
-            else:
-                data.update(new_data, map_path=map_path)
-                combined_any = True
-                if message:
-                    message(f"Combined data file {rel_file_name}")
-        else:
+        sha = _file_hash(f)
+        if sha in file_hashes:
             if message:
                 message(f"Skipping duplicate data {rel_file_name}")
-
-        if delete_this_one:
+            if not keep:
+                if data._debug.should("dataio"):
+                    data._debug.write(f"Deleting data file {f!r}")
+                file_be_gone(f)
+        else:
+            file_hashes.add(sha)
+            unique_files.append((f, rel_file_name))
+
+    ncombined = 0
+    nbytes = 0
+    start = time.perf_counter()
+
+    def report(data_file: TDataFile, error: str | None) -> None:
+        """Tell the user about one data file, and delete it if combined."""
+        nonlocal ncombined, nbytes
+        f, rel_file_name = data_file
+        if error is not None:
+            if data._warn:
+                # The error has the file name in it, so just use the message
+                # as the warning.
+                data._warn(error)
+            if message:
+                message(f"Couldn't combine data file {rel_file_name}: {error}")
+            return
+
+        ncombined += 1
+        nbytes += os.path.getsize(f)
+        if message:
+            message(f"Combined data file {rel_file_name}")
+        if not keep:
             if data._debug.should("dataio"):
                 data._debug.write(f"Deleting data file {f!r}")
             file_be_gone(f)
 
-    if strict and not combined_any:
+    jobs = min(jobs, len(unique_files))
+    if jobs > 1:
+        combine_in_parallel(data, unique_files, aliases, jobs, report)
+    else:
+        map_path = None if aliases is None else functools.cache(aliases.map)
+        _combine_files(data, unique_files, map_path, report)
+
+    if ncombined and data._debug.should("dataio"):
+        elapsed = time.perf_counter() - start
+        rate = f" ({ncombined / elapsed:.1f} files/s)" if elapsed else ""
+        data._debug.write(
+            f"Combined {ncombined} data file{plural(ncombined)}, "
+            + f"{nbytes / 1_000_000:.1f} MB, in {elapsed:.2f}s{rate}"
+        )
+
+    if strict and not ncombined:
         raise NoDataError("No usable data files")
 
 
@@ -13,7 +13,7 @@ import posixpath
 import re
 import sys
 from collections.abc import Iterable
-from typing import Callable
+from typing import Any, Callable
 
 from coverage import env
 from coverage.exceptions import ConfigError
@@ -215,6 +215,44 @@ def prep_patterns(patterns: Iterable[str]) -> list[str]:
     return prepped
 
 
+# A trie node maps name parts to child nodes.  _PrefixTrie.END maps to an
+# empty node to mark the end of one of the lists.
+_TrieNode = dict[str | None, "_TrieNode"]
+
+
+class _PrefixTrie:
+    """A trie of sequences of name parts, for matching prefixes.
+
+    Construct with lists of parts.  `match` is true if the parts given are
+    one of the lists, or start with one of them.  The cost of a match depends
+    on the number of parts being matched, not the number of lists.
+
+    """
+
+    # Marks a node as the end of one of the lists.
+    END = None
+
+    def __init__(self, parts_lists: Iterable[list[str]]) -> None:
+        self.root: _TrieNode = {}
+        for parts in parts_lists:
+            node = self.root
+            for part in parts:
+                node = node.setdefault(part, {})
+            node[self.END] = {}
+
+    def match(self, parts: list[str]) -> bool:
+        """Do `parts` start with one of our lists of parts?"""
+        node = self.root
+        for part in parts:
+            if self.END in node:
+                return True
+            child = node.get(part)
+            if child is None:
+                return False
+            node = child
+        return self.END in node
+
+
 class TreeMatcher:
     """A matcher for files in a tree.
 
@@ -228,6 +266,7 @@ class TreeMatcher:
         self.original_paths: list[str] = human_sorted(paths)
         self.paths = [os.path.normcase(p) for p in paths]
         self.name = name
+        self.trie = _PrefixTrie(p.split(os.sep) for p in self.paths)
 
     def __repr__(self) -> str:
         return f"<TreeMatcher {self.name} {self.original_paths!r}>"
@@ -238,16 +277,7 @@ class TreeMatcher:
 
     def match(self, fpath: str) -> bool:
         """Does `fpath` indicate a file in one of our trees?"""
-        fpath = os.path.normcase(fpath)
-        for p in self.paths:
-            if fpath.startswith(p):
-                if fpath == p:
-                    # This is the same file!
-                    return True
-                if fpath[len(p)] == os.sep:
-                    # This is a file in the directory
-                    return True
-        return False
+        return self.trie.match(os.path.normcase(fpath).split(os.sep))
 
 
 class ModuleMatcher:
@@ -256,6 +286,7 @@ class ModuleMatcher:
     def __init__(self, module_names: Iterable[str], name: str = "unknown") -> None:
         self.modules = list(module_names)
         self.name = name
+        self.trie = _PrefixTrie(m.split(".") for m in self.modules)
 
     def __repr__(self) -> str:
         return f"<ModuleMatcher {self.name} {self.modules!r}>"
@@ -268,16 +299,7 @@ class ModuleMatcher:
         """Does `module_name` indicate a module in one of our packages?"""
         if not module_name:
             return False
-
-        for m in self.modules:
-            if module_name.startswith(m):
-                if module_name == m:
-                    return True
-                if module_name[len(m)] == ".":
-                    # This is a module in the package
-                    return True
-
-        return False
+        return self.trie.match(module_name.split("."))
 
 
 class GlobMatcher:
@@ -404,6 +426,17 @@ class PathAliases:
         self.relative = relative
         self.pprinted = False
 
+    def __getstate__(self) -> dict[str, Any]:
+        # The debug function usually can't be pickled, and is only useful in
+        # this process anyway, so an unpickled copy doesn't debug.
+        state = self.__dict__.copy()
+        del state["debugfn"]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.debugfn = lambda msg: 0
+
     def pprint(self) -> None:
         """Dump the important parts of the PathAliases, for debugging."""
         self.debugfn(f"Aliases (relative={self.relative}):")
@@ -30,9 +30,11 @@ from coverage.files import (
     find_python_files,
     prep_patterns,
 )
-from coverage.misc import isolate_module, sys_modules_saved
+from coverage.misc import Hasher, isolate_module, sys_modules_saved
 from coverage.python import source_for_file, source_for_morf
+from coverage.tracecache import TraceCache
 from coverage.types import TDebugCtl, TFileDisposition, TMorf, TWarnFn
+from coverage.version import __version__
 
 if TYPE_CHECKING:
     from coverage.config import CoverageConfig
@@ -306,6 +308,36 @@ class InOrOut:
 
         self.plugins: Plugins
         self.disp_class: type[TFileDisposition] = FileDisposition
+        self.trace_cache: TraceCache | None = None
+
+    def trace_cache_key(self) -> str:
+        """Compute a key for the decisions `should_trace` will make.
+
+        The key is a hash of everything other than the file name that the
+        decisions depend on.
+
+        """
+        hasher = Hasher()
+        hasher.update(__version__)
+        hasher.update(platform.python_implementation())
+        hasher.update(list(env.PYVERSION))
+        hasher.update(sys.prefix)
+        hasher.update(sorted(self.source_dirs))
+        hasher.update(sorted(self.source_pkgs))
+        hasher.update(self.include)
+        hasher.update(self.omit)
+        hasher.update(sorted(self.pylib_paths))
+        hasher.update(sorted(self.cover_paths))
+        hasher.update(sorted(self.third_paths))
+        hasher.update(sorted(self.source_in_third_paths))
+        hasher.update(
+            [
+                plugin._coverage_plugin_name
+                for plugin in self.plugins.file_tracers
+                if plugin._coverage_enabled
+            ]
+        )
+        return hasher.hexdigest()
 
     def should_trace(self, filename: str, frame: FrameType | None = None) -> TFileDisposition:
         """Decide whether to trace execution in `filename`, with a reason.
@@ -328,6 +360,23 @@ class InOrOut:
         if original_filename.startswith("<"):
             return nope(disp, "original file name is not real")
 
+        # Decisions about code objects can be cached across processes.  Calls
+        # without a frame are about module files, which can be decided
+        # differently, so they don't use the cache.  Entries are lists:
+        # [trace, canonical_filename, reason, module], where `module` is the
+        # name of a source package that was matched, or None.
+        trace_cache = self.trace_cache if frame is not None else None
+        if trace_cache is not None:
+            entry = trace_cache.get(original_filename)
+            if entry is not None:
+                trace, canonical, reason, module = entry
+                disp.canonical_filename = disp.source_filename = canonical
+                disp.trace = trace
+                disp.reason = reason
+                if module in self.source_pkgs_unmatched:
+                    self.source_pkgs_unmatched.remove(module)
+                return disp
+
         if frame is not None:
             # Compiled Python files have two file names: frame.f_code.co_filename is
             # the file name at the time the .pyc was compiled.  The second name is
@@ -403,6 +452,16 @@ class InOrOut:
             if reason:
                 nope(disp, reason)
 
+        # Only plain Python files with absolute names are cached: file tracers
+        # can't be saved, and relative names depend on the current directory.
+        if trace_cache is not None and disp.file_tracer is None and os.path.isabs(filename):
+            module = None
+            if disp.trace and self.source_pkgs:
+                module = name_for_module(canonical, frame)
+                if module not in self.source_pkgs:
+                    module = None
+            trace_cache.add(original_filename, [disp.trace, canonical, disp.reason, module])
+
         return disp
 
     def check_include_omit_etc(self, filename: str, frame: FrameType | None) -> str | None:
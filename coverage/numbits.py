@@ -16,10 +16,36 @@ the future.  Use these functions to work with those binary blobs of data.
 
 from __future__ import annotations
 
+import itertools
 import json
 import sqlite3
 from collections.abc import Iterable
-from itertools import zip_longest
+
+# These functions avoid Python-level loops over bits and bytes.  A numbits is
+# converted to a Python int with int.from_bytes, so set operations are single
+# int operations.  Converting to and from lists of numbers goes through a
+# string of binary digits, with one byte per number, so that most of the work
+# happens in C.
+
+# Translate "0" and "1" characters to 0 and 1 bytes, and back again.
+_DIGITS_TO_FLAGS = bytes.maketrans(b"01", b"\x00\x01")
+_FLAGS_TO_DIGITS = bytes.maketrans(b"\x00\x01", b"01")
+
+
+def _numbits_int(numbits: bytes) -> int:
+    """Convert a numbits to an int with the same bits set."""
+    return int.from_bytes(numbits, "little")
+
+
+def _int_numbits(bits: int, nbytes: int | None = None) -> bytes:
+    """Convert an int to a numbits.
+
+    The result is `nbytes` long if provided, otherwise as short as possible.
+
+    """
+    if nbytes is None:
+        nbytes = (bits.bit_length() + 7) // 8
+    return bits.to_bytes(nbytes, "little")
 
 
 def nums_to_numbits(nums: Iterable[int]) -> bytes:
@@ -36,10 +62,14 @@ def nums_to_numbits(nums: Iterable[int]) -> bytes:
     except ValueError:
         # nums was empty.
         return b""
-    b = bytearray(nbytes)
+    # Set a flag byte for each number, then read the flags as binary digits,
+    # most-significant first.
+    flags = bytearray(nbytes * 8)
     for num in nums:
-        b[num // 8] |= 1 << num % 8
-    return bytes(b)
+        flags[num] = 1
+    digits = flags.translate(_FLAGS_TO_DIGITS)
+    digits.reverse()
+    return _int_numbits(int(digits, 2), nbytes)
 
 
 def numbits_to_nums(numbits: bytes) -> list[int]:
@@ -55,12 +85,12 @@ def numbits_to_nums(numbits: bytes) -> list[int]:
     this returns a string, a JSON-encoded list of ints.
 
     """
-    nums = []
-    for byte_i, byte in enumerate(numbits):
-        for bit_i in range(8):
-            if byte & (1 << bit_i):
-                nums.append(byte_i * 8 + bit_i)
-    return nums
+    bits = _numbits_int(numbits)
+    if not bits:
+        return []
+    # The binary digits, least-significant first, as a flag byte per number.
+    flags = format(bits, "b").encode("ascii")[::-1].translate(_DIGITS_TO_FLAGS)
+    return list(itertools.compress(range(len(flags)), flags))
 
 
 def numbits_union(numbits1: bytes, numbits2: bytes) -> bytes:
@@ -69,8 +99,8 @@ def numbits_union(numbits1: bytes, numbits2: bytes) -> bytes:
     Returns:
         A new numbits, the union of `numbits1` and `numbits2`.
     """
-    byte_pairs = zip_longest(numbits1, numbits2, fillvalue=0)
-    return bytes(b1 | b2 for b1, b2 in byte_pairs)
+    bits = _numbits_int(numbits1) | _numbits_int(numbits2)
+    return _int_numbits(bits, max(len(numbits1), len(numbits2)))
 
 
 def numbits_intersection(numbits1: bytes, numbits2: bytes) -> bytes:
@@ -79,9 +109,7 @@ def numbits_intersection(numbits1: bytes, numbits2: bytes) -> bytes:
     Returns:
         A new numbits, the intersection `numbits1` and `numbits2`.
     """
-    byte_pairs = zip_longest(numbits1, numbits2, fillvalue=0)
-    intersection_bytes = bytes(b1 & b2 for b1, b2 in byte_pairs)
-    return intersection_bytes.rstrip(b"\0")
+    return _int_numbits(_numbits_int(numbits1) & _numbits_int(numbits2))
 
 
 def numbits_any_intersection(numbits1: bytes, numbits2: bytes) -> bool:
@@ -93,8 +121,7 @@ def numbits_any_intersection(numbits1: bytes, numbits2: bytes) -> bool:
     Returns:
         A bool, True if there is any number in both `numbits1` and `numbits2`.
     """
-    byte_pairs = zip_longest(numbits1, numbits2, fillvalue=0)
-    return any(b1 & b2 for b1, b2 in byte_pairs)
+    return bool(_numbits_int(numbits1) & _numbits_int(numbits2))
 
 
 def num_in_numbits(num: int, numbits: bytes) -> bool:
@@ -15,7 +15,7 @@ import tokenize
 from collections.abc import Iterable, Sequence
 from dataclasses import dataclass
 from types import CodeType
-from typing import Callable, Optional, Protocol, cast
+from typing import TYPE_CHECKING, Callable, Optional, Protocol, cast
 
 from coverage import env
 from coverage.bytecode import code_objects
@@ -25,6 +25,9 @@ from coverage.misc import isolate_module, nice_pair
 from coverage.phystokens import generate_tokens
 from coverage.types import TArc, TLineNo
 
+if TYPE_CHECKING:
+    from coverage.parsecache import ParseCache
+
 os = isolate_module(os)
 
 
@@ -41,12 +44,16 @@ class PythonParser:
         text: str | None = None,
         filename: str | None = None,
         exclude: str | None = None,
+        cache: ParseCache | None = None,
     ) -> None:
         """
         Source can be provided as `text`, the text itself, or `filename`, from
         which the text will be read.  Excluded lines are those that match
         `exclude`, a regex string.
 
+        If `cache` is provided, it's a :class:`ParseCache` used to avoid
+        re-parsing source that has been parsed before.
+
         """
         assert text or filename, "PythonParser needs either text or filename"
         self.filename = filename or "<code>"
@@ -61,6 +68,7 @@ class PythonParser:
                 raise NoSource(f"No source for code: '{self.filename}': {err}") from err
 
         self.exclude = exclude
+        self.cache = cache
 
         # The parsed AST of the text.
         self._ast_root: ast.AST | None = None
@@ -98,6 +106,7 @@ class PythonParser:
         self._all_arcs: set[TArc] | None = None
         self._missing_arc_fragments: TArcFragments | None = None
         self._with_jump_fixers: dict[TArc, tuple[TArc, TArc]] = {}
+        self._exit_counts: dict[TLineNo, int] | None = None
 
     def lines_matching(self, regex: str) -> set[TLineNo]:
         """Find the lines matching a regex.
@@ -261,6 +270,9 @@ class PythonParser:
         line of multi-line statements.
 
         """
+        if self.cache is not None and self.cache.load(self):
+            return
+
         try:
             self._ast_root = ast.parse(self.text)
             self._raw_parse()
@@ -278,6 +290,9 @@ class PythonParser:
         starts = self.raw_statements - ignore
         self.statements = self.first_lines(starts) - ignore
 
+        if self.cache is not None:
+            self.cache.save(self)
+
     def arcs(self) -> set[TArc]:
         """Get information about the arcs available in the code.
 
@@ -296,7 +311,9 @@ class PythonParser:
         `_all_arcs` is the set of arcs in the code.
 
         """
-        assert self._ast_root is not None
+        if self._ast_root is None:
+            # The statements came from the cache, but the arcs didn't.
+            self._ast_root = ast.parse(self.text)
         aaa = AstArcAnalyzer(self.filename, self._ast_root, self.raw_statements, self.multiline_map)
         aaa.analyze()
         arcs = aaa.arcs
@@ -313,6 +330,9 @@ class PythonParser:
 
         self._missing_arc_fragments = aaa.missing_arc_fragments
 
+        if self.cache is not None:
+            self.cache.save(self)
+
     def fix_with_jumps(self, arcs: Iterable[TArc]) -> set[TArc]:
         """Adjust arcs to fix jumps leaving `with` statements.
 
@@ -353,13 +373,15 @@ class PythonParser:
         arcs = (set(arcs) | to_add) - to_remove
         return arcs
 
-    @functools.lru_cache
     def exit_counts(self) -> dict[TLineNo, int]:
         """Get a count of exits from that each line.
 
         Excluded lines are excluded.
 
         """
+        if self._exit_counts is not None:
+            return self._exit_counts
+
         exit_counts: dict[TLineNo, int] = collections.defaultdict(int)
         for l1, l2 in self.arcs():
             assert l1 > 0, f"{l1=} should be greater than zero in {self.filename}"
@@ -371,6 +393,7 @@ class PythonParser:
                 continue
             exit_counts[l1] += 1
 
+        self._exit_counts = exit_counts
         return exit_counts
 
     def _finish_action_msg(self, action_msg: str | None, end: TLineNo) -> str:
@@ -9,13 +9,14 @@ import os.path
 import types
 import zipimport
 from collections.abc import Iterable
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
 from coverage import env
 from coverage.exceptions import CoverageException, NoSource
 from coverage.files import canonical_filename, relative_filename, zip_location
 from coverage.misc import isolate_module, join_regex
 from coverage.parser import PythonParser
+from coverage.parsecache import restore_parse_results
 from coverage.phystokens import source_encoding, source_token_lines
 from coverage.plugin import CodeRegion, FileReporter
 from coverage.regions import code_regions
@@ -188,10 +189,25 @@ class PythonFileReporter(FileReporter):
             self._parser = PythonParser(
                 filename=self.filename,
                 exclude=self.coverage._exclude_regex("exclude"),
+                cache=self.coverage._parse_cache(),
             )
             self._parser.parse_source()
         return self._parser
 
+    def use_parse_results(self, results: dict[str, Any]) -> None:
+        """Use parsing results computed elsewhere instead of parsing again.
+
+        `results` is from :func:`coverage.parsecache.parse_results`, for the
+        same source and exclusion regex this file reporter would use.
+
+        """
+        assert self.coverage is not None
+        self._parser = PythonParser(
+            filename=self.filename,
+            exclude=self.coverage._exclude_regex("exclude"),
+        )
+        restore_parse_results(self._parser, results)
+
     def lines(self) -> set[TLineNo]:
         """Return the line numbers of statements in the file."""
         return self.parser.statements
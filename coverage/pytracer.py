@@ -184,6 +184,8 @@ class PyTracer(Tracer):
         # if event != "call" and frame.f_code.co_filename != self.cur_file_name:
         #     self.log("---\n*", frame.f_code.co_filename, self.cur_file_name, frame.f_lineno)
 
+        self._activity = True
+
         if event == "call":
             # Should we start a new context?
             if self.should_start_context and self.context is None:
@@ -200,7 +202,6 @@ class PyTracer(Tracer):
             self.started_context = started_context
 
             # Entering a new frame.  Decide if we should trace in this file.
-            self._activity = True
             self.data_stack.append(
                 (
                     self.cur_file_data,
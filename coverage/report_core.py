@@ -6,18 +6,22 @@
 from __future__ import annotations
 
 import sys
-from collections.abc import Iterable
-from typing import IO, TYPE_CHECKING, Callable, Protocol
+from collections.abc import Iterable, Iterator
+from typing import IO, TYPE_CHECKING, Any, Callable, Protocol
 
-from coverage.exceptions import NoDataError, NotPython
+from coverage.exceptions import NoDataError, NoSource, NotPython
 from coverage.files import GlobMatcher, prep_patterns
 from coverage.misc import ensure_dir_for_file, file_be_gone
+from coverage.parsecache import ParseCache, parse_results
+from coverage.parser import PythonParser
 from coverage.plugin import FileReporter
-from coverage.results import Analysis
-from coverage.types import TMorf
+from coverage.python import PythonFileReporter
+from coverage.results import Analysis, analysis_from_file_reporter
+from coverage.types import TArc, TLineNo, TMorf
 
 if TYPE_CHECKING:
     from coverage import Coverage
+    from coverage.data import CoverageData
 
 
 class Reporter(Protocol):
@@ -93,9 +97,35 @@ def get_analysis_to_report(
     if not fr_morfs:
         raise NoDataError("No data to report.")
 
-    for fr, morf in sorted(fr_morfs):
+    fr_morfs = sorted(fr_morfs)
+    if config.jobs > 1:
+        parse_in_parallel(coverage, [fr for fr, _ in fr_morfs], config.jobs)
+
+    data = coverage.get_data()
+    # When reporting on all of the measured files, their data is read in bulk,
+    # rather than with queries for each file.  It's produced in file name
+    # order, so it's consumed as the sorted file reporters need it.
+    file_data = _all_file_data(data) if morfs is None else None
+    next_data = None if file_data is None else next(file_data, None)
+
+    for fr, morf in fr_morfs:
         try:
-            analysis = coverage._analyze(morf)
+            filename = coverage._file_mapper(fr.filename)
+            lines = arcs = None
+            if file_data is not None:
+                # A file not found here has its data read by its own query.
+                while next_data is not None and next_data[0] < filename:
+                    next_data = next(file_data, None)
+                if next_data is not None and next_data[0] == filename:
+                    _, lines, arcs = next_data
+            analysis = analysis_from_file_reporter(
+                data,
+                config.precision,
+                fr,
+                filename,
+                lines=lines,
+                arcs=arcs,
+            )
         except NotPython:
             # Only report errors for .py files, and only if we didn't
             # explicitly suppress those errors.
@@ -115,3 +145,75 @@ def get_analysis_to_report(
                 raise
         else:
             yield (fr, analysis)
+
+
+def _all_file_data(
+    data: CoverageData,
+) -> Iterator[tuple[str, list[TLineNo], list[TArc] | None]]:
+    """Get the executed lines and arcs for all of the measured files.
+
+    Produces a triple for each file, in file name order: the file name, its
+    executed lines, and its executed arcs, or None if `data` has no arcs.
+
+    """
+    if data.has_arcs():
+        # Read the arcs once, and find the lines from them.
+        for filename, arcs in data.all_arcs():
+            yield filename, list({l for arc in arcs for l in arc if l > 0}), arcs
+    else:
+        for filename, lines in data.all_lines():
+            yield filename, lines, None
+
+
+def _parse_python_file(args: tuple[str, str, bool, str | None]) -> dict[str, Any] | None:
+    """Parse one Python file in a worker process, for `parse_in_parallel`.
+
+    Returns the results from `parse_results`, or None if the file couldn't be
+    parsed.
+
+    """
+    filename, exclude, branch, cache_dir = args
+    cache = ParseCache(cache_dir) if cache_dir is not None else None
+    try:
+        parser = PythonParser(filename=filename, exclude=exclude, cache=cache)
+        parser.parse_source()
+        if branch:
+            parser.arcs()
+    except (NoSource, NotPython):
+        # The file will be parsed again in the main process, which will deal
+        # with the error the usual way.
+        return None
+    return parse_results(parser)
+
+
+def parse_in_parallel(
+    coverage: Coverage,
+    file_reporters: Iterable[FileReporter],
+    jobs: int,
+) -> None:
+    """Parse the Python files among `file_reporters` using `jobs` processes.
+
+    Parsing is most of the work of analyzing a file.  The results are handed
+    to the file reporters, so that analyzing them and writing the report can
+    happen in this process, in the usual order.
+
+    """
+    pyfrs = [
+        fr for fr in file_reporters if isinstance(fr, PythonFileReporter) and fr._parser is None
+    ]
+    if len(pyfrs) < 2:
+        return
+
+    # Imported here to keep from slowing down the start of measurement.
+    import concurrent.futures
+
+    exclude = coverage._exclude_regex("exclude")
+    branch = coverage.get_data().has_arcs()
+    cache = coverage._parse_cache()
+    cache_dir = cache.directory if cache is not None else None
+    args = [(fr.filename, exclude, branch, cache_dir) for fr in pyfrs]
+    chunksize = max(1, len(args) // (jobs * 4))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        for fr, results in zip(pyfrs, executor.map(_parse_python_file, args, chunksize=chunksize)):
+            if results is not None:
+                fr.use_parse_results(results)
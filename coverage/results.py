@@ -24,16 +24,26 @@ def analysis_from_file_reporter(
     precision: int,
     file_reporter: FileReporter,
     filename: str,
+    lines: Iterable[TLineNo] | None = None,
+    arcs: Iterable[TArc] | None = None,
 ) -> Analysis:
-    """Create an Analysis from a FileReporter."""
+    """Create an Analysis from a FileReporter.
+
+    The executed `lines` and `arcs` for `filename` are read from `data`,
+    unless they are provided, already read for many files at once.
+
+    """
     has_arcs = data.has_arcs()
     statements = file_reporter.lines()
     excluded = file_reporter.excluded_lines()
-    executed = file_reporter.translate_lines(data.lines(filename) or [])
+    if lines is None:
+        lines = data.lines(filename) or []
+    executed = file_reporter.translate_lines(lines)
 
     if has_arcs:
         arc_possibilities_set = file_reporter.arcs()
-        arcs: Iterable[TArc] = data.arcs(filename) or []
+        if arcs is None:
+            arcs = data.arcs(filename) or []
         arcs = file_reporter.translate_arcs(arcs)
 
         # Reduce the set of arcs to the ones that could be branches.
@@ -5,6 +5,7 @@
 
 from __future__ import annotations
 
+import bisect
 import collections
 import datetime
 import functools
@@ -12,6 +13,7 @@ import glob
 import itertools
 import os
 import random
+import re
 import socket
 import sqlite3
 import string
@@ -20,7 +22,7 @@ import textwrap
 import threading
 import uuid
 import zlib
-from collections.abc import Collection, Mapping, Sequence
+from collections.abc import Collection, Container, Iterable, Iterator, Mapping, Sequence
 from typing import Any, Callable, cast
 
 from coverage.debug import NoDebugging, auto_repr, file_summary
@@ -109,6 +111,19 @@ CREATE TABLE tracer (
 );
 """
 
+# An optional table, not part of SCHEMA: it's derived from `line_bits` or `arc`
+# by CoverageData.index_line_contexts, and dropped when the data changes.
+LINE_CONTEXTS_SCHEMA = """\
+CREATE TABLE line_contexts (
+    -- If indexed, a row per file per line executed.
+    file_id integer,            -- foreign key to `file`.
+    lineno integer,             -- line number executed.
+    context_bits blob,          -- the ids of the contexts that executed it, as numbits.
+    foreign key (file_id) references file (id),
+    unique (file_id, lineno)
+);
+"""
+
 
 def _locked(method: AnyCallable) -> AnyCallable:
     """A decorator for methods that should hold self._lock."""
@@ -125,19 +140,85 @@ def _locked(method: AnyCallable) -> AnyCallable:
     return _wrapped
 
 
+# SQLite has supported "INSERT ... ON CONFLICT DO UPDATE" since 3.24.0.
+HAS_UPSERT = sqlite3.sqlite_version_info >= (3, 24, 0)
+
+# The most parameters we use in one SQL statement.  Old versions of SQLite
+# allowed at most 999.
+MAX_SQL_VARIABLES = 900
+
+# The most data files that can be merged at once by CoverageData._update_many.
+# SQLite allows ten databases to be attached to a connection by default.
+MAX_UPDATE_BATCH = 8
+
+
 class NumbitsUnionAgg:
-    """SQLite aggregate function for computing union of numbits."""
+    """SQLite aggregate function for computing union of numbits.
+
+    The union is kept as an int, so each step is one int operation rather than
+    building a new numbits.
+
+    """
 
     def __init__(self) -> None:
-        self.result = b""
+        self.bits = 0
+        self.nbytes = 0
 
     def step(self, value: bytes) -> None:
         """Process one value in the aggregation."""
-        self.result = numbits_union(self.result, value)
+        self.bits |= int.from_bytes(value, "little")
+        self.nbytes = max(self.nbytes, len(value))
 
     def finalize(self) -> bytes:
         """Return the final aggregated result."""
-        return self.result
+        return self.bits.to_bytes(self.nbytes, "little")
+
+
+# A context pattern that is a literal prefix (``^abc``) or a literal name
+# (``^abc$``): no regex special characters after the caret.
+LITERAL_PREFIX_PATTERN = re.compile(r"\^([^.^$*+?{}\[\]\\|()]*)(\$?)")
+
+
+class ContextIndex:
+    """An index of the contexts in a data file, for finding them by pattern.
+
+    Query context patterns are regexes used with :func:`re.search`, so in
+    general every context has to be checked.  But the common patterns are
+    literal prefixes like ``^test_foo`` and literal names like
+    ``^test_foo$``, which are found by bisecting the sorted contexts instead.
+
+    """
+
+    def __init__(self, rows: Iterable[tuple[int, str]]) -> None:
+        self.ids = {context: context_id for context_id, context in rows}
+        self.names = {context_id: context for context, context_id in self.ids.items()}
+        self.sorted_contexts = sorted(self.ids)
+
+    def ids_matching(self, pattern: str) -> list[int]:
+        """Get the ids of the contexts that `pattern` matches with re.search.
+
+        Raises :class:`DataError` if `pattern` isn't a valid regex.
+
+        """
+        m = LITERAL_PREFIX_PATTERN.fullmatch(pattern)
+        if m:
+            prefix, dollar = m.groups()
+            if dollar:
+                # "$" also matches before a newline at the end.
+                names = [prefix, prefix + "\n"]
+                return [self.ids[name] for name in names if name in self.ids]
+            ids = []
+            start = bisect.bisect_left(self.sorted_contexts, prefix)
+            for context in itertools.islice(self.sorted_contexts, start, None):
+                if not context.startswith(prefix):
+                    break
+                ids.append(self.ids[context])
+            return ids
+        try:
+            regex = re.compile(pattern)
+        except re.error as e:
+            raise DataError(f"Invalid context pattern {pattern!r}: {e}") from e
+        return [context_id for context, context_id in self.ids.items() if regex.search(context)]
 
 
 class CoverageData:
@@ -181,7 +262,8 @@ class CoverageData:
 
     To read an existing coverage.py data file, use :meth:`read`.  You can then
     access the line, arc, or file tracer data with :meth:`lines`, :meth:`arcs`,
-    or :meth:`file_tracer`.
+    or :meth:`file_tracer`.  To only read a large data file, as reporting
+    does, use ``read(read_only=True)``.
 
     The :meth:`has_arcs` method indicates whether arc data is available.  You
     can get a set of the files in the data with :meth:`measured_files`.  As
@@ -189,7 +271,9 @@ class CoverageData:
     by using this object as a boolean value.
 
     The contexts for each line in a file can be read with
-    :meth:`contexts_by_lineno`.
+    :meth:`contexts_by_lineno`, or for particular lines with
+    :meth:`contexts_for_line` or :meth:`contexts_for_lines`.  To make those
+    fast for many lookups, build an index with :meth:`index_line_contexts`.
 
     To limit querying to certain contexts, use :meth:`set_query_context` or
     :meth:`set_query_contexts`. These will narrow the focus of subsequent
@@ -271,6 +355,15 @@ class CoverageData:
         self._current_context: str | None = None
         self._current_context_id: int | None = None
         self._query_context_ids: list[int] | None = None
+        self._context_index: ContextIndex | None = None
+        # Does the data file have a line_contexts table?  None if we don't know yet.
+        self._has_line_contexts: bool | None = None
+
+        # Opened with read(read_only=True)?  Then the data can't change, so
+        # the lines or arcs for all files are read at once, and kept.
+        self._read_only = False
+        self._all_line_bits: dict[int, bytes] | None = None
+        self._all_arcs: dict[int, set[TArc]] | None = None
 
     __repr__ = auto_repr
 
@@ -292,10 +385,15 @@ class CoverageData:
     def _reset(self) -> None:
         """Reset our attributes."""
         if not self._no_disk:
-            self.close()
+            self.close(force=self._read_only)
+        self._read_only = False
+        self._all_line_bits = None
+        self._all_arcs = None
         self._file_map = {}
         self._have_used = False
         self._current_context_id = None
+        self._context_index = None
+        self._has_line_contexts = None
 
     def close(self, force: bool = False) -> None:
         """Really close all the database objects."""
@@ -308,7 +406,12 @@ class CoverageData:
     def _open_db(self) -> None:
         """Open an existing db file, and read its metadata."""
         self._debug_dataio("Opening data file", self._filename)
-        self._dbs[threading.get_ident()] = SqliteDb(self._filename, self._debug, self._no_disk)
+        self._dbs[threading.get_ident()] = SqliteDb(
+            self._filename,
+            self._debug,
+            self._no_disk,
+            read_only=self._read_only,
+        )
         self._read_db()
 
     def _read_db(self) -> None:
@@ -447,6 +550,29 @@ class CoverageData:
                     )
         return self._file_map.get(filename)
 
+    def _add_files(self, filenames: Collection[str]) -> None:
+        """Make sure all of `filenames` have ids in the database.
+
+        The files not already in the database are added with one statement,
+        and their ids read back, so that `_file_map` has all of `filenames`.
+
+        """
+        new_files = [filename for filename in filenames if filename not in self._file_map]
+        if not new_files:
+            return
+        with self._connect() as con:
+            con.executemany_void(
+                "INSERT OR IGNORE INTO file (path) VALUES (?)",
+                [(filename,) for filename in new_files],
+            )
+            for i in range(0, len(new_files), MAX_SQL_VARIABLES):
+                chunk = new_files[i : i + MAX_SQL_VARIABLES]
+                query = (
+                    "SELECT id, path FROM file WHERE path IN (" + ", ".join("?" * len(chunk)) + ")"
+                )
+                with con.execute(query, chunk) as cur:
+                    self._file_map.update({path: file_id for file_id, path in cur})
+
     def _context_id(self, context: str) -> int | None:
         """Get the id for a context."""
         assert context is not None
@@ -485,6 +611,30 @@ class CoverageData:
                     "INSERT INTO context (context) VALUES (?)",
                     (context,),
                 )
+            self._context_index = None
+
+    def _get_context_index(self) -> ContextIndex:
+        """Get the ContextIndex for the contexts in the data file."""
+        if self._context_index is None:
+            with self._connect() as con:
+                with con.execute("SELECT id, context FROM context") as cur:
+                    self._context_index = ContextIndex(cur)
+        return self._context_index
+
+    def _line_contexts_indexed(self, con: SqliteDb) -> bool:
+        """Does the data file have a line_contexts table?"""
+        if self._has_line_contexts is None:
+            row = con.execute_one(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'line_contexts'"
+            )
+            self._has_line_contexts = row is not None
+        return self._has_line_contexts
+
+    def _drop_line_contexts(self, con: SqliteDb) -> None:
+        """The data is changing, so drop the line_contexts table if there is one."""
+        if self._line_contexts_indexed(con):
+            con.execute_void("DROP TABLE line_contexts")
+            self._has_line_contexts = False
 
     def base_filename(self) -> str:
         """The base filename for storing data.
@@ -522,27 +672,67 @@ class CoverageData:
             if self._debug.should("dataop2"):
                 for filename, linenos in sorted(line_data.items()):
                     self._debug.write(f"  {filename}: {linenos}")
+        self._add_line_bits(
+            {filename: nums_to_numbits(linenos) for filename, linenos in line_data.items()}
+        )
+
+    def _add_line_bits(self, line_bits: Mapping[str, bytes]) -> None:
+        """Add measured line data already packed as numbits.
+
+        `line_bits` is a dictionary mapping file names to numbits.
+
+        """
         self._start_using()
         self._choose_lines_or_arcs(lines=True)
-        if not line_data:
+        if not line_bits:
             return
         with self._connect() as con:
-            self._set_context_id()
-            for filename, linenos in line_data.items():
-                line_bits = nums_to_numbits(linenos)
-                file_id = self._file_id(filename, add=True)
-                query = "SELECT numbits FROM line_bits WHERE file_id = ? AND context_id = ?"
-                with con.execute(query, (file_id, self._current_context_id)) as cur:
-                    existing = list(cur)
-                if existing:
-                    line_bits = numbits_union(line_bits, existing[0][0])
-
-                con.execute_void(
+            if self._current_context_id is None:
+                self._set_context_id()
+            context_id = self._current_context_id
+            self._drop_line_contexts(con)
+            self._add_files(line_bits)
+            data = [
+                (self._file_map[filename], context_id, numbits)
+                for filename, numbits in line_bits.items()
+            ]
+            if HAS_UPSERT:
+                assert con.con is not None
+                con.con.create_function("numbits_union", 2, numbits_union)
+                con.executemany_void(
+                    """
+                    INSERT INTO line_bits (file_id, context_id, numbits) VALUES (?, ?, ?)
+                    ON CONFLICT (file_id, context_id)
+                    DO UPDATE SET numbits = numbits_union(numbits, excluded.numbits)
+                    """,
+                    data,
+                )
+            else:
+                # Without upsert, read the existing data for these files in
+                # bulk, and merge it here.
+                existing: dict[int, bytes] = {}
+                for i in range(0, len(data), MAX_SQL_VARIABLES):
+                    file_ids = [file_id for file_id, _, _ in data[i : i + MAX_SQL_VARIABLES]]
+                    query = (
+                        "SELECT file_id, numbits FROM line_bits "
+                        + "WHERE context_id = ? AND file_id IN ("
+                        + ", ".join("?" * len(file_ids))
+                        + ")"
+                    )
+                    with con.execute(query, [context_id, *file_ids]) as cur:
+                        existing.update(cur)
+                data = [
+                    (file_id, context_id, numbits_union(line_bits, existing[file_id]))
+                    if file_id in existing
+                    else (file_id, context_id, line_bits)
+                    for file_id, context_id, line_bits in data
+                ]
+                con.executemany_void(
                     """
                     INSERT OR REPLACE INTO line_bits
                     (file_id, context_id, numbits) VALUES (?, ?, ?)
                     """,
-                    (file_id, self._current_context_id, line_bits),
+                    data,
                 )
 
     @_locked
@@ -571,19 +761,47 @@ class CoverageData:
         if not arc_data:
             return
         with self._connect() as con:
-            self._set_context_id()
-            for filename, arcs in arc_data.items():
-                if not arcs:
-                    continue
-                file_id = self._file_id(filename, add=True)
-                data = [(file_id, self._current_context_id, fromno, tono) for fromno, tono in arcs]
-                con.executemany_void(
-                    """
-                    INSERT OR IGNORE INTO arc
-                    (file_id, context_id, fromno, tono) VALUES (?, ?, ?, ?)
-                    """,
-                    data,
-                )
+            if self._current_context_id is None:
+                self._set_context_id()
+            context_id = self._current_context_id
+            self._drop_line_contexts(con)
+            self._add_files([filename for filename, arcs in arc_data.items() if arcs])
+            data = [
+                (self._file_map[filename], context_id, fromno, tono)
+                for filename, arcs in arc_data.items()
+                for fromno, tono in arcs
+            ]
+            con.executemany_void(
+                """
+                INSERT OR IGNORE INTO arc
+                (file_id, context_id, fromno, tono) VALUES (?, ?, ?, ?)
+                """,
+                data,
+            )
+
+    @_locked
+    def _add_context_data(
+        self,
+        context_data: Mapping[str | None, Mapping[str, bytes] | Mapping[str, Collection[TArc]]],
+        arcs: bool,
+    ) -> None:
+        """Add measured data for a number of contexts in one transaction.
+
+        `context_data` maps contexts to the data for that context: a mapping of
+        file names to numbits of lines, or if `arcs` is true, to arcs.  The
+        current context is unchanged afterward.
+
+        """
+        self._start_using()
+        with self._connect():
+            current_context = self._current_context
+            for context, file_data in context_data.items():
+                self.set_context(context)
+                if arcs:
+                    self.add_arcs(cast(Mapping[str, Collection[TArc]], file_data))
+                else:
+                    self._add_line_bits(cast(Mapping[str, bytes], file_data))
+            self.set_context(current_context)
 
     def _choose_lines_or_arcs(self, lines: bool = False, arcs: bool = False) -> None:
         """Force the data file to choose between lines and arcs."""
@@ -658,8 +876,8 @@ class CoverageData:
             if not self._has_arcs and not self._has_lines:
                 raise DataError("Can't touch files in an empty CoverageData")
 
+            self._add_files(filenames)
             for filename in filenames:
-                self._file_id(filename, add=True)
                 if plugin_name:
                     # Set the tracer for this file
                     self.add_file_tracers({filename: plugin_name})
@@ -681,6 +899,7 @@ class CoverageData:
             else:
                 raise DataError("Can't purge files in an empty CoverageData")
 
+            self._drop_line_contexts(con)
             for filename in filenames:
                 file_id = self._file_id(filename, add=False)
                 if file_id is None:
@@ -699,30 +918,63 @@ class CoverageData:
         directly from the test suite.
 
         """
+        self._update_many([other_data], map_path)
+
+    def _update_many(
+        self,
+        others: Sequence[CoverageData],
+        map_path: Callable[[str], str] | None = None,
+    ) -> None:
+        """Update this data with data from a number of other CoverageData's.
+
+        All of `others` are attached to our database at once, and merged in
+        one transaction.  SQLite limits the number of attached databases, so
+        there can be at most :data:`MAX_UPDATE_BATCH` of them.
+
+        """
+        assert 0 < len(others) <= MAX_UPDATE_BATCH
         if self._debug.should("dataop"):
-            self._debug.write(
-                "Updating with data from {!r}".format(
-                    getattr(other_data, "_filename", "???"),
+            for other_data in others:
+                self._debug.write(
+                    "Updating with data from {!r}".format(
+                        getattr(other_data, "_filename", "???"),
+                    )
                 )
-            )
-        if self._has_lines and other_data._has_arcs:
-            raise DataError(
-                "Can't combine branch coverage data with statement data", slug="cant-combine"
-            )
-        if self._has_arcs and other_data._has_lines:
-            raise DataError(
-                "Can't combine statement coverage data with branch data", slug="cant-combine"
-            )
+        has_lines, has_arcs = self._has_lines, self._has_arcs
+        for other_data in others:
+            if has_lines and other_data._has_arcs:
+                raise DataError(
+                    "Can't combine branch coverage data with statement data", slug="cant-combine"
+                )
+            if has_arcs and other_data._has_lines:
+                raise DataError(
+                    "Can't combine statement coverage data with branch data", slug="cant-combine"
+                )
+            has_lines = has_lines or other_data._has_lines
+            has_arcs = has_arcs or other_data._has_arcs
 
         map_path = map_path or (lambda p: p)
 
         # Force the database we're writing to to exist before we start nesting contexts.
         self._start_using()
-        other_data.read()
-
-        # Ensure other_data has a properly initialized database
-        with other_data._connect():
-            pass
+        for other_data in others:
+            other_data.read()
+
+            # Ensure other_data has a properly initialized database
+            with other_data._connect():
+                pass
+
+        # Each other database is attached as other_db0, other_db1, etc.  Temp
+        # views combine the same table from all of them, with a `db` column
+        # to tell the rows apart.  Ids are only unique within one database, so
+        # joins between the views have to match `db` as well as ids.
+        schemas = [f"other_db{i}" for i in range(len(others))]
+
+        def union_all(select: str) -> str:
+            """Combine `select` for each of the attached databases."""
+            return " UNION ALL ".join(
+                select.format(db=i, schema=schema) for i, schema in enumerate(schemas)
+            )
 
         with self._connect() as con:
             assert con.con is not None
@@ -737,132 +989,190 @@ class CoverageData:
                 NumbitsUnionAgg,  # type: ignore[arg-type]
             )
 
-            # Attach the other database
-            con.execute_void("ATTACH DATABASE ? AS other_db", (other_data.data_filename(),))
-
-            # Create temporary table with mapped file paths to avoid repeated map_path() calls
-            con.execute_void("""
-                CREATE TEMP TABLE other_file_mapped AS
-                SELECT
-                    other_file.id as other_file_id,
-                    map_path(other_file.path) as mapped_path
-                FROM other_db.file AS other_file
-            """)
-
-            # Check for tracer conflicts before proceeding
-            with con.execute("""
-                SELECT other_file_mapped.mapped_path,
-                       COALESCE(main.tracer.tracer, ''),
-                       COALESCE(other_db.tracer.tracer, '')
-                FROM main.file
-                LEFT JOIN main.tracer ON main.file.id = main.tracer.file_id
-                INNER JOIN other_file_mapped ON main.file.path = other_file_mapped.mapped_path
-                LEFT JOIN other_db.tracer ON other_file_mapped.other_file_id = other_db.tracer.file_id
-                WHERE COALESCE(main.tracer.tracer, '') != COALESCE(other_db.tracer.tracer, '')
-            """) as cur:
-                conflicts = list(cur)
-                if conflicts:
-                    path, this_tracer, other_tracer = conflicts[0]
-                    raise DataError(
-                        "Conflicting file tracer name for '{}': {!r} vs {!r}".format(
-                            path,
-                            this_tracer,
-                            other_tracer,
-                        ),
+            self._drop_line_contexts(con)
+
+            # Attach the other databases
+            for schema, other_data in zip(schemas, others):
+                con.execute_void(f"ATTACH DATABASE ? AS {schema}", (other_data.data_filename(),))
+
+            try:
+                for table, columns in [
+                    ("context", "id, context"),
+                    ("arc", "file_id, context_id, fromno, tono"),
+                    ("line_bits", "file_id, context_id, numbits"),
+                    ("tracer", "file_id, tracer"),
+                ]:
+                    con.execute_void(
+                        f"CREATE TEMP VIEW other_{table} AS "
+                        + union_all(f"SELECT {{db}} AS db, {columns} FROM {{schema}}.{table}")
                     )
 
-            # Insert missing files from other_db (with map_path applied)
-            con.execute_void("""
-                INSERT OR IGNORE INTO main.file (path)
-                SELECT DISTINCT mapped_path FROM other_file_mapped
-            """)
-
-            # Insert missing contexts from other_db
-            con.execute_void("""
-                INSERT OR IGNORE INTO main.context (context)
-                SELECT context FROM other_db.context
-            """)
-
-            # Update file_map with any new files
-            with con.execute("SELECT id, path FROM file") as cur:
-                self._file_map.update({path: id for id, path in cur})
-
-            with con.execute("""
-                SELECT
-                    EXISTS(SELECT 1 FROM other_db.arc),
-                    EXISTS(SELECT 1 FROM other_db.line_bits)
-            """) as cur:
-                has_arcs, has_lines = cur.fetchone()
-
-            # Handle arcs if present in other_db
-            if has_arcs:
-                self._choose_lines_or_arcs(arcs=True)
+                # Create temporary table with mapped file paths to avoid repeated map_path() calls
+                con.execute_void(
+                    "CREATE TEMP TABLE other_file_mapped AS "
+                    + union_all(
+                        "SELECT {db} AS db, id AS other_file_id, map_path(path) AS mapped_path "
+                        + "FROM {schema}.file"
+                    )
+                )
+
+                # Check for tracer conflicts before proceeding.  The tracer for
+                # each file from our data (db -1) and the other data is compared
+                # to the tracers for the same file in the databases after it.
+                con.execute_void("""
+                    CREATE TEMP TABLE file_tracer AS
+                    SELECT -1 AS db, main.file.path AS path, COALESCE(main.tracer.tracer, '') AS tracer
+                    FROM main.file
+                    LEFT JOIN main.tracer ON main.file.id = main.tracer.file_id
+                    WHERE main.file.path IN (SELECT mapped_path FROM other_file_mapped)
+                    UNION ALL
+                    SELECT other_file_mapped.db, other_file_mapped.mapped_path, COALESCE(other_tracer.tracer, '')
+                    FROM other_file_mapped
+                    LEFT JOIN other_tracer
+                        ON other_file_mapped.db = other_tracer.db
+                        AND other_file_mapped.other_file_id = other_tracer.file_id
+                """)
+                with con.execute("""
+                    SELECT earlier.path, earlier.tracer, later.tracer
+                    FROM file_tracer AS earlier
+                    INNER JOIN file_tracer AS later
+                        ON earlier.path = later.path AND earlier.db < later.db
+                    WHERE earlier.tracer != later.tracer
+                    ORDER BY later.db, earlier.db
+                    LIMIT 1
+                """) as cur:
+                    conflicts = list(cur)
+                    if conflicts:
+                        path, this_tracer, other_tracer = conflicts[0]
+                        raise DataError(
+                            "Conflicting file tracer name for '{}': {!r} vs {!r}".format(
+                                path,
+                                this_tracer,
+                                other_tracer,
+                            ),
+                        )
+
+                # Insert missing files from the other dbs (with map_path applied)
+                con.execute_void("""
+                    INSERT OR IGNORE INTO main.file (path)
+                    SELECT mapped_path FROM other_file_mapped
+                    ORDER BY db, other_file_id
+                """)
+
+                # Insert missing contexts from the other dbs
+                con.execute_void("""
+                    INSERT OR IGNORE INTO main.context (context)
+                    SELECT context FROM other_context
+                    ORDER BY db, id
+                """)
+                self._context_index = None
+
+                # Update file_map with any new files
+                with con.execute("SELECT id, path FROM file") as cur:
+                    self._file_map.update({path: id for id, path in cur})
+
+                with con.execute("""
+                    SELECT
+                        EXISTS(SELECT 1 FROM other_arc),
+                        EXISTS(SELECT 1 FROM other_line_bits)
+                """) as cur:
+                    has_arcs, has_lines = cur.fetchone()
 
                 # Create context mapping table for faster lookups
                 con.execute_void("""
                     CREATE TEMP TABLE context_mapping AS
                     SELECT
+                        other_context.db as db,
                         other_context.id as other_id,
                         main_context.id as main_id
-                    FROM other_db.context AS other_context
+                    FROM other_context
                     INNER JOIN main.context AS main_context ON other_context.context = main_context.context
                 """)
 
-                con.execute_void("""
-                    INSERT OR IGNORE INTO main.arc (file_id, context_id, fromno, tono)
-                    SELECT
-                        main_file.id,
-                        context_mapping.main_id,
-                        other_arc.fromno,
-                        other_arc.tono
-                    FROM other_db.arc AS other_arc
-                    INNER JOIN other_file_mapped ON other_arc.file_id = other_file_mapped.other_file_id
-                    INNER JOIN context_mapping ON other_arc.context_id = context_mapping.other_id
-                    INNER JOIN main.file AS main_file ON other_file_mapped.mapped_path = main_file.path
-                """)
-
-            # Handle line_bits if present in other_db
-            if has_lines:
-                self._choose_lines_or_arcs(lines=True)
+                # Handle arcs if present in the other dbs
+                if has_arcs:
+                    self._choose_lines_or_arcs(arcs=True)
 
-                # Handle line_bits by aggregating other_db data by mapped target,
-                # then inserting/updating
+                    con.execute_void("""
+                        INSERT OR IGNORE INTO main.arc (file_id, context_id, fromno, tono)
+                        SELECT
+                            main_file.id,
+                            context_mapping.main_id,
+                            other_arc.fromno,
+                            other_arc.tono
+                        FROM other_arc
+                        INNER JOIN other_file_mapped
+                            ON other_arc.db = other_file_mapped.db
+                            AND other_arc.file_id = other_file_mapped.other_file_id
+                        INNER JOIN context_mapping
+                            ON other_arc.db = context_mapping.db
+                            AND other_arc.context_id = context_mapping.other_id
+                        INNER JOIN main.file AS main_file ON other_file_mapped.mapped_path = main_file.path
+                    """)
+
+                # Handle line_bits if present in the other dbs
+                if has_lines:
+                    self._choose_lines_or_arcs(lines=True)
+
+                    # Handle line_bits by aggregating the other dbs' data by mapped
+                    # target, then inserting/updating
+                    con.execute_void("""
+                        INSERT OR REPLACE INTO main.line_bits (file_id, context_id, numbits)
+                        SELECT
+                            main_file.id,
+                            aggregated.context_id,
+                            numbits_union(
+                                COALESCE((
+                                    SELECT numbits FROM main.line_bits
+                                    WHERE file_id = main_file.id AND context_id = aggregated.context_id
+                                ), X''),
+                                aggregated.combined_numbits
+                            )
+                        FROM (
+                            SELECT
+                                other_file_mapped.mapped_path,
+                                context_mapping.main_id AS context_id,
+                                numbits_union_agg(other_line_bits.numbits) as combined_numbits
+                            FROM other_line_bits
+                            INNER JOIN other_file_mapped
+                                ON other_line_bits.db = other_file_mapped.db
+                                AND other_line_bits.file_id = other_file_mapped.other_file_id
+                            INNER JOIN context_mapping
+                                ON other_line_bits.db = context_mapping.db
+                                AND other_line_bits.context_id = context_mapping.other_id
+                            GROUP BY other_file_mapped.mapped_path, context_mapping.main_id
+                        ) AS aggregated
+                        INNER JOIN main.file AS main_file ON aggregated.mapped_path = main_file.path
+                    """)
+
+                # Insert tracers from the other dbs (avoiding conflicts we already checked)
                 con.execute_void("""
-                    INSERT OR REPLACE INTO main.line_bits (file_id, context_id, numbits)
+                    INSERT OR IGNORE INTO main.tracer (file_id, tracer)
                     SELECT
                         main_file.id,
-                        main_context.id,
-                        numbits_union(
-                            COALESCE((
-                                SELECT numbits FROM main.line_bits
-                                WHERE file_id = main_file.id AND context_id = main_context.id
-                            ), X''),
-                            aggregated.combined_numbits
-                        )
-                    FROM (
-                        SELECT
-                            other_file_mapped.mapped_path,
-                            other_context.context,
-                            numbits_union_agg(other_line_bits.numbits) as combined_numbits
-                        FROM other_db.line_bits AS other_line_bits
-                        INNER JOIN other_file_mapped ON other_line_bits.file_id = other_file_mapped.other_file_id
-                        INNER JOIN other_db.context AS other_context ON other_line_bits.context_id = other_context.id
-                        GROUP BY other_file_mapped.mapped_path, other_context.context
-                    ) AS aggregated
-                    INNER JOIN main.file AS main_file ON aggregated.mapped_path = main_file.path
-                    INNER JOIN main.context AS main_context ON aggregated.context = main_context.context
+                        other_tracer.tracer
+                    FROM other_tracer
+                    INNER JOIN other_file_mapped
+                        ON other_tracer.db = other_file_mapped.db
+                        AND other_tracer.file_id = other_file_mapped.other_file_id
+                    INNER JOIN main.file AS main_file ON other_file_mapped.mapped_path = main_file.path
+                    ORDER BY other_tracer.db
                 """)
-
-            # Insert tracers from other_db (avoiding conflicts we already checked)
-            con.execute_void("""
-                INSERT OR IGNORE INTO main.tracer (file_id, tracer)
-                SELECT
-                    main_file.id,
-                    other_tracer.tracer
-                FROM other_db.tracer AS other_tracer
-                INNER JOIN other_file_mapped ON other_tracer.file_id = other_file_mapped.other_file_id
-                INNER JOIN main.file AS main_file ON other_file_mapped.mapped_path = main_file.path
-            """)
+            except BaseException:
+                con.con.rollback()
+                raise
+            else:
+                con.con.commit()
+            finally:
+                # Leave the connection as we found it: it stays open for
+                # in-memory data, and could be used to merge more files.  This
+                # is after the transaction, since DETACH can't be inside one.
+                for name in ["context", "arc", "line_bits", "tracer"]:
+                    con.execute_void(f"DROP VIEW IF EXISTS temp.other_{name}", fail_ok=True)
+                for name in ["other_file_mapped", "file_tracer", "context_mapping"]:
+                    con.execute_void(f"DROP TABLE IF EXISTS temp.{name}", fail_ok=True)
+                for schema in schemas:
+                    con.execute_void(f"DETACH DATABASE {schema}", fail_ok=True)
 
         if not self._no_disk:
             # Update all internal cache data.
@@ -889,9 +1199,25 @@ class CoverageData:
                 self._debug_dataio("Erasing parallel data file", filename)
                 file_be_gone(filename)
 
-    def read(self) -> None:
-        """Start using an existing data file."""
+    def read(self, read_only: bool = False) -> None:
+        """Start using an existing data file.
+
+        If `read_only` is true, the file is opened only for reading, which is
+        faster for large data files.  The file must not change while this
+        object uses it, and no data can be added, until :meth:`erase`.
+        :meth:`all_lines` and :meth:`all_arcs` read the data for all of the
+        files in one pass, and keep it for the :meth:`lines` and :meth:`arcs`
+        calls that follow.
+
+        .. versionadded:: 7.12
+            The `read_only` parameter.
+
+        """
         if os.path.exists(self._filename):
+            if read_only and not self._read_only:
+                # Re-open any connections read-only.
+                self.close(force=True)
+                self._read_only = True
             with self._connect():
                 self._have_used = True
 
@@ -968,6 +1294,7 @@ class CoverageData:
         with self._connect() as con:
             with con.execute("SELECT id FROM context WHERE context = ?", (context,)) as cur:
                 self._query_context_ids = [row[0] for row in cur.fetchall()]
+        self._all_line_bits = self._all_arcs = None
 
     def set_query_contexts(self, contexts: Sequence[str] | None) -> None:
         """Set a number of contexts for subsequent querying.
@@ -983,12 +1310,36 @@ class CoverageData:
         """
         self._start_using()
         if contexts:
-            with self._connect() as con:
-                context_clause = " or ".join(["context REGEXP ?"] * len(contexts))
-                with con.execute("SELECT id FROM context WHERE " + context_clause, contexts) as cur:
-                    self._query_context_ids = [row[0] for row in cur.fetchall()]
+            context_index = self._get_context_index()
+            ids: set[int] = set()
+            for pattern in contexts:
+                ids.update(context_index.ids_matching(pattern))
+            self._query_context_ids = sorted(ids)
         else:
             self._query_context_ids = None
+        self._all_line_bits = self._all_arcs = None
+
+    def _limit_to_query_contexts(
+        self,
+        query: str,
+        data: list[Any],
+        column: str,
+    ) -> tuple[str, list[Any], Container[int] | None]:
+        """Limit `query` to the contexts set by set_query_context(s).
+
+        Returns the query and its data, and a container of context ids to
+        keep.  If it isn't None, the query wasn't limited, because there are
+        too many contexts for an IN clause, and the caller must check each
+        row's context id against the container.
+
+        """
+        ids = self._query_context_ids
+        if ids is None:
+            return query, data, None
+        if len(ids) > MAX_SQL_VARIABLES:
+            return query, data, frozenset(ids)
+        query += f" AND {column} IN (" + ", ".join("?" * len(ids)) + ")"
+        return query, data + ids, None
 
     def lines(self, filename: str) -> list[TLineNo] | None:
         """Get the list of lines executed for a source file.
@@ -999,31 +1350,49 @@ class CoverageData:
         If the file was executed, returns a list of integers, the line numbers
         executed in the file. The list is in no particular order.
 
+        """
+        line_bits = self.line_bits(filename)
+        if line_bits is None:
+            return None
+        return numbits_to_nums(line_bits)
+
+    def line_bits(self, filename: str) -> bytes | None:
+        """Get the lines executed for a source file, as a numbits.
+
+        If the file was not measured, returns None.  A file might be measured,
+        and have no lines executed, in which case an empty numbits is returned.
+
+        This is the same information as :meth:`lines`, but the data for all of
+        the queried contexts is merged without converting it to integers, so
+        it's faster when there are many contexts.  Use the functions in
+        :mod:`coverage.numbits` to work with the result.
+
+        .. versionadded:: 7.12
+
         """
         self._start_using()
         if self.has_arcs():
             arcs = self.arcs(filename)
-            if arcs is not None:
-                all_lines = itertools.chain.from_iterable(arcs)
-                return list({l for l in all_lines if l > 0})
+            if arcs is None:
+                return None
+            all_lines = itertools.chain.from_iterable(arcs)
+            return nums_to_numbits({l for l in all_lines if l > 0})
 
         with self._connect() as con:
             file_id = self._file_id(filename)
             if file_id is None:
                 return None
+            elif self._all_line_bits is not None:
+                return self._all_line_bits.get(file_id, b"")
             else:
-                query = "SELECT numbits FROM line_bits WHERE file_id = ?"
-                data = [file_id]
-                if self._query_context_ids is not None:
-                    ids_array = ", ".join("?" * len(self._query_context_ids))
-                    query += " AND context_id IN (" + ids_array + ")"
-                    data += self._query_context_ids
+                query = "SELECT context_id, numbits FROM line_bits WHERE file_id = ?"
+                query, data, keep = self._limit_to_query_contexts(query, [file_id], "context_id")
+                union = NumbitsUnionAgg()
                 with con.execute(query, data) as cur:
-                    bitmaps = list(cur)
-                nums = set()
-                for row in bitmaps:
-                    nums.update(numbits_to_nums(row[0]))
-                return list(nums)
+                    for context_id, numbits in cur:
+                        if keep is None or context_id in keep:
+                            union.step(numbits)
+                return union.finalize()
 
     def arcs(self, filename: str) -> list[TArc] | None:
         """Get the list of arcs executed for a file.
@@ -1047,16 +1416,136 @@ class CoverageData:
             file_id = self._file_id(filename)
             if file_id is None:
                 return None
+            elif self._all_arcs is not None:
+                return list(self._all_arcs.get(file_id, ()))
             else:
                 query = "SELECT DISTINCT fromno, tono FROM arc WHERE file_id = ?"
-                data = [file_id]
-                if self._query_context_ids is not None:
-                    ids_array = ", ".join("?" * len(self._query_context_ids))
-                    query += " AND context_id IN (" + ids_array + ")"
-                    data += self._query_context_ids
+                query, data, keep = self._limit_to_query_contexts(query, [file_id], "context_id")
+                if keep is not None:
+                    query = "SELECT context_id, fromno, tono FROM arc WHERE file_id = ?"
+                    with con.execute(query, data) as cur:
+                        return list({(fromno, tono) for cid, fromno, tono in cur if cid in keep})
                 with con.execute(query, data) as cur:
                     return list(cur)
 
+    def all_lines(self) -> Iterator[tuple[str, list[TLineNo]]]:
+        """Get the lines executed for all of the measured files.
+
+        Produces a pair for each measured file, in file name order: the file
+        name, and the list of lines executed in it, as :meth:`lines` would
+        return.  The data is read with one query rather than one for each
+        file, so this is much faster than :meth:`lines` when there are many
+        files.
+
+        .. versionadded:: 7.12
+
+        """
+        self._start_using()
+        if self.has_arcs():
+            for filename, arcs in self.all_arcs():
+                yield filename, list({l for arc in arcs for l in arc if l > 0})
+            return
+
+        if self._read_only:
+            all_bits = self._read_all_line_bits()
+            for filename, file_id in sorted(self._file_map.items()):
+                yield filename, numbits_to_nums(all_bits.get(file_id, b""))
+            return
+
+        with self._connect() as con:
+            # The contexts are limited in the join condition, not in a WHERE
+            # clause, so that files with no data in them are still produced.
+            query = (
+                "SELECT file.path, line_bits.context_id, line_bits.numbits FROM file "
+                + "LEFT JOIN line_bits ON (line_bits.file_id = file.id"
+            )
+            query, data, keep = self._limit_to_query_contexts(query, [], "line_bits.context_id")
+            query += ") ORDER BY file.path"
+            with con.execute(query, data) as cur:
+                for filename, rows in itertools.groupby(cur, key=lambda row: row[0]):
+                    union = NumbitsUnionAgg()
+                    for _, context_id, numbits in rows:
+                        if numbits is not None and (keep is None or context_id in keep):
+                            union.step(numbits)
+                    yield filename, numbits_to_nums(union.finalize())
+
+    def all_arcs(self) -> Iterator[tuple[str, list[TArc]]]:
+        """Get the arcs executed for all of the measured files.
+
+        Produces a pair for each measured file, in file name order: the file
+        name, and the list of arcs executed in it, as :meth:`arcs` would
+        return.  The data is read with one query rather than one for each
+        file, so this is much faster than :meth:`arcs` when there are many
+        files.
+
+        .. versionadded:: 7.12
+
+        """
+        self._start_using()
+        if self._read_only:
+            all_arcs = self._read_all_arcs()
+            for filename, file_id in sorted(self._file_map.items()):
+                yield filename, list(all_arcs.get(file_id, ()))
+            return
+
+        with self._connect() as con:
+            # The contexts are limited in the join condition, not in a WHERE
+            # clause, so that files with no data in them are still produced.
+            query = (
+                "SELECT file.path, arc.context_id, arc.fromno, arc.tono FROM file "
+                + "LEFT JOIN arc ON (arc.file_id = file.id"
+            )
+            query, data, keep = self._limit_to_query_contexts(query, [], "arc.context_id")
+            query += ") ORDER BY file.path"
+            with con.execute(query, data) as cur:
+                for filename, rows in itertools.groupby(cur, key=lambda row: row[0]):
+                    arcs = {
+                        (fromno, tono)
+                        for _, context_id, fromno, tono in rows
+                        if fromno is not None and (keep is None or context_id in keep)
+                    }
+                    yield filename, list(arcs)
+
+    def _read_all_line_bits(self) -> dict[int, bytes]:
+        """Read the lines for all files, for a read-only data file.
+
+        Returns a dict mapping file ids to numbits, for the query contexts.
+        The table is scanned once, in the order it's stored.
+
+        """
+        if self._all_line_bits is None:
+            keep = None if self._query_context_ids is None else set(self._query_context_ids)
+            all_bits: dict[int, int] = collections.defaultdict(int)
+            with self._connect() as con:
+                with con.execute("SELECT file_id, context_id, numbits FROM line_bits") as cur:
+                    for file_id, context_id, numbits in cur:
+                        if keep is None or context_id in keep:
+                            all_bits[file_id] |= int.from_bytes(numbits, "little")
+            self._all_line_bits = {
+                file_id: bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+                for file_id, bits in all_bits.items()
+            }
+        return self._all_line_bits
+
+    def _read_all_arcs(self) -> dict[int, set[TArc]]:
+        """Read the arcs for all files, for a read-only data file.
+
+        Returns a dict mapping file ids to sets of arcs, for the query
+        contexts.  The table is scanned once, in the order it's stored.
+
+        """
+        if self._all_arcs is None:
+            keep = None if self._query_context_ids is None else set(self._query_context_ids)
+            all_arcs: dict[int, set[TArc]] = collections.defaultdict(set)
+            with self._connect() as con:
+                query = "SELECT file_id, context_id, fromno, tono FROM arc"
+                with con.execute(query) as cur:
+                    for file_id, context_id, fromno, tono in cur:
+                        if keep is None or context_id in keep:
+                            all_arcs[file_id].add((fromno, tono))
+            self._all_arcs = dict(all_arcs)
+        return self._all_arcs
+
     def contexts_by_lineno(self, filename: str) -> dict[TLineNo, list[str]]:
         """Get the contexts for each line in a file.
 
@@ -1075,39 +1564,137 @@ class CoverageData:
             lineno_contexts_map = collections.defaultdict(set)
             if self.has_arcs():
                 query = """
-                    SELECT arc.fromno, arc.tono, context.context
+                    SELECT arc.context_id, arc.fromno, arc.tono, context.context
                     FROM arc, context
                     WHERE arc.file_id = ? AND arc.context_id = context.id
                 """
-                data = [file_id]
-                if self._query_context_ids is not None:
-                    ids_array = ", ".join("?" * len(self._query_context_ids))
-                    query += " AND arc.context_id IN (" + ids_array + ")"
-                    data += self._query_context_ids
+                query, data, keep = self._limit_to_query_contexts(
+                    query, [file_id], "arc.context_id"
+                )
                 with con.execute(query, data) as cur:
-                    for fromno, tono, context in cur:
+                    for context_id, fromno, tono, context in cur:
+                        if keep is not None and context_id not in keep:
+                            continue
                         if fromno > 0:
                             lineno_contexts_map[fromno].add(context)
                         if tono > 0:
                             lineno_contexts_map[tono].add(context)
             else:
                 query = """
-                    SELECT l.numbits, c.context FROM line_bits l, context c
+                    SELECT l.context_id, l.numbits, c.context FROM line_bits l, context c
                     WHERE l.context_id = c.id
                     AND file_id = ?
                 """
-                data = [file_id]
-                if self._query_context_ids is not None:
-                    ids_array = ", ".join("?" * len(self._query_context_ids))
-                    query += " AND l.context_id IN (" + ids_array + ")"
-                    data += self._query_context_ids
+                query, data, keep = self._limit_to_query_contexts(query, [file_id], "l.context_id")
                 with con.execute(query, data) as cur:
-                    for numbits, context in cur:
+                    for context_id, numbits, context in cur:
+                        if keep is not None and context_id not in keep:
+                            continue
                         for lineno in numbits_to_nums(numbits):
                             lineno_contexts_map[lineno].add(context)
 
         return {lineno: list(contexts) for lineno, contexts in lineno_contexts_map.items()}
 
+    def index_line_contexts(self) -> None:
+        """Build an index of the contexts that executed each line.
+
+        The index is stored in the data file, and makes :meth:`contexts_for_line`
+        a single lookup instead of reading all of the data for the file.  Any
+        change to the data drops the index, so build it once all of the data
+        has been collected or combined.  Building it again while it's current
+        does nothing.
+
+        .. versionadded:: 7.12
+
+        """
+        self._start_using()
+        with self._connect() as con:
+            if self._line_contexts_indexed(con):
+                return
+            has_arcs = self.has_arcs()
+            if has_arcs:
+                query = "SELECT file_id, context_id, fromno, tono FROM arc ORDER BY file_id"
+            else:
+                query = "SELECT file_id, context_id, numbits FROM line_bits ORDER BY file_id"
+            con.execute_void(LINE_CONTEXTS_SCHEMA)
+            insert = "INSERT INTO line_contexts (file_id, lineno, context_bits) VALUES (?, ?, ?)"
+            with con.execute(query) as cur:
+                # Working on one file at a time keeps the per-line dict small.
+                for file_id, file_rows in itertools.groupby(cur, key=lambda row: row[0]):
+                    # Context ids can repeat for arcs, but numbits ignores that.
+                    line_contexts: dict[TLineNo, list[int]] = collections.defaultdict(list)
+                    if has_arcs:
+                        for _, context_id, fromno, tono in file_rows:
+                            if fromno > 0:
+                                line_contexts[fromno].append(context_id)
+                            if tono > 0:
+                                line_contexts[tono].append(context_id)
+                    else:
+                        for _, context_id, numbits in file_rows:
+                            for lineno in numbits_to_nums(numbits):
+                                line_contexts[lineno].append(context_id)
+                    con.executemany_void(
+                        insert,
+                        [
+                            (file_id, lineno, nums_to_numbits(context_ids))
+                            for lineno, context_ids in line_contexts.items()
+                        ],
+                    )
+            self._has_line_contexts = True
+
+    def contexts_for_line(self, filename: str, lineno: TLineNo) -> list[str]:
+        """Get the contexts that executed one line of a file.
+
+        Returns a sorted list of context names, empty if the line wasn't
+        executed.  The contexts are limited by :meth:`set_query_context` or
+        :meth:`set_query_contexts`, like :meth:`contexts_by_lineno`.
+
+        If :meth:`index_line_contexts` has built the index, this reads one row
+        of it.  Otherwise, it's computed from :meth:`contexts_by_lineno`.
+
+        .. versionadded:: 7.12
+
+        """
+        return sorted(self.contexts_for_lines(filename, [lineno]))
+
+    def contexts_for_lines(self, filename: str, linenos: Iterable[TLineNo]) -> set[str]:
+        """Get the contexts that executed any of a number of lines of a file.
+
+        Returns a set of context names, limited like :meth:`contexts_for_line`.
+        The data for the file is read once, however many lines there are: if
+        :meth:`index_line_contexts` has built the index, only the rows for
+        `linenos` are read.
+
+        .. versionadded:: 7.12
+
+        """
+        self._start_using()
+        with self._connect() as con:
+            if not self._line_contexts_indexed(con):
+                by_lineno = self.contexts_by_lineno(filename)
+                return {context for lineno in linenos for context in by_lineno.get(lineno, ())}
+            file_id = self._file_id(filename)
+            if file_id is None:
+                return set()
+            wanted = sorted(set(linenos))
+            union = NumbitsUnionAgg()
+            for i in range(0, len(wanted), MAX_SQL_VARIABLES):
+                chunk = wanted[i : i + MAX_SQL_VARIABLES]
+                query = (
+                    "SELECT context_bits FROM line_contexts WHERE file_id = ? AND lineno IN ("
+                    + ", ".join("?" * len(chunk))
+                    + ")"
+                )
+                with con.execute(query, [file_id, *chunk]) as cur:
+                    for (context_bits,) in cur:
+                        union.step(context_bits)
+        context_ids = numbits_to_nums(union.finalize())
+        if self._query_context_ids is not None:
+            keep = set(self._query_context_ids)
+            context_ids = [context_id for context_id in context_ids if context_id in keep]
+        names = self._get_context_index().names
+        return {names[context_id] for context_id in context_ids}
+
     @classmethod
     def sys_info(cls) -> list[tuple[str, Any]]:
         """Our information for `Coverage.sys_info`.
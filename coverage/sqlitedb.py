@@ -6,6 +6,8 @@
 from __future__ import annotations
 
 import contextlib
+import os
+import pathlib
 import re
 import sqlite3
 from collections.abc import Iterable, Iterator
@@ -13,8 +15,14 @@ from typing import Any, cast
 
 from coverage.debug import auto_repr, clipped_repr, exc_one_line
 from coverage.exceptions import DataError
+from coverage.misc import isolate_module
 from coverage.types import TDebugCtl
 
+os = isolate_module(os)
+
+# The page cache size for read-only databases, in KiB.  SQLite's default is 2Mb.
+READ_ONLY_CACHE_KIB = 64 * 1024
+
 
 class SqliteDb:
     """A simple abstraction over a SQLite database.
@@ -27,12 +35,24 @@ class SqliteDb:
                 for a, b in cur:
                     etc(a, b)
 
+    If `read_only` is true, the database is only read, and must not change
+    while it's open.  SQLite can then skip locking, and map the whole file
+    into memory.  The connection stays open until it's closed with
+    ``force=True``, so its page cache is kept between uses.
+
     """
 
-    def __init__(self, filename: str, debug: TDebugCtl, no_disk: bool = False) -> None:
+    def __init__(
+        self,
+        filename: str,
+        debug: TDebugCtl,
+        no_disk: bool = False,
+        read_only: bool = False,
+    ) -> None:
         self.debug = debug
         self.filename = filename
         self.no_disk = no_disk
+        self.read_only = read_only
         self.nest = 0
         self.con: sqlite3.Connection | None = None
 
@@ -51,8 +71,12 @@ class SqliteDb:
         if self.debug.should("sql"):
             self.debug.write(f"Connecting to {self.filename!r}")
         try:
+            if self.read_only:
+                uri = pathlib.Path(os.path.abspath(self.filename)).as_uri()
+                uri += "?mode=ro&immutable=1"
+                self.con = sqlite3.connect(uri, check_same_thread=False, uri=True)
             # Use uri=True when connecting to memory URIs
-            if self.filename.startswith("file:"):
+            elif self.filename.startswith("file:"):
                 self.con = sqlite3.connect(self.filename, check_same_thread=False, uri=True)
             else:
                 self.con = sqlite3.connect(self.filename, check_same_thread=False)
@@ -64,6 +88,13 @@ class SqliteDb:
 
         self.con.create_function("REGEXP", 2, lambda txt, pat: re.search(txt, pat) is not None)
 
+        if self.read_only:
+            # Nothing will be written, so there's no need for the pragmas below.
+            # Map the whole file into memory, and keep more of it cached.
+            self.execute_void(f"pragma mmap_size={os.path.getsize(self.filename)}")
+            self.execute_void(f"pragma cache_size=-{READ_ONLY_CACHE_KIB}")
+            return
+
         # Turning off journal_mode can speed up writing. It can't always be
         # disabled, so we have to be prepared for *-journal files elsewhere.
         # In Python 3.12+, we can change the config to allow journal_mode=off.
@@ -85,7 +116,7 @@ class SqliteDb:
     def close(self, force: bool = False) -> None:
         """If needed, close the connection."""
         if self.con is not None:
-            if force or not self.no_disk:
+            if force or not (self.no_disk or self.read_only):
                 if self.debug.should("sql"):
                     self.debug.write(f"Closing {self.con!r} on {self.filename!r}")
                 self.con.close()
@@ -210,12 +241,17 @@ class SqliteDb:
                     self.debug.write(f"{i:4d}: {row!r}")
         assert self.con is not None
         try:
-            return self.con.executemany(sql, data)
-        except Exception:
-            # In some cases, an error might happen that isn't really an
-            # error.  Try again immediately.
-            # https://github.com/coveragepy/coveragepy/issues/1010
-            return self.con.executemany(sql, data)
+            try:
+                return self.con.executemany(sql, data)
+            except Exception:
+                # In some cases, an error might happen that isn't really an
+                # error.  Try again immediately.
+                # https://github.com/coveragepy/coveragepy/issues/1010
+                return self.con.executemany(sql, data)
+        except sqlite3.Error as exc:
+            if self.debug.should("sql"):
+                self.debug.write(f"EXCEPTION from executemany: {exc_one_line(exc)}")
+            raise DataError(f"Couldn't use data file {self.filename!r}: {exc}") from exc
 
     def executemany_void(self, sql: str, data: list[Any]) -> None:
         """Same as :meth:`python:sqlite3.Connection.executemany` when you don't need the cursor."""
@@ -13,18 +13,21 @@ import os.path
 import sys
 import threading
 import traceback
+import weakref
 from dataclasses import dataclass
-from types import CodeType
+from types import CodeType, FrameType
 from typing import Any, Callable, NewType, Optional, cast
 
 from coverage import env
 from coverage.bytecode import TBranchTrails, always_jumps, branch_trails
 from coverage.debug import short_filename, short_stack
 from coverage.exceptions import NotPython
-from coverage.misc import isolate_module
+from coverage.misc import Hasher, isolate_module
 from coverage.parser import PythonParser
+from coverage.tracecache import TraceCache
 from coverage.types import (
     AnyCallable,
+    TArc,
     TFileDisposition,
     TLineNo,
     TOffset,
@@ -35,6 +38,7 @@ from coverage.types import (
     TTraceFileData,
     TWarnFn,
 )
+from coverage.version import __version__
 
 # Only needed for some of the commented-out logging:
 # from coverage.debug import ppformat
@@ -202,14 +206,23 @@ class SysMonitor(Tracer):
 
     # One of these will be used across threads. Be careful.
 
-    def __init__(self, tool_id: int) -> None:
+    # Greenlet-based concurrency needs nothing special.  sys.monitoring events
+    # don't depend on which greenlet is running, and we don't keep a stack of
+    # data per call the way trace functions do.  This is set by the Collector,
+    # and its presence means the concurrency libraries are supported.
+    concur_id_func: Callable[[], Any] | None = None
+
+    def __init__(
+        self,
+        tool_id: int,
+        trace_cache_dir: str | None = None,
+        callbacks_class: type[Any] | None = None,
+    ) -> None:
         # Attributes set from the collector:
         self.data: TTraceData
         self.trace_arcs = False
         self.should_trace: TShouldTraceFn
         self.should_trace_cache: dict[str, TFileDisposition | None]
-        # TODO: should_start_context and switch_context are unused!
-        # Change tests/testenv.py:DYN_CONTEXTS when this is updated.
         self.should_start_context: TShouldStartContextFn | None = None
         self.switch_context: Callable[[str | None], None] | None = None
         self.lock_data: Callable[[], None]
@@ -221,9 +234,10 @@ class SysMonitor(Tracer):
 
         # Map id(code_object) -> CodeInfo
         self.code_infos: dict[int, CodeInfo] = {}
-        # A list of code_objects, just to keep them alive so that id's are
-        # useful as identity.
-        self.code_objects: list[CodeType] = []
+        # Map id(code_object) -> weak reference to the code object.  When the
+        # code object is collected, its entries are removed, so ids are useful
+        # as identity without keeping every code object alive forever.
+        self.code_refs: dict[int, weakref.ref[CodeType]] = {}
 
         # Map filename:__name__ -> set(id(code_object))
         self.filename_code_ids: dict[str, set[int]] = collections.defaultdict(set)
@@ -231,13 +245,37 @@ class SysMonitor(Tracer):
         self.sysmon_on = False
         self.lock = threading.Lock()
 
+        # The dynamic context started by should_start_context, and the frame
+        # that started it.  The context ends when that frame returns.  These
+        # are shared by all threads, as the collector's current context is.
+        self.context: str | None = None
+        self.context_frame: FrameType | None = None
+
+        branch_trail_dir = None
+        if trace_cache_dir is not None:
+            branch_trail_dir = os.path.join(trace_cache_dir, "branch_trails")
+        self.branch_trail_cache = get_branch_trail_cache(branch_trail_dir)
+
         self.stats: dict[str, int] | None = None
         if COLLECT_STATS:
             self.stats = dict.fromkeys(
-                "starts start_tracing returns line_lines line_arcs branches branch_trails".split(),
+                (
+                    "starts start_tracing returns line_lines line_arcs branches branch_trails"
+                    + " code_infos_freed"
+                ).split(),
                 0,
             )
 
+        # The C implementation of the hot callbacks, if we have one.  It records
+        # into the same CodeInfo objects as the Python callbacks do.  Stats and
+        # logging are only done by the Python callbacks.
+        self.c_callbacks: Any = None
+        if callbacks_class is not None and self.stats is None and not LOG:
+            self.c_callbacks = callbacks_class()
+            self.c_callbacks.code_infos = self.code_infos
+            self.c_callbacks.disable = DISABLE
+            self.c_callbacks.branch_fallback = self.sysmon_branch_either
+
         self._activity = False
 
     def __repr__(self) -> str:
@@ -254,22 +292,44 @@ class SysMonitor(Tracer):
             register = functools.partial(sys_monitoring.register_callback, self.myid)
             events = sys.monitoring.events
 
-            sys_monitoring.set_events(self.myid, events.PY_START)
+            callbacks = self.c_callbacks
+            if callbacks is not None:
+                py_return = callbacks.py_return
+                line_arcs = callbacks.line_arcs
+                line_lines = callbacks.line_lines
+                branch_either = callbacks.branch_either
+            else:
+                py_return = self.sysmon_py_return
+                line_arcs = self.sysmon_line_arcs
+                line_lines = self.sysmon_line_lines
+                branch_either = self.sysmon_branch_either
+
+            global_events = events.PY_START
+            if self.should_start_context is not None:
+                # Returns and unwinds have to be seen to end contexts.  Changing
+                # the global events re-instruments all code, so PY_UNWIND stays
+                # on even between contexts.
+                py_return = self.sysmon_py_return_contexts
+                register(events.PY_UNWIND, self.sysmon_py_unwind)
+                global_events |= events.PY_UNWIND
+
+            sys_monitoring.set_events(self.myid, global_events)
             register(events.PY_START, self.sysmon_py_start)
+            if self.trace_arcs or self.should_start_context is not None:
+                register(events.PY_RETURN, py_return)
             if self.trace_arcs:
-                register(events.PY_RETURN, self.sysmon_py_return)
-                register(events.LINE, self.sysmon_line_arcs)
+                register(events.LINE, line_arcs)
                 if env.PYBEHAVIOR.branch_right_left:
                     register(
                         events.BRANCH_RIGHT,  # type:ignore[attr-defined]
-                        self.sysmon_branch_either,
+                        branch_either,
                     )
                     register(
                         events.BRANCH_LEFT,  # type:ignore[attr-defined]
-                        self.sysmon_branch_either,
+                        branch_either,
                     )
             else:
-                register(events.LINE, self.sysmon_line_lines)
+                register(events.LINE, line_lines)
             sys_monitoring.restart_events()
             self.sysmon_on = True
 
@@ -286,6 +346,8 @@ class SysMonitor(Tracer):
             self.sysmon_on = False
             sys_monitoring.free_tool_id(self.myid)
 
+        self.branch_trail_cache.save()
+
         if LOG:  # pragma: debugging
             items = sorted(
                 self.filename_code_ids.items(),
@@ -302,6 +364,20 @@ class SysMonitor(Tracer):
             else:
                 log("==== Duplicate code objects: none")
 
+    @panopticon()
+    def restart_events(self) -> None:
+        """Re-enable all the events our callbacks have disabled.
+
+        Each line is reported only once, then disabled.  After a context
+        switch, lines have to be reported again to be recorded in the new
+        context.
+
+        """
+        with self.lock:
+            if self.sysmon_on:
+                assert sys_monitoring is not None
+                sys_monitoring.restart_events()
+
     @panopticon()
     def post_fork(self) -> None:
         """The process has forked, clean up as needed."""
@@ -309,15 +385,33 @@ class SysMonitor(Tracer):
 
     def activity(self) -> bool:
         """Has there been any activity?"""
+        if self.c_callbacks is not None and self.c_callbacks.activity():
+            return True
         return self._activity
 
     def reset_activity(self) -> None:
         """Reset the activity() flag."""
         self._activity = False
+        if self.c_callbacks is not None:
+            self.c_callbacks.reset_activity()
 
     def get_stats(self) -> dict[str, int] | None:
         """Return a dictionary of statistics, or None."""
-        return self.stats
+        if self.stats is None:
+            return None
+        return {**self.stats, "code_infos": len(self.code_infos)}
+
+    def _forget_code(self, code_id: int, ref_unused: weakref.ref[CodeType]) -> None:
+        """A code object has been collected, forget what we knew about it.
+
+        This is called before the object's memory is freed, so its id can't
+        have been reused yet.
+
+        """
+        self.code_infos.pop(code_id, None)
+        self.code_refs.pop(code_id, None)
+        if self.stats is not None:
+            self.stats["code_infos_freed"] += 1
 
     @panopticon("code", "@")
     def sysmon_py_start(self, code: CodeType, instruction_offset: TOffset) -> MonitorReturn:
@@ -338,13 +432,7 @@ class SysMonitor(Tracer):
             filename = code.co_filename
             disp = self.should_trace_cache.get(filename)
             if disp is None:
-                frame = inspect.currentframe()
-                if frame is not None:
-                    frame = inspect.currentframe().f_back  # type: ignore[union-attr]
-                    if LOG:  # pragma: debugging
-                        # @panopticon adds a frame.
-                        frame = frame.f_back  # type: ignore[union-attr]
-                disp = self.should_trace(filename, frame)  # type: ignore[arg-type]
+                disp = self.should_trace(filename, self._monitored_frame())
                 self.should_trace_cache[filename] = disp
 
             tracing_code = disp.trace
@@ -370,8 +458,11 @@ class SysMonitor(Tracer):
                 branch_trails={},
                 always_jumps={},
             )
-            self.code_infos[id(code)] = code_info
-            self.code_objects.append(code)
+            code_id = id(code)
+            self.code_infos[code_id] = code_info
+            self.code_refs[code_id] = weakref.ref(
+                code, functools.partial(self._forget_code, code_id)
+            )
 
             if tracing_code:
                 if self.stats is not None:
@@ -395,8 +486,87 @@ class SysMonitor(Tracer):
                                     id(code)
                                 )
 
+        if self.should_start_context is not None and self.context is None:
+            return self._start_context_maybe(code, self._monitored_frame())
+        return DISABLE
+
+    def _monitored_frame(self) -> FrameType:
+        """Get the frame that the event being handled by our caller is for."""
+        frame = inspect.currentframe().f_back.f_back  # type: ignore[union-attr]
+        if LOG:  # pragma: debugging
+            # @panopticon adds a frame.
+            frame = frame.f_back  # type: ignore[union-attr]
+        return frame  # type: ignore[return-value]
+
+    def _start_context_maybe(self, code: CodeType, frame: FrameType) -> MonitorReturn:
+        """Start a dynamic context if `frame`, running `code`, should start one.
+
+        This is called from the PY_START callback, and returns what it should
+        return.  Until a context starts, PY_START stays enabled everywhere so
+        that any call can start one.
+
+        """
+        assert self.should_start_context is not None
+        context = self.should_start_context(frame)  # pylint: disable=not-callable
+        if context is None:
+            return None
+
+        self.context = context
+        self.context_frame = frame
+        events = sys.monitoring.events
+        with self.lock:
+            if self.sysmon_on:
+                assert sys_monitoring is not None
+                local_events = sys_monitoring.get_local_events(self.myid, code)
+                sys_monitoring.set_local_events(self.myid, code, local_events | events.PY_RETURN)
+        assert self.switch_context is not None
+        self.switch_context(context)  # pylint: disable=not-callable
+        return DISABLE
+
+    def _end_context(self) -> None:
+        """The frame that started the current dynamic context is done."""
+        self.context = None
+        self.context_frame = None
+        assert self.switch_context is not None
+        self.switch_context(None)  # pylint: disable=not-callable
+
+    @panopticon("code", "@", None)
+    def sysmon_py_return_contexts(
+        self,
+        code: CodeType,
+        instruction_offset: TOffset,
+        retval: object,
+    ) -> MonitorReturn:
+        """Handle sys.monitoring.events.PY_RETURN events with dynamic contexts."""
+        if self.trace_arcs:
+            code_info = self.code_infos.get(id(code))
+            if code_info is not None and code_info.file_data is not None:
+                self.sysmon_py_return(code, instruction_offset, retval)
+        context_frame = self.context_frame
+        if context_frame is not None and code is context_frame.f_code:
+            # Other calls of this code can return here too, so keep this enabled.
+            if self._monitored_frame() is context_frame:
+                self._end_context()
+            return None
         return DISABLE
 
+    @panopticon("code", "@", None)
+    def sysmon_py_unwind(
+        self,
+        code: CodeType,
+        instruction_offset: TOffset,
+        exception: BaseException,
+    ) -> None:
+        """Handle sys.monitoring.events.PY_UNWIND events, only used for contexts.
+
+        PY_UNWIND events can't be disabled, so this returns nothing.
+
+        """
+        context_frame = self.context_frame
+        if context_frame is not None and code is context_frame.f_code:
+            if self._monitored_frame() is context_frame:
+                self._end_context()
+
     @panopticon("code", "@", None)
     def sysmon_py_return(
         self,
@@ -412,6 +582,7 @@ class SysMonitor(Tracer):
         # wouldn't have enabled this event if they were.
         last_line = code_info.byte_to_line.get(instruction_offset)  # type: ignore
         if last_line is not None:
+            self._activity = True
             arc = (last_line, -code.co_firstlineno)
             code_info.file_data.add(arc)  # type: ignore
             # log(f"adding {arc=}")
@@ -427,6 +598,7 @@ class SysMonitor(Tracer):
         # is not None, since we wouldn't have enabled this event if they were.
         # But somehow code_info can be None here, so we have to check.
         if code_info is not None and code_info.file_data is not None:
+            self._activity = True
             code_info.file_data.add(line_number)  # type: ignore
         # log(f"adding {line_number=}")
         return DISABLE
@@ -439,6 +611,7 @@ class SysMonitor(Tracer):
         code_info = self.code_infos[id(code)]
         # code_info is not None and code_info.file_data is not None, since we
         # wouldn't have enabled this event if they were.
+        self._activity = True
         arc = (line_number, line_number)
         code_info.file_data.add(arc)  # type: ignore
         # log(f"adding {arc=}")
@@ -454,12 +627,16 @@ class SysMonitor(Tracer):
         code_info = self.code_infos[id(code)]
         # code_info is not None and code_info.file_data is not None, since we
         # wouldn't have enabled this event if they were.
+        self._activity = True
         if not code_info.branch_trails:
             if self.stats is not None:
                 self.stats["branch_trails"] += 1
-            multiline_map = get_multiline_map(code.co_filename)
-            code_info.branch_trails = branch_trails(code, multiline_map=multiline_map)
-            code_info.always_jumps = always_jumps(code)
+            trails, jumps = self.branch_trail_cache.get(code)
+            # Other threads can be handling branches in this code.  They
+            # use always_jumps once they see non-empty branch_trails, so set
+            # always_jumps first.
+            code_info.always_jumps = jumps
+            code_info.branch_trails = trails
             # log(f"branch_trails for {code}:\n{ppformat(code_info.branch_trails)}")
         added_arc = False
         dest_info = code_info.branch_trails.get(instruction_offset)
@@ -495,7 +672,7 @@ class SysMonitor(Tracer):
         return DISABLE
 
 
-@functools.lru_cache(maxsize=5)
+@functools.lru_cache(maxsize=100)
 def get_multiline_map(filename: str) -> dict[TLineNo, TLineNo]:
     """Get a PythonParser for the given filename, cached."""
     parser = PythonParser(filename=filename)
@@ -508,3 +685,164 @@ def get_multiline_map(filename: str) -> dict[TLineNo, TLineNo]:
         # wrong branch coverage, but we don't have any better option.
         return {}
     return parser.multiline_map
+
+
+def _trails_size(trails: TBranchTrails, jumps: dict[TOffset, TOffset]) -> int:
+    """Estimate the memory used by branch trails and always-jumps."""
+    size = sys.getsizeof(trails) + sys.getsizeof(jumps)
+    for dests in trails.values():
+        size += sys.getsizeof(dests)
+        for offsets in dests.values():
+            size += sys.getsizeof(offsets)
+    return size
+
+
+def _trails_to_json(trails: TBranchTrails, jumps: dict[TOffset, TOffset]) -> list[Any]:
+    """Convert branch trails and always-jumps to JSON-compatible data."""
+    return [
+        [
+            [offset, [[arc, sorted(offsets)] for arc, offsets in dests.items()]]
+            for offset, dests in trails.items()
+        ],
+        list(jumps.items()),
+    ]
+
+
+def _trails_from_json(data: list[Any]) -> tuple[TBranchTrails, dict[TOffset, TOffset]]:
+    """Convert data from :func:`_trails_to_json` back to trails and jumps."""
+    json_trails, json_jumps = data
+    trails: TBranchTrails = {}
+    for offset, json_dests in json_trails:
+        dests: dict[TArc | None, set[TOffset]] = {}
+        for arc, offsets in json_dests:
+            dests[(arc[0], arc[1]) if arc is not None else None] = set(offsets)
+        trails[offset] = dests
+    return trails, dict(json_jumps)
+
+
+class BranchTrailCache:
+    """A cache of branch trails and always-jumps for code objects.
+
+    Computing branch trails means parsing the source file and walking the
+    bytecode.  Identical code objects, like those made again by `exec` or
+    re-importing, or those in a forked process, share the results here.
+    Entries are keyed on the file name and a hash of the bytecode and line
+    table.  The least-recently used entries are discarded when the estimated
+    memory used is more than `max_size` bytes.
+
+    If `directory` is given, entries are also saved on disk there, with one
+    :class:`TraceCache` file for each source file, so that other processes
+    can use them.  Entries read from or waiting to be written to disk are
+    also limited to about `max_size` bytes: past that, they are written and
+    forgotten.
+
+    """
+
+    def __init__(self, max_size: int, directory: str | None = None) -> None:
+        self.max_size = max_size
+        self.size = 0
+        self.entries: collections.OrderedDict[
+            tuple[str, str],
+            tuple[TBranchTrails, dict[TOffset, TOffset], int],
+        ] = collections.OrderedDict()
+        self.directory = directory
+        self.disk_caches: dict[str, TraceCache] = {}
+        self.disk_size = 0
+        self.lock = threading.Lock()
+
+    def _disk_cache(self, filename: str) -> TraceCache:
+        """Get the on-disk cache for the code in `filename`."""
+        disk_cache = self.disk_caches.get(filename)
+        if disk_cache is None:
+            assert self.directory is not None
+            hasher = Hasher()
+            hasher.update(__version__)
+            hasher.update(sys.version)
+            hasher.update(filename)
+            disk_cache = TraceCache(self.directory, hasher.hexdigest())
+            self.disk_caches[filename] = disk_cache
+        return disk_cache
+
+    def get(self, code: CodeType) -> tuple[TBranchTrails, dict[TOffset, TOffset]]:
+        """Get the branch trails and always-jumps for `code`.
+
+        The results are shared, and must not be changed.
+
+        """
+        hasher = Hasher()
+        hasher.update(code.co_qualname)
+        hasher.update(code.co_firstlineno)
+        hasher.update(code.co_code)
+        hasher.update(code.co_linetable)
+        hasher.update(code.co_exceptiontable)
+        key = (code.co_filename, hasher.hexdigest())
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                return entry[0], entry[1]
+
+            disk_cache = None
+            data = None
+            if self.directory is not None:
+                disk_cache = self._disk_cache(code.co_filename)
+                data = disk_cache.get(key[1])
+
+        if data is not None:
+            trails, jumps = _trails_from_json(data)
+        else:
+            multiline_map = get_multiline_map(code.co_filename)
+            trails = branch_trails(code, multiline_map=multiline_map)
+            jumps = always_jumps(code)
+
+        size = _trails_size(trails, jumps)
+        with self.lock:
+            if key not in self.entries:
+                self.entries[key] = (trails, jumps, size)
+                self.size += size
+                while self.size > self.max_size and len(self.entries) > 1:
+                    _, (_, _, old_size) = self.entries.popitem(last=False)
+                    self.size -= old_size
+            if disk_cache is not None:
+                if data is None:
+                    disk_cache.add(key[1], _trails_to_json(trails, jumps))
+                self.disk_size += size
+                if self.disk_size > self.max_size:
+                    self._save()
+        return trails, jumps
+
+    def save(self) -> None:
+        """Write new entries to disk, if we are using a directory."""
+        with self.lock:
+            self._save()
+
+    def _save(self) -> None:
+        """Write new entries to disk, and forget the disk caches.
+
+        They will be read again when needed.  Call with the lock held.
+
+        """
+        for disk_cache in self.disk_caches.values():
+            disk_cache.save()
+        self.disk_caches = {}
+        self.disk_size = 0
+
+
+# The most memory to use for the branch trails of one BranchTrailCache.
+BRANCH_TRAIL_CACHE_SIZE = 64 * 1024 * 1024
+
+# The branch trail caches, by directory.  All the SysMonitor instances in a
+# process using the same directory share a cache.
+_BRANCH_TRAIL_CACHES: dict[str | None, BranchTrailCache] = {}
+_BRANCH_TRAIL_CACHES_LOCK = threading.Lock()
+
+
+def get_branch_trail_cache(directory: str | None) -> BranchTrailCache:
+    """Get the shared :class:`BranchTrailCache` saving entries in `directory`."""
+    with _BRANCH_TRAIL_CACHES_LOCK:
+        cache = _BRANCH_TRAIL_CACHES.get(directory)
+        if cache is None:
+            cache = BranchTrailCache(max_size=BRANCH_TRAIL_CACHE_SIZE, directory=directory)
+            _BRANCH_TRAIL_CACHES[directory] = cache
+    return cache
@@ -3,10 +3,28 @@
 
 """Typing information for the constructs from our .c files."""
 
+from types import CodeType
 from typing import Any, Dict
 
 from coverage.types import TFileDisposition, TTraceData, TTraceFn, Tracer
 
+class CArcSet:
+    """CArcSet is in ctracer/arcset.c"""
+
+    def __init__(self) -> None: ...
+    def __len__(self) -> int: ...
+    def add(self, l1: int, l2: int) -> None:
+        """Record the arc (l1, l2)."""
+
+    def arcs(self) -> list[tuple[int, int]]:
+        """Get a list of the (l1, l2) arcs recorded."""
+
+    def clear(self) -> None:
+        """Remove all the arcs."""
+
+    def pop_arcs(self) -> list[tuple[int, int]]:
+        """Get a list of the (l1, l2) arcs recorded, and remove them."""
+
 class CFileDisposition(TFileDisposition):
     """CFileDisposition is in ctracer/filedisp.c"""
 
@@ -41,3 +59,30 @@ class CTracer(Tracer):
     def reset_activity(self) -> Any: ...
     def start(self) -> TTraceFn: ...
     def stop(self) -> None: ...
+
+class CSysMonCallbacks:
+    """CSysMonCallbacks is in ctracer/sysmon.c"""
+
+    branch_fallback: Any
+    code_infos: Any
+    disable: Any
+    def __init__(self) -> None: ...
+    def activity(self) -> bool:
+        """Has there been any activity?"""
+
+    def branch_either(
+        self, code: CodeType, instruction_offset: int, destination_offset: int
+    ) -> Any:
+        """Handle BRANCH_RIGHT and BRANCH_LEFT events."""
+
+    def line_arcs(self, code: CodeType, line_number: int) -> Any:
+        """Handle LINE events for branch coverage."""
+
+    def line_lines(self, code: CodeType, line_number: int) -> Any:
+        """Handle LINE events for line coverage."""
+
+    def py_return(self, code: CodeType, instruction_offset: int, retval: object) -> Any:
+        """Handle PY_RETURN events for branch coverage."""
+
+    def reset_activity(self) -> None:
+        """Reset the activity flag."""
@@ -70,8 +70,8 @@ class TFileDisposition(Protocol):
 # - If measuring line coverage, the values are sets of line numbers.
 # - If measuring arcs in the Python tracer, the values are sets of arcs (pairs
 #   of line numbers).
-# - If measuring arcs in the C tracer, the values are sets of packed arcs (two
-#   line numbers combined into one integer).
+# - If measuring arcs in the C tracer, the values are CArcSet objects holding
+#   packed arcs (two line numbers combined into one integer).
 
 TTraceFileData = set[TLineNo] | set[TArc] | set[int]
 
@@ -0,0 +1,103 @@
+# Licensed under the Apache License: http://www.apache.org/licenses/LICENSE-2.0
+# For details: https://github.com/coveragepy/coveragepy/blob/main/NOTICE.txt
+
+"""Compare the speed of the cores when measuring with dynamic contexts.
+
+Run from the root of the repo, with Python 3.12 or later for sysmon:
+
+    python lab/bench_contexts.py [NTESTS [WORK]]
+
+A module of NTESTS test functions is run by a small runner under each core, with and without
+``dynamic_context = test_function``.  The test functions share helpers, so
+most lines run in many contexts.  WORK sets how much code each test runs.
+
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+TEST_MODULE = """\
+def helper(n):
+    total = 0
+    for i in range(n):
+        if i % 3:
+            total += i
+        else:
+            total -= 1
+    return total
+
+def other(x):
+    return [helper(y) for y in range(x)]
+
+"""
+
+TEST_FUNCTION = """\
+def test_{i}():
+    assert helper({i} % 50) is not None
+    other({work})
+
+"""
+
+RUNNER = """\
+import tests_mod
+
+for name, func in list(vars(tests_mod).items()):
+    if name.startswith("test_"):
+        func()
+"""
+
+
+def make_module(dirname, ntests, work):
+    with open(os.path.join(dirname, "tests_mod.py"), "w", encoding="utf-8") as f:
+        f.write(TEST_MODULE)
+        for i in range(ntests):
+            f.write(TEST_FUNCTION.format(i=i, work=work))
+    with open(os.path.join(dirname, "run_tests.py"), "w", encoding="utf-8") as f:
+        f.write(RUNNER)
+
+
+def run(dirname, core, contexts, branch):
+    rc = ["[run]", f"core = {core}", f"branch = {branch}"]
+    if contexts:
+        rc.append("dynamic_context = test_function")
+    with open(os.path.join(dirname, ".coveragerc"), "w", encoding="utf-8") as f:
+        f.write("\n".join(rc) + "\n")
+    env = dict(os.environ, PYTHONPATH=os.getcwd())
+    times = []
+    for _ in range(3):
+        start = time.perf_counter()
+        out = subprocess.run(
+            [sys.executable, "-m", "coverage", "run", "--debug=sys", "run_tests.py"],
+            cwd=dirname,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        times.append(time.perf_counter() - start)
+    lines = (out.stdout + out.stderr).splitlines()
+    used = [line.split(":")[1].strip() for line in lines if " core:" in line]
+    return min(times), used[0] if used else "?"
+
+
+def main(ntests, work):
+    with tempfile.TemporaryDirectory() as dirname:
+        make_module(dirname, ntests, work)
+        print(f"{ntests} tests, work {work}, Python {sys.version.split()[0]}:")
+        for branch in [False, True]:
+            for contexts in [False, True]:
+                for core in ["ctrace", "sysmon"]:
+                    secs, used = run(dirname, core, contexts, branch)
+                    label = f"{core} {'branch' if branch else 'lines'}"
+                    label += " contexts" if contexts else ""
+                    print(f"{label:30} {secs:8.3f}s  (core: {used})")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 2000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 20,
+    )
@@ -0,0 +1,87 @@
+# Licensed under the Apache License: http://www.apache.org/licenses/LICENSE-2.0
+# For details: https://github.com/coveragepy/coveragepy/blob/main/NOTICE.txt
+
+"""Compare the speed of TreeMatcher and ModuleMatcher with the original scans.
+
+Run from the root of the repo:
+
+    python lab/bench_matchers.py [NROOTS]
+
+"""
+
+import os
+import sys
+import timeit
+
+from coverage.files import ModuleMatcher, TreeMatcher
+
+
+# The original implementations, for comparison.
+
+
+def tree_match(paths, fpath):
+    fpath = os.path.normcase(fpath)
+    for p in paths:
+        if fpath.startswith(p):
+            if fpath == p:
+                return True
+            if fpath[len(p)] == os.sep:
+                return True
+    return False
+
+
+def module_match(modules, module_name):
+    if not module_name:
+        return False
+    for m in modules:
+        if module_name.startswith(m):
+            if module_name == m:
+                return True
+            if module_name[len(m)] == ".":
+                return True
+    return False
+
+
+def bench(label, old, new, number):
+    old_time = min(timeit.repeat(old, number=number, repeat=5))
+    new_time = min(timeit.repeat(new, number=number, repeat=5))
+    per_call = 1e6 / number
+    print(
+        f"{label:30} old {old_time * per_call:8.3f}us  "
+        + f"new {new_time * per_call:8.3f}us  {old_time / new_time:6.1f}x"
+    )
+
+
+def main(nroots):
+    print(f"{nroots} roots:")
+    paths = [os.path.join(os.sep, "usr", "src", f"project{i}") for i in range(nroots)]
+    tm = TreeMatcher(paths)
+    norm_paths = [os.path.normcase(p) for p in paths]
+    hit = os.path.join(paths[-1], "pkg", "sub", "mod.py")
+    miss = os.path.join(os.sep, "usr", "lib", "python3", "site-packages", "mod.py")
+    for label, fpath in [("tree match, last root", hit), ("tree match, miss", miss)]:
+        assert tm.match(fpath) == tree_match(norm_paths, fpath)
+        bench(
+            label,
+            lambda: tree_match(norm_paths, fpath),  # noqa: B023
+            lambda: tm.match(fpath),  # noqa: B023
+            number=2000,
+        )
+
+    modules = [f"company.team{i}.service" for i in range(nroots)]
+    mm = ModuleMatcher(modules)
+    hit = modules[-1] + ".handlers.views"
+    miss = "requests.adapters"
+    for label, name in [("module match, last root", hit), ("module match, miss", miss)]:
+        assert mm.match(name) == module_match(modules, name)
+        bench(
+            label,
+            lambda: module_match(modules, name),  # noqa: B023
+            lambda: mm.match(name),  # noqa: B023
+            number=2000,
+        )
+
+
+if __name__ == "__main__":
+    for n in [int(a) for a in sys.argv[1:]] or [10, 100, 1000]:
+        main(n)
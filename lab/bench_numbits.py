@@ -0,0 +1,83 @@
+# Licensed under the Apache License: http://www.apache.org/licenses/LICENSE-2.0
+# For details: https://github.com/coveragepy/coveragepy/blob/main/NOTICE.txt
+
+"""Compare the speed of coverage.numbits with the original loop-based code.
+
+Run from the root of the repo:
+
+    python lab/bench_numbits.py [NLINES]
+
+"""
+
+import random
+import sys
+import timeit
+from itertools import zip_longest
+
+from coverage import numbits
+
+
+# The original implementations, for comparison.
+
+
+def nums_to_numbits(nums):
+    try:
+        nbytes = max(nums) // 8 + 1
+    except ValueError:
+        return b""
+    b = bytearray(nbytes)
+    for num in nums:
+        b[num // 8] |= 1 << num % 8
+    return bytes(b)
+
+
+def numbits_to_nums(numbits):
+    nums = []
+    for byte_i, byte in enumerate(numbits):
+        for bit_i in range(8):
+            if byte & (1 << bit_i):
+                nums.append(byte_i * 8 + bit_i)
+    return nums
+
+
+def numbits_union(numbits1, numbits2):
+    byte_pairs = zip_longest(numbits1, numbits2, fillvalue=0)
+    return bytes(b1 | b2 for b1, b2 in byte_pairs)
+
+
+def numbits_intersection(numbits1, numbits2):
+    byte_pairs = zip_longest(numbits1, numbits2, fillvalue=0)
+    return bytes(b1 & b2 for b1, b2 in byte_pairs).rstrip(b"\0")
+
+
+def main(nlines):
+    rand = random.Random(17)
+    # Executed lines in a file of `nlines` lines: about 60% of them.
+    nums1 = set(rand.sample(range(1, nlines + 1), k=nlines * 6 // 10))
+    nums2 = set(rand.sample(range(1, nlines + 1), k=nlines * 6 // 10))
+    nb1 = nums_to_numbits(nums1)
+    nb2 = nums_to_numbits(nums2)
+
+    cases = [
+        ("nums_to_numbits", "f(nums1)", nums_to_numbits, numbits.nums_to_numbits),
+        ("numbits_to_nums", "f(nb1)", numbits_to_nums, numbits.numbits_to_nums),
+        ("numbits_union", "f(nb1, nb2)", numbits_union, numbits.numbits_union),
+        ("numbits_intersection", "f(nb1, nb2)", numbits_intersection, numbits.numbits_intersection),
+    ]
+
+    data = {"nums1": nums1, "nb1": nb1, "nb2": nb2}
+
+    print(f"{nlines} line file, {len(nums1)} lines executed")
+    print(f"{'function':25} {'old usec':>10} {'new usec':>10} {'speedup':>8}")
+    for name, stmt, old, new in cases:
+        assert eval(stmt, {"f": old, **data}) == eval(stmt, {"f": new, **data})
+        times = []
+        for f in [old, new]:
+            timer = timeit.Timer(stmt, globals={"f": f, **data})
+            number, _ = timer.autorange()
+            times.append(min(timer.repeat(repeat=5, number=number)) / number * 1e6)
+        print(f"{name:25} {times[0]:10.1f} {times[1]:10.1f} {times[0] / times[1]:7.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
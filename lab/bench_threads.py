@@ -0,0 +1,97 @@
+# Licensed under the Apache License: http://www.apache.org/licenses/LICENSE-2.0
+# For details: https://github.com/coveragepy/coveragepy/blob/main/NOTICE.txt
+
+"""Measure how the cores scale with the number of threads.
+
+Run from the root of the repo, ideally with a free-threaded Python (3.13t or
+later) on a machine with several cores:
+
+    python lab/bench_threads.py [MAXTHREADS [WORK]]
+
+Each thread runs the same amount of work, so with perfect scaling the time
+stays the same as threads are added.  The "scaling" column is how many
+threads' worth of work got done in the time one thread took: ideally it's the
+number of threads.  With the GIL, it stays near 1.
+
+"""
+
+import os
+import subprocess
+import sys
+import sysconfig
+import tempfile
+
+PROGRAM = """\
+import sys
+import threading
+import time
+
+def helper(n):
+    total = 0
+    for i in range(n):
+        if i % 3:
+            total += i
+        else:
+            total -= 1
+    return total
+
+def work(n):
+    for j in range(n):
+        helper(j % 100 + 50)
+
+start = time.perf_counter()
+threads = [threading.Thread(target=work, args=({work},)) for _ in range(int(sys.argv[1]))]
+for t in threads:
+    t.start()
+for t in threads:
+    t.join()
+print(time.perf_counter() - start)
+"""
+
+
+def run(dirname, core, nthreads):
+    if core:
+        rc = ["[run]", f"core = {core}", "branch = True", "concurrency = thread"]
+        with open(os.path.join(dirname, ".coveragerc"), "w", encoding="utf-8") as f:
+            f.write("\n".join(rc) + "\n")
+        cmd = [sys.executable, "-m", "coverage", "run", "prog.py", str(nthreads)]
+    else:
+        cmd = [sys.executable, "prog.py", str(nthreads)]
+    env = dict(os.environ, PYTHONPATH=os.getcwd())
+    times = []
+    for _ in range(3):
+        # The program reports the time its threads took, so that starting
+        # Python and saving the data aren't counted.
+        out = subprocess.run(cmd, cwd=dirname, env=env, check=True, capture_output=True, text=True)
+        times.append(float(out.stdout.split()[-1]))
+    return min(times)
+
+
+def main(maxthreads, work):
+    free_threaded = bool(sysconfig.get_config_var("Py_GIL_DISABLED"))
+    print(
+        f"Python {sys.version.split()[0]}, {'free-threaded' if free_threaded else 'with GIL'}, "
+        + f"{os.cpu_count()} cpus, work {work}:",
+    )
+    nthreads_list = [1]
+    while nthreads_list[-1] * 2 <= maxthreads:
+        nthreads_list.append(nthreads_list[-1] * 2)
+    with tempfile.TemporaryDirectory() as dirname:
+        with open(os.path.join(dirname, "prog.py"), "w", encoding="utf-8") as f:
+            f.write(PROGRAM.format(work=work))
+        for core in [None, "ctrace", "sysmon", "pytrace"]:
+            base = None
+            for nthreads in nthreads_list:
+                secs = run(dirname, core, nthreads)
+                if base is None:
+                    base = secs
+                scaling = nthreads * base / secs
+                label = f"{core or 'no coverage'} x{nthreads}"
+                print(f"{label:20} {secs:8.3f}s  scaling {scaling:5.2f}")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 8,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 20000,
+    )
@@ -192,9 +192,11 @@ if compile_extension:
                 Extension(
                     "coverage.tracer",
                     sources=[
+                        "coverage/ctracer/arcset.c",
                         "coverage/ctracer/datastack.c",
                         "coverage/ctracer/filedisp.c",
                         "coverage/ctracer/module.c",
+                        "coverage/ctracer/sysmon.c",
                         "coverage/ctracer/tracer.c",
                     ],
                 ),
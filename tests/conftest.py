@@ -9,6 +9,13 @@ This module is run automatically by pytest, to define and enable fixtures.
 
 from __future__ import annotations
 
+# ProcessPoolExecutor imports concurrent.futures.process when it's first used.
+# If that happened during a test, RestoreModulesMixin would remove the module
+# afterward, and the next test would get a second copy of it, whose classes
+# can't be pickled to send to the worker processes.  Import it before any test.
+import concurrent.futures.process  # pylint: disable=unused-import
+import multiprocessing.process
+import multiprocessing.spawn
 import os
 import sys
 import warnings
@@ -18,6 +25,7 @@ from collections.abc import Iterable
 import pytest
 
 from coverage.files import set_relative_directory
+from coverage.multiproc import PATCHED_MARKER
 from coverage.patch import create_pth_files
 
 from tests import testenv
@@ -91,6 +99,24 @@ def reset_filesdotpy_globals() -> None:
     set_relative_directory()
 
 
+ORIGINAL_BOOTSTRAP = multiprocessing.process.BaseProcess._bootstrap  # type: ignore[attr-defined]
+ORIGINAL_GET_PREPARATION_DATA = multiprocessing.spawn.get_preparation_data
+
+
+@pytest.fixture(autouse=True)
+def reset_multiprocessing() -> Iterable[None]:
+    """Undo coverage's patching of multiprocessing after every test.
+
+    Otherwise, the processes started by later tests (like parallel combining)
+    would measure themselves and write data files.
+    """
+    yield
+    multiprocessing.process.BaseProcess._bootstrap = ORIGINAL_BOOTSTRAP  # type: ignore[attr-defined]
+    multiprocessing.spawn.get_preparation_data = ORIGINAL_GET_PREPARATION_DATA
+    if hasattr(multiprocessing, PATCHED_MARKER):
+        delattr(multiprocessing, PATCHED_MARKER)
+
+
 @pytest.fixture(autouse=True)
 def force_local_pyc_files() -> None:
     """Ensure that .pyc files are written next to source files."""
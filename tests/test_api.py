@@ -14,6 +14,7 @@ import re
 import shutil
 import sys
 import textwrap
+import time
 
 from typing import cast, Callable
 from collections.abc import Iterable
@@ -22,13 +23,12 @@ import pytest
 
 import coverage
 from coverage import Coverage, env
-from coverage.data import line_counts, sorted_lines
+from coverage.data import CoverageData, line_counts, sorted_lines
 from coverage.exceptions import ConfigError, CoverageException, DataError, NoDataError, NoSource
 from coverage.files import abs_file, relative_filename
 from coverage.misc import import_local_file
-from coverage.types import FilePathClasses, FilePathType, TCovKwargs
+from coverage.types import FilePathClasses, FilePathType, TCovKwargs, TLineNo
 
-from tests import testenv
 from tests.coveragetest import CoverageTest, TESTS_DIR, UsingModulesMixin
 from tests.helpers import (
     assert_count_equal,
@@ -678,6 +678,33 @@ class ApiTest(CoverageTest):
             """)
         assert expected == self.stdout()
 
+    @pytest.mark.parametrize("branch", [False, True])
+    def test_load_read_only(self, branch: bool) -> None:
+        self.make_file(
+            "a.py",
+            """\
+            a = 1
+            if a == 2:
+                a = 3
+            b = 4
+            """,
+        )
+        cov = coverage.Coverage(branch=branch)
+        self.start_import_stop(cov, "a")
+        cov.save()
+        self.assert_exists(".coverage")
+        expected = cov.report()
+
+        cov = coverage.Coverage(branch=branch)
+        cov.load(read_only=True)
+        assert cov.report() == expected
+        assert cov.analysis2("a.py")[3] == [3]
+        # The data file isn't changed, and can be erased when we're done.
+        with pytest.raises(DataError, match="Couldn't use data file"):
+            cov.get_data().touch_file("b.py")
+        cov.erase()
+        self.assert_doesnt_exist(".coverage")
+
     def test_config_crash(self) -> None:
         # The internal '[run] _crash' setting can be used to artificially raise
         # exceptions from inside Coverage.
@@ -701,7 +728,6 @@ class ApiTest(CoverageTest):
         assert cast(str, d["data_file"]).endswith(".coverage")
 
 
-@pytest.mark.skipif(not testenv.DYN_CONTEXTS, reason="No dynamic contexts with this core.")
 class SwitchContextTest(CoverageTest):
     """Tests of the .switch_context() method."""
 
@@ -821,6 +847,150 @@ class SwitchContextTest(CoverageTest):
             cov.switch_context("test3")
 
 
+class SnapshotTest(CoverageTest):
+    """Tests of the .snapshot() method."""
+
+    def make_code(self) -> None:
+        """Create a module with functions to call between snapshots."""
+        self.make_file(
+            "windows.py",
+            """\
+            def helper(x):
+                return x*2
+
+            def one():
+                return helper(1)
+
+            def two():
+                return helper(2)
+            """,
+        )
+
+    def snapshot_lines(self, data: CoverageData) -> list[TLineNo]:
+        """Get the lines measured in windows.py in a snapshot."""
+        return sorted_lines(data, self.get_measured_filenames(data)["windows.py"])
+
+    @pytest.mark.parametrize("branch", [False, True])
+    def test_snapshots(self, branch: bool) -> None:
+        self.make_code()
+        cov = coverage.Coverage(branch=branch)
+        with cov.collect():
+            mod = import_local_file("windows")
+            mod.one()
+            snap1 = cov.snapshot()
+            mod.one()
+            snap2 = cov.snapshot()
+            mod.two()
+            peek = cov.snapshot(reset=False)
+            mod.two()
+            snap3 = cov.snapshot()
+            snap4 = cov.snapshot()
+
+        assert self.snapshot_lines(snap1) == [1, 2, 4, 5, 7]
+        assert self.snapshot_lines(snap2) == [2, 5]
+        assert self.snapshot_lines(peek) == [2, 8]
+        assert self.snapshot_lines(snap3) == [2, 8]
+        assert not snap4.measured_files()
+        assert snap1.has_arcs() == branch
+
+        # All the data is still in the data file.
+        data = cov.get_data()
+        assert self.snapshot_lines(data) == [1, 2, 4, 5, 7, 8]
+
+    def test_snapshot_contexts(self) -> None:
+        self.make_code()
+        cov = coverage.Coverage(context="static")
+        with cov.collect():
+            mod = import_local_file("windows")
+            cov.snapshot()
+            cov.switch_context("a")
+            mod.one()
+            snap = cov.snapshot()
+        assert sorted(snap.measured_contexts()) == ["static|a"]
+
+    def test_snapshot_unstarted(self) -> None:
+        cov = coverage.Coverage()
+        msg = "Cannot take a snapshot, coverage is not started"
+        with pytest.raises(CoverageException, match=msg):
+            cov.snapshot()
+
+
+class FlushIntervalTest(CoverageTest):
+    """Tests of [run] flush_interval."""
+
+    def wait_for_lines(self, fname: str, lines: list[TLineNo]) -> None:
+        """Wait until the data file on disk has `lines` for `fname`."""
+        for _ in range(200):
+            data = CoverageData()
+            data.read()
+            measured = [f for f in data.measured_files() if f.endswith(fname)]
+            if measured and sorted_lines(data, measured[0]) == lines:
+                return
+            time.sleep(0.05)
+        raise AssertionError(f"Data for {fname} never flushed")
+
+    @pytest.mark.parametrize("branch", [False, True])
+    def test_flush_interval(self, branch: bool) -> None:
+        self.make_file(
+            "flushed.py",
+            """\
+            def f(x):
+                return x + 1
+
+            a = f(3)
+            """,
+        )
+        cov = coverage.Coverage(branch=branch, source=["."])
+        cov.set_option("run:flush_interval", 0.01)
+        with cov.collect():
+            import_local_file("flushed")
+            # The data is written to the file while coverage is still running.
+            self.wait_for_lines("flushed.py", [1, 2, 4])
+            assert cov._collector is not None
+            assert cov._collector.flush_thread is not None
+        assert cov._collector.flush_thread is None
+        cov.save()
+        data = cov.get_data()
+        assert sorted_lines(data, data.measured_files().pop()) == [1, 2, 4]
+
+    def test_threads_lose_nothing(self) -> None:
+        # Tracers in other threads go on recording while data is flushed, but
+        # nothing they record is lost.
+        nfuncs = 300
+        funcs = "".join(f"def f{i}():\n    return {i}\n" for i in range(nfuncs))
+        self.make_file(
+            "many.py",
+            funcs
+            + textwrap.dedent(f"""\
+            import threading
+
+            def work(start):
+                for i in range({nfuncs}):
+                    globals()[f"f{{(start + i) % {nfuncs}}}"]()
+
+            threads = [threading.Thread(target=work, args=(n * 77,)) for n in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            """),
+        )
+        cov = coverage.Coverage(source=["."])
+        cov.set_option("run:flush_interval", 0.001)
+        self.start_import_stop(cov, "many")
+        data = cov.get_data()
+        lines = sorted_lines(data, data.measured_files().pop())
+        # The functions, then the threading code after them.
+        thread_lines = [601, 603, 604, 605, 607, 608, 609, 610, 611]
+        assert lines == list(range(1, 2 * nfuncs + 1)) + thread_lines
+
+    def test_no_flush_thread_without_interval(self) -> None:
+        cov = coverage.Coverage()
+        with cov.collect():
+            assert cov._collector is not None
+            assert cov._collector.flush_thread is None
+
+
 class CurrentInstanceTest(CoverageTest):
     """Tests of Coverage.current()."""
 
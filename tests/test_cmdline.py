@@ -259,7 +259,7 @@ class CmdLineTest(BaseCmdLineTest):
             "annotate",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.annotate()
             """,
         )
@@ -267,7 +267,7 @@ class CmdLineTest(BaseCmdLineTest):
             "annotate -d dir1",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.annotate(directory="dir1")
             """,
         )
@@ -275,7 +275,7 @@ class CmdLineTest(BaseCmdLineTest):
             "annotate -i",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.annotate(ignore_errors=True)
             """,
         )
@@ -283,7 +283,7 @@ class CmdLineTest(BaseCmdLineTest):
             "annotate --omit fooey",
             """\
             cov = Coverage(omit=["fooey"])
-            cov.load()
+            cov.load(read_only=True)
             cov.annotate(omit=["fooey"])
             """,
         )
@@ -291,7 +291,7 @@ class CmdLineTest(BaseCmdLineTest):
             "annotate --omit fooey,booey",
             """\
             cov = Coverage(omit=["fooey", "booey"])
-            cov.load()
+            cov.load(read_only=True)
             cov.annotate(omit=["fooey", "booey"])
             """,
         )
@@ -299,7 +299,7 @@ class CmdLineTest(BaseCmdLineTest):
             "annotate mod1",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.annotate(morfs=["mod1"])
             """,
         )
@@ -307,7 +307,7 @@ class CmdLineTest(BaseCmdLineTest):
             "annotate mod1 mod2 mod3",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.annotate(morfs=["mod1", "mod2", "mod3"])
             """,
         )
@@ -318,7 +318,7 @@ class CmdLineTest(BaseCmdLineTest):
             "combine datadir1",
             """\
             cov = Coverage()
-            cov.combine(["datadir1"], strict=True, keep=False)
+            cov.combine(["datadir1"], strict=True, keep=False, jobs=1)
             cov.save()
             """,
         )
@@ -328,7 +328,7 @@ class CmdLineTest(BaseCmdLineTest):
             """\
             cov = Coverage()
             cov.load()
-            cov.combine(["datadir1"], strict=True, keep=False)
+            cov.combine(["datadir1"], strict=True, keep=False, jobs=1)
             cov.save()
             """,
         )
@@ -337,7 +337,7 @@ class CmdLineTest(BaseCmdLineTest):
             "combine",
             """\
             cov = Coverage()
-            cov.combine(None, strict=True, keep=False)
+            cov.combine(None, strict=True, keep=False, jobs=1)
             cov.save()
             """,
         )
@@ -346,7 +346,7 @@ class CmdLineTest(BaseCmdLineTest):
             "combine -q",
             """\
             cov = Coverage(messages=False)
-            cov.combine(None, strict=True, keep=False)
+            cov.combine(None, strict=True, keep=False, jobs=1)
             cov.save()
             """,
         )
@@ -354,7 +354,7 @@ class CmdLineTest(BaseCmdLineTest):
             "combine --quiet",
             """\
             cov = Coverage(messages=False)
-            cov.combine(None, strict=True, keep=False)
+            cov.combine(None, strict=True, keep=False, jobs=1)
             cov.save()
             """,
         )
@@ -362,7 +362,15 @@ class CmdLineTest(BaseCmdLineTest):
             "combine --data-file=foo.cov",
             """\
             cov = Coverage(data_file="foo.cov")
-            cov.combine(None, strict=True, keep=False)
+            cov.combine(None, strict=True, keep=False, jobs=1)
+            cov.save()
+            """,
+        )
+        self.cmd_executes(
+            "combine --jobs=4",
+            """\
+            cov = Coverage()
+            cov.combine(None, strict=True, keep=False, jobs=4)
             cov.save()
             """,
         )
@@ -373,7 +381,7 @@ class CmdLineTest(BaseCmdLineTest):
             "combine --rcfile cov.ini",
             """\
             cov = Coverage(config_file='cov.ini')
-            cov.combine(None, strict=True, keep=False)
+            cov.combine(None, strict=True, keep=False, jobs=1)
             cov.save()
             """,
         )
@@ -381,7 +389,7 @@ class CmdLineTest(BaseCmdLineTest):
             "combine --rcfile cov.ini data1 data2/more",
             """\
             cov = Coverage(config_file='cov.ini')
-            cov.combine(["data1", "data2/more"], strict=True, keep=False)
+            cov.combine(["data1", "data2/more"], strict=True, keep=False, jobs=1)
             cov.save()
             """,
         )
@@ -500,7 +508,7 @@ class CmdLineTest(BaseCmdLineTest):
             "html",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.html_report()
             """,
         )
@@ -508,7 +516,7 @@ class CmdLineTest(BaseCmdLineTest):
             "html -d dir1",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.html_report(directory="dir1")
             """,
         )
@@ -516,7 +524,7 @@ class CmdLineTest(BaseCmdLineTest):
             "html -i",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.html_report(ignore_errors=True)
             """,
         )
@@ -524,7 +532,7 @@ class CmdLineTest(BaseCmdLineTest):
             "html --omit fooey",
             """\
             cov = Coverage(omit=["fooey"])
-            cov.load()
+            cov.load(read_only=True)
             cov.html_report(omit=["fooey"])
             """,
         )
@@ -532,7 +540,7 @@ class CmdLineTest(BaseCmdLineTest):
             "html --omit fooey,booey",
             """\
             cov = Coverage(omit=["fooey", "booey"])
-            cov.load()
+            cov.load(read_only=True)
             cov.html_report(omit=["fooey", "booey"])
             """,
         )
@@ -540,7 +548,7 @@ class CmdLineTest(BaseCmdLineTest):
             "html mod1",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.html_report(morfs=["mod1"])
             """,
         )
@@ -548,15 +556,24 @@ class CmdLineTest(BaseCmdLineTest):
             "html mod1 mod2 mod3",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.html_report(morfs=["mod1", "mod2", "mod3"])
             """,
         )
+        self.cmd_executes(
+            "html -j 2",
+            """\
+            cov = Coverage()
+            cov.set_option("report:jobs", 2)
+            cov.load(read_only=True)
+            cov.html_report()
+            """,
+        )
         self.cmd_executes(
             "html --precision=3",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.html_report(precision=3)
             """,
         )
@@ -564,7 +581,7 @@ class CmdLineTest(BaseCmdLineTest):
             "html --title=Hello_there",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.html_report(title='Hello_there')
             """,
         )
@@ -572,7 +589,7 @@ class CmdLineTest(BaseCmdLineTest):
             "html -q",
             """\
             cov = Coverage(messages=False)
-            cov.load()
+            cov.load(read_only=True)
             cov.html_report()
             """,
         )
@@ -580,7 +597,7 @@ class CmdLineTest(BaseCmdLineTest):
             "html --quiet",
             """\
             cov = Coverage(messages=False)
-            cov.load()
+            cov.load(read_only=True)
             cov.html_report()
             """,
         )
@@ -591,7 +608,7 @@ class CmdLineTest(BaseCmdLineTest):
             "json",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.json_report()
             """,
         )
@@ -599,7 +616,7 @@ class CmdLineTest(BaseCmdLineTest):
             "json --pretty-print",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.json_report(pretty_print=True)
             """,
         )
@@ -607,7 +624,7 @@ class CmdLineTest(BaseCmdLineTest):
             "json --pretty-print --show-contexts",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.json_report(pretty_print=True, show_contexts=True)
             """,
         )
@@ -615,7 +632,7 @@ class CmdLineTest(BaseCmdLineTest):
             "json -i",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.json_report(ignore_errors=True)
             """,
         )
@@ -623,7 +640,7 @@ class CmdLineTest(BaseCmdLineTest):
             "json -o myjson.foo",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.json_report(outfile="myjson.foo")
             """,
         )
@@ -631,7 +648,7 @@ class CmdLineTest(BaseCmdLineTest):
             "json -o -",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.json_report(outfile="-")
             """,
         )
@@ -639,7 +656,7 @@ class CmdLineTest(BaseCmdLineTest):
             "json --omit fooey",
             """\
             cov = Coverage(omit=["fooey"])
-            cov.load()
+            cov.load(read_only=True)
             cov.json_report(omit=["fooey"])
             """,
         )
@@ -647,7 +664,7 @@ class CmdLineTest(BaseCmdLineTest):
             "json --omit fooey,booey",
             """\
             cov = Coverage(omit=["fooey", "booey"])
-            cov.load()
+            cov.load(read_only=True)
             cov.json_report(omit=["fooey", "booey"])
             """,
         )
@@ -655,7 +672,7 @@ class CmdLineTest(BaseCmdLineTest):
             "json mod1",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.json_report(morfs=["mod1"])
             """,
         )
@@ -663,7 +680,7 @@ class CmdLineTest(BaseCmdLineTest):
             "json mod1 mod2 mod3",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.json_report(morfs=["mod1", "mod2", "mod3"])
             """,
         )
@@ -671,7 +688,7 @@ class CmdLineTest(BaseCmdLineTest):
             "json -q",
             """\
             cov = Coverage(messages=False)
-            cov.load()
+            cov.load(read_only=True)
             cov.json_report()
             """,
         )
@@ -679,7 +696,7 @@ class CmdLineTest(BaseCmdLineTest):
             "json --quiet",
             """\
             cov = Coverage(messages=False)
-            cov.load()
+            cov.load(read_only=True)
             cov.json_report()
             """,
         )
@@ -690,7 +707,7 @@ class CmdLineTest(BaseCmdLineTest):
             "lcov",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.lcov_report()
             """,
         )
@@ -698,7 +715,7 @@ class CmdLineTest(BaseCmdLineTest):
             "lcov -i",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.lcov_report(ignore_errors=True)
             """,
         )
@@ -706,7 +723,7 @@ class CmdLineTest(BaseCmdLineTest):
             "lcov -o mylcov.foo",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.lcov_report(outfile="mylcov.foo")
             """,
         )
@@ -714,7 +731,7 @@ class CmdLineTest(BaseCmdLineTest):
             "lcov -o -",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.lcov_report(outfile="-")
             """,
         )
@@ -722,7 +739,7 @@ class CmdLineTest(BaseCmdLineTest):
             "lcov --omit fooey",
             """\
             cov = Coverage(omit=["fooey"])
-            cov.load()
+            cov.load(read_only=True)
             cov.lcov_report(omit=["fooey"])
             """,
         )
@@ -730,7 +747,7 @@ class CmdLineTest(BaseCmdLineTest):
             "lcov --omit fooey,booey",
             """\
             cov = Coverage(omit=["fooey", "booey"])
-            cov.load()
+            cov.load(read_only=True)
             cov.lcov_report(omit=["fooey", "booey"])
             """,
         )
@@ -738,7 +755,7 @@ class CmdLineTest(BaseCmdLineTest):
             "lcov -q",
             """\
             cov = Coverage(messages=False)
-            cov.load()
+            cov.load(read_only=True)
             cov.lcov_report()
             """,
         )
@@ -746,7 +763,7 @@ class CmdLineTest(BaseCmdLineTest):
             "lcov --quiet",
             """\
             cov = Coverage(messages=False)
-            cov.load()
+            cov.load(read_only=True)
             cov.lcov_report()
             """,
         )
@@ -757,7 +774,7 @@ class CmdLineTest(BaseCmdLineTest):
             "report",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.report(show_missing=None)
             """,
         )
@@ -765,7 +782,7 @@ class CmdLineTest(BaseCmdLineTest):
             "report -i",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.report(ignore_errors=True)
             """,
         )
@@ -773,7 +790,7 @@ class CmdLineTest(BaseCmdLineTest):
             "report -m",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.report(show_missing=True)
             """,
         )
@@ -781,7 +798,7 @@ class CmdLineTest(BaseCmdLineTest):
             "report --omit fooey",
             """\
             cov = Coverage(omit=["fooey"])
-            cov.load()
+            cov.load(read_only=True)
             cov.report(omit=["fooey"])
             """,
         )
@@ -789,7 +806,7 @@ class CmdLineTest(BaseCmdLineTest):
             "report --omit fooey,booey",
             """\
             cov = Coverage(omit=["fooey", "booey"])
-            cov.load()
+            cov.load(read_only=True)
             cov.report(omit=["fooey", "booey"])
             """,
         )
@@ -797,7 +814,7 @@ class CmdLineTest(BaseCmdLineTest):
             "report mod1",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.report(morfs=["mod1"])
             """,
         )
@@ -805,15 +822,24 @@ class CmdLineTest(BaseCmdLineTest):
             "report mod1 mod2 mod3",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.report(morfs=["mod1", "mod2", "mod3"])
             """,
         )
+        self.cmd_executes(
+            "report --jobs=4",
+            """\
+            cov = Coverage()
+            cov.set_option("report:jobs", 4)
+            cov.load(read_only=True)
+            cov.report()
+            """,
+        )
         self.cmd_executes(
             "report --precision=7",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.report(precision=7)
             """,
         )
@@ -821,7 +847,7 @@ class CmdLineTest(BaseCmdLineTest):
             "report --skip-covered",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.report(skip_covered=True)
             """,
         )
@@ -829,7 +855,7 @@ class CmdLineTest(BaseCmdLineTest):
             "report --skip-covered --no-skip-covered",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.report(skip_covered=False)
             """,
         )
@@ -837,7 +863,7 @@ class CmdLineTest(BaseCmdLineTest):
             "report --no-skip-covered",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.report(skip_covered=False)
             """,
         )
@@ -845,7 +871,7 @@ class CmdLineTest(BaseCmdLineTest):
             "report --skip-empty",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.report(skip_empty=True)
             """,
         )
@@ -853,7 +879,7 @@ class CmdLineTest(BaseCmdLineTest):
             "report --contexts=foo,bar",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.report(contexts=["foo", "bar"])
             """,
         )
@@ -861,7 +887,7 @@ class CmdLineTest(BaseCmdLineTest):
             "report --sort=-foo",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.report(sort='-foo')
             """,
         )
@@ -869,7 +895,7 @@ class CmdLineTest(BaseCmdLineTest):
             "report --data-file=foo.cov.2",
             """\
             cov = Coverage(data_file="foo.cov.2")
-            cov.load()
+            cov.load(read_only=True)
             cov.report(show_missing=None)
             """,
         )
@@ -877,7 +903,7 @@ class CmdLineTest(BaseCmdLineTest):
             "report --format=markdown",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.report(output_format="markdown")
             """,
         )
@@ -1209,7 +1235,7 @@ class CmdLineTest(BaseCmdLineTest):
             "xml",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.xml_report()
             """,
         )
@@ -1217,7 +1243,7 @@ class CmdLineTest(BaseCmdLineTest):
             "xml -i",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.xml_report(ignore_errors=True)
             """,
         )
@@ -1225,7 +1251,7 @@ class CmdLineTest(BaseCmdLineTest):
             "xml -o myxml.foo",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.xml_report(outfile="myxml.foo")
             """,
         )
@@ -1233,7 +1259,7 @@ class CmdLineTest(BaseCmdLineTest):
             "xml -o -",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.xml_report(outfile="-")
             """,
         )
@@ -1241,7 +1267,7 @@ class CmdLineTest(BaseCmdLineTest):
             "xml --omit fooey",
             """\
             cov = Coverage(omit=["fooey"])
-            cov.load()
+            cov.load(read_only=True)
             cov.xml_report(omit=["fooey"])
             """,
         )
@@ -1249,7 +1275,7 @@ class CmdLineTest(BaseCmdLineTest):
             "xml --omit fooey,booey",
             """\
             cov = Coverage(omit=["fooey", "booey"])
-            cov.load()
+            cov.load(read_only=True)
             cov.xml_report(omit=["fooey", "booey"])
             """,
         )
@@ -1257,7 +1283,7 @@ class CmdLineTest(BaseCmdLineTest):
             "xml mod1",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.xml_report(morfs=["mod1"])
             """,
         )
@@ -1265,7 +1291,7 @@ class CmdLineTest(BaseCmdLineTest):
             "xml mod1 mod2 mod3",
             """\
             cov = Coverage()
-            cov.load()
+            cov.load(read_only=True)
             cov.xml_report(morfs=["mod1", "mod2", "mod3"])
             """,
         )
@@ -1273,7 +1299,7 @@ class CmdLineTest(BaseCmdLineTest):
             "xml -q",
             """\
             cov = Coverage(messages=False)
-            cov.load()
+            cov.load(read_only=True)
             cov.xml_report()
             """,
         )
@@ -1281,7 +1307,7 @@ class CmdLineTest(BaseCmdLineTest):
             "xml --quiet",
             """\
             cov = Coverage(messages=False)
-            cov.load()
+            cov.load(read_only=True)
             cov.xml_report()
             """,
         )
@@ -1522,7 +1548,7 @@ class CoverageReportingFake:
     def get_option(self, optname: str) -> TConfigValueOut:
         return self.config.get_option(optname)
 
-    def load(self) -> None:
+    def load(self, read_only: bool = False) -> None:
         pass
 
     def report(self, *args_unused: Any, **kwargs_unused: Any) -> float:
@@ -5,9 +5,14 @@
 
 from __future__ import annotations
 
+import gc
 import os.path
 
+import pytest
+
 import coverage
+from coverage.core import CTRACER_FILE
+from coverage.data import sorted_lines
 
 from tests.coveragetest import CoverageTest
 from tests.helpers import CheckUniqueFilenames
@@ -56,3 +61,112 @@ class CollectorTest(CoverageTest):
         abs_files = {os.path.abspath(f) for f in should_trace_hook.filenames}
         assert os.path.abspath("f1.py") in abs_files
         assert os.path.abspath("f2.py") in abs_files
+
+    def test_sharded_data(self) -> None:
+        # With sharded data, each thread's tracer has its own data, and it's
+        # all merged when flushed.
+        self.make_file(
+            "threads.py",
+            """\
+            import threading
+
+            def work(n):
+                if n:
+                    return n * 2
+                return None
+
+            threads = [threading.Thread(target=work, args=(n,)) for n in range(3)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            """,
+        )
+        cov = coverage.Coverage(source=["."])
+        self.start_import_stop(cov, "threads")
+        collector = cov._collector
+        assert collector is not None
+        shards = list(collector.data_shards.values())
+        if collector.core.sharded_data:
+            # The unsharded dict, then the main thread and the three others.
+            assert len(shards) == 5
+            assert all(any(tracer.data is d for d in shards) for tracer in collector.tracers)
+        else:
+            assert shards == [collector.data]
+        data = cov.get_data()
+        lines = sorted_lines(data, data.measured_files().pop())
+        assert lines == [1, 3, 4, 5, 6, 8, 9, 10, 11, 12]
+
+        # Taking the data dropped the shards of the threads that ended, and
+        # starting again on this thread doesn't make another shard.
+        for _ in range(3):
+            cov.start()
+            cov.stop()
+        cov.get_data()
+        if collector.core.sharded_data:
+            assert len(collector.data_shards) == 2
+        else:
+            assert len(collector.data_shards) == 1
+
+
+@pytest.mark.skipif(not CTRACER_FILE, reason="Only the C extension has CArcSet")
+class CArcSetTest(CoverageTest):
+    """Tests of the CArcSet used by the C tracer to record arcs."""
+
+    run_in_temp_dir = False
+
+    def test_add_and_unpack(self) -> None:
+        from coverage import tracer
+
+        arcset = tracer.CArcSet()
+        assert not arcset
+        assert arcset.arcs() == []
+        arcs = [(-1, 1), (1, 2), (2, -1), (-17, -23), (1000, 999999)]
+        for _ in range(3):
+            for l1, l2 in arcs:
+                arcset.add(l1, l2)
+        assert len(arcset) == 5
+        assert sorted(arcset.arcs()) == sorted(arcs)
+
+    def test_growing_and_clearing(self) -> None:
+        from coverage import tracer
+
+        arcset = tracer.CArcSet()
+        arcs = [(i, -(i + 1)) for i in range(5000)]
+        for l1, l2 in arcs:
+            arcset.add(l1, l2)
+        assert len(arcset) == 5000
+        assert sorted(arcset.arcs()) == sorted(arcs)
+        arcset.clear()
+        assert len(arcset) == 0
+        assert arcset.arcs() == []
+        arcset.add(3, 4)
+        assert arcset.arcs() == [(3, 4)]
+
+    def test_adding_while_popping(self) -> None:
+        from coverage import tracer
+
+        # Making the tuples can run the garbage collector, which can run code
+        # that adds arcs, making the table grow.
+        arcset = tracer.CArcSet()
+        arcs = [(i, i + 1) for i in range(1, 1000)]
+        for l1, l2 in arcs:
+            arcset.add(l1, l2)
+        added: list[tuple[int, int]] = []
+
+        def add_more(phase: str, info: dict[str, int]) -> None:  # pylint: disable=unused-argument
+            if phase == "start" and len(added) < 1000:
+                added.append((-len(added) - 1, 5000))
+                arcset.add(*added[-1])
+
+        threshold = gc.get_threshold()
+        gc.callbacks.append(add_more)
+        gc.set_threshold(1)
+        try:
+            popped = arcset.pop_arcs()
+        finally:
+            gc.set_threshold(*threshold)
+            gc.callbacks.remove(add_more)
+        assert sorted(popped) == sorted(arcs)
+        assert added
+        assert sorted(arcset.arcs()) == sorted(added)
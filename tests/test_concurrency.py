@@ -182,13 +182,11 @@ def cant_trace_msg(concurrency: str, the_module: ModuleType | None) -> str | Non
         parts.remove("multiprocessing")
         concurrency = ",".join(parts)
 
-    if testenv.SYS_MON and concurrency:
-        expected_out = f"Can't use core=sysmon: it doesn't support concurrency={concurrency}"
-    elif the_module is None:
+    if the_module is None:
         # We don't even have the underlying module installed, we expect
         # coverage to alert us to this fact.
         expected_out = f"Couldn't trace with concurrency={concurrency}, the module isn't installed."
-    elif testenv.C_TRACER or concurrency == "thread" or concurrency == "":
+    elif testenv.C_TRACER or testenv.SYS_MON or concurrency == "thread" or concurrency == "":
         expected_out = None
     else:
         expected_out = (
@@ -358,8 +356,7 @@ class ConcurrencyTest(CoverageTest):
         if gevent is None:
             assert "Couldn't trace with concurrency=gevent, the module isn't installed.\n" in out
             pytest.skip("Can't run test without gevent installed.")
-        if not testenv.C_TRACER:
-            assert testenv.PY_TRACER
+        if testenv.PY_TRACER:
             assert out == (
                 "Can't support concurrency=gevent with PyTracer, only threads are supported.\n"
             )
@@ -730,6 +727,66 @@ def test_thread_safe_save_data(tmp_path: pathlib.Path) -> None:
         should_run[0] = False
 
 
+class ThreadStressTest(CoverageTest):
+    """Many threads measured at once, which matters most without the GIL."""
+
+    @pytest.mark.parametrize("branch", [False, True])
+    def test_threads_running_together(self, branch: bool) -> None:
+        nmods = 20
+        for i in range(nmods):
+            self.make_file(
+                f"stress{i:02d}.py",
+                """\
+                def f(x):
+                    if x % 2:
+                        y = x + 1
+                    else:
+                        y = x - 1
+                    return y
+                """,
+            )
+        self.make_file(
+            "stress.py",
+            f"""\
+            import importlib
+            import threading
+
+            barrier = threading.Barrier(8)
+
+            def work(start):
+                barrier.wait()
+                for i in range({nmods}):
+                    mod = importlib.import_module(f"stress{{(start + i) % {nmods}:02d}}")
+                    for x in range(50):
+                        mod.f(x)
+
+            threads = [threading.Thread(target=work, args=(n * 3,)) for n in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            """,
+        )
+        cov = coverage.Coverage(source=["."], branch=branch, concurrency=["thread"])
+        cov.set_option("run:flush_interval", 0.001)
+        self.start_import_stop(cov, "stress")
+        data = cov.get_data()
+        for i in range(nmods):
+            fname = abs_file(f"stress{i:02d}.py")
+            assert sorted(data.lines(fname) or ()) == [1, 2, 3, 5, 6]
+            if branch:
+                assert sorted(data.arcs(fname) or ()) == [
+                    (-1, 1),
+                    (-1, 2),
+                    (1, -1),
+                    (2, 3),
+                    (2, 5),
+                    (3, 6),
+                    (5, 6),
+                    (6, -1),
+                ]
+
+
 @pytest.mark.skipif(env.WINDOWS, reason="SIGTERM doesn't work the same on Windows")
 @pytest.mark.flaky(max_runs=3)  # Sometimes a test fails due to inherent randomness. Try more times.
 class SigtermTest(CoverageTest):
@@ -7,6 +7,7 @@ from __future__ import annotations
 
 import inspect
 import os.path
+import sqlite3
 
 from typing import Any
 from unittest import mock
@@ -18,7 +19,6 @@ from coverage.context import qualname_from_frame
 from coverage.data import CoverageData, sorted_lines
 from coverage.types import TArc, TCovKwargs, TLineNo
 
-from tests import testenv
 from tests.coveragetest import CoverageTest
 from tests.helpers import assert_count_equal
 
@@ -134,7 +134,6 @@ class StaticContextTest(CoverageTest):
             assert_combined_arcs(fblue, "blue", arc_data)
 
 
-@pytest.mark.skipif(not testenv.DYN_CONTEXTS, reason="No dynamic contexts with this core")
 class DynamicContextTest(CoverageTest):
     """Tests of dynamically changing contexts."""
 
@@ -209,6 +208,119 @@ class DynamicContextTest(CoverageTest):
         assert_context_lines("stat|two_tests.test_one", self.TEST_ONE_LINES)
         assert_context_lines("stat|two_tests.test_two", self.TEST_TWO_LINES)
 
+    @pytest.mark.parametrize("branch", [False, True])
+    def test_contexts_without_calls(self, branch: bool) -> None:
+        # The test functions make no calls, so only line events happen in them.
+        self.make_file(
+            "no_calls.py",
+            """\
+            def test_one():
+                a = 2
+
+            def test_two():
+                b = 5
+
+            test_one()
+            test_two()
+            x = 9
+            """,
+        )
+        cov = coverage.Coverage(source=["."], branch=branch)
+        cov.set_option("run:dynamic_context", "test_function")
+        self.start_import_stop(cov, "no_calls")
+        data = cov.get_data()
+        fname = data.measured_files().pop()
+
+        def assert_context_lines(context: str, lines: list[TLineNo]) -> None:
+            data.set_query_context(context)
+            assert_count_equal(lines, sorted_lines(data, fname))
+
+        assert_context_lines("", [1, 4, 7, 8, 9])
+        assert_context_lines("no_calls.test_one", [2])
+        assert_context_lines("no_calls.test_two", [5])
+
+    def test_exception_ends_context(self) -> None:
+        self.make_file(
+            "raising.py",
+            """\
+            def helper():
+                x = 2
+
+            def test_raise():
+                helper()
+                raise ValueError
+
+            for _ in range(2):
+                try:
+                    test_raise()
+                except ValueError:
+                    helper()
+            """,
+        )
+        cov = coverage.Coverage(source=["."])
+        cov.set_option("run:dynamic_context", "test_function")
+        self.start_import_stop(cov, "raising")
+        data = cov.get_data()
+
+        fname = data.measured_files().pop()
+        assert_count_equal(data.measured_contexts(), ["", "raising.test_raise"])
+        data.set_query_context("")
+        assert_count_equal(sorted_lines(data, fname), [1, 2, 4, 8, 9, 10, 11, 12])
+        data.set_query_context("raising.test_raise")
+        assert_count_equal(sorted_lines(data, fname), [2, 5, 6])
+
+    @pytest.mark.parametrize("branch", [False, True])
+    def test_index_line_contexts(self, branch: bool) -> None:
+        self.make_file("two_tests.py", self.SOURCE)
+        cov = coverage.Coverage(source=["."], branch=branch)
+        cov.set_option("run:dynamic_context", "test_function")
+        cov.set_option("run:index_line_contexts", True)
+        self.start_import_stop(cov, "two_tests")
+        cov.save()
+
+        with sqlite3.connect(".coverage") as con:
+            tables = {row[0] for row in con.execute("SELECT name FROM sqlite_master")}
+        assert "line_contexts" in tables
+
+        data = CoverageData()
+        data.read()
+        fname = data.measured_files().pop()
+        assert_count_equal(
+            data.contexts_for_line(fname, 2),
+            ["", "two_tests.test_one", "two_tests.test_two"],
+        )
+        assert data.contexts_for_line(fname, 12) == []
+        assert data.contexts_for_line(fname, 13) == ["two_tests.test_two"]
+        assert data.contexts_for_line(fname, 18) == [""]
+
+    @pytest.mark.parametrize("branch", [False, True])
+    @pytest.mark.parametrize("buffer", [5, 1000])
+    def test_dynamic_context_buffer(self, branch: bool, buffer: int) -> None:
+        self.make_file("two_tests.py", self.SOURCE)
+        cov = coverage.Coverage(source=["."], branch=branch)
+        cov.set_option("run:dynamic_context", "test_function")
+        cov.set_option("run:dynamic_context_buffer", buffer)
+        self.start_import_stop(cov, "two_tests")
+        # Stopping writes whatever is still buffered, so the data is all there
+        # without get_data() flushing it.
+        data = cov._data
+        assert data is not None
+
+        full_names = {os.path.basename(f): f for f in data.measured_files()}
+        fname = full_names["two_tests.py"]
+        assert_count_equal(
+            data.measured_contexts(),
+            ["", "two_tests.test_one", "two_tests.test_two"],
+        )
+
+        def assert_context_lines(context: str, lines: list[TLineNo]) -> None:
+            data.set_query_context(context)
+            assert_count_equal(lines, sorted_lines(data, fname))
+
+        assert_context_lines("", self.OUTER_LINES)
+        assert_context_lines("two_tests.test_one", self.TEST_ONE_LINES)
+        assert_context_lines("two_tests.test_two", self.TEST_TWO_LINES)
+
 
 def get_qualname() -> str | None:
     """Helper to return qualname_from_frame for the caller."""
@@ -91,7 +91,7 @@ class CoverageCoreTest(CoverageTest):
             assert core in ["core: CTracer", "core: PyTracer"]
             assert warns
 
-    def test_core_request_sysmon_no_dyncontext(self) -> None:
+    def test_core_request_sysmon_dyncontext(self) -> None:
         # Use config core= for this test just to be different.
         self.make_file(
             ".coveragerc",
@@ -104,15 +104,13 @@ class CoverageCoreTest(CoverageTest):
         out = self.run_command("coverage run --debug=sys numbers.py")
         assert out.endswith("123 456\n")
         core = re_line(r" core:", out).strip()
-        assert core in ["core: CTracer", "core: PyTracer"]
         warns = re_lines(r"\(no-sysmon\)", out)
-        assert len(warns) == 1
         if env.PYBEHAVIOR.pep669:
-            assert (
-                "Can't use core=sysmon: it doesn't yet support dynamic contexts, using default core"
-                in warns[0]
-            )
+            assert core == "core: SysMonitor"
+            assert not warns
         else:
+            assert core in ["core: CTracer", "core: PyTracer"]
+            assert len(warns) == 1
             assert "sys.monitoring isn't available in this version, using default core" in warns[0]
 
     def test_core_request_sysmon_no_branches(self) -> None:
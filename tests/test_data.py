@@ -19,9 +19,11 @@ from unittest import mock
 import pytest
 
 from coverage.data import CoverageData, combine_parallel_data
-from coverage.data import add_data_to_hash, line_counts
+from coverage.data import add_data_to_hash, line_counts, sorted_lines
 from coverage.exceptions import DataError, NoDataError
 from coverage.files import PathAliases, canonical_filename
+from coverage.numbits import numbits_to_nums, nums_to_numbits
+from coverage.sqldata import MAX_UPDATE_BATCH
 from coverage.types import FilePathClasses, FilePathType, TArc, TLineNo
 
 from tests.coveragetest import CoverageTest
@@ -187,6 +189,33 @@ class CoverageDataTest(CoverageTest):
         assert_line_counts(covdata, SUMMARY_1_2)
         assert_measured_files(covdata, MEASURED_FILES_1_2)
 
+    @pytest.mark.parametrize("has_upsert", [True, False])
+    def test_adding_lines_merges_in_bulk(self, has_upsert: bool) -> None:
+        # Many files, more than fit in one SQL statement, merged with lines
+        # already recorded for them in the same context.
+        lines1 = {f"file{i}.py": {i + 1, i + 2} for i in range(30)}
+        lines2 = {f"file{i}.py": {i + 3} for i in range(0, 40, 2)}
+        with (
+            mock.patch("coverage.sqldata.HAS_UPSERT", has_upsert),
+            mock.patch("coverage.sqldata.MAX_SQL_VARIABLES", 7),
+        ):
+            covdata = DebugCoverageData()
+            covdata.set_context("test1")
+            covdata.add_lines(lines1)
+            covdata.add_lines(lines2)
+            covdata.set_context("test2")
+            covdata.add_lines(lines2)
+
+        assert len(covdata.measured_files()) == 35
+        assert sorted_lines(covdata, "file0.py") == [1, 2, 3]
+        assert sorted_lines(covdata, "file1.py") == [2, 3]
+        assert sorted_lines(covdata, "file38.py") == [41]
+        covdata.set_query_contexts(["test1"])
+        assert sorted_lines(covdata, "file4.py") == [5, 6, 7]
+        covdata.set_query_contexts(["test2"])
+        assert sorted_lines(covdata, "file4.py") == [7]
+        assert sorted_lines(covdata, "file5.py") == []
+
     def test_ok_to_add_arcs_twice(self) -> None:
         covdata = DebugCoverageData()
         covdata.add_arcs(ARCS_3)
@@ -239,6 +268,69 @@ class CoverageDataTest(CoverageTest):
         covdata.set_query_contexts(["other"])
         assert covdata.lines("a.py") == []
 
+    @pytest.mark.parametrize(
+        "patterns, expected",
+        [
+            (["^test_a"], ["test_a", "test_ab"]),
+            (["^test_a$"], ["test_a"]),
+            (["^test_a$", "^other"], ["other", "test_a"]),
+            (["test_a"], ["sub|test_a", "test_a", "test_ab"]),
+            (["^te.t_a$"], ["test_a"]),
+            (["^nothing"], []),
+        ],
+    )
+    def test_query_context_patterns(self, patterns: list[str], expected: list[str]) -> None:
+        covdata = DebugCoverageData()
+        for lineno, context in enumerate(["test_a", "test_ab", "sub|test_a", "other", "tesu"], 1):
+            covdata.set_context(context)
+            covdata.add_lines({"a.py": [lineno]})
+        covdata.set_query_contexts(patterns)
+        lines = covdata.lines("a.py")
+        contexts = sorted(
+            {ctx for ctxs in covdata.contexts_by_lineno("a.py").values() for ctx in ctxs},
+        )
+        assert contexts == expected
+        assert len(lines or []) == len(expected)
+
+    def test_invalid_query_context_pattern(self) -> None:
+        covdata = DebugCoverageData()
+        covdata.set_context("test_a")
+        covdata.add_lines(LINES_1)
+        msg = r"Invalid context pattern '\(': missing \), unterminated subpattern"
+        with pytest.raises(DataError, match=msg):
+            covdata.set_query_contexts(["^test_a", "("])
+
+    @pytest.mark.parametrize("arcs", [False, True])
+    def test_many_query_contexts(self, arcs: bool) -> None:
+        # More query contexts than SQLite can take as parameters.
+        covdata = DebugCoverageData()
+        for i in range(2000):
+            covdata.set_context(f"test_{i:04d}")
+            if arcs:
+                covdata.add_arcs({"a.py": [(i + 1, i + 2)], "b.py": [(-1, 1)]})
+            else:
+                covdata.add_lines({"a.py": [i + 1], "b.py": [1]})
+        covdata.set_query_contexts(["^test_1"])
+        expected = list(range(1001, 2001))
+        assert sorted_lines(covdata, "a.py") == (expected + [2001] if arcs else expected)
+        assert covdata.lines("b.py") == [1]
+        by_lineno = covdata.contexts_by_lineno("a.py")
+        assert by_lineno[1001] == ["test_1000"]
+        assert 1000 not in by_lineno
+        if arcs:
+            assert covdata.arcs("b.py") == [(-1, 1)]
+
+    def test_query_contexts_after_new_context(self) -> None:
+        covdata = DebugCoverageData()
+        covdata.set_context("test_a")
+        covdata.add_lines({"a.py": [1]})
+        covdata.set_query_contexts(["^test_"])
+        assert covdata.lines("a.py") == [1]
+        covdata.set_context("test_b")
+        covdata.add_lines({"a.py": [2]})
+        covdata.set_query_contexts(["^test_"])
+        assert covdata.lines("a.py") == [1, 2]
+
     def test_no_lines_vs_unmeasured_file(self) -> None:
         covdata = DebugCoverageData()
         covdata.add_lines(LINES_1)
@@ -256,6 +348,28 @@ class CoverageDataTest(CoverageTest):
         covdata.set_query_contexts(["other"])
         assert covdata.lines("a.py") == []
 
+    def test_line_bits_with_contexts(self) -> None:
+        covdata = DebugCoverageData()
+        covdata.set_context("test_a")
+        covdata.add_lines({"a.py": [1, 2]})
+        covdata.set_context("test_b")
+        covdata.add_lines({"a.py": [2, 17], "b.py": []})
+        assert covdata.line_bits("a.py") == nums_to_numbits([1, 2, 17])
+        covdata.set_query_contexts(["test_b"])
+        assert covdata.line_bits("a.py") == nums_to_numbits([2, 17])
+        covdata.set_query_contexts(["other"])
+        assert covdata.line_bits("a.py") == b""
+        assert covdata.line_bits("b.py") == b""
+        assert covdata.line_bits("no_such_file.py") is None
+
+    def test_line_bits_with_arcs(self) -> None:
+        covdata = DebugCoverageData()
+        covdata.add_arcs(ARCS_3)
+        covdata.touch_file("zzz.py")
+        assert numbits_to_nums(covdata.line_bits("y.py") or b"") == [17, 23]
+        assert covdata.line_bits("zzz.py") == b""
+        assert covdata.line_bits("no_such_file.py") is None
+
     def test_contexts_by_lineno_with_lines(self) -> None:
         covdata = DebugCoverageData()
         covdata.set_context("test_a")
@@ -331,6 +445,97 @@ class CoverageDataTest(CoverageTest):
         covdata.set_query_context("test_1")
         assert covdata.contexts_by_lineno("x.py") == dict.fromkeys([1, 2, 3], ["test_1"])
 
+    @pytest.mark.parametrize("many_contexts", [False, True])
+    def test_all_lines(self, many_contexts: bool) -> None:
+        covdata = DebugCoverageData()
+        assert list(covdata.all_lines()) == []
+        covdata.set_context("test_1")
+        covdata.add_lines(LINES_1)
+        covdata.set_context("test_2")
+        covdata.add_lines(LINES_2)
+        covdata.touch_file("d.py")
+        all_lines = list(covdata.all_lines())
+        assert [filename for filename, _ in all_lines] == ["a.py", "b.py", "c.py", "d.py"]
+        for filename, lines in all_lines:
+            assert_count_equal(lines, covdata.lines(filename))
+        with mock.patch("coverage.sqldata.MAX_SQL_VARIABLES", 0 if many_contexts else 900):
+            covdata.set_query_contexts(["test_2"])
+            assert {f: sorted(lines) for f, lines in covdata.all_lines()} == {
+                "a.py": [1, 5],
+                "b.py": [],
+                "c.py": [17],
+                "d.py": [],
+            }
+
+    @pytest.mark.parametrize("many_contexts", [False, True])
+    def test_all_arcs(self, many_contexts: bool) -> None:
+        covdata = DebugCoverageData()
+        covdata.set_context("test_1")
+        covdata.add_arcs(ARCS_3)
+        covdata.set_context("test_2")
+        covdata.add_arcs(ARCS_4)
+        all_arcs = list(covdata.all_arcs())
+        assert [filename for filename, _ in all_arcs] == ["x.py", "y.py", "z.py"]
+        for filename, arcs in all_arcs:
+            assert_count_equal(arcs, covdata.arcs(filename))
+        for filename, lines in covdata.all_lines():
+            assert_count_equal(lines, covdata.lines(filename))
+        with mock.patch("coverage.sqldata.MAX_SQL_VARIABLES", 0 if many_contexts else 900):
+            covdata.set_query_contexts(["test_1"])
+            assert {f: sorted(arcs) for f, arcs in covdata.all_arcs()} == {
+                "x.py": sorted(X_PY_ARCS_3),
+                "y.py": sorted(Y_PY_ARCS_3),
+                "z.py": [],
+            }
+            assert dict(covdata.all_lines())["z.py"] == []
+
+    @pytest.mark.parametrize("indexed", [False, True])
+    def test_contexts_for_line_with_lines(self, indexed: bool) -> None:
+        covdata = DebugCoverageData()
+        covdata.set_context("test_1")
+        covdata.add_lines(LINES_1)
+        covdata.set_context("test_2")
+        covdata.add_lines(LINES_2)
+        if indexed:
+            covdata.index_line_contexts()
+        assert sorted(covdata.contexts_for_line("a.py", 1)) == ["test_1", "test_2"]
+        assert covdata.contexts_for_line("a.py", 2) == ["test_1"]
+        assert covdata.contexts_for_line("a.py", 5) == ["test_2"]
+        assert covdata.contexts_for_line("a.py", 3) == []
+        assert covdata.contexts_for_line("xyz.py", 1) == []
+        covdata.set_query_context("test_2")
+        assert covdata.contexts_for_line("a.py", 1) == ["test_2"]
+        assert covdata.contexts_for_line("a.py", 2) == []
+
+    @pytest.mark.parametrize("indexed", [False, True])
+    def test_contexts_for_line_with_arcs(self, indexed: bool) -> None:
+        covdata = DebugCoverageData()
+        covdata.set_context("test_1")
+        covdata.add_arcs(ARCS_3)
+        covdata.set_context("test_2")
+        covdata.add_arcs(ARCS_4)
+        if indexed:
+            covdata.index_line_contexts()
+        assert covdata.contexts_for_line("x.py", 1) == ["test_1"]
+        assert sorted(covdata.contexts_for_line("x.py", 2)) == ["test_1", "test_2"]
+        assert covdata.contexts_for_line("x.py", 5) == ["test_2"]
+        assert covdata.contexts_for_line("x.py", -1) == []
+        covdata.set_query_contexts(["_1$"])
+        assert covdata.contexts_for_line("x.py", 2) == ["test_1"]
+
+    def test_line_contexts_index_dropped_on_change(self) -> None:
+        covdata = DebugCoverageData()
+        covdata.set_context("test_1")
+        covdata.add_lines(LINES_1)
+        covdata.index_line_contexts()
+        covdata.set_context("test_2")
+        covdata.add_lines(LINES_2)
+        assert sorted(covdata.contexts_for_line("a.py", 1)) == ["test_1", "test_2"]
+        covdata.index_line_contexts()
+        assert sorted(covdata.contexts_for_line("a.py", 1)) == ["test_1", "test_2"]
+        covdata.purge_files(["a.py"])
+        assert covdata.contexts_for_line("a.py", 1) == []
+
     def test_file_tracer_name(self) -> None:
         covdata = DebugCoverageData()
         covdata.add_lines(
@@ -665,6 +870,74 @@ class CoverageDataInTempDirTest(CoverageTest):
         covdata2.read()
         assert_arcs3_data(covdata2)
 
+    @pytest.mark.parametrize("klass", [CoverageData, DebugCoverageData])
+    def test_read_only_lines(self, klass: TCoverageData) -> None:
+        covdata1 = klass("lines.dat")
+        covdata1.set_context("test_a")
+        covdata1.add_lines({"a.py": [1, 2], "b.py": [3]})
+        covdata1.set_context("test_b")
+        covdata1.add_lines({"a.py": [2, 1000], "c.py": []})
+        covdata1.write()
+
+        covdata2 = klass("lines.dat")
+        covdata2.read(read_only=True)
+        assert_measured_files(covdata2, ["a.py", "b.py", "c.py"])
+        # Asking for a few files doesn't read the data for all of them.
+        with mock.patch.object(covdata2, "_read_all_line_bits", side_effect=AssertionError):
+            assert_count_equal(covdata2.lines("a.py"), [1, 2, 1000])
+            assert_count_equal(covdata2.lines("b.py"), [3])
+            assert covdata2.lines("c.py") == []
+            assert covdata2.lines("d.py") is None
+        assert [filename for filename, _ in covdata2.all_lines()] == ["a.py", "b.py", "c.py"]
+        assert_count_equal(covdata2.lines("a.py"), [1, 2, 1000])
+        covdata2.set_query_contexts(["test_b"])
+        assert_count_equal(covdata2.lines("a.py"), [2, 1000])
+        assert covdata2.lines("b.py") == []
+        assert covdata2.contexts_by_lineno("a.py") == {2: ["test_b"], 1000: ["test_b"]}
+        assert {f: sorted(lines) for f, lines in covdata2.all_lines()} == {
+            "a.py": [2, 1000],
+            "b.py": [],
+            "c.py": [],
+        }
+
+    def test_read_only_arcs(self) -> None:
+        covdata1 = DebugCoverageData("arcs.dat")
+        covdata1.set_context("test_a")
+        covdata1.add_arcs(ARCS_3)
+        covdata1.set_context("test_b")
+        covdata1.add_arcs({"x.py": {(-1, 1), (1, 2), (2, -1)}})
+        covdata1.write()
+
+        covdata2 = DebugCoverageData("arcs.dat")
+        covdata2.read(read_only=True)
+        with mock.patch.object(covdata2, "_read_all_arcs", side_effect=AssertionError):
+            assert_count_equal(covdata2.arcs("x.py"), X_PY_ARCS_3 + [(2, -1)])
+        covdata2.set_query_contexts(["test_a"])
+        assert_arcs3_data(covdata2)
+        covdata2.set_query_contexts(["test_b"])
+        assert_count_equal(covdata2.arcs("x.py"), [(-1, 1), (1, 2), (2, -1)])
+        assert_count_equal(covdata2.lines("x.py"), [1, 2])
+        assert covdata2.arcs("y.py") == []
+        assert [(f, sorted(arcs)) for f, arcs in covdata2.all_arcs()] == [
+            ("x.py", [(-1, 1), (1, 2), (2, -1)]),
+            ("y.py", []),
+        ]
+
+    def test_cant_write_read_only(self) -> None:
+        covdata1 = DebugCoverageData("lines.dat")
+        covdata1.add_lines(LINES_1)
+        covdata1.write()
+
+        covdata2 = DebugCoverageData("lines.dat")
+        covdata2.read(read_only=True)
+        with pytest.raises(DataError, match=r"Couldn't .* '.*[/\\]lines.dat': \S+"):
+            covdata2.add_lines({"c.py": [17]})
+        # After erasing, the data can be written again.
+        covdata2.erase()
+        covdata2.add_lines({"c.py": [17]})
+        covdata2.write()
+        assert_measured_files(covdata2, ["c.py"])
+
     def test_read_errors(self) -> None:
         self.make_file("xyzzy.dat", "xyzzy")
         with pytest.raises(DataError, match=r"Couldn't .* '.*[/\\]xyzzy.dat': \S+"):
@@ -951,6 +1224,156 @@ class CoverageDataFilesTest(CoverageTest):
         with pytest.raises(NoDataError, match=msg):
             combine_parallel_data(covdata, data_paths=["xyzzy"])
 
+    def test_combining_in_batches(self) -> None:
+        # More data files than fit in one batch, with some duplicates.
+        nfiles = MAX_UPDATE_BATCH * 2 + 3
+        for i in range(nfiles):
+            covdata = DebugCoverageData(suffix=str(i))
+            covdata.set_context(f"ctx{i % 3}")
+            covdata.add_lines({"a.py": {i % 10 + 1}, f"f{i}.py": {i + 1}})
+            covdata.write()
+        dup = DebugCoverageData(suffix="dup")
+        dup.set_context("ctx0")
+        dup.add_lines({"a.py": {1}, "f0.py": {1}})
+        dup.write()
+
+        messages: list[str] = []
+        debug = DebugControlString(options=["dataio"])
+        covdata = CoverageData(debug=debug)
+        with (
+            mock.patch("coverage.data.HASH_CHUNK_SIZE", 100),
+            mock.patch.object(
+                CoverageData, "_update_many", autospec=True, side_effect=CoverageData._update_many
+            ) as update_many,
+        ):
+            combine_parallel_data(covdata, message=messages.append)
+
+        assert update_many.call_count == 3
+        assert [len(call.args[1]) for call in update_many.call_args_list] == [
+            MAX_UPDATE_BATCH,
+            MAX_UPDATE_BATCH,
+            3,
+        ]
+        assert sorted_lines(covdata, "a.py") == list(range(1, 11))
+        for i in range(nfiles):
+            assert sorted_lines(covdata, f"f{i}.py") == [i + 1]
+        assert covdata.measured_contexts() == {"ctx0", "ctx1", "ctx2"}
+        self.assert_file_count(".coverage.*", 0)
+
+        assert sum(m.startswith("Combined data file") for m in messages) == nfiles
+        assert messages.count("Skipping duplicate data .coverage.dup") == 1
+        assert messages[-1].startswith("Combined data file ")
+        assert re.search(
+            rf"Combined {nfiles} data files, \d+\.\d MB, in \d+\.\d\ds \(\d+\.\d files/s\)",
+            debug.get_output(),
+        )
+
+    def test_combining_in_parallel(self) -> None:
+        for i in range(10):
+            covdata = DebugCoverageData(suffix=str(i))
+            covdata.add_lines(
+                {"/home/ned/proj/src/a.py": {i + 1}, f"/home/ned/proj/src/f{i}.py": {1}}
+            )
+            covdata.write()
+        self.make_file(".coverage.bad", "This isn't a coverage data file.")
+        self.make_file("a.py", "")
+
+        messages: list[str] = []
+        warnings: list[str] = []
+
+        def warn(
+            msg: str,
+            slug: str | None = None,  # pylint: disable=unused-argument
+            once: bool = False,  # pylint: disable=unused-argument
+        ) -> None:
+            warnings.append(msg)
+
+        covdata = CoverageData(warn=warn)
+        aliases = PathAliases()
+        aliases.add("/home/ned/proj/src/", "./")
+        combine_parallel_data(covdata, aliases=aliases, message=messages.append, jobs=3)
+
+        apy = canonical_filename("./a.py")
+        assert sorted_lines(covdata, apy) == list(range(1, 11))
+        assert len(covdata.measured_files()) == 11
+        self.assert_file_count(".coverage.*", 1)
+        self.assert_exists(".coverage.bad")
+
+        # Messages are in the usual order.
+        assert messages[:10] == [f"Combined data file .coverage.{i}" for i in range(10)]
+        assert messages[10].startswith("Couldn't combine data file .coverage.bad: ")
+        assert len(messages) == 11
+        assert len(warnings) == 1
+
+    def test_combining_in_parallel_intermediate_error(self) -> None:
+        for i in range(6):
+            covdata = DebugCoverageData(suffix=str(i))
+            covdata.add_lines({"a.py": {i + 1}})
+            covdata.write()
+
+        # Make the main process fail to read the second intermediate file.
+        real_read = CoverageData.read
+        main_pid = os.getpid()
+
+        def read(self: CoverageData, read_only: bool = False) -> None:
+            if os.getpid() == main_pid and self.data_filename().endswith(
+                os.path.join("", ".coverage.1")
+            ):
+                if os.path.dirname(self.data_filename()) != os.getcwd():
+                    raise DataError("Couldn't read intermediate file")
+            real_read(self, read_only=read_only)
+
+        messages: list[str] = []
+        covdata = DebugCoverageData()
+        with mock.patch.object(CoverageData, "read", read):
+            combine_parallel_data(covdata, message=messages.append, jobs=2)
+
+        # The second group is .coverage.1, .3, and .5.  They weren't combined,
+        # so they weren't deleted.
+        assert sorted_lines(covdata, "a.py") == [1, 3, 5]
+        assert messages == [
+            "Combined data file .coverage.0",
+            "Couldn't combine data file .coverage.1: Couldn't read intermediate file",
+            "Combined data file .coverage.2",
+            "Couldn't combine data file .coverage.3: Couldn't read intermediate file",
+            "Combined data file .coverage.4",
+            "Couldn't combine data file .coverage.5: Couldn't read intermediate file",
+        ]
+        assert sorted(glob.glob(".coverage.*")) == [".coverage.1", ".coverage.3", ".coverage.5"]
+
+    def test_combining_conflicting_file_tracers_in_one_batch(self) -> None:
+        covdata1 = DebugCoverageData(suffix="1")
+        covdata1.add_lines({"p1.html": [1, 2, 3]})
+        covdata1.add_file_tracers({"p1.html": "html.plugin"})
+        covdata1.write()
+
+        covdata2 = DebugCoverageData(suffix="2")
+        covdata2.add_lines({"p1.html": [1, 2, 3]})
+        covdata2.add_file_tracers({"p1.html": "html.other_plugin"})
+        covdata2.write()
+
+        covdata3 = DebugCoverageData()
+        msg = "Conflicting file tracer name for 'p1.html': 'html.plugin' vs 'html.other_plugin'"
+        with pytest.raises(DataError, match=msg):
+            combine_parallel_data(covdata3)
+        # Nothing was combined, so nothing was deleted.
+        self.assert_file_count(".coverage.*", 2)
+
+    def test_combining_lines_and_arcs_in_one_batch(self) -> None:
+        covdata1 = DebugCoverageData(suffix="1")
+        covdata1.add_lines(LINES_1)
+        covdata1.write()
+
+        covdata2 = DebugCoverageData(suffix="2")
+        covdata2.add_arcs(ARCS_3)
+        covdata2.write()
+
+        covdata3 = DebugCoverageData()
+        msg = "Can't combine branch coverage data with statement data"
+        with pytest.raises(DataError, match=msg):
+            combine_parallel_data(covdata3)
+        self.assert_file_count(".coverage.*", 2)
+
     def test_interleaved_erasing_bug716(self) -> None:
         # pytest-cov could produce this scenario. #716
         covdata1 = DebugCoverageData()
@@ -1053,3 +1476,28 @@ class NoDiskTest(CoverageTest):
         b = CoverageData(no_disk=True)
         b.update(a)
         assert b.measured_files() == {"foo.py"}
+
+    def test_updating_leaves_nothing_behind(self) -> None:
+        # The in-memory database stays open, so merging mustn't leave temp
+        # tables or attached databases that would break the next merge.
+        a = CoverageData(no_disk=True)
+        a.add_lines({"foo.py": [10, 20, 30]})
+        a.add_file_tracers({"foo.py": "foo.plugin"})
+        bad = CoverageData(no_disk=True)
+        bad.add_lines({"foo.py": [40]})
+        bad.add_file_tracers({"foo.py": "other.plugin"})
+        c = CoverageData(no_disk=True)
+        c.add_lines({"bar.py": [1]})
+
+        b = CoverageData(no_disk=True)
+        b.update(a)
+        with pytest.raises(DataError, match="Conflicting file tracer name"):
+            b.update(bad)
+        b.update(c)
+        assert b.measured_files() == {"foo.py", "bar.py"}
+        assert sorted_lines(b, "foo.py") == [10, 20, 30]
+        with b._connect() as con:
+            with con.execute("SELECT name FROM sqlite_temp_master") as cur:
+                assert list(cur) == []
+            with con.execute("PRAGMA database_list") as cur:
+                assert not [row[1] for row in cur if row[1].startswith("other_db")]
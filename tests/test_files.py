@@ -8,6 +8,7 @@ from __future__ import annotations
 import itertools
 import os
 import os.path
+import pickle
 import re
 
 from typing import Any, Protocol
@@ -426,6 +427,51 @@ class MatcherTest(CoverageTest):
         for modulename, matches in matches_to_try:
             assert mm.match(modulename) == matches, modulename
 
+    def test_tree_matcher_overload(self) -> None:
+        trees = [os.path.join(os.sep, "src", f"pkg{i:03d}") for i in range(500)]
+        trees.append(os.path.join(os.sep, "src", "pkg123", "sub"))
+        trees.append(os.path.join(os.sep, "lib", "one.py"))
+        tm = TreeMatcher(trees)
+        matches_to_try = [
+            ("/src/pkg007/a.py", True),
+            ("/src/pkg123/sub/b.py", True),
+            ("/src/pkg499", True),
+            ("/src/pkg500/a.py", False),
+            ("/src/pkg0071/a.py", False),
+            ("/src", False),
+            ("/lib/one.py", True),
+            ("/lib/one.pyc", False),
+            ("/lib/one.py/x", True),
+        ]
+        for fpath, matches in matches_to_try:
+            fpath = fpath.replace("/", os.sep)
+            assert tm.match(fpath) == matches, fpath
+
+    def test_tree_matcher_trailing_separator(self) -> None:
+        # A path ending with a separator only matches paths with an empty
+        # component after it, as startswith matching always did.
+        tm = TreeMatcher([os.sep.join(["", "src", ""])])
+        assert tm.match(os.sep.join(["", "src", ""]))
+        assert tm.match(os.sep.join(["", "src", "", "a.py"]))
+        assert not tm.match(os.sep.join(["", "src", "a.py"]))
+        assert not tm.match(os.sep.join(["", "src"]))
+
+    def test_module_matcher_overload(self) -> None:
+        modules = [f"pkg{i:03d}" for i in range(500)] + ["deep.er.pkg"]
+        mm = ModuleMatcher(modules)
+        matches_to_try = [
+            ("pkg007", True),
+            ("pkg007.sub.mod", True),
+            ("pkg0071", False),
+            ("pkg500", False),
+            ("deep.er.pkg.mod", True),
+            ("deep.er", False),
+            ("deep.er.pkgx", False),
+            ("", False),
+        ]
+        for modulename, matches in matches_to_try:
+            assert mm.match(modulename) == matches, modulename
+
     def test_glob_matcher(self) -> None:
         matches_to_try = [
             (self.make_file("sub/file1.py"), True),
@@ -717,6 +763,13 @@ class PathAliasesTest(CoverageTest):
         assert "~" not in the_file  # to be sure the test is pure.
         self.assert_mapped(aliases, the_file, "/the/source/a.py")
 
+    def test_pickling(self, rel_yn: bool) -> None:
+        # Parallel combining sends aliases to other processes, debugfn and all.
+        aliases = PathAliases(debugfn=lambda msg: None, relative=rel_yn)
+        aliases.add("/ned/home/*/src", "./mysrc")
+        aliases = pickle.loads(pickle.dumps(aliases))
+        self.assert_mapped(aliases, "/ned/home/foo/src/a.py", "./mysrc/a.py")
+
 
 class PathAliasesRealFilesTest(CoverageTest):
     """Tests for coverage/files.py:PathAliases using real files."""
@@ -5,6 +5,7 @@
 
 from __future__ import annotations
 
+import gc
 import os.path
 import re
 import sys
@@ -224,10 +225,8 @@ class MemoryLeakTest(CoverageTest):
             pytest.fail("RAM grew by %d" % (ram_growth))  # pragma: only failure
 
     @pytest.mark.skipif(
-        not testenv.C_TRACER,
-        reason="Only the C tracer has refcounting issues",
-        # In fact, sysmon explicitly holds onto all code objects,
-        # so this will definitely fail with sysmon.
+        not (testenv.C_TRACER or testenv.SYS_MON),
+        reason="Only the C tracer and sysmon hold onto code objects",
     )
     @pytest.mark.skipif(
         env.PYVERSION[:2] == (3, 13) and not env.GIL,
@@ -253,6 +252,22 @@ class MemoryLeakTest(CoverageTest):
             base = now
         assert any(d < 50 * 1024 for d in deltas)
 
+    @pytest.mark.skipif(not testenv.SYS_MON, reason="Only sysmon keeps info about code objects")
+    def test_sysmon_forgets_collected_code(self) -> None:
+        # Code made with exec is collected, and sysmon shouldn't keep its
+        # information forever.
+        cov = coverage.Coverage()
+        cov.start()
+        try:
+            for i in range(1000):
+                exec(compile(f"def f():\n    return {i}\nf()\n", "gen.py", "exec"), {})
+            gc.collect()
+            assert cov._collector is not None
+            n_code_infos = len(cov._collector.tracers[0].code_infos)  # type: ignore[attr-defined]
+        finally:
+            cov.stop()
+        assert n_code_infos < 100
+
 
 class MemoryFumblingTest(CoverageTest):
     """Test that we properly manage the None refcount."""
@@ -0,0 +1,135 @@
+# Licensed under the Apache License: http://www.apache.org/licenses/LICENSE-2.0
+# For details: https://github.com/coveragepy/coveragepy/blob/main/NOTICE.txt
+
+"""Tests for coverage/parsecache.py"""
+
+from __future__ import annotations
+
+import os
+import textwrap
+from unittest import mock
+
+import coverage
+from coverage.parsecache import ParseCache
+from coverage.parser import PythonParser
+
+from tests.coveragetest import CoverageTest
+
+
+SOURCE = textwrap.dedent("""\
+    def func(a):
+        if a:
+            x = (
+                1
+            )
+        else:  # nocover
+            x = 2
+        return x
+
+    with open(__file__) as f:
+        func(f)
+    """)
+
+
+class ParseCacheTest(CoverageTest):
+    """Tests of ParseCache."""
+
+    def parse(self, cache: ParseCache, exclude: str = "nocover") -> PythonParser:
+        """Parse SOURCE with `cache`, and return the `PythonParser` used."""
+        parser = PythonParser(text=SOURCE, exclude=exclude, cache=cache)
+        parser.parse_source()
+        return parser
+
+    def test_statements_come_from_cache(self) -> None:
+        cache = ParseCache("the_cache")
+        parser1 = self.parse(cache)
+        assert len(os.listdir("the_cache")) == 1
+
+        with mock.patch("coverage.parser.ast.parse") as mock_parse:
+            parser2 = self.parse(cache)
+        mock_parse.assert_not_called()
+        assert parser2.statements == parser1.statements
+        assert parser2.excluded == parser1.excluded
+        assert parser2.multiline_map == parser1.multiline_map
+        assert parser2.translate_lines([4]) == {3}
+
+    def test_arcs_come_from_cache(self) -> None:
+        cache = ParseCache("the_cache")
+        parser1 = self.parse(cache)
+        arcs = parser1.arcs()
+        exit_counts = parser1.exit_counts()
+        desc = parser1.missing_arc_description(2, 3)
+
+        with mock.patch("coverage.parser.AstArcAnalyzer") as mock_aaa:
+            parser2 = self.parse(cache)
+            assert parser2.arcs() == arcs
+            assert parser2.exit_counts() == exit_counts
+            assert parser2.missing_arc_description(2, 3) == desc
+            assert parser2.translate_arcs([(11, 10)]) == parser1.translate_arcs([(11, 10)])
+        mock_aaa.assert_not_called()
+
+    def test_arcs_added_to_cached_statements(self) -> None:
+        cache = ParseCache("the_cache")
+        self.parse(cache)
+        # The second parse uses the cache for statements, then computes arcs,
+        # which are added to the cache entry.
+        arcs = self.parse(cache).arcs()
+        with mock.patch("coverage.parser.AstArcAnalyzer") as mock_aaa:
+            assert self.parse(cache).arcs() == arcs
+        mock_aaa.assert_not_called()
+
+    def test_exclusion_is_part_of_the_key(self) -> None:
+        cache = ParseCache("the_cache")
+        parser1 = self.parse(cache)
+        parser2 = self.parse(cache, exclude="if a")
+        assert parser1.excluded != parser2.excluded
+        assert len(os.listdir("the_cache")) == 2
+
+    def test_unwritable_cache(self) -> None:
+        self.make_file("the_cache", "This is a file, not a directory")
+        cache = ParseCache("the_cache")
+        parser = self.parse(cache)
+        assert parser.statements == {1, 2, 3, 8, 10, 11}
+
+
+class ParseCacheReportTest(CoverageTest):
+    """Tests of using the parse cache during reporting."""
+
+    def test_report_with_parse_cache(self) -> None:
+        self.make_file("mycode.py", SOURCE)
+        self.make_file(
+            ".coveragerc",
+            """\
+            [run]
+            branch = True
+            [report]
+            parse_cache = True
+            """,
+        )
+        cov = coverage.Coverage()
+        self.start_import_stop(cov, "mycode")
+        report1 = self.get_report(cov, show_missing=True)
+        assert len(os.listdir(".coverage-parse-cache")) == 1
+
+        cov = coverage.Coverage()
+        cov.load()
+        with mock.patch("coverage.parser.AstArcAnalyzer") as mock_aaa:
+            report2 = self.get_report(cov, show_missing=True)
+        mock_aaa.assert_not_called()
+        assert report1 == report2
+
+    def test_parse_cache_dir(self) -> None:
+        self.make_file("mycode.py", SOURCE)
+        self.make_file(
+            ".coveragerc",
+            """\
+            [report]
+            parse_cache = True
+            parse_cache_dir = elsewhere/cache
+            """,
+        )
+        cov = coverage.Coverage()
+        self.start_import_stop(cov, "mycode")
+        self.get_report(cov)
+        assert len(os.listdir("elsewhere/cache")) == 1
+        self.assert_doesnt_exist(".coverage-parse-cache")
@@ -1113,7 +1113,6 @@ class ConfigurerPluginTest(CoverageTest):
         assert "pragma: or whatever" in excluded
 
 
-@pytest.mark.skipif(not testenv.DYN_CONTEXTS, reason="No dynamic contexts with this core")
 class DynamicContextPluginTest(CoverageTest):
     """Tests of plugins that implement `dynamic_context`."""
 
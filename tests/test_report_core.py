@@ -7,12 +7,16 @@ from __future__ import annotations
 
 from typing import IO
 from collections.abc import Iterable
+from unittest import mock
 
 import pytest
 
-from coverage.exceptions import CoverageException
-from coverage.report_core import render_report
-from coverage.types import TMorf
+import coverage
+from coverage.exceptions import CoverageException, NotPython
+from coverage.parser import PythonParser
+from coverage.python import PythonFileReporter
+from coverage.report_core import get_analysis_to_report, parse_in_parallel, render_report
+from coverage.types import TArc, TMorf
 
 from tests.coveragetest import CoverageTest
 
@@ -67,3 +71,103 @@ class RenderReportTest(CoverageTest):
         assert self.stdout() == ""
         self.assert_doesnt_exist("output.txt")
         assert not msgs
+
+
+class ParallelAnalysisTest(CoverageTest):
+    """Tests of get_analysis_to_report with more than one job."""
+
+    def make_files(self) -> None:
+        """Make a few files to measure."""
+        for i in range(5):
+            self.make_file(
+                f"mod{i}.py",
+                f"""\
+                def f(x):
+                    if x:
+                        return {i}
+                    return -{i}
+                f(1)
+                """,
+            )
+        self.make_file("main.py", "".join(f"import mod{i}\n" for i in range(5)))
+
+    def analyses(
+        self, cov: coverage.Coverage
+    ) -> list[tuple[str, list[int], list[tuple[int, int]]]]:
+        """Get a summary of the analyses of the measured files."""
+        cov.get_data()
+        return [
+            (fr.relative_filename(), sorted(a.missing), a.arcs_missing())
+            for fr, a in get_analysis_to_report(cov, None)
+        ]
+
+    def test_parallel_matches_serial(self) -> None:
+        self.make_files()
+        cov = coverage.Coverage(branch=True)
+        self.start_import_stop(cov, "main")
+        serial = self.analyses(cov)
+        cov.set_option("report:jobs", 3)
+        assert self.analyses(cov) == serial
+
+    def test_parse_in_parallel(self) -> None:
+        self.make_files()
+        cov = coverage.Coverage(branch=True)
+        self.start_import_stop(cov, "main")
+        cov.get_data()
+        frs = [fr for fr, _ in cov._get_file_reporters()]
+        parse_in_parallel(cov, frs, jobs=2)
+        for fr in frs:
+            assert isinstance(fr, PythonFileReporter)
+            assert fr._parser is not None
+            parser = PythonParser(filename=fr.filename, exclude=cov._exclude_regex("exclude"))
+            parser.parse_source()
+            assert fr._parser.statements == parser.statements
+            assert fr._parser.arcs() == parser.arcs()
+
+    def test_parallel_report(self) -> None:
+        self.make_files()
+        cov = coverage.Coverage(branch=True)
+        self.start_import_stop(cov, "main")
+        serial = self.get_report(cov, squeeze=False, show_missing=True)
+        cov.set_option("report:jobs", 2)
+        assert self.get_report(cov, squeeze=False, show_missing=True) == serial
+
+    def test_parallel_errors(self) -> None:
+        self.make_files()
+        cov = coverage.Coverage()
+        self.start_import_stop(cov, "main")
+        self.make_file("mod3.py", "This isn't python!")
+        cov.set_option("report:jobs", 2)
+        with pytest.raises(NotPython, match="Couldn't parse '.*mod3.py' as Python"):
+            self.analyses(cov)
+
+
+class BulkDataTest(CoverageTest):
+    """Tests of get_analysis_to_report reading the data for all files at once."""
+
+    @pytest.mark.parametrize("branch", [False, True])
+    def test_no_queries_for_each_file(self, branch: bool) -> None:
+        self.make_file("mod1.py", "a = 1\nif a:\n    b = 3\n")
+        self.make_file("mod2.py", "def f():\n    return 2\nc = 3\n")
+        self.make_file("unrun.py", "d = 1\n")
+        self.make_file("main.py", "import mod1, mod2\n")
+        cov = coverage.Coverage(branch=branch, source=["."])
+        self.start_import_stop(cov, "main")
+
+        def summary(morfs: Iterable[TMorf] | None) -> list[tuple[str, set[int], set[TArc]]]:
+            return [
+                (fr.relative_filename(), a.executed, a.arcs_executed_set)
+                for fr, a in get_analysis_to_report(cov, morfs)
+            ]
+
+        # With morfs, each file's data is read on its own.
+        expected = summary(["main.py", "mod1.py", "mod2.py", "unrun.py"])
+        assert expected[1][1] == {1, 2, 3}
+        assert expected[3][1] == set()
+        # Without morfs, all files are reported, so their data is read at once.
+        data = cov.get_data()
+        with (
+            mock.patch.object(data, "lines", side_effect=AssertionError),
+            mock.patch.object(data, "arcs", side_effect=AssertionError),
+        ):
+            assert summary(None) == expected
@@ -0,0 +1,180 @@
+# Licensed under the Apache License: http://www.apache.org/licenses/LICENSE-2.0
+# For details: https://github.com/coveragepy/coveragepy/blob/main/NOTICE.txt
+
+"""Tests for coverage/selecttests.py and `coverage select-tests`."""
+
+from __future__ import annotations
+
+import io
+import textwrap
+
+from unittest import mock
+
+import pytest
+
+import coverage
+from coverage.selecttests import parse_line_spec, parse_unified_diff
+from coverage.types import TLineNo
+
+from tests.coveragetest import CoverageTest, OK, ERR, command_line
+
+
+GIT_DIFF = """\
+diff --git a/mod.py b/mod.py
+index 1234567..89abcde 100644
+--- a/mod.py
++++ b/mod.py
+@@ -2,6 +2,7 @@ def helper(x):
+     if x > 1:
+-        return 3
++        return 2 + 1
+     return 4
++# comment
+
+ def test_one():
+     assert helper(1) == 4
+@@ -20,4 +21,2 @@ def other():
+     a = 20
+-    b = 21
+-- c = 22
+     d = 23
+diff --git a/new.py b/new.py
+new file mode 100644
+--- /dev/null
++++ b/new.py
+@@ -0,0 +1,2 @@
++a = 1
++b = 2
+diff --git a/gone.py b/gone.py
+deleted file mode 100644
+--- a/gone.py
++++ /dev/null
+@@ -1,2 +0,0 @@
+-a = 1
+-b = 2
+"""
+
+
+class ParseTest(CoverageTest):
+    """Tests of the parsing functions."""
+
+    run_in_temp_dir = False
+
+    def test_parse_git_diff(self) -> None:
+        changes = parse_unified_diff(GIT_DIFF.splitlines(keepends=True))
+        assert changes == {
+            "mod.py": {3, 4, 5, 21, 22},
+            "gone.py": {1, 2},
+        }
+
+    def test_parse_plain_diff(self) -> None:
+        diff = textwrap.dedent("""\
+            --- old/mod.py\t2025-01-01 12:00:00
+            +++ new/mod.py\t2025-01-02 12:00:00
+            @@ -1 +1 @@
+            -a = 1
+            +a = 2
+            """)
+        assert parse_unified_diff(diff.splitlines()) == {"old/mod.py": {1}}
+
+    @pytest.mark.parametrize(
+        "spec, expected",
+        [
+            ("mod.py", ("mod.py", None)),
+            ("mod.py:17", ("mod.py", {17})),
+            ("src/mod.py:3-5,10", ("src/mod.py", {3, 4, 5, 10})),
+            ("odd:name.py", ("odd:name.py", None)),
+        ],
+    )
+    def test_parse_line_spec(self, spec: str, expected: tuple[str, set[TLineNo] | None]) -> None:
+        assert parse_line_spec(spec) == expected
+
+    @pytest.mark.parametrize("spec", ["mod.py:3-,5", "mod.py:1,,2", "mod.py:5-3"])
+    def test_bad_line_spec(self, spec: str) -> None:
+        with pytest.raises(ValueError, match=f"Couldn't understand line numbers in '{spec}'"):
+            parse_line_spec(spec)
+
+
+class SelectTestsCommandTest(CoverageTest):
+    """Tests of `coverage select-tests`."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.make_file(
+            "mod.py",
+            """\
+            def helper(x):
+                if x > 1:
+                    return 3
+                return 4
+
+            def test_one():
+                assert helper(1) == 4
+
+            def test_two():
+                assert helper(2) == 3
+
+            def test_three():
+                pass
+
+            test_one()
+            test_two()
+            test_three()
+            """,
+        )
+
+    def measure(self, **options: bool) -> None:
+        """Measure mod.py with test function contexts, and save the data."""
+        cov = coverage.Coverage(source=["."])
+        cov.set_option("run:dynamic_context", "test_function")
+        for name, value in options.items():
+            cov.set_option(f"run:{name}", value)
+        self.start_import_stop(cov, "mod")
+        cov.save()
+
+    @pytest.mark.parametrize("index", [False, True])
+    @pytest.mark.parametrize("branch", [False, True])
+    def test_select_lines(self, index: bool, branch: bool) -> None:
+        self.measure(index_line_contexts=index, branch=branch)
+        assert command_line("select-tests mod.py:3") == OK
+        assert self.stdout() == "mod.test_two\n"
+        assert command_line("select-tests mod.py:1-2,13") == OK
+        assert self.stdout() == "mod.test_one\nmod.test_three\nmod.test_two\n"
+        assert command_line("select-tests mod.py:7 mod.py:3") == OK
+        assert self.stdout() == "mod.test_one\nmod.test_two\n"
+        assert command_line("select-tests mod.py") == OK
+        assert self.stdout() == "mod.test_one\nmod.test_three\nmod.test_two\n"
+        assert command_line("select-tests mod.py:5-6 other.py:1") == OK
+        assert self.stdout() == ""
+
+    def test_select_contexts(self) -> None:
+        self.measure()
+        assert command_line("select-tests --contexts=two,three mod.py:2,13") == OK
+        assert self.stdout() == "mod.test_three\nmod.test_two\n"
+
+    def test_select_from_diff(self) -> None:
+        self.measure()
+        self.make_file(
+            "change.diff",
+            """\
+            diff --git a/mod.py b/mod.py
+            --- a/mod.py
+            +++ b/mod.py
+            @@ -3,2 +3,2 @@ def helper(x):
+            -        return 3
+            +        return 2 + 1
+                     return 4
+            """,
+        )
+        assert command_line("select-tests --changed=change.diff") == OK
+        assert self.stdout() == "mod.test_two\n"
+        with mock.patch("sys.stdin", io.StringIO(GIT_DIFF)):
+            assert command_line("select-tests --changed=- mod.py:13") == OK
+        assert self.stdout() == "mod.test_one\nmod.test_three\nmod.test_two\n"
+
+    def test_errors(self) -> None:
+        self.measure()
+        assert command_line("select-tests") == ERR
+        assert "Nothing to do" in self.stderr()
+        assert command_line("select-tests mod.py:1-") == ERR
+        assert "Couldn't understand line numbers in 'mod.py:1-'" in self.stderr()
@@ -0,0 +1,175 @@
+# Licensed under the Apache License: http://www.apache.org/licenses/LICENSE-2.0
+# For details: https://github.com/coveragepy/coveragepy/blob/main/NOTICE.txt
+
+"""Tests for coverage/sysmon.py"""
+
+from __future__ import annotations
+
+import os
+from types import CodeType
+from unittest import mock
+
+import pytest
+
+from coverage import env
+from coverage.bytecode import always_jumps, branch_trails
+from coverage.core import CTRACER_FILE
+from coverage.sysmon import (
+    BranchTrailCache,
+    CodeInfo,
+    SysMonitor,
+    bytes_to_lines,
+    get_branch_trail_cache,
+)
+
+from tests.coveragetest import CoverageTest
+
+
+SOURCE = """\
+def f(x):
+    if x:
+        return 1
+    return (
+        2
+    )
+"""
+
+
+@pytest.mark.skipif(env.PYVERSION < (3, 13), reason="Branch trails need 3.13+ dis")
+class BranchTrailCacheTest(CoverageTest):
+    """Tests of BranchTrailCache."""
+
+    def make_code(self) -> CodeType:
+        """Compile SOURCE in a file, and return the code object for f."""
+        filename = os.path.abspath(self.make_file("branchy.py", SOURCE))
+        code = compile(SOURCE, filename, "exec")
+        f_code = code.co_consts[0]
+        assert isinstance(f_code, CodeType)
+        return f_code
+
+    def test_identical_code_shares_trails(self) -> None:
+        cache = BranchTrailCache(max_size=1_000_000)
+        code1 = self.make_code()
+        trails, jumps = cache.get(code1)
+        assert trails == branch_trails(code1, multiline_map={4: 4, 5: 4, 6: 4})
+        assert jumps == always_jumps(code1)
+
+        code2 = self.make_code()
+        assert code2 is not code1
+        with mock.patch("coverage.sysmon.branch_trails") as mock_branch_trails:
+            trails2, jumps2 = cache.get(code2)
+        mock_branch_trails.assert_not_called()
+        assert trails2 is trails
+        assert jumps2 is jumps
+
+    def test_size_is_bounded(self) -> None:
+        cache = BranchTrailCache(max_size=1)
+        for i in range(5):
+            filename = os.path.abspath(self.make_file(f"branchy{i}.py", SOURCE))
+            cache.get(compile(SOURCE, filename, "exec").co_consts[0])
+        # The most recent entry is always kept.
+        assert len(cache.entries) == 1
+        assert list(cache.entries)[0][0].endswith("branchy4.py")
+
+    def test_entries_are_saved_on_disk(self) -> None:
+        cache1 = BranchTrailCache(max_size=1_000_000, directory="the_cache")
+        trails, jumps = cache1.get(self.make_code())
+        cache1.save()
+        assert len(os.listdir("the_cache")) == 1
+
+        cache2 = BranchTrailCache(max_size=1_000_000, directory="the_cache")
+        with mock.patch("coverage.sysmon.branch_trails") as mock_branch_trails:
+            trails2, jumps2 = cache2.get(self.make_code())
+        mock_branch_trails.assert_not_called()
+        assert trails2 == trails
+        assert jumps2 == jumps
+
+    def test_disk_entries_are_bounded(self) -> None:
+        cache = BranchTrailCache(max_size=1, directory="the_cache")
+        for i in range(5):
+            filename = os.path.abspath(self.make_file(f"branchy{i}.py", SOURCE))
+            cache.get(compile(SOURCE, filename, "exec").co_consts[0])
+            # Over the size limit, entries are written right away, and not
+            # kept for writing later.
+            assert not cache.disk_caches
+        assert len(os.listdir("the_cache")) == 5
+
+    def test_caches_are_per_directory(self) -> None:
+        cache = get_branch_trail_cache("dir1")
+        assert get_branch_trail_cache("dir1") is cache
+        assert get_branch_trail_cache("dir2") is not cache
+        assert get_branch_trail_cache(None) is not cache
+        assert cache.directory == "dir1"
+
+
+@pytest.mark.skipif(not CTRACER_FILE, reason="Only the C extension has CSysMonCallbacks")
+class CSysMonCallbacksTest(CoverageTest):
+    """Tests that the C callbacks record the same data as the Python callbacks."""
+
+    def make_monitors(self) -> tuple[CodeType, SysMonitor, SysMonitor]:
+        """Make a code object, and a Python and a C SysMonitor that know about it."""
+        import coverage.tracer
+
+        filename = os.path.abspath(self.make_file("branchy.py", SOURCE))
+        code = compile(SOURCE, filename, "exec").co_consts[0]
+        assert isinstance(code, CodeType)
+        py_mon = SysMonitor(tool_id=1)
+        c_mon = SysMonitor(tool_id=1, callbacks_class=coverage.tracer.CSysMonCallbacks)
+        assert py_mon.c_callbacks is None
+        assert c_mon.c_callbacks is not None
+        for mon in [py_mon, c_mon]:
+            mon.code_infos[id(code)] = CodeInfo(
+                tracing=True,
+                file_data=set(),
+                byte_to_line=bytes_to_lines(code),
+                branch_trails={},
+                always_jumps={},
+            )
+        return code, py_mon, c_mon
+
+    def file_data(self, mon: SysMonitor, code: CodeType) -> set[object]:
+        """Get the data recorded by `mon` for `code`."""
+        file_data = mon.code_infos[id(code)].file_data
+        assert file_data is not None
+        return file_data  # type: ignore[return-value]
+
+    def test_lines_and_returns(self) -> None:
+        code, py_mon, c_mon = self.make_monitors()
+        c_callbacks = c_mon.c_callbacks
+        for line in [2, 3, 4]:
+            assert c_callbacks.line_lines(code, line) is py_mon.sysmon_line_lines(code, line)
+            assert c_callbacks.line_arcs(code, line) is py_mon.sysmon_line_arcs(code, line)
+        for offset in bytes_to_lines(code):
+            retval = c_callbacks.py_return(code, offset, None)
+            assert retval is py_mon.sysmon_py_return(code, offset, None)
+        assert self.file_data(c_mon, code) == self.file_data(py_mon, code)
+        assert (4, -1) in self.file_data(c_mon, code)
+        assert c_mon.activity() and py_mon.activity()
+
+    def test_unknown_code(self) -> None:
+        code, py_mon, c_mon = self.make_monitors()
+        other_code = compile("a = 1", "other.py", "exec")
+        retval = c_mon.c_callbacks.line_lines(other_code, 1)
+        assert retval is py_mon.sysmon_line_lines(other_code, 1)
+        assert self.file_data(c_mon, code) == set()
+        # Events for code from an earlier monitor don't count as activity, or
+        # a stopped measurement would keep flushing data.
+        assert not c_mon.activity()
+        assert not py_mon.activity()
+
+    def test_wrong_arguments(self) -> None:
+        code, _, c_mon = self.make_monitors()
+        with pytest.raises(TypeError, match=r"line_lines\(\) takes 2 arguments \(1 given\)"):
+            c_mon.c_callbacks.line_lines(code)
+
+    @pytest.mark.skipif(env.PYVERSION < (3, 13), reason="Branch trails need 3.13+ dis")
+    def test_branches(self) -> None:
+        code, py_mon, c_mon = self.make_monitors()
+        offsets = sorted(bytes_to_lines(code))
+        for from_offset in offsets:
+            for to_offset in offsets:
+                args = (code, from_offset, to_offset)
+                assert c_mon.c_callbacks.branch_either(*args) is py_mon.sysmon_branch_either(*args)
+        assert c_mon.code_infos[id(code)].branch_trails
+        assert self.file_data(c_mon, code) == self.file_data(py_mon, code)
+        assert {(2, 3), (2, 4)} <= self.file_data(c_mon, code)
@@ -0,0 +1,158 @@
+# Licensed under the Apache License: http://www.apache.org/licenses/LICENSE-2.0
+# For details: https://github.com/coveragepy/coveragepy/blob/main/NOTICE.txt
+
+"""Tests for coverage/tracecache.py"""
+
+from __future__ import annotations
+
+import json
+import os
+from unittest import mock
+
+import coverage
+from coverage.inorout import InOrOut
+from coverage.tracecache import TraceCache
+
+from tests.coveragetest import CoverageTest
+
+
+class TraceCacheTest(CoverageTest):
+    """Tests of TraceCache."""
+
+    def test_entries_are_saved(self) -> None:
+        cache = TraceCache("the_cache", "key")
+        assert cache.get("/a.py") is None
+        cache.add("/a.py", [True, "/a.py", "", None])
+        assert cache.get("/a.py") == [True, "/a.py", "", None]
+        cache.save()
+        assert os.listdir("the_cache") == ["key.json"]
+
+        cache = TraceCache("the_cache", "key")
+        assert cache.get("/a.py") == [True, "/a.py", "", None]
+        assert cache.get("/b.py") is None
+
+    def test_saves_are_merged(self) -> None:
+        cache1 = TraceCache("the_cache", "key")
+        cache2 = TraceCache("the_cache", "key")
+        cache1.add("/a.py", [True, "/a.py", "", None])
+        cache2.add("/b.py", [False, "/b.py", "is in the stdlib", None])
+        cache1.save()
+        cache2.save()
+        cache = TraceCache("the_cache", "key")
+        assert cache.get("/a.py") == [True, "/a.py", "", None]
+        assert cache.get("/b.py") == [False, "/b.py", "is in the stdlib", None]
+
+    def test_bad_cache_file(self) -> None:
+        self.make_file("the_cache/key.json", "[this isn't json")
+        cache = TraceCache("the_cache", "key")
+        assert cache.get("/a.py") is None
+        cache.add("/a.py", [True, "/a.py", "", None])
+        cache.save()
+        with open("the_cache/key.json", encoding="utf-8") as f:
+            assert json.load(f) == {"/a.py": [True, "/a.py", "", None]}
+
+    def test_unwritable_cache(self) -> None:
+        self.make_file("the_cache", "This is a file, not a directory")
+        cache = TraceCache("the_cache", "key")
+        cache.add("/a.py", [True, "/a.py", "", None])
+        cache.save()
+        assert cache.get("/a.py") == [True, "/a.py", "", None]
+
+
+class TraceCacheRunTest(CoverageTest):
+    """Tests of using the trace cache while measuring."""
+
+    def run_with_cache(self, modname: str) -> coverage.Coverage:
+        """Measure importing `modname`, and return the Coverage object."""
+        cov = coverage.Coverage()
+        self.start_import_stop(cov, modname)
+        return cov
+
+    def test_decisions_come_from_cache(self) -> None:
+        self.make_file("mycode.py", "import othercode\na = 2\n")
+        self.make_file("othercode.py", "b = 1\n")
+        self.make_file(
+            ".coveragerc",
+            """\
+            [run]
+            trace_cache = True
+            omit = othercode.py
+            """,
+        )
+        cov = self.run_with_cache("mycode")
+        assert len(os.listdir(".coverage-trace-cache")) == 1
+        data1 = cov.get_data()
+        measured = {os.path.basename(f) for f in data1.measured_files()}
+        assert measured == {"mycode.py"}
+
+        self.clean_local_file_imports()
+        with mock.patch.object(
+            InOrOut,
+            "check_include_omit_etc",
+            autospec=True,
+            side_effect=InOrOut.check_include_omit_etc,
+        ) as check:
+            cov = self.run_with_cache("mycode")
+        checked = {os.path.basename(c.args[1]) for c in check.call_args_list}
+        assert not checked & {"mycode.py", "othercode.py"}
+        data2 = cov.get_data()
+        assert data2.measured_files() == data1.measured_files()
+        for fname in data1.measured_files():
+            assert data2.lines(fname) == data1.lines(fname)
+
+    def test_settings_are_part_of_the_key(self) -> None:
+        self.make_file("mycode.py", "a = 1\n")
+        self.make_file(
+            ".coveragerc",
+            """\
+            [run]
+            trace_cache = True
+            """,
+        )
+        self.run_with_cache("mycode")
+        self.make_file(
+            ".coveragerc",
+            """\
+            [run]
+            trace_cache = True
+            omit = mycode.py
+            """,
+        )
+        self.clean_local_file_imports()
+        cov = self.run_with_cache("mycode")
+        assert len(os.listdir(".coverage-trace-cache")) == 2
+        assert not cov.get_data().measured_files()
+
+    def test_unimported_source_pkgs(self) -> None:
+        # A source package decided through the cache was still imported.
+        self.make_file("mymod.py", "a = 1\n")
+        self.make_file(
+            ".coveragerc",
+            """\
+            [run]
+            trace_cache = True
+            source_pkgs = mymod
+            """,
+        )
+        self.run_with_cache("mymod")
+        self.clean_local_file_imports()
+        cov = self.run_with_cache("mymod")
+        assert cov._inorout is not None
+        assert cov._inorout.source_pkgs_unmatched == []
+        data = cov.get_data()
+        measured = {os.path.basename(f) for f in data.measured_files()}
+        assert measured == {"mymod.py"}
+
+    def test_trace_cache_dir(self) -> None:
+        self.make_file("mycode.py", "a = 1\n")
+        self.make_file(
+            ".coveragerc",
+            """\
+            [run]
+            trace_cache = True
+            trace_cache_dir = elsewhere/cache
+            """,
+        )
+        self.run_with_cache("mycode")
+        assert len(os.listdir("elsewhere/cache")) == 1
+        self.assert_doesnt_exist(".coverage-trace-cache")
@@ -32,9 +32,6 @@ SETTRACE_CORE = C_TRACER or PY_TRACER
 # Are plugins supported during these tests?
 PLUGINS = C_TRACER
 
-# Are dynamic contexts supported during these tests?
-DYN_CONTEXTS = C_TRACER or PY_TRACER
-
 # Can we measure threads?
 CAN_MEASURE_THREADS = not SYS_MON
 
@@ -0,0 +1,15 @@
+import time, random, os, sys
+from coverage.sqldata import CoverageData
+import coverage.sqldata
+if len(sys.argv) > 1: coverage.sqldata.HAS_UPSERT = False
+r = random.Random(1)
+if os.path.exists("tmp/combench/f.cov"): os.remove("tmp/combench/f.cov")
+cd = CoverageData("tmp/combench/f.cov")
+files = [f"/src/m{j}.py" for j in range(200)]
+flushes = [[{f: set(r.sample(range(1, 300), 30)) for f in r.sample(files, 40)} for _ in range(3)] for ctx in range(300)]
+t = time.perf_counter()
+for ctx, fl in enumerate(flushes):
+    cd.set_context(f"test_{ctx}")
+    for data in fl:
+        cd.add_lines(data)
+print(time.perf_counter() - t)
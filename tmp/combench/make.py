@@ -0,0 +1,9 @@
+import os, random, sys, shutil
+from coverage.data import CoverageData
+d=sys.argv[1]; n=int(sys.argv[2])
+shutil.rmtree(d, ignore_errors=True); os.makedirs(d)
+r=random.Random(1)
+for i in range(n):
+    cd=CoverageData(os.path.join(d,".coverage"), suffix=str(i))
+    cd.add_lines({f"/src/m{j}.py": set(r.sample(range(1,500),100)) for j in range(100)})
+    cd.write()
@@ -0,0 +1,6 @@
+import sys,time,os
+from coverage.data import CoverageData, combine_parallel_data
+d=sys.argv[1]
+cd=CoverageData(os.path.join(d,".coverage"))
+t=time.perf_counter(); combine_parallel_data(cd, keep=True); print(time.perf_counter()-t)
+os.remove(os.path.join(d,".coverage"))
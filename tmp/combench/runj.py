@@ -0,0 +1,7 @@
+import sys,time,os
+from coverage.data import CoverageData, combine_parallel_data
+d=sys.argv[1]
+for jobs in [1, 4]:
+    cd=CoverageData(os.path.join(d,".coverage"))
+    t=time.perf_counter(); combine_parallel_data(cd, keep=True, jobs=jobs); print(jobs, time.perf_counter()-t)
+    os.remove(os.path.join(d,".coverage"))